@@ -91,7 +91,7 @@ from stdm.utils.logging_handlers import(
 )
 
 
-def load_table_layers(config_collection)->List['QgsVectorLayer']:
+def load_table_layers(config_collection, layer_cache=None)->List['QgsVectorLayer']:
     """
     In order to be able to use attribute tables in the composition, the
     corresponding vector layers need to be added to the layer
@@ -101,18 +101,23 @@ def load_table_layers(config_collection)->List['QgsVectorLayer']:
     :param config_collection: Table configuration collection built from
     the template file.
     :type config_collection: TableConfigurationCollection
+    :param layer_cache: Cache of the layers shared by the documents of a
+    generation run. If None, new layers are created.
+    :type layer_cache: TableLayerCache
     :returns: Valid layers that have been successfully added to the
     registry.
     :rtype: list
     """
-    #table_configs = list(config_collection.items()).values()
-    table_configs = config_collection.items()
+    table_names = [
+        conf.linked_table() for conf in config_collection.items().values()
+    ]
 
-    v_layers = []
+    if layer_cache is not None:
+        return layer_cache.layers(table_names)
 
-    for key, conf in table_configs.items():
-        layer_name = conf.linked_table()
+    v_layers = []
 
+    for layer_name in table_names:
         v_layer = vector_layer(layer_name)
 
         if v_layer is None:
@@ -123,12 +128,101 @@ def load_table_layers(config_collection)->List['QgsVectorLayer']:
 
         v_layers.append(v_layer)
 
-    #QgsProject.instance().addMapLayers(v_layers, False)
     QgsProject.instance().addMapLayers(v_layers, True)
 
     return v_layers
 
 
+class TableLayerCache(object):
+    """
+    Vector layers of the tables linked to the table items of the document
+    templates, created once and shared by all the documents of a generation
+    run. The rows shown for each record are selected by the feature filter
+    of the table items, which the data provider runs in the database, so
+    the layers are never modified. The layers are removed from the project
+    by clear().
+    """
+
+    def __init__(self, layer_factory=None, project=None):
+        """
+        :param layer_factory: Callable that creates the layer of a table
+        from its name, pg_utils.vector_layer if None.
+        :type layer_factory: callable
+        :param project: Project that the layers are added to, the current
+        project if None.
+        :type project: QgsProject
+        """
+        self._layer_factory = layer_factory or vector_layer
+        self._project = project or QgsProject.instance()
+        self._layers = {}
+        self._layer_ids = {}
+
+    def __len__(self):
+        return len(self._layers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.clear()
+
+    def layer(self, table_name):
+        """
+        :param table_name: Name of the linked table.
+        :type table_name: str
+        :return: Layer of the table, created and added to the project the
+        first time it is requested. None if the layer is not valid.
+        :rtype: QgsVectorLayer
+        """
+        if table_name in self._layers:
+            layer_id = self._layer_ids.get(table_name, None)
+            # Unless removed from the project in the meantime
+            if layer_id is None or \
+                    self._project.mapLayer(layer_id) is not None:
+                return self._layers[table_name]
+
+        v_layer = self._layer_factory(table_name)
+        if v_layer is None or not v_layer.isValid():
+            # Not retried for the remaining documents
+            self._layers[table_name] = None
+            return None
+
+        self._project.addMapLayer(v_layer, True)
+        self._layers[table_name] = v_layer
+        self._layer_ids[table_name] = v_layer.id()
+
+        return v_layer
+
+    def layers(self, table_names):
+        """
+        :param table_names: Names of the linked tables.
+        :type table_names: list
+        :return: Valid layers of the tables.
+        :rtype: list
+        """
+        v_layers = []
+        for name in table_names:
+            v_layer = self.layer(name)
+            if v_layer is not None and v_layer not in v_layers:
+                v_layers.append(v_layer)
+
+        return v_layers
+
+    def clear(self):
+        """
+        Removes the layers from the project, which deletes them.
+        """
+        layer_ids = [
+            l_id for l_id in self._layer_ids.values()
+            if self._project.mapLayer(l_id) is not None
+        ]
+        self._layers = {}
+        self._layer_ids = {}
+
+        if len(layer_ids) > 0:
+            self._project.removeMapLayers(layer_ids)
+
+
 class ComposerWrapper(QObject):
     """
     Embeds custom STDM tools in a QgsComposer instance for managing map-based
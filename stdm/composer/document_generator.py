@@ -16,9 +16,12 @@ email                : gkahiu@gmail.com
  *                                                                         *
  ***************************************************************************/
 """
+import hashlib
 import logging
+import os
 import uuid
 from datetime import date, datetime
+from itertools import groupby
 from numbers import Number
 from enum import Enum
 
@@ -62,6 +65,11 @@ from qgis.gui import(
     QgsHighlight,
 )
 
+from sqlalchemy import (
+    and_,
+    bindparam,
+    select
+)
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.schema import (
     Table,
@@ -71,7 +79,10 @@ from sqlalchemy.sql.expression import text
 
 from stdm.composer.chart_configuration import ChartConfigurationCollection
 from stdm.composer.composer_data_source import ComposerDataSource
-from stdm.composer.composer_wrapper import load_table_layers
+from stdm.composer.composer_wrapper import (
+    load_table_layers,
+    TableLayerCache
+)
 from stdm.composer.photo_configuration import PhotoConfigurationCollection
 from stdm.composer.qr_code_configuration import QRCodeConfigurationCollection
 from stdm.composer.spatial_fields_config import SpatialFieldsConfiguration
@@ -109,6 +120,12 @@ from stdm.utils.logging_handlers import (
     EventLogger
 )
 
+# Number of data source records queried at a time in batch mode
+DOCUMENT_BATCH_SIZE = 500
+
+# Directory for the ids of the records processed in batch mode
+DOCUMENT_CHECKPOINT_DIR = QDir.home().path() + '/.stdm/document_checkpoints'
+
 class LayoutExportResult(Enum):
     Success = 0
     Canceled = 1
@@ -118,6 +135,226 @@ class LayoutExportResult(Enum):
     SvgLayerError = 5
     IteratorError = 6
 
+class DocumentBatchCheckpoint:
+    """
+    Records the ids of the records whose documents have been generated in
+    batch mode so that an interrupted run can be resumed. The checkpoint is
+    identified by the template, data source and output options.
+    """
+
+    def __init__(self, template_path, data_source, output_mode, output_location):
+        key = '|'.join([template_path, data_source, str(output_mode), output_location])
+        self.path = '{0}/{1}.txt'.format(
+            DOCUMENT_CHECKPOINT_DIR,
+            hashlib.md5(key.encode('utf-8')).hexdigest()
+        )
+
+    def completed(self) -> set:
+        """
+        :return: Ids, as strings, of the records that have been processed.
+        :rtype: set
+        """
+        if not os.path.exists(self.path):
+            return set()
+
+        with open(self.path, 'r') as cp_file:
+            return set(line.strip() for line in cp_file if line.strip())
+
+    def mark_completed(self, record_id):
+        """
+        Appends the id of a processed record to the checkpoint file.
+        """
+        if not os.path.exists(DOCUMENT_CHECKPOINT_DIR):
+            os.makedirs(DOCUMENT_CHECKPOINT_DIR)
+
+        with open(self.path, 'a') as cp_file:
+            cp_file.write('{0}\n'.format(record_id))
+
+    def clear(self):
+        """
+        Removes the checkpoint file.
+        """
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class PhotoDocumentResolver:
+    """
+    Finds the supporting documents shown by the photo items of a template
+    for a batch of data source records at a time. The documents of all the
+    records in the batch are read using one join query, per photo item, of
+    the entity supporting document table and the base supporting document
+    table. The query of each photo item is built once and reused for the
+    following batches.
+    """
+
+    def __init__(self, reflected_table, session):
+        """
+        :param reflected_table: Callable returning the reflected table of
+        the given table name.
+        :type reflected_table: callable
+        :param session: Database session.
+        :type session: Session
+        """
+        self._reflected_table = reflected_table
+        self._session = session
+        self._statements = {}
+        self._documents = {}
+        self._batch = []
+
+    def set_batch(self, records):
+        """
+        Sets the records whose documents are read together, by the first
+        lookup of each photo item.
+        :param records: Data source records.
+        :type records: list
+        """
+        self._batch = list(records)
+
+    def clear(self):
+        """
+        Clears the documents read and the current batch.
+        """
+        self._documents = {}
+        self._batch = []
+
+    def _statement(self, photo_table, base_table, linked_field, document_type_id):
+        key = (photo_table, base_table, linked_field, document_type_id)
+        if key not in self._statements:
+            doc_table = self._reflected_table(photo_table)
+            base_doc_table = self._reflected_table(base_table)
+            link_col = doc_table.c[linked_field]
+
+            self._statements[key] = select([
+                link_col.label('ref_value'),
+                base_doc_table.c.document_identifier,
+                base_doc_table.c.filename
+            ]).select_from(
+                doc_table.join(
+                    base_doc_table,
+                    base_doc_table.c.id == doc_table.c.supporting_doc_id
+                )
+            ).where(and_(
+                doc_table.c.document_type == document_type_id,
+                link_col.in_(bindparam('ref_values', expanding=True))
+            )).order_by(link_col, doc_table.c.id)
+
+        return self._statements[key]
+
+    def document(self, photo_table, base_table, linked_field, source_field,
+                 document_type_id, record):
+        """
+        :param photo_table: Name of the entity supporting document table.
+        :type photo_table: str
+        :param base_table: Name of the base supporting document table.
+        :type base_table: str
+        :param linked_field: Column of the photo table referencing the
+        data source records.
+        :type linked_field: str
+        :param source_field: Data source column referenced by the photo
+        table.
+        :type source_field: str
+        :param document_type_id: Id of the document type of the photos.
+        :type document_type_id: int
+        :param record: Data source record.
+        :type record: object
+        :return: Document identifier and file name of the first photo of
+        the record, None if the record has no photo.
+        :rtype: tuple
+        """
+        value = getattr(record, source_field, None)
+        documents = self._documents.setdefault(
+            (photo_table, linked_field, document_type_id), {}
+        )
+        if value is None or value in documents:
+            return documents.get(value, None)
+
+        values = set(getattr(r, source_field, None) for r in self._batch)
+        values.add(value)
+        values = [v for v in values if v is not None and v not in documents]
+        for v in values:
+            documents[v] = None
+
+        stmt = self._statement(
+            photo_table, base_table, linked_field, document_type_id
+        )
+        try:
+            rows = self._session.execute(stmt, {'ref_values': values})
+        except SQLAlchemyError as ex:
+            self._session.rollback()
+            raise ex
+
+        for row in rows:
+            # Only the first photo of each record is shown
+            if documents.get(row.ref_value, None) is None:
+                documents[row.ref_value] = (
+                    row.document_identifier, row.filename
+                )
+
+        return documents.get(value, None)
+
+
+class LayoutTemplate:
+    """
+    Print layout loaded from a parsed template together with the
+    configuration collections of its items. The layout is loaded once and
+    reused for all the documents of a run, the labels and pictures that are
+    set for a record being restored to their template values before the
+    next record.
+    """
+
+    def __init__(self, template_doc, composer_ds, project):
+        """
+        :param template_doc: Parsed template.
+        :type template_doc: QDomDocument
+        :param composer_ds: Data source of the template.
+        :type composer_ds: ComposerDataSource
+        :param project: Project of the print layout.
+        :type project: QgsProject
+        """
+        self.layout = QgsPrintLayout(project)
+        self.layout.initializeDefaults()
+
+        context = QgsReadWriteContext()
+        layout_items, _ = self.layout.loadFromTemplate(template_doc, context)
+
+        self.table_configs = TableConfigurationCollection.create(self.layout)
+        self.photo_configs = PhotoConfigurationCollection.create_layout_item(layout_items)
+        self.qrc_configs = QRCodeConfigurationCollection.create_layout_item(layout_items)
+        self.chart_configs = ChartConfigurationCollection.create_chart_layout(layout_items, template_doc)
+        self.spatial_field_configs = SpatialFieldsConfiguration.create(layout_items)
+
+        # Data labels and the names of the fields whose values they show
+        self.data_labels = []
+        for item_id in composer_ds.dataFieldMappings().reverse:
+            item = self.layout.itemById(item_id)
+            field_name = composer_ds.dataFieldName(item_id)
+            if isinstance(item, StdmDataLabelLayoutItem) and field_name:
+                self.data_labels.append((item, field_name))
+
+        self._label_texts = [
+            (item, item.text()) for item in layout_items
+            if isinstance(item, QgsLayoutItemLabel)
+        ]
+        self._picture_paths = [
+            (item, item.picturePath()) for item in layout_items
+            if isinstance(item, QgsLayoutItemPicture)
+        ]
+
+    def reset(self):
+        """
+        Restores the text of the labels and the path of the pictures to
+        those in the template.
+        """
+        for item, label_text in self._label_texts:
+            if item.text() != label_text:
+                item.setText(label_text)
+
+        for item, picture_path in self._picture_paths:
+            if item.picturePath() != picture_path:
+                item.setPicturePath(picture_path)
+
+
 class DocumentGenerator(QObject):
     """
     Generates documents from user-defined templates.
@@ -141,7 +378,8 @@ class DocumentGenerator(QObject):
         # For cleanup after document compositions have been created
         self._map_memory_layers = []
         self.map_registry = QgsProject.instance()
-        self._table_mem_layers = []
+        # Table layers shared by the documents of a generation run
+        self._table_layers = TableLayerCache()
         self._feature_ids = []
 
         self._link_field = ""
@@ -151,6 +389,20 @@ class DocumentGenerator(QObject):
         # Value formatter for output files
         self._file_name_value_formatter = None
 
+        # Parsed templates and reflected data sources
+        self._template_cache = {}
+        self._reflected_tables = {}
+        self._metadata = None
+
+        # Photo documents and paths resolved for the records of a run
+        self._photo_resolver = PhotoDocumentResolver(
+            self._reflected_table, self._dbSession
+        )
+        self._photo_paths = {}
+
+        # Entity records used to name the documents of a batch, by id
+        self._file_name_records = {}
+
         self._logger = self._make_event_logger()
 
     def _make_event_logger(self) -> EventLogger:
@@ -352,7 +604,7 @@ class DocumentGenerator(QObject):
             qrc_config_collection = QRCodeConfigurationCollection.create(templateDoc)
 
             # Load the layers required by the table composer items
-            self._table_mem_layers = load_table_layers(table_config_collection)
+            load_table_layers(table_config_collection, self._table_layers)
 
             entityFieldName = self.format_entity_field_name(composerDS.name(), data_source)
 
@@ -368,6 +620,9 @@ class DocumentGenerator(QObject):
             """
             project = QgsProject().instance()
 
+            # Photos of all the matching records are read together
+            self.clear_photo_cache()
+            self._photo_resolver.set_batch(records)
 
             for rec in records:
                 print_layout = QgsPrintLayout(project)
@@ -565,294 +820,488 @@ class DocumentGenerator(QObject):
         if data_source is None:
             data_source = ''
 
-        templateFile = QFile(templatePath)
+        templateDoc, composerDS, error_msg = self._parsed_template(templatePath)
+        if templateDoc is None:
+            return False, error_msg
 
-        if not templateFile.open(QIODevice.ReadOnly):
-            error_msg = "Cannot read template file! Document generation aborted."
-            self._log_errorr(error_msg)
-            return False, QApplication.translate("DocumentGenerator",
-                                                 error_msg)
+        # Set file name value formatter
+        self._file_name_value_formatter = EntityValueFormatter(
+            name=data_source
+        )
 
-        templateDoc = QDomDocument()
+        entity_field_name = self.format_entity_field_name(composerDS.name(), data_source)
 
-        if templateDoc.setContent(templateFile):
-            composerDS = ComposerDataSource.create(templateDoc)
+        msg = f"Entity field name/value... {entity_field_name}={entity_field_value}"
+        self._log_info(msg)
 
-            # Check if data source exists and return if it doesn't
-            if not self.data_source_exists(composerDS):
-                error_msg = (f"`{composerDS.name()}` data source does not exist in the database! "
-                             "\nPlease contact your database administrator")
-                msg = QApplication.translate("DocumentGenerator", error_msg)
-                self._log_error(error_msg)
-                return False, msg
+        # Execute query - records = List[tuple]
+        dsTable, records = self._exec_query(composerDS.name(), entity_field_name, entity_field_value)
 
-            # Set file name value formatter
-            self._file_name_value_formatter = EntityValueFormatter(
-                name=data_source
-            )
+        msg = f"Query results count... {len(records)}"
+        self._log_info(msg)
 
-            msg = f"Composer Datasource... `{composerDS.name()}`"
-            self._log_info(msg)
+        if records is None or len(records) == 0:
+            error_msg = (f"No matching records in the database! \n"
+                         "Confirm the STR link is created for the selected record.")
+            self._log_error(error_msg)
+            return False, QApplication.translate("DocumentGenerator", error_msg)
 
-            entity_field_name = self.format_entity_field_name(composerDS.name(), data_source)
+        """
+        Iterate through records where a single file output will be generated for each matching record.
+        """
+        self._log_info("Generating document...")
 
-            msg = f"Entity field name/value... {entity_field_name}={entity_field_value}"
-            self._log_info(msg)
+        self._photo_resolver.set_batch(records)
 
-            # Execute query - records = List[tuple]
-            dsTable, records = self._exec_query(composerDS.name(), entity_field_name, entity_field_value)
+        try:
+            layout_template = self._layout_template(templateDoc, composerDS)
 
-            msg = f"Query results count... {len(records)}"
-            self._log_info(msg)
+            for rec in records:
+                status, msg = self._generate_document(layout_template, composerDS, rec, entity_field_value,
+                                                      outputMode, filePath, dataFields, fileExtension, data_source)
+                self.clear_temporary_map_layers()
+                if not status:
+                    return status, msg
+        finally:
+            self.clear_temporary_layers()
+            self.clear_photo_cache()
+
+        return True, "Success"
+
+    def run_batch(self, templatePath, record_ids, outputMode, filePath=None, dataFields=None,
+                  fileExtension=None, data_source=None, progress_callback=None, resume=False,
+                  id_column=None):
+        """
+        Generates the documents for multiple records (mail merge). The
+        template is read, parsed and loaded once and the data source records
+        are streamed in batches of DOCUMENT_BATCH_SIZE records. Records whose
+        documents were generated in a previous, interrupted run with the same
+        template and output options are skipped if 'resume' is True.
+        :param templatePath: The file path to the user-defined template.
+        :param record_ids: Ids of the entity records whose documents will be
+        generated, None to generate documents for all the records in the
+        template data source.
+        :type record_ids: list
+        :param outputMode: Whether the output composition should be an image or PDF.
+        :param filePath: The output file where the composition will be written to.
+        :param dataFields: List containing the field names whose values will be used to name the files.
+        :param fileExtension: The output file format.
+        :param data_source: Name of the data source table or view whose
+        row values will be used to name output files.
+        :param progress_callback: Callable invoked after each record with
+        the number of processed records, the total number of records, the
+        status and message. Document generation stops if it returns False.
+        :type progress_callback: callable
+        :param resume: True to skip the records processed by a previous run
+        that did not complete, see completed_batch_documents.
+        :type resume: bool
+        :param id_column: Column of the template data source containing the
+        record ids. If None, the column is derived from the names of the
+        data source and the entity and has to exist in the data source.
+        :type id_column: str
+        :return: A tuple containing the status and message.
+        :rtype: tuple
+        """
+        if dataFields is None:
+            dataFields = []
 
-            if records is None or len(records) == 0:
-                error_msg = (f"No matching records in the database! \n"
-                             "Confirm the STR link is created for the selected record.")
-                self._log_error(error_msg)
-                return False, QApplication.translate("DocumentGenerator", error_msg)
+        if fileExtension is None:
+            fileExtension = ''
 
-            """
-            Iterate through records where a single file output will be generated for each matching record.
-            """
-            project = QgsProject().instance()
+        if data_source is None:
+            data_source = ''
 
-            self._log_info("Generating document...")
+        templateDoc, composerDS, error_msg = self._parsed_template(templatePath)
+        if templateDoc is None:
+            return False, error_msg
 
-            for rec in records:
-                #composition = QgsPrintLayout(self._map_settings)
-                print_layout = QgsPrintLayout(project)
-                print_layout.initializeDefaults()
+        self._file_name_value_formatter = EntityValueFormatter(
+            name=data_source
+        )
 
-                context = QgsReadWriteContext()
-                results = print_layout.loadFromTemplate(templateDoc, context)
+        ds_table = self._reflected_table(composerDS.name())
+        if id_column is None:
+            id_column = self.format_entity_field_name(composerDS.name(), data_source).split('.')[-1]
+
+        # The records cannot be matched to the entity ids without the key
+        if id_column not in ds_table.c:
+            error_msg = (f"`{composerDS.name()}` data source has no `{id_column}` column "
+                         "identifying the records.")
+            self._log_error(error_msg)
+            return False, QApplication.translate("DocumentGenerator", error_msg)
+
+        if record_ids is None:
+            id_col = ds_table.c[id_column]
+            record_ids = [r[0] for r in self._dbSession.query(id_col).distinct().order_by(id_col)]
+
+        checkpoint = self._batch_checkpoint(templatePath, composerDS, outputMode, filePath, dataFields)
+        if resume:
+            completed = checkpoint.completed()
+            pending_ids = [r_id for r_id in record_ids if str(r_id) not in completed]
+        else:
+            checkpoint.clear()
+            pending_ids = list(record_ids)
 
-                ref_layer = None
-                # Set value of composer items based on the corresponding db values
+        total = len(record_ids)
+        processed = total - len(pending_ids)
+        failed = 0
 
-                for composerId in composerDS.dataFieldMappings().reverse:
-                    # Use composer item id since the uuid is stripped off
-                    self._log_info(f"Composer ID... {composerId}")
-                    composerItem = print_layout.itemById(composerId)
+        # File names are built from the entity records of each batch
+        batch_loaded = None
+        if filePath is None and len(dataFields) > 0:
+            batch_loaded = lambda batch_ids: self._load_file_name_records(data_source, batch_ids)
 
-                    if composerItem is not None:
-                        self._log_info(f"Composer Item... Found.")
-                        fieldName = composerDS.dataFieldName(composerId)
-                        if fieldName == '':
-                            self._log_error(f"Field name for composer Id: {composerId}... Not Found.")
-                            continue
-                        fieldValue = getattr(rec, fieldName)
+        self._log_info(f"Generating {len(pending_ids)} of {total} documents...")
+        start_time = tm()
 
-                        msg = f"Field Name/Value... {fieldName}={fieldValue}"
-                        self._log_info(msg)
+        try:
+            layout_template = self._layout_template(templateDoc, composerDS)
+
+            for record_value, group in groupby(self._stream_records(ds_table, id_column, pending_ids,
+                                                                    batch_loaded=batch_loaded),
+                                               key=lambda r: getattr(r, id_column)):
+                status, msg = True, "Success"
+                for rec in group:
+                    status, msg = self._generate_document(layout_template, composerDS, rec, record_value,
+                                                          outputMode, filePath, dataFields, fileExtension,
+                                                          data_source)
+                    # The table layers are kept for the next documents
+                    self.clear_temporary_map_layers()
+                    if not status:
+                        break
+
+                if status:
+                    checkpoint.mark_completed(record_value)
+                else:
+                    failed += 1
+
+                processed += 1
+                if progress_callback is not None and not progress_callback(processed, total, status, msg):
+                    return False, QApplication.translate("DocumentGenerator", "Document generation canceled")
+        finally:
+            self.clear_temporary_layers()
+            self.clear_photo_cache()
+            self._file_name_records = {}
+
+        # The checkpoint is kept so that the failed records can be retried
+        if failed == 0:
+            checkpoint.clear()
+        else:
+            self._log_error(f"Documents for {failed} of {total} records could not be generated")
 
-                        # StdmDataLabel
-                        if isinstance(composerItem, StdmDataLabelLayoutItem):
-                            self._log_info(f"Setting value for Stdm DataLabel...")
-                            self._composeritem_value_handler(composerItem, fieldValue)
+        self._log_info(f"Generated documents for {total - failed} records in {tm() - start_time:.1f}s")
 
+        return True, "Success"
+
+    def completed_batch_documents(self, templatePath, outputMode, filePath=None, dataFields=None):
+        """
+        :param templatePath: The file path to the user-defined template.
+        :param outputMode: Whether the output composition should be an image or PDF.
+        :param filePath: The output file of the documents, None if the
+        documents are named using the data fields.
+        :param dataFields: List containing the field names whose values are
+        used to name the files.
+        :return: Number of records whose documents were generated, with the
+        same template and output options, by a batch run that did not
+        complete. These records are skipped by run_batch when resuming.
+        :rtype: int
+        """
+        templateDoc, composerDS, _ = self._parsed_template(templatePath)
+        if templateDoc is None:
+            return 0
 
-                # # Set table item values based on configuration information
-                self._log_info("Setting Table Items ...")
-                table_config_collection = TableConfigurationCollection.create(print_layout)
+        checkpoint = self._batch_checkpoint(templatePath, composerDS, outputMode, filePath, dataFields or [])
 
-                msg = f"[{len(table_config_collection.items())}] Table items found."
-                self._log_info(msg)
+        return len(checkpoint.completed())
 
-                self._table_mem_layers = load_table_layers(table_config_collection)
-                self._set_table_data(print_layout, table_config_collection, rec)
+    def _batch_checkpoint(self, templatePath, composerDS, outputMode, filePath, dataFields):
+        output_location = filePath or '{0}|{1}'.format(self._composer_output_path(), ','.join(dataFields))
 
-                self._log_info("Setting Photo items...")
-                layout_items, load_status = results
-                ph_config_collection = PhotoConfigurationCollection.create_layout_item(layout_items)
+        return DocumentBatchCheckpoint(templatePath, composerDS.name(), outputMode, output_location)
 
-                msg = f"[{len(ph_config_collection.items())}] Photo items found."
-                self._log_info(msg)
+    def _load_file_name_records(self, data_source, record_ids):
+        """
+        Reads the entity records used to name the documents of a batch.
+        """
+        ds_table = self._reflected_table(data_source)
+        try:
+            records = self._dbSession.query(ds_table).filter(
+                ds_table.c.id.in_(list(record_ids))
+            ).all()
+        except SQLAlchemyError as ex:
+            self._dbSession.rollback()
+            raise ex
 
-                # Extract photo information
-                self._extract_photo_info(print_layout, ph_config_collection, rec)
+        self._file_name_records = dict((r.id, r) for r in records)
 
-                self._log_info(f"Setting QRcode Items...")
-                # Create QR code configuration collection object
-                qrc_config_collection = QRCodeConfigurationCollection.create_layout_item(layout_items)
+    def _parsed_template(self, templatePath):
+        """
+        Reads and parses the template file. The parsed template and its data
+        source are cached and only re-read if the file has been modified.
+        :return: A tuple containing the template document, composer data
+        source and error message where applicable.
+        :rtype: tuple
+        """
+        modified = QFileInfo(templatePath).lastModified()
+        cached = self._template_cache.get(templatePath, None)
+        if cached is not None and cached[0] == modified:
+            return cached[1], cached[2], ""
 
-                msg = f"[{len(qrc_config_collection.items())}] QRCode items found."
-                self._log_info(msg)
+        templateFile = QFile(templatePath)
 
-                # Extract QR code information in order to generate QR codes
-                self._generate_qr_codes(print_layout, qrc_config_collection, rec)
+        if not templateFile.open(QIODevice.ReadOnly):
+            error_msg = "Cannot read template file! Document generation aborted."
+            self._log_error(error_msg)
+            return None, None, QApplication.translate("DocumentGenerator",
+                                                      error_msg)
 
-                self._log_info("Setting Chart Items...")
-                # Create chart configuration collection object
-                chart_config_collection = ChartConfigurationCollection.create_chart_layout(layout_items, templateDoc)
+        templateDoc = QDomDocument()
 
-                if chart_config_collection is not None:
-                    msg = f"[{len(chart_config_collection.items())}] Chart items found."
-                else:
-                    msg = f"[0] Chart items found."
+        if not templateDoc.setContent(templateFile):
+            return None, None, "Document Print Layout could not be generated"
 
-                self._log_info(msg)
+        composerDS = ComposerDataSource.create(templateDoc)
 
-                # Extract chart information and generate chart
-                self._generate_charts(print_layout, chart_config_collection, rec)
+        # Check if data source exists and return if it doesn't
+        if not self.data_source_exists(composerDS):
+            error_msg = (f"`{composerDS.name()}` data source does not exist in the database! "
+                         "\nPlease contact your database administrator")
+            msg = QApplication.translate("DocumentGenerator", error_msg)
+            self._log_error(error_msg)
+            return None, None, msg
 
-                # Set use fixed scale to false i.e. relative zoom
-                use_fixed_scale = False
+        msg = f"Composer Datasource... `{composerDS.name()}`"
+        self._log_info(msg)
 
-                self._log_info("Creating Map Items...")
-                spatial_field_configs = SpatialFieldsConfiguration.create(layout_items)
+        self._template_cache[templatePath] = (modified, templateDoc, composerDS)
 
-                msg = f"[{len(spatial_field_configs)}] Map items found."
-                self._log_info(msg)
+        return templateDoc, composerDS, ""
 
-                for spatial_field_config in spatial_field_configs:
+    def _stream_records(self, ds_table, id_column, record_ids, batch_size=DOCUMENT_BATCH_SIZE,
+                        batch_loaded=None):
+        """
+        Yields the data source records matching the given ids, ordered by
+        the id column, querying batch_size ids at a time. If specified,
+        batch_loaded is called with the ids of each batch before its
+        records are yielded.
+        """
+        id_col = ds_table.c[id_column]
+        for i in range(0, len(record_ids), batch_size):
+            batch_ids = record_ids[i:i + batch_size]
+            try:
+                records = self._dbSession.query(ds_table).filter(
+                    id_col.in_(batch_ids)
+                ).order_by(id_col).all()
+            except SQLAlchemyError as ex:
+                self._dbSession.rollback()
+                raise ex
+
+            # Photos of the records in the batch are read together
+            self._photo_resolver.set_batch(records)
+            if batch_loaded is not None:
+                batch_loaded(batch_ids)
 
-                    map_item = spatial_field_config.map_item()
+            for rec in records:
+                yield rec
 
-                    # Refresh non-custom map composer items
-                    self._refresh_composer_maps(print_layout,
-                                                list(spatial_field_config.spatialFieldsMapping().keys()))
+    def _layout_template(self, templateDoc, composerDS):
+        """
+        Loads the print layout of the parsed template and the configuration
+        of its items, for use by all the documents of a run.
+        :rtype: LayoutTemplate
+        """
+        layout_template = LayoutTemplate(templateDoc, composerDS, QgsProject.instance())
 
-                    # Create memory layers for spatial features and add them to the map
-                    for mapId, spfmList in spatial_field_config.spatialFieldsMapping().items():
+        msg = (f"[{len(layout_template.data_labels)}] data labels, "
+               f"[{len(layout_template.table_configs.items())}] tables, "
+               f"[{len(layout_template.photo_configs.items())}] photos, "
+               f"[{len(layout_template.qrc_configs.items())}] QR codes and "
+               f"[{len(layout_template.spatial_field_configs)}] map items found.")
+        self._log_info(msg)
 
-                        #map_item = print_layout.itemById(mapId)
-                        #if map_item is not None:
+        # Load the layers required by the table composer items
+        load_table_layers(layout_template.table_configs, self._table_layers)
 
-                        # Clear any previous map memory layer
-                        # self.clear_temporary_map_layers()
-                        for spfm in spfmList:
-                            # Use the value of the label field to name the layer
-                            lbl_field = spfm.labelField()
-                            spatial_field = spfm.spatialField()
+        return layout_template
 
-                            if not spatial_field:
-                                continue
+    def _generate_document(self, layout_template, composerDS, rec, entity_field_value, outputMode, filePath,
+                           dataFields, fileExtension, data_source):
+        """
+        Sets the values of the items of the template print layout from the
+        data source record and writes the output.
+        :return: A tuple containing the status and message.
+        :rtype: tuple
+        """
+        # Restore the item values set for the previous record
+        layout_template.reset()
+        print_layout = layout_template.layout
 
-                            if lbl_field:
-                                if hasattr(rec, spfm.labelField()):
-                                    layerName = getattr(rec, spfm.labelField())
-                                else:
-                                    layerName = self._random_feature_layer_name(spatial_field)
-                            else:
-                                layerName = self._random_feature_layer_name(spatial_field)
+        # Set value of composer items based on the corresponding db values
+        for composerItem, fieldName in layout_template.data_labels:
+            fieldValue = getattr(rec, fieldName)
 
-                            # Extract the geometry using geoalchemy spatial capabilities
-                            geom_value = getattr(rec, spatial_field)
-                            if geom_value is None:
-                                continue
+            msg = f"Field Name/Value... {fieldName}={fieldValue}"
+            self._log_info(msg)
 
-                            geom_func = geom_value.ST_AsText()
-                            geomWKT = self._dbSession.scalar(geom_func)
+            self._composeritem_value_handler(composerItem, fieldValue)
 
-                            # Get geometry type
-                            geom_type, srid = geometryType(composerDS.name(),
-                                                            spatial_field)
+        # Set table item values based on configuration information
+        self._set_table_data(print_layout, layout_template.table_configs, rec)
 
-                            # Create reference layer with feature
-                            ref_layer = self._build_vector_layer(layerName, geom_type, srid)
+        # Extract photo information
+        self._extract_photo_info(print_layout, layout_template.photo_configs, rec)
 
-                            if ref_layer is None or not ref_layer.isValid():
-                                continue
+        # Extract QR code information in order to generate QR codes
+        self._generate_qr_codes(print_layout, layout_template.qrc_configs, rec)
 
-                            # Add feature
-                            bbox = self._add_feature_to_layer(ref_layer, geomWKT)
+        # Extract chart information and generate chart
+        self._generate_charts(print_layout, layout_template.chart_configs, rec)
 
-                            zoom_type = spfm.zoom_type
+        # Set use fixed scale to false i.e. relative zoom
+        use_fixed_scale = False
 
-                            # Only scale the extents if zoom type is relative
-                            if zoom_type == 'RELATIVE':
-                                bbox.scale(int(spfm.zoomLevel()))
+        for spatial_field_config in layout_template.spatial_field_configs:
 
-                            # Workaround for zooming to single point extent
-                            if ref_layer.wkbType() == QgsWkbTypes.Point:
-                                canvas_extent = self._iface.mapCanvas().fullExtent()
-                                cnt_pnt = bbox.center()
-                                canvas_extent.scale(1.0 / 32, cnt_pnt)
-                                bbox = canvas_extent
+            map_item = spatial_field_config.map_item()
 
-                            # Style layer based on the spatial field mapping symbol layer
-                            symbol_layer = spfm.symbolLayer()
-                            if symbol_layer is not None:
-                                ref_layer.renderer().symbols()[0].changeSymbolLayer(0, spfm.symbolLayer())
-                            '''
-                            Add layer to map and ensure its always added at the top
-                            '''
-                            self.map_registry.addMapLayer(ref_layer)
-                            self._iface.mapCanvas().setExtent(bbox)
+            # Refresh non-custom map composer items
+            self._refresh_composer_maps(print_layout,
+                                        list(spatial_field_config.spatialFieldsMapping().keys()))
 
-                            # Set scale if type is FIXED
-                            if zoom_type == 'FIXED':
-                                self._iface.mapCanvas().zoomScale(int(spfm.zoomLevel()))
-                                use_fixed_scale = True
+            # Create memory layers for spatial features and add them to the map
+            for mapId, spfmList in spatial_field_config.spatialFieldsMapping().items():
 
-                            self._iface.mapCanvas().refresh()
-                            # Add layer to map memory layer list
-                            self._map_memory_layers.append(ref_layer.id())
-                            self._hide_layer(ref_layer)
-                        '''
-                        Use root layer tree to get the correct ordering of layers
-                        in the legend
-                        '''
-                        self._refresh_map_item(map_item, use_fixed_scale)
+                #map_item = print_layout.itemById(mapId)
+                #if map_item is not None:
 
-                # Build output path and generate print_layout
-                if filePath is not None and len(dataFields) == 0:
-                    self._write_output(print_layout, outputMode, filePath)
+                # Clear any previous map memory layer
+                # self.clear_temporary_map_layers()
+                for spfm in spfmList:
+                    # Use the value of the label field to name the layer
+                    lbl_field = spfm.labelField()
+                    spatial_field = spfm.spatialField()
+
+                    if not spatial_field:
+                        continue
 
-                    self._log_info("Generating document... done.")
+                    if lbl_field:
+                        if hasattr(rec, spfm.labelField()):
+                            layerName = getattr(rec, spfm.labelField())
+                        else:
+                            layerName = self._random_feature_layer_name(spatial_field)
+                    else:
+                        layerName = self._random_feature_layer_name(spatial_field)
 
+                    # Extract the geometry using geoalchemy spatial capabilities
+                    geom_value = getattr(rec, spatial_field)
+                    if geom_value is None:
+                        continue
 
-                elif filePath is None and len(dataFields) > 0:
-                    entity_field_name = 'id'
-                    doc_filename = self._build_file_name(data_source, entity_field_name,
-                                                        entity_field_value, dataFields, fileExtension)
+                    geom_func = geom_value.ST_AsText()
+                    geomWKT = self._dbSession.scalar(geom_func)
+
+                    # Get geometry type
+                    geom_type, srid = geometryType(composerDS.name(),
+                                                    spatial_field)
+
+                    # Create reference layer with feature
+                    ref_layer = self._build_vector_layer(layerName, geom_type, srid)
 
-                    # If doc_filname is empty - Log the incident and move on
-                    if doc_filename == "":
-                        self._log_error(f"Failed to generate document for record with column: `{fieldName}` value: {fieldValue}")
+                    if ref_layer is None or not ref_layer.isValid():
                         continue
 
-                    # Replace unsupported characters in Windows file naming
-                    doc_filename = doc_filename.replace('/', '_').replace('\\', '_').replace(':', '_').strip('*?"<>|')
+                    # Add feature
+                    bbox = self._add_feature_to_layer(ref_layer, geomWKT)
 
-                    if not doc_filename:
-                        return (False, QApplication.translate("DocumentGenerator",
-                                                                "File name could not be generated from the data fields."))
+                    zoom_type = spfm.zoom_type
 
-                    outputDir = self._composer_output_path()
-                    if outputDir is None:
-                        return (False, QApplication.translate("DocumentGenerator",
-                                                                "System could not read the location of the output directory in the registry."))
+                    # Only scale the extents if zoom type is relative
+                    if zoom_type == 'RELATIVE':
+                        bbox.scale(int(spfm.zoomLevel()))
 
-                    qDir = QDir()
-                    if not qDir.exists(outputDir):
-                        return (False, QApplication.translate("DocumentGenerator",
-                                                                "Output directory does not exist"))
+                    # Workaround for zooming to single point extent
+                    if ref_layer.wkbType() == QgsWkbTypes.Point:
+                        canvas_extent = self._iface.mapCanvas().fullExtent()
+                        cnt_pnt = bbox.center()
+                        canvas_extent.scale(1.0 / 32, cnt_pnt)
+                        bbox = canvas_extent
 
-                    absDocPath = "{0}/{1}".format(outputDir, doc_filename)
+                    # Style layer based on the spatial field mapping symbol layer
+                    symbol_layer = spfm.symbolLayer()
+                    if symbol_layer is not None:
+                        ref_layer.renderer().symbols()[0].changeSymbolLayer(0, spfm.symbolLayer())
+                    '''
+                    Add layer to map and ensure its always added at the top
+                    '''
+                    self.map_registry.addMapLayer(ref_layer)
+                    self._iface.mapCanvas().setExtent(bbox)
 
-                    write_result = self._write_output(print_layout, outputMode, absDocPath)
+                    # Set scale if type is FIXED
+                    if zoom_type == 'FIXED':
+                        self._iface.mapCanvas().zoomScale(int(spfm.zoomLevel()))
+                        use_fixed_scale = True
 
-                    if write_result == QgsLayoutExporter.Canceled:
-                        return (False, QApplication.translate("DocumentGenerator",
-                                                                "Document generation canceled"))
+                    self._iface.mapCanvas().refresh()
+                    # Add layer to map memory layer list
+                    self._map_memory_layers.append(ref_layer.id())
+                    self._hide_layer(ref_layer)
+                '''
+                Use root layer tree to get the correct ordering of layers
+                in the legend
+                '''
+                self._refresh_map_item(map_item, use_fixed_scale)
 
-                    if write_result == QgsLayoutExporter.MemoryError:
-                        return (False, QApplication.translate("DocumentGenerator",
-                                                                "Unable to allocate memory required to export"))
+        # Build output path and generate print_layout
+        if filePath is not None and len(dataFields) == 0:
+            self._write_output(print_layout, outputMode, filePath)
 
-                    if write_result == QgsLayoutExporter.FileError:
-                        return (False, QApplication.translate("DocumentGenerator",
-                                                                "Could not write to destination file, likely due to a lock held by anther application"))
+            self._log_info("Generating document... done.")
 
-            return True, "Success"
 
-        return False, "Document Print Layout could not be generated"
-    
+        elif filePath is None and len(dataFields) > 0:
+            entity_field_name = 'id'
+            doc_filename = self._build_file_name(data_source, entity_field_name,
+                                                entity_field_value, dataFields, fileExtension)
+
+            # If doc_filname is empty - Log the incident and move on
+            if doc_filename == "":
+                self._log_error(f"Failed to generate document for record with id: {entity_field_value}")
+                return True, "Success"
+
+            # Replace unsupported characters in Windows file naming
+            doc_filename = doc_filename.replace('/', '_').replace('\\', '_').replace(':', '_').strip('*?"<>|')
+
+            if not doc_filename:
+                return (False, QApplication.translate("DocumentGenerator",
+                                                  "File name could not be generated from the data fields."))
+
+            outputDir = self._composer_output_path()
+            if outputDir is None:
+                return (False, QApplication.translate("DocumentGenerator",
+                                                  "System could not read the location of the output directory in the registry."))
+
+            qDir = QDir()
+            if not qDir.exists(outputDir):
+                return (False, QApplication.translate("DocumentGenerator",
+                                                  "Output directory does not exist"))
 
+            absDocPath = "{0}/{1}".format(outputDir, doc_filename)
 
+            write_result = self._write_output(print_layout, outputMode, absDocPath)
 
+            if write_result == QgsLayoutExporter.Canceled:
+                return (False, QApplication.translate("DocumentGenerator",
+                                                  "Document generation canceled"))
 
+            if write_result == QgsLayoutExporter.MemoryError:
+                return (False, QApplication.translate("DocumentGenerator",
+                                                  "Unable to allocate memory required to export"))
+
+            if write_result == QgsLayoutExporter.FileError:
+                return (False, QApplication.translate("DocumentGenerator",
+                                                  "Could not write to destination file, likely due to a lock held by anther application"))
+
+        return True, "Success"
 
     # ----------------------------------------------------------------------------------------------------------------
     def format_entity_field_name(self, composer_datasource, entity):
@@ -903,7 +1352,7 @@ class DocumentGenerator(QObject):
         """
         Clears all table layers for attribute tables.
         """
-        self._clear_layers(self._table_mem_layers)
+        self._table_layers.clear()
 
     def clear_temporary_layers(self):
         """
@@ -916,9 +1365,11 @@ class DocumentGenerator(QObject):
         if layers is None:
             return
         try:
-            for lyr_id in layers:
-                self.map_registry.removeMapLayer(lyr_id)
-                layers.remove(lyr_id)
+            # Layers already removed from the project are ignored
+            layer_ids = [l_id for l_id in layers
+                         if self.map_registry.mapLayer(l_id) is not None]
+            del layers[:]
+            self.map_registry.removeMapLayers(layer_ids)
 
         except DummyException as ex:
             self._log_error(
@@ -1086,22 +1537,39 @@ class DocumentGenerator(QObject):
             photo_doc_entity = photo_doc_entities[0]
             document_parent_table = photo_doc_entity.parent_entity.name
 
-            # Get id of base photo
-            alchemy_table, results = self._exec_query(
+            # Paths are resolved once for each record
+            path_key = (
                 photo_tb,
                 referencing_column,
-                getattr(record, referenced_column, '')
+                document_type_id,
+                getattr(record, referenced_column, None)
             )
+            if path_key not in self._photo_paths:
+                document = self._photo_resolver.document(
+                    photo_tb,
+                    supporting_doc_base,
+                    referencing_column,
+                    referenced_column,
+                    document_type_id,
+                    record
+                )
+                if document is None:
+                    self._photo_paths[path_key] = (False, None)
+                else:
+                    self._photo_paths[path_key] = (True, self._photo_document_path(
+                        document_parent_table,
+                        document_type,
+                        document[0],
+                        document[1]
+                    ))
 
-            # Filter results further based on document type
-            results = [r for r in results
-                       if r.document_type == document_type_id]
+            has_document, photo_path = self._photo_paths[path_key]
 
             '''
             There are no photos in the referenced table column hence insert no
             photo image
             '''
-            if len(results) == 0:
+            if not has_document:
                 pic_item = composition.itemById(conf.item_id())
 
                 if pic_item is not None:
@@ -1110,53 +1578,31 @@ class DocumentGenerator(QObject):
                     if QFile.exists(no_photo_path):
                         self._composeritem_value_handler(pic_item, no_photo_path)
 
-                    continue
-
-            for r in results:
-                base_ph_table, doc_results = self._exec_query(
-                    supporting_doc_base,
-                    'id',
-                    r.supporting_doc_id
-                )
-
-                for dr in doc_results:
-                    self._build_photo_path(
-                        composition,
-                        conf.item_id(),
-                        document_parent_table,
-                        document_type,
-                        dr.document_identifier,
-                        dr.filename,
-                        photo_layout_item
-                    )
+                continue
 
-                # TODO: Only interested in one photograph, should support more?
-                break
+            # TODO: Only interested in one photograph, should support more?
+            if photo_layout_item is not None and photo_path is not None:
+                self._composeritem_value_handler(photo_layout_item, photo_path)
 
-    def _build_photo_path(
+    def _photo_document_path(
             self,
-            composition,
-            composer_id,
             document_parent_table,
             document_type,
             doc_id,
-            doc_name,
-            photo_layout_item: QgsLayoutItem
+            doc_name
     ):
-
-        #pic_item = composition.itemById(composer_id)
-        pic_item = photo_layout_item
-
-        if pic_item is None:
-            return
-
+        """
+        :return: Absolute path of the photo document in the network
+        document directory, None if the file does not exist.
+        :rtype: str
+        """
         extensions = doc_name.rsplit(".", 1)
         if len(extensions) < 2:
-            return
+            return None
 
         network_ph_path = network_document_path()
         if not network_ph_path:
-            return
+            return None
 
         img_extension = extensions[1]
         profile_name = self._current_profile.name.replace(' ', '_').lower()
@@ -1169,8 +1615,18 @@ class DocumentGenerator(QObject):
             img_extension
         )
 
-        if QFile.exists(abs_path):
-            self._composeritem_value_handler(pic_item, abs_path)
+        if not QFile.exists(abs_path):
+            return None
+
+        return abs_path
+
+    def clear_photo_cache(self):
+        """
+        Clears the photo documents and paths resolved for the records of
+        the last run.
+        """
+        self._photo_resolver.clear()
+        self._photo_paths = {}
 
     def _add_feature_to_layer(self, vlayer, geom_wkb) ->'QgsRectangle':
         """
@@ -1233,13 +1689,18 @@ class DocumentGenerator(QObject):
                          fileExtension) -> str:
         """
         Build a file name based on the values of the specified data fields.
+        The entity records read for the current batch are used if available.
         """
+        rec = None
+        if fieldName == 'id':
+            rec = self._file_name_records.get(fieldValue, None)
 
-        table, results = self._exec_query(data_source, fieldName, fieldValue)
-
-        if len(results) > 0:
-            rec = results[0]
+        if rec is None:
+            table, results = self._exec_query(data_source, fieldName, fieldValue)
+            if len(results) > 0:
+                rec = results[0]
 
+        if rec is not None:
             ds_values = []
 
             for dt in data_fields:
@@ -1261,18 +1722,30 @@ class DocumentGenerator(QObject):
 
         return ""
 
+    def _reflected_table(self, dataSourceName) -> Table:
+        """
+        Reflects the data source table or view, once per generator.
+        """
+        ds_table = self._reflected_tables.get(dataSourceName, None)
+        if ds_table is None:
+            if self._metadata is None:
+                self._metadata = MetaData(bind=STDMDb.instance().engine)
+            ds_table = Table(dataSourceName, self._metadata, autoload=True)
+            self._reflected_tables[dataSourceName] = ds_table
+
+        return ds_table
+
     def _exec_query(self, dataSourceName, query_field: str, query_value):
         """
         Reflects the data source then execute the query using the specified
         query parameters.
         Returns a tuple containing the reflected table and results of the query.
         """
-        meta = MetaData(bind=STDMDb.instance().engine)
-        dsTable = Table(dataSourceName, meta, autoload=True)
+        dsTable = self._reflected_table(dataSourceName)
         try:
             if not query_field and not query_value:
-                # Return all the rows; this is currently limited to 100 rows
-                results = self._dbSession.query(dsTable).limit(100).all()
+                # Return all the rows
+                results = self._dbSession.query(dsTable).all()
 
             else:
                 if isinstance(query_value, str):
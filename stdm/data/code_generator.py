@@ -18,14 +18,62 @@ email                : stdm@unhabitat.org
  *                                                                         *
  ***************************************************************************/
 """
+from sqlalchemy.sql.expression import text
+
 from stdm.data.configuration import entity_model
+from stdm.data.database import STDMDb
 from stdm.settings import current_profile
 
+# Table holding the last serial number issued for each code prefix
+CODE_COUNTER_TABLE = 'stdm_code_counter'
+
+
+def create_code_counter_table(connection, code_tables):
+    """
+    Creates the code counter table and seeds it with the largest serial
+    number of the codes already saved in the code tables. Run by the schema
+    update, as the account that owns the database objects, so that data
+    entry users only need to read and update the counters.
+    :param connection: Connection of the schema update transaction.
+    :type connection: Connection
+    :param code_tables: Names of the code tables of the profiles.
+    :type code_tables: list
+    """
+    connection.execute(text(
+        'CREATE TABLE IF NOT EXISTS {0} ('
+        'code_key character varying PRIMARY KEY, '
+        'last_value bigint NOT NULL)'.format(CODE_COUNTER_TABLE)
+    ))
+
+    if code_tables:
+        # The prefix and separator of a code are the characters before its
+        # trailing digits.
+        codes = ' UNION ALL '.join(
+            'SELECT code FROM {0}'.format(t) for t in code_tables
+        )
+        connection.execute(text(
+            'INSERT INTO {0} (code_key, last_value) '
+            'SELECT regexp_replace(code, \'[0-9]+$\', \'\'), '
+            'max(substring(code FROM \'[0-9]+$\')::bigint) '
+            'FROM ({1}) codes WHERE code ~ \'[0-9]$\' '
+            'GROUP BY 1 ON CONFLICT (code_key) DO NOTHING'.format(
+                CODE_COUNTER_TABLE, codes
+            )
+        ))
+
+    connection.execute(text(
+        'GRANT SELECT, INSERT, UPDATE ON {0} TO PUBLIC'.format(
+            CODE_COUNTER_TABLE
+        )
+    ))
+
 
 class CodeGenerator:
     """
     Generate unique code for a column using prefix, separator and leading zero
-    parameters.
+    parameters. The serial numbers are issued from a counter, for each prefix
+    and separator, that is incremented atomically in the database so that
+    concurrent users never receive the same code.
     """
 
     def __init__(self, entity, column):
@@ -48,8 +96,8 @@ class CodeGenerator:
 
     def generate(self, prefix, separator, leading_zero, hide_prefix=False):
         """
-        Generates the next unique code by checking what is saved in the
-        database for a specific column.
+        Generates the next unique code by incrementing the counter of the
+        prefix and separator.
         :param prefix: The code prefix in front of the serial number.
         :type prefix: String
         :param separator: The separator used to separate code prefixes and
@@ -61,86 +109,110 @@ class CodeGenerator:
         :return: Returns the next unique code for the column
         :rtype: String
         """
-        matches = self.search_similar_code(prefix, separator)
-        # matches is list with tuple items.
-        # To access them 0 index is used
-        record_match = []
-
-        for item in matches:
-
-            if len(item) > 0:
-                try:
-                    # for code with prefix
-                    if prefix == item[0].rsplit(separator, 1)[0]:
-                        record_match.append(item[0])
-                    # for serial number code
-                    if prefix == '':
-                        record_match.append(item[0])
-                # if the separator is empty - '', escape the value error
-                # and append.
-                except ValueError:
-                    record_match.append(item[0])
-
-        # if no match found, start with 1
-        if len(record_match) == 0:
-            code = '{0}{1}{2}1'.format(prefix, separator, leading_zero)
-            self.save_code(code)
-            if hide_prefix:
-                code = '{0}1'.format(leading_zero)
-
-            return code
-
-        else:
-            last_serial = None
-
-            if prefix == '':
-                # get the serial number
-                last_serial = record_match[len(record_match) - 1]
-            else:
-                last_code = []
-                # get the serial number
-                try:
-                    last_code = record_match[0].rsplit(separator, 1)
-                    # if the separator is empty - '', split by numbers and letters.
-                    if len(last_code) > 1:
-                        last_serial = last_code[1]
-
-                except ValueError:
-                    if separator == '':
-                        last_serial = record_match[0].replace(prefix, '')
-
-                    else:
-                        prefix_and_serial = record_match[0].split(separator)
-                        if len(prefix_and_serial) > 0:
-                            last_serial = prefix_and_serial[len(prefix_and_serial) - 1]
-
-                    # match = re.match(
-                    #     r'([a-zA-Z]+)([0-9]+)', record_match[0], re.I
-                    # )
-                #     if match:
-                #         text_numbers = match.groups()
-                #         if len(text_numbers) == 2:
-                #             last_code = text_numbers
-                #
-
-            if last_serial is None:
-                return None
-
-            # convert to integer and add 1
-            next_serial = int(last_serial) + 1
-            # Add 1 to append correct number of leading zero at the beginning.
-            leading_zero_len = len(leading_zero) + 1
+        return self.reserve(
+            prefix, separator, leading_zero, 1, hide_prefix
+        )[0]
+
+    def reserve(self, prefix, separator, leading_zero, count,
+                hide_prefix=False):
+        """
+        Reserves a block of consecutive codes using a single update of the
+        counter.
+        :param prefix: The code prefix in front of the serial number.
+        :type prefix: String
+        :param separator: The separator used to separate code prefixes and
+        serial numbers within a code.
+        :type separator: String
+        :param leading_zero: The leading zeros to be added in front of
+        serial number.
+        :type leading_zero: String
+        :param count: Number of codes to reserve.
+        :type count: int
+        :return: The reserved codes.
+        :rtype: list
+        """
+        last_serial = self.next_serials(prefix, separator, count)
+        # Add 1 to append correct number of leading zero at the beginning.
+        leading_zero_len = len(leading_zero) + 1
+
+        codes = []
+        serials = []
+        for serial in range(last_serial - count + 1, last_serial + 1):
             # format again with leading 0
-            formatted_serial = "%0{}d".format(leading_zero_len) % (next_serial,)
+            formatted_serial = "%0{}d".format(leading_zero_len) % (serial,)
+            codes.append('{0}{1}{2}'.format(prefix, separator, formatted_serial))
+            serials.append(formatted_serial)
+
+        self.save_codes(codes)
+
+        if hide_prefix:
+            return serials
+
+        return codes
+
+    def next_serials(self, prefix, separator, count=1):
+        """
+        Atomically increments the counter of the prefix and separator. A
+        counter that does not exist is seeded from the largest serial number
+        of the codes already saved in the code table. If the counter table
+        has not yet been created by a schema update, the serial number is
+        computed from the saved codes only.
+        :param prefix: The code prefix in front of the serial number.
+        :type prefix: String
+        :param separator: The separator used to separate code prefixes and
+        serial numbers within a code.
+        :type separator: String
+        :param count: Number by which the counter is incremented.
+        :type count: int
+        :return: The last serial number issued.
+        :rtype: int
+        """
+        code_prefix = '{0}{1}'.format(prefix, separator)
+        update_sql = text(
+            'UPDATE {0} SET last_value = last_value + :count '
+            'WHERE code_key = :key RETURNING last_value'.format(
+                CODE_COUNTER_TABLE
+            )
+        )
+        serial_sql = 'SELECT :key, ' \
+                     'COALESCE(max(substring(code FROM :start)::bigint), ' \
+                     '0) + :count FROM {0} WHERE left(code, :length) = :key ' \
+                     'AND substring(code FROM :start) ~ \'^[0-9]+$\''.format(
+                         self.code_entity.name
+                     )
+        seed_sql = text(
+            'INSERT INTO {0} (code_key, last_value) {1} '
+            'ON CONFLICT (code_key) DO UPDATE '
+            'SET last_value = {0}.last_value + :count '
+            'RETURNING last_value'.format(CODE_COUNTER_TABLE, serial_sql)
+        )
+        serial_params = dict(
+            count=count,
+            key=code_prefix,
+            start=len(code_prefix) + 1,
+            length=len(code_prefix)
+        )
+
+        with STDMDb.instance().engine.begin() as conn:
+            counter_exists = conn.execute(
+                text('SELECT to_regclass(:name) IS NOT NULL'),
+                name=CODE_COUNTER_TABLE
+            ).scalar()
+            if not counter_exists:
+                return conn.execute(
+                    text(serial_sql), **serial_params
+                ).fetchone()[1]
 
-            code = '{0}{1}{2}'.format(prefix, separator, formatted_serial)
-            self.save_code(code)
+            last_value = conn.execute(
+                update_sql, count=count, key=code_prefix
+            ).scalar()
 
-            if hide_prefix:
-                code = formatted_serial
+            if last_value is None:
+                last_value = conn.execute(
+                    seed_sql, **serial_params
+                ).scalar()
 
-            # add new code with the formatted number
-            return code
+        return last_value
 
     def save_code(self, code):
         """
@@ -153,6 +225,22 @@ class CodeGenerator:
         self.code_model_obj.code = code
         self.code_model_obj.save()
 
+    def save_codes(self, codes):
+        """
+        Saves the codes to the code table using a single insert.
+        :param codes: The unique codes generated.
+        :type codes: list
+        """
+        if len(codes) == 1:
+            self.save_code(codes[0])
+            return
+
+        code_table = self.code_model.__table__
+        with STDMDb.instance().engine.begin() as conn:
+            conn.execute(
+                code_table.insert().values([{'code': c} for c in codes])
+            )
+
     def search_similar_code(self, prefix, separator):
         """
         Queries the database on the column to get all the values matching
@@ -1,7 +1,10 @@
+import time
+
 from sqlalchemy import (
     MetaData
 )
 from sqlalchemy.engine import reflection
+from sqlalchemy.sql.expression import text
 from sqlalchemy.orm.interfaces import (
     MANYTOMANY,
 )
@@ -16,6 +19,72 @@ from stdm.data.database import (
     STDMDb
 )
 
+# Models created by entity_model indexed by (database, profile, entity,
+# entity_only, with_supporting_document)
+_entity_model_cache = {}
+
+# Hash of the table definitions at the time the models were cached and the
+# time the hash was last checked
+_schema_signature = None
+_schema_checked_at = 0
+
+# Minimum interval, in seconds, between checks for schema changes made
+# outside this session
+SCHEMA_CHECK_INTERVAL = 30
+
+_SCHEMA_SIGNATURE_SQL = text(
+    "SELECT md5(string_agg(c.relname || '.' || a.attname || ':' || "
+    "a.atttypid::text, ',' ORDER BY c.relname, a.attnum)) "
+    "FROM pg_attribute a "
+    "JOIN pg_class c ON c.oid = a.attrelid "
+    "JOIN pg_namespace n ON n.oid = c.relnamespace "
+    "WHERE n.nspname = 'public' AND c.relkind IN ('r', 'v', 'm') "
+    "AND a.attnum > 0 AND NOT a.attisdropped"
+)
+
+
+def clear_entity_model_cache():
+    """
+    Removes all models cached by entity_model. Should be called whenever
+    the schema of the entity tables changes e.g. after the configuration
+    wizard has updated the database.
+    """
+    global _schema_signature, _schema_checked_at
+
+    _entity_model_cache.clear()
+    _schema_signature = None
+    _schema_checked_at = 0
+
+
+def _schema_hash():
+    # Hash of the table and column definitions in the public schema
+    conn = metadata.bind.connect()
+    try:
+        return conn.execute(_SCHEMA_SIGNATURE_SQL).scalar()
+    finally:
+        conn.close()
+
+
+def _validate_entity_model_cache():
+    """
+    Clears the cached models if the table definitions have changed since
+    they were cached. The check is done at most once every
+    SCHEMA_CHECK_INTERVAL seconds.
+    """
+    global _schema_signature, _schema_checked_at
+
+    now = time.monotonic()
+    if _schema_signature is not None and \
+            now - _schema_checked_at < SCHEMA_CHECK_INTERVAL:
+        return
+
+    signature = _schema_hash()
+    if signature != _schema_signature:
+        _entity_model_cache.clear()
+
+    _schema_signature = signature
+    _schema_checked_at = now
+
 
 def _bind_metadata(metadata):
     # Ensures there is a connectable set in the metadata
@@ -57,13 +126,41 @@ def entity_model(entity, entity_only=False, with_supporting_document=False):
     not be reflected.
     :type entity_only: bool
     :return: An SQLAlchemy model reflected from the table in the database
-    corresponding to the specified entity object.
+    corresponding to the specified entity object. Models are cached per
+    profile and entity, and reused until the schema changes.
     """
 
     if entity.TYPE_INFO == 'ENTITY_SUPPORTING_DOCUMENT':
         raise TypeError('<EntitySupportingDocument> type not supported. '
                         'Please use the parent entity.')
 
+    _bind_metadata(metadata)
+    _validate_entity_model_cache()
+
+    cache_key = (
+        str(metadata.bind.url),
+        getattr(entity.profile, 'name', ''),
+        entity.name,
+        entity_only,
+        with_supporting_document
+    )
+    model = _entity_model_cache.get(cache_key, None)
+    if model is None:
+        model = _create_entity_model(
+            entity,
+            entity_only,
+            with_supporting_document
+        )
+        _entity_model_cache[cache_key] = model
+
+    return model
+
+
+def _create_entity_model(entity, entity_only, with_supporting_document):
+    """
+    Reflects the tables for the entity and creates the mapped classes. See
+    entity_model.
+    """
     rf_entities = [entity.name]
 
     if not entity_only:
@@ -75,8 +172,6 @@ def entity_model(entity, entity_only=False, with_supporting_document=False):
         rf_entities.extend(children)
         rf_entities.extend(associations)
 
-    _bind_metadata(metadata)
-
     # We will use a different metadata object just for reflecting 'rf_entities'
     rf_metadata = MetaData(metadata.bind)
     rf_metadata.reflect(only=rf_entities)
@@ -23,17 +23,21 @@ from qgis.PyQt.QtCore import (
     pyqtSignal,
     QObject
 )
-from qgis.core import QgsApplication
 from sqlalchemy.exc import SQLAlchemyError
 
-from stdm.data.configuration import profile_foreign_keys
-from stdm.data.configuration.db_items import DbItem
+from stdm.data.configuration import clear_entity_model_cache
 from stdm.data.configuration.exception import ConfigurationException
+from stdm.data.configuration.migration_plan import (
+    CatalogSnapshot,
+    MigrationPlan
+)
 from stdm.data.configuration.stdm_configuration import StdmConfiguration
 from stdm.data.database import (
     metadata,
     STDMDb
 )
+from stdm.data.index_advisor import IndexAdvisor
+from stdm.settings.registryconfig import build_advised_indexes
 
 LOGGER = logging.getLogger('stdm')
 
@@ -59,6 +63,7 @@ class ConfigurationSchemaUpdater(QObject):
         self.config = StdmConfiguration.instance()
         self.engine = engine
         self.metadata = metadata
+        self.plan = None
 
         # Use the default engine if None is specified.
         if self.engine is None:
@@ -68,11 +73,16 @@ class ConfigurationSchemaUpdater(QObject):
         if self.metadata.bind is None:
             self.metadata.bind = self.engine
 
-    def exec_(self):
+    def exec_(self, dry_run=False):
         """
         Initiate the process of updating the schema based on the specified
-        configuration. The object will determine whether the schema needs to
-        be created or updated.
+        configuration. The changes required are computed into a migration
+        plan from a snapshot of the database catalogue and run in one
+        transaction.
+        :param dry_run: True to run the plan and roll it back, reporting
+        the statements and the duration of each step without changing the
+        database or the configuration.
+        :type dry_run: bool
         """
         self.update_started.emit()
 
@@ -89,194 +99,130 @@ class ConfigurationSchemaUpdater(QObject):
             return
 
         try:
-            # Iterate through removed profiles first
-            for rp in self.config.removed_profiles:
-                self.remove_profile(rp)
-
-            # Iterate through profiles
-            for p in self.config.profiles.values():
-                self.update_profile(p)
+            self.plan = self.migration_plan()
+
+            msg = self.tr('{0} schema changes found.').format(len(self.plan))
+            self.update_progress.emit(ConfigurationSchemaUpdater.INFORMATION, msg)
+
+            duration = self.plan.execute(
+                self.engine,
+                self.metadata,
+                dry_run,
+                self._on_step_finished
+            )
+
+            if dry_run:
+                for line in self.plan.preview():
+                    self.update_progress.emit(
+                        ConfigurationSchemaUpdater.INFORMATION, line
+                    )
+            else:
+                # Delete removed profile objects
+                self._clean_removed_profiles()
+
+                if build_advised_indexes():
+                    self.build_advised_indexes()
+
+            msg = self.tr('Schema changes {0} in {1:.2f} seconds.').format(
+                self.tr('previewed') if dry_run else self.tr('applied'),
+                duration
+            )
+            LOGGER.debug(msg)
+            self.update_progress.emit(ConfigurationSchemaUpdater.INFORMATION, msg)
 
-            # Delete removed profile objects
-            self._clean_removed_profiles()
+            # Cached models no longer reflect the updated tables
+            clear_entity_model_cache()
 
             self.update_completed.emit(True)
 
-        except SQLAlchemyError as sae:
-            msg = str(sae)
+        except (SQLAlchemyError, ConfigurationException) as err:
+            msg = str(err)
+
+            clear_entity_model_cache()
 
             self.update_progress.emit(ConfigurationSchemaUpdater.ERROR, msg)
+            self.update_progress.emit(
+                ConfigurationSchemaUpdater.ERROR,
+                self.tr('The schema changes have been rolled back.')
+            )
 
             LOGGER.debug(msg)
 
             self.update_completed.emit(False)
 
-    def _clean_removed_profiles(self):
-        # Delete removed profiles
-        for p in self.config.removed_profiles:
-            p.deleteLater()
-            QgsApplication.processEvents()
-
-        self.config.reset_removed_profiles()
-
-    def remove_profile(self, profile):
+    def migration_plan(self):
         """
-        Deletes the entities in the given profile from the database.
-        :param profile: Profile whose entities are to be deleted.
-        :type profile: Profile
+        :return: Schema changes required to apply the configuration,
+        computed from a single snapshot of the database catalogue.
+        :rtype: MigrationPlan
         """
-        trans_msg = 'Attempting to delete {0} profile...'.format(
-            profile.name)
-        msg = self.tr(trans_msg)
-
-        LOGGER.debug(trans_msg)
-
-        self.update_progress.emit(ConfigurationSchemaUpdater.INFORMATION, msg)
-
-        # Delete basic view first
-        profile.social_tenure.delete_view(self.engine)
-
-        # Drop relations
-        self._drop_entity_relations(profile)
-
-        # Drop entities
-        self._update_entities(profile.removed_entities)
+        snapshot = CatalogSnapshot.take(self.engine)
 
-    def _drop_entity_relations(self, profile):
-        trans_msg = self.tr('Removing redundant foreign key constraints...')
-        self.update_progress.emit(ConfigurationSchemaUpdater.INFORMATION, trans_msg)
+        return MigrationPlan.build(self.config, snapshot, self.metadata)
 
-        # Get existing foreign key names
-        fks = profile_foreign_keys(profile)
-
-        try:
-
-            # Drop removed relations
-            for er in profile.removed_relations:
-                # Assert if the foreign key exists and skip drop if it exists
-                if er.autoname in fks:
-                    continue
-
-                status = er.drop_foreign_key_constraint()
-
-                if not status:
-                    msg = self.tr('Error in removing {0} foreign key '
-                                  'constraint.'.format(er.autoname))
-
-                else:
-                    del profile.relations[er.name]
-
-                    msg = self.tr('{0} foreign key constraint successfully '
-                                  'removed.'.format(er.autoname))
-
-                QgsApplication.processEvents()
-
-                LOGGER.debug(msg)
-        except ConfigurationException as ce:
-            msg = str(ce)
-            self.update_progress.emit(ConfigurationSchemaUpdater.ERROR, msg)
-            LOGGER.debug(msg)
-            self.update_completed.emit(False)
-
-    def update_profile(self, profile):
+    def preview(self):
         """
-        Updates the given profile.
-        :param profile: Profile instance.
-        :type profile: Profile
+        :return: Description of the schema changes required to apply the
+        configuration, without running them.
+        :rtype: list
         """
-        trans_msg = 'Scanning for changes in {0} profile...'.format(
-            profile.name)
-
-        msg = self.tr(trans_msg)
-
-        LOGGER.debug(trans_msg)
+        return self.migration_plan().preview()
 
-        self.update_progress.emit(ConfigurationSchemaUpdater.INFORMATION, msg)
-
-        self._drop_entity_relations(profile)
-
-        # Drop removed entities first
-        self._update_entities(profile.removed_entities)
-
-        # Now iterate through new or updated entities
-        self._update_entities(list(profile.entities.values()))
-
-        # Update entity relations by creating foreign key references
-        self.update_entity_relations(profile)
-
-        # Create basic STR database view
-        try:
-            profile.social_tenure.create_view(self.engine)
-
-        except ConfigurationException as ce:
-            msg = str(ce)
-
-            self.update_progress.emit(ConfigurationSchemaUpdater.ERROR, msg)
-
-            LOGGER.debug(msg)
-
-            self.update_completed.emit(False)
-
-    def _update_entities(self, entities):
-        for e in entities:
-            action = e.action
-
-            if action != DbItem.NONE:
-                action_txt = str(self._action_text(action))
-                entity_text = self.tr('entity')
-                trans_msg = '{0} {1} {2}...'.format(
-                    action_txt.capitalize(), e.short_name, entity_text)
-
-                msg = trans_msg
-
-                LOGGER.debug(trans_msg)
-
-                self.update_progress.emit(ConfigurationSchemaUpdater.INFORMATION, msg)
-
-                e.update(self.engine, self.metadata)
-
-            QgsApplication.processEvents()
-
-    def update_entity_relations(self, profile):
+    def build_advised_indexes(self):
         """
-        Update entity relations in the profile by creating the corresponding
-        foreign key references.
-        :param profile: Profile whose foreign key references are to be updated.
-        :type profile: Profile
+        Creates the indexes missing on the tables of the profiles, without
+        blocking writes to the tables. Indexes that cannot be created are
+        reported as warnings as the schema update has already been
+        committed.
         """
-        fks = profile_foreign_keys(profile)
+        for profile in self.config.profiles.values():
+            advisor = IndexAdvisor(profile, self.engine)
+            try:
+                proposals = advisor.propose()
+            except SQLAlchemyError as err:
+                msg = self.tr('Indexes for {0} could not be '
+                              'checked. {1}').format(profile.name, err)
+                LOGGER.debug(msg)
+                self.update_progress.emit(
+                    ConfigurationSchemaUpdater.WARNING, msg
+                )
 
-        for er in profile.relations.values():
-            # Assert if the EntityRelation object is valid
-            if er.valid()[0]:
-                # Assert if the entity relation already exists
-                if er.autoname in fks:
-                    LOGGER.debug('{0} foreign key already exists.'.format(er.autoname))
+                continue
 
-                    continue
+            if len(proposals) > 0:
+                advisor.build(proposals, self._on_index_built)
 
-                status = er.create_foreign_key_constraint()
-                if not status:
-                    msg = self.tr('Error in creating {0} foreign key '
-                                  'constraint.'.format(er.name))
+    def _on_index_built(self, proposal):
+        if proposal.error is None:
+            msg_type = ConfigurationSchemaUpdater.INFORMATION
+            msg = self.tr('Created {0}').format(proposal)
+        else:
+            msg_type = ConfigurationSchemaUpdater.WARNING
+            msg = self.tr('{0} not created. {1}').format(
+                proposal, proposal.error
+            )
 
-                else:
-                    msg = self.tr('{0} foreign key constraint successfully '
-                                  'created.'.format(er.name))
+        LOGGER.debug(msg)
 
-                LOGGER.debug(msg)
+        self.update_progress.emit(msg_type, msg)
 
-            QgsApplication.processEvents()
+    def _on_step_finished(self, step):
+        if step.succeeded:
+            msg_type = ConfigurationSchemaUpdater.INFORMATION
+            msg = '{0} ({1:.2f} s)'.format(step.description, step.duration)
+        else:
+            msg_type = ConfigurationSchemaUpdater.WARNING
+            msg = self.tr('{0} failed. {1}').format(
+                step.description, step.error
+            )
 
-    def _action_text(self, action):
-        if action == DbItem.CREATE:
-            return self.tr('creating')
+        LOGGER.debug(msg)
 
-        elif action == DbItem.ALTER:
-            return self.tr('updating')
+        self.update_progress.emit(msg_type, msg)
 
-        elif action == DbItem.DROP:
-            return self.tr('deleting')
+    def _clean_removed_profiles(self):
+        # Delete removed profiles
+        for p in self.config.removed_profiles:
+            p.deleteLater()
 
-        else:
-            return 'UNKNOWN ACTION'
+        self.config.reset_removed_profiles()
@@ -77,6 +77,7 @@ class EntityRelation:
     @parent.setter
     def parent(self, entity):
         self._parent = self._obj_from_str(entity)
+        self._invalidate_profile_indexes()
 
     @property
     def child(self):
@@ -85,6 +86,12 @@ class EntityRelation:
     @child.setter
     def child(self, entity):
         self._child = self._obj_from_str(entity)
+        self._invalidate_profile_indexes()
+
+    def _invalidate_profile_indexes(self):
+        # The profile indexes relations by parent and child names
+        if self.profile is not None:
+            self.profile.invalidate_relation_indexes()
 
     @property
     def name(self):
@@ -0,0 +1,503 @@
+"""
+/***************************************************************************
+Name                 : migration_plan
+Description          : Plan of the schema changes required to apply the
+                       configuration to the database, computed from a single
+                       snapshot of the database catalogue and run in one
+                       transaction.
+Date                 : 18/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import logging
+import time
+from collections import defaultdict
+
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql.expression import text
+
+from stdm.data.configuration.db_items import DbItem
+from stdm.data.configuration.exception import ConfigurationException
+from stdm.data.database import STDMDb
+from stdm.data.display_views import drop_display_views
+from stdm.data.pg_utils import shared_transaction
+
+LOGGER = logging.getLogger('stdm')
+
+_RELATIONS_SQL = "SELECT c.relname, c.relkind " \
+                 "FROM pg_class c " \
+                 "JOIN pg_namespace n ON n.oid = c.relnamespace " \
+                 "WHERE n.nspname = 'public' " \
+                 "AND c.relkind IN ('r', 'p', 'v', 'm')"
+
+_COLUMNS_SQL = "SELECT c.relname, a.attname " \
+               "FROM pg_attribute a " \
+               "JOIN pg_class c ON c.oid = a.attrelid " \
+               "JOIN pg_namespace n ON n.oid = c.relnamespace " \
+               "WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p') " \
+               "AND a.attnum > 0 AND NOT a.attisdropped"
+
+_FOREIGN_KEYS_SQL = "SELECT con.conname, c.relname " \
+                    "FROM pg_constraint con " \
+                    "JOIN pg_class c ON c.oid = con.conrelid " \
+                    "JOIN pg_namespace n ON n.oid = con.connamespace " \
+                    "WHERE n.nspname = 'public' AND con.contype = 'f'"
+
+
+class CatalogSnapshot(object):
+    """
+    Tables, views, columns and foreign keys in the public schema, read
+    from the database catalogue in one pass.
+    """
+
+    def __init__(self, tables=None, views=None, columns=None,
+                 foreign_keys=None):
+        self.tables = set(tables or [])
+        self.views = set(views or [])
+        self.columns = defaultdict(set, columns or {})
+        self.foreign_keys = dict(foreign_keys or {})
+
+    @classmethod
+    def take(cls, connectable):
+        """
+        :param connectable: Engine or connection to the database.
+        :type connectable: Engine
+        :return: Snapshot of the database catalogue.
+        :rtype: CatalogSnapshot
+        """
+        tables = []
+        views = []
+        for r in connectable.execute(text(_RELATIONS_SQL)):
+            if r['relkind'] in ('v', 'm'):
+                views.append(r['relname'])
+            else:
+                tables.append(r['relname'])
+
+        columns = defaultdict(set)
+        for r in connectable.execute(text(_COLUMNS_SQL)):
+            columns[r['relname']].add(r['attname'])
+
+        foreign_keys = dict(
+            (r['conname'], r['relname'])
+            for r in connectable.execute(text(_FOREIGN_KEYS_SQL))
+        )
+
+        return cls(tables, views, columns, foreign_keys)
+
+    def table_exists(self, name):
+        """
+        :param name: Table name.
+        :type name: str
+        :return: True if the table exists.
+        :rtype: bool
+        """
+        return name in self.tables
+
+
+class MigrationStep(object):
+    """
+    A schema change in the migration plan.
+    """
+    DROP_VIEW, DROP_FOREIGN_KEY, CREATE, ALTER, DROP, CREATE_FOREIGN_KEY, \
+    CREATE_VIEW = ('DROP VIEW', 'DROP FOREIGN KEY', 'CREATE', 'ALTER',
+                   'DROP', 'CREATE FOREIGN KEY', 'CREATE VIEW')
+
+    def __init__(self, kind, target, description, runner, required=True,
+                 on_commit=None):
+        """
+        :param kind: Type of change.
+        :type kind: str
+        :param target: Name of the table, view or constraint changed.
+        :type target: str
+        :param description: Summary of the change.
+        :type description: str
+        :param runner: Callable, accepting the connection of the migration
+        transaction, that makes the change. Returning False marks the step
+        as failed.
+        :type runner: callable
+        :param required: True if the migration should be rolled back when
+        the step fails, False if the failure is only reported.
+        :type required: bool
+        :param on_commit: Callable run once the migration has been
+        committed, for updating the configuration.
+        :type on_commit: callable
+        """
+        self.kind = kind
+        self.target = target
+        self.description = description
+        self.required = required
+        self._runner = runner
+        self._on_commit = on_commit
+
+        # Set once the step has been run
+        self.statements = []
+        self.duration = 0.0
+        self.succeeded = None
+        self.error = ''
+
+    def __str__(self):
+        return '{0} {1}: {2}'.format(self.kind, self.target, self.description)
+
+    def run(self, connection):
+        """
+        Makes the change using the connection of the migration transaction.
+        :return: False if the change failed.
+        :rtype: bool
+        """
+        return self._runner(connection) is not False
+
+    def committed(self):
+        """
+        Called once the migration has been committed.
+        """
+        if self._on_commit is not None:
+            self._on_commit()
+
+
+class MigrationPlan(object):
+    """
+    Ordered schema changes required to apply the profiles in the
+    configuration to the database.
+    """
+
+    def __init__(self, steps=None):
+        self.steps = list(steps or [])
+
+        # Configuration updates, not requiring schema changes, applied once
+        # the migration has been committed
+        self._config_updates = []
+
+    def __len__(self):
+        return len(self.steps)
+
+    @classmethod
+    def build(cls, config, snapshot, metadata):
+        """
+        Computes the changes required by the removed and current profiles
+        in the configuration. Changes that the snapshot shows are not
+        needed, such as dropping a missing table or creating an existing
+        foreign key, are left out.
+        :param config: Configuration to be applied.
+        :type config: StdmConfiguration
+        :param snapshot: Snapshot of the database catalogue.
+        :type snapshot: CatalogSnapshot
+        :param metadata: Database container with the schema definition.
+        :type metadata: MetaData
+        :return: The migration plan.
+        :rtype: MigrationPlan
+        """
+        plan = cls()
+        foreign_keys = set(snapshot.foreign_keys.keys())
+
+        for rp in config.removed_profiles:
+            plan._add_view_drops(rp)
+            plan._add_foreign_key_drops(rp, foreign_keys)
+            plan._add_entity_steps(rp.removed_entities, snapshot, metadata)
+
+        for p in config.profiles.values():
+            plan._add_display_view_drops(p)
+            plan._add_foreign_key_drops(p, foreign_keys)
+            plan._add_entity_steps(p.removed_entities, snapshot, metadata)
+            plan._add_entity_steps(
+                list(p.entities.values()), snapshot, metadata
+            )
+            plan._add_foreign_key_creates(p, foreign_keys)
+            plan._add_view_create(p)
+
+        plan._add_code_counter_create(config, snapshot)
+
+        return plan
+
+    def _add_view_drops(self, profile):
+        social_tenure = profile.social_tenure
+        self.steps.append(MigrationStep(
+            MigrationStep.DROP_VIEW,
+            social_tenure.name,
+            'Drop social tenure relationship views',
+            social_tenure.delete_view
+        ))
+        self._add_display_view_drops(profile)
+
+    def _add_display_view_drops(self, profile):
+        # Display views depend on the entity tables and are recreated when
+        # the layers are next loaded.
+        self.steps.append(MigrationStep(
+            MigrationStep.DROP_VIEW,
+            profile.name,
+            'Drop spatial layer display views',
+            lambda conn: drop_display_views(profile)
+        ))
+
+    def _add_foreign_key_drops(self, profile, foreign_keys):
+        for er in profile.removed_relations:
+            name = er.autoname
+
+            def remove_relation(er=er):
+                if er.name in profile.relations:
+                    del profile.relations[er.name]
+
+            if name not in foreign_keys:
+                # Nothing to drop, only the configuration is updated
+                self._config_updates.append(remove_relation)
+                continue
+
+            foreign_keys.discard(name)
+            self.steps.append(MigrationStep(
+                MigrationStep.DROP_FOREIGN_KEY,
+                name,
+                'Drop {0} foreign key constraint'.format(name),
+                lambda conn, er=er: er.drop_foreign_key_constraint(),
+                required=False,
+                on_commit=remove_relation
+            ))
+
+    def _add_entity_steps(self, entities, snapshot, metadata):
+        for e in entities:
+            action = e.action
+            if action == DbItem.NONE:
+                continue
+
+            if action == DbItem.DROP:
+                if not snapshot.table_exists(e.name):
+                    continue
+                kind = MigrationStep.DROP
+                description = 'Drop {0} table'.format(e.name)
+
+            elif action == DbItem.CREATE and not snapshot.table_exists(e.name):
+                kind = MigrationStep.CREATE
+                description = 'Create {0} table with {1} columns'.format(
+                    e.name, len(e.columns)
+                )
+
+            else:
+                kind = MigrationStep.ALTER
+                description = 'Alter {0} table: {1}'.format(
+                    e.name,
+                    self._column_changes(e, snapshot.columns[e.name])
+                )
+
+            self.steps.append(MigrationStep(
+                kind,
+                e.name,
+                description,
+                lambda conn, e=e: e.update(conn, metadata)
+            ))
+
+    @staticmethod
+    def _column_changes(entity, existing_columns):
+        # Summary of the column changes of an entity
+        added, altered, dropped = [], [], []
+        columns = entity.updated_columns.values()
+        if entity.action == DbItem.CREATE:
+            columns = entity.columns.values()
+
+        for c in columns:
+            if c.action == DbItem.DROP:
+                if c.name in existing_columns:
+                    dropped.append(c.name)
+            elif c.name in existing_columns:
+                altered.append(c.name)
+            elif c.name != 'id':
+                added.append(c.name)
+
+        changes = []
+        for label, names in (('add', added), ('alter', altered),
+                             ('drop', dropped)):
+            if len(names) > 0:
+                changes.append('{0} {1}'.format(label, ', '.join(names)))
+
+        return '; '.join(changes) or 'no column changes'
+
+    def _add_foreign_key_creates(self, profile, foreign_keys):
+        removed = set(er.name for er in profile.removed_relations)
+        for er in profile.relations.values():
+            # Assert if the EntityRelation object is valid
+            if er.name in removed or not er.valid()[0]:
+                continue
+
+            name = er.autoname
+            if name in foreign_keys:
+                LOGGER.debug('%s foreign key already exists.', name)
+                continue
+
+            foreign_keys.add(name)
+            self.steps.append(MigrationStep(
+                MigrationStep.CREATE_FOREIGN_KEY,
+                name,
+                'Create {0} foreign key constraint referencing {1}'.format(
+                    name, er.parent.name
+                ),
+                lambda conn, er=er: er.create_foreign_key_constraint(),
+                required=False
+            ))
+
+    def _add_view_create(self, profile):
+        social_tenure = profile.social_tenure
+        self.steps.append(MigrationStep(
+            MigrationStep.CREATE_VIEW,
+            social_tenure.name,
+            'Create social tenure relationship views',
+            social_tenure.create_view,
+            required=False
+        ))
+
+    def _add_code_counter_create(self, config, snapshot):
+        # Imported here as the code generator depends on the settings,
+        # which import the schema updater.
+        from stdm.data.code_generator import (
+            CODE_COUNTER_TABLE,
+            create_code_counter_table
+        )
+
+        if snapshot.table_exists(CODE_COUNTER_TABLE):
+            return
+
+        code_tables = [
+            p.auto_generate_code.name for p in config.profiles.values()
+        ]
+        self.steps.append(MigrationStep(
+            MigrationStep.CREATE,
+            CODE_COUNTER_TABLE,
+            'Create code counter table',
+            lambda conn: create_code_counter_table(conn, code_tables)
+        ))
+
+    def preview(self):
+        """
+        :return: Description of each step of the plan and, if the plan has
+        been run, the statements it executed and its duration.
+        :rtype: list
+        """
+        lines = []
+        for i, step in enumerate(self.steps, 1):
+            line = '{0}. {1}'.format(i, step)
+            if step.succeeded is not None:
+                line = '{0} ({1:.2f} s{2})'.format(
+                    line,
+                    step.duration,
+                    '' if step.succeeded else ', failed'
+                )
+            lines.append(line)
+            lines.extend('    {0};'.format(s.strip()) for s in step.statements)
+
+        return lines
+
+    def execute(self, engine, metadata, dry_run=False, step_finished=None):
+        """
+        Runs all the steps of the plan in one transaction. Statements run
+        through _execute, the ORM session and the metadata are routed to
+        the transaction. Each step runs in a savepoint so that failed
+        optional steps are rolled back on their own while failed required
+        steps roll back the whole migration.
+        :param engine: Engine of the database to be migrated.
+        :type engine: Engine
+        :param metadata: Database container with the schema definition.
+        :type metadata: MetaData
+        :param dry_run: True to roll back the transaction once all the
+        steps have run, so that the statements and their durations can be
+        previewed without changing the database.
+        :type dry_run: bool
+        :param step_finished: Callable accepting each step once it has run.
+        :type step_finished: callable
+        :return: Total duration, in seconds.
+        :rtype: float
+        """
+        db = STDMDb.instance()
+        session = db.session
+        session_bind = session.bind
+        metadata_bind = metadata.bind
+        tables = set(metadata.tables.keys())
+
+        connection = engine.connect()
+        current = {'step': None}
+
+        def on_cursor_execute(conn, cursor, statement, parameters, context,
+                              executemany):
+            if current['step'] is not None:
+                current['step'].statements.append(statement)
+
+        event.listen(connection, 'before_cursor_execute', on_cursor_execute)
+
+        # End the transaction of the session before it joins the migration
+        session.rollback()
+        session.bind = connection
+        metadata.bind = connection
+
+        started = time.perf_counter()
+        committed = False
+        transaction = connection.begin()
+        try:
+            with shared_transaction(connection):
+                for step in self.steps:
+                    current['step'] = step
+                    self._run_step(step, connection)
+                    current['step'] = None
+
+                    if step_finished is not None:
+                        step_finished(step)
+
+            if dry_run:
+                transaction.rollback()
+            else:
+                transaction.commit()
+                committed = True
+
+        except Exception:
+            transaction.rollback()
+            raise
+
+        finally:
+            session.rollback()
+            session.bind = session_bind
+            metadata.bind = metadata_bind
+            event.remove(connection, 'before_cursor_execute', on_cursor_execute)
+            connection.close()
+
+            # Tables defined during a dry run or a failed migration do not
+            # exist in the database
+            if not committed:
+                for name in set(metadata.tables.keys()) - tables:
+                    metadata.remove(metadata.tables[name])
+
+        if committed:
+            for step in self.steps:
+                if step.succeeded:
+                    step.committed()
+
+            for update in self._config_updates:
+                update()
+
+        return time.perf_counter() - started
+
+    def _run_step(self, step, connection):
+        savepoint = connection.begin_nested()
+        start = time.perf_counter()
+        try:
+            step.succeeded = step.run(connection)
+
+        except (SQLAlchemyError, ConfigurationException) as err:
+            if step.required:
+                raise
+
+            step.succeeded = False
+            step.error = str(err)
+
+        finally:
+            step.duration = time.perf_counter() - start
+
+        if step.succeeded:
+            savepoint.commit()
+        else:
+            savepoint.rollback()
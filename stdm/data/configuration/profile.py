@@ -50,6 +50,46 @@ from stdm.data.configuration.value_list import (
 LOGGER = logging.getLogger('stdm')
 
 
+class _VersionedDict(OrderedDict):
+    """
+    OrderedDict whose version number is incremented whenever an item is
+    added, replaced or removed. Used by the profile to detect changes made
+    to its collections outside of its methods.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.version = 0
+        super().__init__(*args, **kwargs)
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.version += 1
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.version += 1
+
+    def pop(self, *args):
+        self.version += 1
+        return super().pop(*args)
+
+    def popitem(self, *args, **kwargs):
+        self.version += 1
+        return super().popitem(*args, **kwargs)
+
+    def setdefault(self, key, default=None):
+        self.version += 1
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        self.version += 1
+        super().update(*args, **kwargs)
+
+    def clear(self):
+        self.version += 1
+        super().clear()
+
+
 class Profile(QObject):
     """
     A profile represents a collection of related entities, of which some
@@ -76,6 +116,17 @@ class Profile(QObject):
         self.description = ''
         self.configuration = configuration
         self.prefix = self._prefix()
+
+        # Secondary indexes of entities by name and relations by parent
+        # and child names. An index is rebuilt if the collection version
+        # differs from the one it was built or updated for.
+        self._entity_index = {}
+        self._entity_index_version = None
+        self._parent_relations_index = {}
+        self._child_relations_index = {}
+        self._relation_index_version = None
+        self._relation_endpoints_version = 0
+
         self.entities = OrderedDict()
         self.relations = OrderedDict()
         self.removed_relations = []
@@ -101,6 +152,85 @@ class Profile(QObject):
         self.add_entity(self.social_tenure)
         self.add_entity(self._gender_lookup)
 
+    @property
+    def entities(self):
+        """
+        :return: Entities in the profile indexed by short name.
+        :rtype: OrderedDict
+        """
+        return self._entities
+
+    @entities.setter
+    def entities(self, entities):
+        self._entities = _VersionedDict(entities)
+
+    @property
+    def relations(self):
+        """
+        :return: Entity relations in the profile indexed by name.
+        :rtype: OrderedDict
+        """
+        return self._relations
+
+    @relations.setter
+    def relations(self, relations):
+        self._relations = _VersionedDict(relations)
+
+    def _current_entity_index(self):
+        # Returns the name index if it is up to date, otherwise None.
+        if self._entity_index_version == self._entities.version:
+            return self._entity_index
+
+        return None
+
+    def _name_index(self):
+        # Returns the name index, rebuilding it if it is out of date.
+        if self._current_entity_index() is None:
+            self._entity_index = {}
+            for e in reversed(list(self._entities.values())):
+                self._entity_index[e.name] = e
+            self._entity_index_version = self._entities.version
+
+        return self._entity_index
+
+    def _relations_version(self):
+        # Relation indexes depend on the names of the related entities.
+        return (
+            self._relations.version,
+            self._entities.version,
+            self._relation_endpoints_version
+        )
+
+    def _relation_indexes(self):
+        # Returns the parent and child indexes, rebuilding them if they
+        # are out of date.
+        if self._relation_index_version != self._relations_version():
+            self._parent_relations_index = {}
+            self._child_relations_index = {}
+            for er in self._relations.values():
+                self._index_relation(er)
+            self._relation_index_version = self._relations_version()
+
+        return self._parent_relations_index, self._child_relations_index
+
+    def _index_relation(self, entity_relation):
+        if entity_relation.parent is not None:
+            self._parent_relations_index.setdefault(
+                entity_relation.parent.name, []
+            ).append(entity_relation)
+
+        if entity_relation.child is not None:
+            self._child_relations_index.setdefault(
+                entity_relation.child.name, []
+            ).append(entity_relation)
+
+    def invalidate_relation_indexes(self):
+        """
+        Flags the parent and child relation indexes as out of date. Called
+        when the parent or child entity of a relation changes.
+        """
+        self._relation_endpoints_version += 1
+
     def _prefix(self) -> str:
         prefixes = self.configuration.prefixes()
 
@@ -248,8 +378,14 @@ class Profile(QObject):
         ValueLists are also searched and returned.
         :rtype: Entity
         """
-        items = [e for e in self.entities.values() if e.name == name]
-        return None if len(items) == 0 else items[0]
+        entity = self._name_index().get(name, None)
+
+        # The entity could have been renamed without updating the collection
+        if entity is not None and entity.name != name:
+            self._entity_index_version = None
+            entity = self._name_index().get(name, None)
+
+        return entity
 
     def relation(self, name: str):
         """
@@ -290,10 +426,9 @@ class Profile(QObject):
         if not isinstance(item, Entity):
             raise TypeError(self.tr('Entity object type expected.'))
 
-        name = item.name
+        parent_index, _ = self._relation_indexes()
 
-        return [er for er in self.relations.values()
-                if er.parent.name == name]
+        return list(parent_index.get(item.name, []))
 
     def child_relations(self, item):
         """
@@ -308,10 +443,9 @@ class Profile(QObject):
         if not isinstance(item, Entity):
             return []
 
-        name = item.name
+        _, child_index = self._relation_indexes()
 
-        return [er for er in self.relations.values()
-                if er.child.name == name]
+        return list(child_index.get(item.name, []))
 
     def add_entity_relation(self, entity_relation: EntityRelation):
         """
@@ -344,8 +478,15 @@ class Profile(QObject):
 
             return False
 
+        index_current = \
+            self._relation_index_version == self._relations_version()
+
         self.relations[entity_relation.name] = entity_relation
 
+        if index_current:
+            self._index_relation(entity_relation)
+            self._relation_index_version = self._relations_version()
+
         LOGGER.debug('%s entity relation added.', entity_relation.name)
 
         return True
@@ -386,13 +527,21 @@ class Profile(QObject):
         """
         # If there is an existing item with the same name,
         # and that item action is not DROP, then do not add this.
-        if item.short_name in self.entities:
-            old_item = self.entities[item.short_name]
-            if old_item.action != DbItem.DROP:
-                return
+        old_item = self.entities.get(item.short_name, None)
+        if old_item is not None and old_item.action != DbItem.DROP:
+            return
+
+        name_index = self._current_entity_index()
 
         self.entities[item.short_name] = item
 
+        if name_index is not None:
+            if old_item is not None and \
+                    name_index.get(old_item.name, None) is old_item:
+                del name_index[old_item.name]
+            name_index[item.name] = item
+            self._entity_index_version = self._entities.version
+
         LOGGER.debug('%s entity added to %s profile', item.short_name, self.name)
 
         # Raise entity added signal if enabled
@@ -439,8 +588,15 @@ class Profile(QObject):
         self.remove_association_entities(ent)
 
         # Now remove the entity from the collection
+        name_index = self._current_entity_index()
+
         del_entity = self.entities.pop(name, None)
 
+        if name_index is not None and del_entity is not None:
+            if name_index.get(del_entity.name, None) is del_entity:
+                del name_index[del_entity.name]
+            self._entity_index_version = self._entities.version
+
         LOGGER.debug('%s entity removed from %s profile', name, self.name)
 
         if del_entity is not None:
@@ -643,6 +799,10 @@ class Profile(QObject):
 
         rn_entity.rename(new_name)
 
+        # The supporting document entity is renamed as well, hence the name
+        # index is rebuilt on its next use
+        self._entity_index_version = None
+
         # Re-insert the entity
         self.add_entity(rn_entity, True)
 
@@ -25,6 +25,7 @@ from qgis.PyQt.QtCore import (
     QObject
 )
 
+from stdm.data.configuration import clear_entity_model_cache
 from stdm.data.configuration.profile import Profile
 from stdm.data.database import Singleton
 
@@ -194,3 +195,6 @@ class StdmConfiguration(QObject):
         """
         self.profiles = OrderedDict()
         self.is_null = True
+
+        # Models of the previous configuration are no longer valid
+        clear_entity_model_cache()
@@ -215,6 +215,57 @@ def alchemy_table_relationships(table_name):
     return relationship_names
 
 
+# Callables notified with (table name, record id) after Model
+# save/update/delete commits
+_write_listeners = []
+
+
+def register_write_listener(listener):
+    """
+    Registers a callable that is notified, with the table name and record id,
+    of each record inserted, updated or deleted through the Model class.
+    :param listener: Callable accepting table name and record id.
+    """
+    if listener not in _write_listeners:
+        _write_listeners.append(listener)
+
+
+def unregister_write_listener(listener):
+    """
+    Removes a callable registered using register_write_listener.
+    """
+    if listener in _write_listeners:
+        _write_listeners.remove(listener)
+
+
+def _pending_writes(session):
+    # Table names and ids of the objects to be flushed by the session
+    writes = []
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(obj, '__table__', None)
+        if table is not None:
+            writes.append((table.name, getattr(obj, 'id', None)))
+
+    return writes
+
+
+def _notify_writes(writes):
+    for table_name, record_id in writes:
+        for listener in _write_listeners:
+            listener(table_name, record_id)
+
+
+def notify_table_write(table_name):
+    """
+    Notifies the write listeners that records in the given table were
+    written outside the Model class, for instance by a bulk copy. The
+    record id passed to the listeners is None.
+    :param table_name: Name of the table.
+    :type table_name: str
+    """
+    _notify_writes([(table_name, None)])
+
+
 class Model:
     """
     Base class that handles all basic database operations.
@@ -226,6 +277,7 @@ class Model:
     def save(self):
         db = STDMDb.instance()
         db.session.add(self)
+        writes = _pending_writes(db.session)
         try:
             db.session.commit()
         except exc.SQLAlchemyError as db_error:
@@ -233,12 +285,15 @@ class Model:
             LOGGER.debug(str(db_error))
             raise db_error
 
+        _notify_writes(writes)
+
     def saveMany(self, objects=None):
         """
         Save multiple objects of the same type in one go.
         """
         db = STDMDb.instance()
         db.session.add_all(objects or [])
+        writes = _pending_writes(db.session)
         try:
             db.session.commit()
         except exc.SQLAlchemyError as db_error:
@@ -246,8 +301,11 @@ class Model:
             LOGGER.debug(str(db_error))
             raise db_error
 
+        _notify_writes(writes)
+
     def update(self):
         db = STDMDb.instance()
+        writes = _pending_writes(db.session)
         try:
             db.session.commit()
         except exc.SQLAlchemyError as db_error:
@@ -255,13 +313,17 @@ class Model:
             LOGGER.debug(str(db_error))
             raise db_error
 
+        _notify_writes(writes)
+
     def delete(self):
         from stdm.data.pg_utils import set_child_dependencies_null_on_delete
 
         db = STDMDb.instance()
         try:
             db.session.delete(self)
+            writes = _pending_writes(db.session)
             db.session.commit()
+            _notify_writes(writes)
 
             return True
         except exc.SQLAlchemyError as db_error:
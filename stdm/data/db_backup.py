@@ -0,0 +1,322 @@
+"""
+/***************************************************************************
+Name                 : db_backup
+Description          : Cross-platform helpers for running the PostgreSQL
+                       backup and restore utilities.
+Date                 : 18/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from zipfile import (
+    ZIP_DEFLATED,
+    ZIP_STORED,
+    ZipFile
+)
+
+from sqlalchemy.sql.expression import text
+
+from stdm.data.pg_utils import _execute
+
+# Number of parallel pg_dump/pg_restore jobs
+BACKUP_JOBS = max(1, min(4, os.cpu_count() or 1))
+
+# Compression level of the table data files written by pg_dump
+BACKUP_COMPRESSION_LEVEL = 6
+
+# Archive members with these extensions are already compressed
+COMPRESSED_EXTENSIONS = ('.gz', '.zst', '.lz4')
+
+_DUMP_STARTED = re.compile(r'dumping contents of table "(?P<table>[^"]+)"')
+_DUMP_FINISHED = re.compile(r'finished item \d+ TABLE DATA (?P<table>.+)$')
+
+
+def pg_base_folder():
+    """
+    :return: Base folder of the PostgreSQL installation as specified in the
+    Windows registry, an empty string if not found or on other platforms.
+    :rtype: str
+    """
+    try:
+        import winreg
+    except ImportError:
+        return ''
+
+    pg_base_value = ''
+    try:
+        reg_key = winreg.OpenKey(
+            winreg.HKEY_LOCAL_MACHINE,
+            'SOFTWARE\\PostgreSQL\\Installations\\'
+        )
+    except OSError:
+        return pg_base_value
+
+    for i in range(winreg.QueryInfoKey(reg_key)[0]):
+        try:
+            subkey_name = winreg.EnumKey(reg_key, i)
+            subkey = winreg.OpenKey(reg_key, subkey_name)
+
+            for j in range(winreg.QueryInfoKey(subkey)[1]):
+                name, value, _ = winreg.EnumValue(subkey, j)
+                if name == 'Base Directory':
+                    pg_base_value = value
+                    break
+            winreg.CloseKey(subkey)
+            if pg_base_value != '':
+                break
+        except OSError:
+            pass
+    winreg.CloseKey(reg_key)
+
+    return pg_base_value
+
+
+def find_pg_tool(name):
+    """
+    Searches for a PostgreSQL client utility in the system path and, on
+    Windows, in the PostgreSQL installation folder.
+    :param name: Name of the utility e.g. pg_dump.
+    :type name: str
+    :return: Path of the utility, an empty string if not found.
+    :rtype: str
+    """
+    tool = shutil.which(name)
+    if tool:
+        return tool
+
+    base_folder = pg_base_folder()
+    if base_folder != '':
+        tool = os.path.join(base_folder, 'bin', '{0}.exe'.format(name))
+        if os.path.exists(tool):
+            return tool
+
+    return ''
+
+
+def _process_options():
+    # Hides the console window of the utilities on Windows
+    if sys.platform.startswith('win32'):
+        return {'creationflags': subprocess.CREATE_NO_WINDOW}
+
+    return {}
+
+
+def _run(args, password, line_callback=None):
+    """
+    Runs a PostgreSQL utility, passing the password through the
+    environment. Each line written to stderr is passed to line_callback.
+    :return: Return code and the stderr output of the utility.
+    :rtype: tuple
+    """
+    env = dict(os.environ)
+    env['PGPASSWORD'] = password
+
+    process = subprocess.Popen(
+        args,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        **_process_options()
+    )
+
+    output = []
+    for line in process.stderr:
+        line = line.rstrip()
+        output.append(line)
+        if line_callback is not None:
+            line_callback(line)
+
+    process.wait()
+
+    return process.returncode, '\n'.join(output)
+
+
+def _connection_args(db_con, user):
+    return [
+        '-h', str(db_con.Host),
+        '-p', str(db_con.Port),
+        '-U', user
+    ]
+
+
+def dump_database(db_con, user, password, backup_dir, jobs=BACKUP_JOBS,
+                  tables=None, progress_callback=None):
+    """
+    Backs up the database using pg_dump in the directory format, with the
+    tables dumped by parallel jobs and the table data compressed.
+    :param db_con: Connection whose database is to be backed up.
+    :type db_con: DatabaseConnection
+    :param user: Name of the database user.
+    :type user: str
+    :param password: Password of the database user.
+    :type password: str
+    :param backup_dir: Directory to be created by pg_dump.
+    :type backup_dir: str
+    :param jobs: Number of tables dumped concurrently.
+    :type jobs: int
+    :param tables: Table name patterns, all tables are dumped if None.
+    :type tables: list
+    :param progress_callback: Callable accepting the name of each table
+    whose data has been dumped.
+    :return: True if the backup succeeded, the error message if not and
+    the dump duration, in seconds, of each table.
+    :rtype: tuple
+    """
+    pg_dump = find_pg_tool('pg_dump')
+    if pg_dump == '':
+        return False, 'pg_dump utility not found.', {}
+
+    args = [pg_dump] + _connection_args(db_con, user) + [
+        '-F', 'd',
+        '-j', str(jobs),
+        '-Z', str(BACKUP_COMPRESSION_LEVEL),
+        '-b',
+        '-v',
+        '-f', backup_dir
+    ]
+    for t in tables or []:
+        args.extend(['-t', t])
+    args.append(db_con.Database)
+
+    started = {}
+    durations = {}
+
+    def on_line(line):
+        # Started tables are schema-qualified, finished ones are not
+        match = _DUMP_STARTED.search(line)
+        if match:
+            table = match.group('table')
+            started[table.split('.')[-1]] = (table, time.monotonic())
+            return
+
+        match = _DUMP_FINISHED.search(line)
+        if match:
+            table, start = started.get(
+                match.group('table').strip(), (match.group('table'), None)
+            )
+            if start is not None:
+                durations[table] = time.monotonic() - start
+            if progress_callback is not None:
+                progress_callback(table)
+
+    return_code, output = _run(args, password, on_line)
+    if return_code != 0:
+        return False, output, durations
+
+    return True, '', durations
+
+
+def restore_database(db_con, user, password, db_name, backup_path,
+                     jobs=BACKUP_JOBS):
+    """
+    Restores a backup created by pg_dump using parallel pg_restore jobs.
+    Both the directory and custom formats are supported.
+    :return: True if the restore succeeded, else False, and the output of
+    pg_restore.
+    :rtype: tuple
+    """
+    pg_restore = find_pg_tool('pg_restore')
+    if pg_restore == '':
+        return False, 'pg_restore utility not found.'
+
+    args = [pg_restore] + _connection_args(db_con, user) + [
+        '-d', db_name,
+        '-j', str(jobs),
+        '--clean',
+        '--if-exists',
+        # Restored objects are owned by the restoring user so that the
+        # owner roles of the source server are not required.
+        '--no-owner',
+        backup_path
+    ]
+    return_code, output = _run(args, password)
+
+    return return_code == 0, output
+
+
+def create_database(db_con, user, password, db_name):
+    """
+    Creates a database using the createdb utility.
+    :return: True if the database was created, else False, and the output
+    of createdb.
+    :rtype: tuple
+    """
+    createdb = find_pg_tool('createdb')
+    if createdb == '':
+        return False, 'createdb utility not found.'
+
+    args = [createdb] + _connection_args(db_con, user) + [db_name]
+    return_code, output = _run(args, password)
+
+    return return_code == 0, output
+
+
+def table_sizes(table_pattern='%'):
+    """
+    :param table_pattern: LIKE pattern of the tables whose sizes are to be
+    returned.
+    :type table_pattern: str
+    :return: Total size on disk, in bytes, of each table in the public
+    schema, including indexes and TOAST data.
+    :rtype: dict
+    """
+    sql = 'SELECT c.relname, pg_total_relation_size(c.oid) AS size ' \
+          'FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace ' \
+          'WHERE c.relkind = \'r\' AND n.nspname = \'public\' ' \
+          'AND c.relname LIKE :pattern'
+    result = _execute(text(sql), pattern=table_pattern)
+
+    return dict(('public.{0}'.format(r['relname']), r['size']) for r in result)
+
+
+def write_archive(files, archive_path, root_folder):
+    """
+    Writes the files into a zip archive. Files are streamed into the archive
+    and compressed using deflate, except for the data files that pg_dump
+    has already compressed.
+    :param files: Paths of the files or directories to be archived.
+    :type files: list
+    :param archive_path: Path of the archive.
+    :type archive_path: str
+    :param root_folder: Folder relative to which the files are named in the
+    archive.
+    :type root_folder: str
+    """
+    with ZipFile(archive_path, 'w', ZIP_DEFLATED, allowZip64=True) as zf:
+        for path in files:
+            if os.path.isdir(path):
+                paths = [
+                    os.path.join(dir_path, f)
+                    for dir_path, _, file_names in os.walk(path)
+                    for f in file_names
+                ]
+            else:
+                paths = [path]
+
+            for p in paths:
+                compress_type = ZIP_DEFLATED
+                if p.endswith(COMPRESSED_EXTENSIONS):
+                    compress_type = ZIP_STORED
+
+                zf.write(
+                    p,
+                    arcname=os.path.relpath(p, root_folder),
+                    compress_type=compress_type
+                )
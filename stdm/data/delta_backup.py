@@ -0,0 +1,346 @@
+"""
+/***************************************************************************
+Name                 : delta_backup
+Description          : Incremental backups of the profile tables, containing
+                       only the rows changed since the previous backup.
+Date                 : 18/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+
+Changed rows are identified using the xmin system column, which holds the
+id of the transaction that last wrote each row version. Each backup records
+the oldest transaction that was still running when its snapshot was taken
+so that the next delta includes the rows written by that transaction or
+any later one. Deleted rows are detected using the list of ids of each
+table, which is exported with every delta.
+"""
+import glob
+import gzip
+import hashlib
+import json
+import os
+
+from qgis.PyQt.QtCore import QDateTime
+from sqlalchemy import create_engine
+
+from stdm.data.pg_utils import pg_table_exists
+
+# Prefix of the manifest files of the incremental backups
+DELTA_MANIFEST_PREFIX = 'delta_'
+
+# Transaction ids wrap around after 2^32 transactions
+XID_WRAPAROUND = 2 ** 32
+
+
+class DeltaBackupException(Exception):
+    """
+    Raised when an incremental backup cannot be created or applied.
+    """
+    pass
+
+
+def _raw_connection(db_con):
+    engine = create_engine(db_con.toAlchemyConnection(), echo=False)
+
+    return engine.raw_connection()
+
+
+def _file_checksum(file_path):
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(block)
+
+    return sha.hexdigest()
+
+
+def _quote_ident(name):
+    return '"{0}"'.format(name.replace('"', '""'))
+
+
+def current_snapshot(cursor):
+    """
+    :return: The oldest transaction id that was still running when the
+    current snapshot was taken and its epoch.
+    :rtype: tuple
+    """
+    cursor.execute(
+        'SELECT txid_snapshot_xmin(txid_current_snapshot())'
+    )
+    txid = cursor.fetchone()[0]
+
+    return txid % XID_WRAPAROUND, txid // XID_WRAPAROUND
+
+
+def database_snapshot(db_con):
+    """
+    :param db_con: Connection, with the user set, to the database.
+    :type db_con: DatabaseConnection
+    :return: Snapshot transaction id and epoch to be recorded with a full
+    backup that is to be taken immediately afterwards.
+    :rtype: tuple
+    """
+    conn = _raw_connection(db_con)
+    cursor = conn.cursor()
+    try:
+        return current_snapshot(cursor)
+    finally:
+        cursor.close()
+        conn.rollback()
+        conn.close()
+
+
+def profile_backup_tables(profile):
+    """
+    :param profile: Profile whose tables are to be backed up.
+    :type profile: Profile
+    :return: Names of the existing tables of the entities in the profile.
+    :rtype: list
+    """
+    return sorted(
+        e.name for e in profile.entities.values() if pg_table_exists(e.name)
+    )
+
+
+def read_manifest(manifest_path):
+    """
+    :param manifest_path: Path of a delta manifest file.
+    :type manifest_path: str
+    :return: Contents of the manifest.
+    :rtype: dict
+    """
+    with open(manifest_path, 'r') as mf:
+        return json.load(mf)
+
+
+def delta_chain(backup_folder):
+    """
+    :param backup_folder: Folder containing the base backup and the deltas.
+    :type backup_folder: str
+    :return: Paths of the manifests of the deltas in the folder, ordered
+    from the oldest to the latest.
+    :rtype: list
+    """
+    manifests = {}
+    for path in glob.glob(
+            os.path.join(backup_folder, '{0}*.json'.format(DELTA_MANIFEST_PREFIX))
+    ):
+        manifests[os.path.basename(path)] = (read_manifest(path), path)
+
+    chain = []
+    parent = None
+    while True:
+        children = [
+            path for name, (manifest, path) in manifests.items()
+            if manifest['parent'] == parent
+        ]
+        if len(children) == 0:
+            break
+        if len(children) > 1:
+            raise DeltaBackupException(
+                'More than one delta follows {0}.'.format(parent or 'the base backup')
+            )
+        chain.append(children[0])
+        parent = os.path.basename(children[0])
+
+    return chain
+
+
+def write_delta(db_con, tables, backup_folder, base_snapshot, parent=None):
+    """
+    Exports the rows written since the previous backup, and the ids of all
+    the rows, of each table into gzipped COPY files and writes a manifest
+    with their checksums. All the tables are exported from the same
+    snapshot.
+    :param db_con: Connection, with the user set, to the database.
+    :type db_con: DatabaseConnection
+    :param tables: Names of the tables to be backed up.
+    :type tables: list
+    :param backup_folder: Folder containing the base backup.
+    :type backup_folder: str
+    :param base_snapshot: Snapshot transaction id and epoch of the previous
+    backup.
+    :type base_snapshot: tuple
+    :param parent: File name of the manifest of the previous delta, None
+    if this is the first delta after the base backup.
+    :type parent: str
+    :return: Path of the manifest file.
+    :rtype: str
+    """
+    created_on = QDateTime.currentDateTime().toString('ddMMyyyyHHmmss')
+    delta_name = '{0}{1}'.format(DELTA_MANIFEST_PREFIX, created_on)
+    delta_folder = os.path.join(backup_folder, delta_name)
+    os.makedirs(delta_folder)
+
+    conn = _raw_connection(db_con)
+    conn.set_session(isolation_level='REPEATABLE READ', readonly=True)
+    cursor = conn.cursor()
+
+    try:
+        snapshot_xid, snapshot_epoch = current_snapshot(cursor)
+        base_xid, base_epoch = base_snapshot
+
+        manifest_tables = {}
+        for table in tables:
+            quoted_table = _quote_ident(table)
+            if base_epoch == snapshot_epoch:
+                where = 'WHERE xmin::text::bigint >= {0}'.format(int(base_xid))
+            else:
+                # Transaction ids have wrapped around, export all rows
+                where = ''
+
+            rows_file = os.path.join(delta_folder, '{0}.copy.gz'.format(table))
+            with gzip.open(rows_file, 'wb') as f:
+                cursor.copy_expert(
+                    'COPY (SELECT * FROM {0} {1}) TO STDOUT'.format(
+                        quoted_table, where
+                    ),
+                    f
+                )
+            row_count = cursor.rowcount
+
+            ids_file = os.path.join(delta_folder, '{0}.ids.gz'.format(table))
+            with gzip.open(ids_file, 'wb') as f:
+                cursor.copy_expert(
+                    'COPY (SELECT id FROM {0}) TO STDOUT'.format(quoted_table),
+                    f
+                )
+
+            manifest_tables[table] = {
+                'rows_file': os.path.relpath(rows_file, backup_folder),
+                'rows_sha256': _file_checksum(rows_file),
+                'changed_rows': row_count,
+                'ids_file': os.path.relpath(ids_file, backup_folder),
+                'ids_sha256': _file_checksum(ids_file)
+            }
+
+    finally:
+        cursor.close()
+        conn.rollback()
+        conn.close()
+
+    manifest = {
+        'parent': parent,
+        'created_on': created_on,
+        'database': db_con.Database,
+        'snapshot_xid': snapshot_xid,
+        'snapshot_epoch': snapshot_epoch,
+        'tables': manifest_tables
+    }
+    manifest_path = os.path.join(backup_folder, '{0}.json'.format(delta_name))
+    with open(manifest_path, 'w') as mf:
+        json.dump(manifest, mf, indent=4)
+
+    return manifest_path
+
+
+def verify_delta(manifest_path):
+    """
+    Asserts that the checksums of the files of the delta match those in
+    its manifest.
+    :param manifest_path: Path of the delta manifest file.
+    :type manifest_path: str
+    :return: Files whose checksums do not match or that are missing.
+    :rtype: list
+    """
+    backup_folder = os.path.dirname(manifest_path)
+    manifest = read_manifest(manifest_path)
+
+    invalid_files = []
+    for table_info in manifest['tables'].values():
+        for file_key, checksum_key in (('rows_file', 'rows_sha256'),
+                                       ('ids_file', 'ids_sha256')):
+            file_path = os.path.join(backup_folder, table_info[file_key])
+            if not os.path.exists(file_path) or \
+                    _file_checksum(file_path) != table_info[checksum_key]:
+                invalid_files.append(table_info[file_key])
+
+    return invalid_files
+
+
+def apply_delta(db_con, manifest_path):
+    """
+    Applies a delta to a database restored from the base backup, or from
+    the base backup and the previous deltas. Changed rows replace the
+    existing ones and rows whose ids are not in the delta are deleted.
+    The delta is applied in a single transaction, with triggers, including
+    foreign key checks, disabled.
+    :param db_con: Connection, with a superuser set, to the database.
+    :type db_con: DatabaseConnection
+    :param manifest_path: Path of the delta manifest file.
+    :type manifest_path: str
+    """
+    invalid_files = verify_delta(manifest_path)
+    if len(invalid_files) > 0:
+        raise DeltaBackupException(
+            'Checksum verification failed for: {0}'.format(
+                ', '.join(invalid_files)
+            )
+        )
+
+    backup_folder = os.path.dirname(manifest_path)
+    manifest = read_manifest(manifest_path)
+
+    conn = _raw_connection(db_con)
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute('SET LOCAL session_replication_role = replica')
+
+        for table, table_info in manifest['tables'].items():
+            quoted_table = _quote_ident(table)
+
+            cursor.execute(
+                'CREATE TEMP TABLE stdm_delta_rows (LIKE {0}) '
+                'ON COMMIT DROP'.format(quoted_table)
+            )
+            rows_file = os.path.join(backup_folder, table_info['rows_file'])
+            with gzip.open(rows_file, 'rb') as f:
+                cursor.copy_expert('COPY stdm_delta_rows FROM STDIN', f)
+
+            cursor.execute(
+                'CREATE TEMP TABLE stdm_delta_ids (id bigint PRIMARY KEY) '
+                'ON COMMIT DROP'
+            )
+            ids_file = os.path.join(backup_folder, table_info['ids_file'])
+            with gzip.open(ids_file, 'rb') as f:
+                cursor.copy_expert('COPY stdm_delta_ids FROM STDIN', f)
+
+            cursor.execute(
+                'DELETE FROM {0} t WHERE NOT EXISTS '
+                '(SELECT 1 FROM stdm_delta_ids d WHERE d.id = t.id) OR '
+                't.id IN (SELECT id FROM stdm_delta_rows)'.format(quoted_table)
+            )
+            cursor.execute(
+                'INSERT INTO {0} SELECT * FROM stdm_delta_rows'.format(
+                    quoted_table
+                )
+            )
+            cursor.execute(
+                "SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+                "COALESCE((SELECT max(id) FROM {0}), 1))".format(quoted_table),
+                (table,)
+            )
+
+            cursor.execute('DROP TABLE stdm_delta_rows, stdm_delta_ids')
+
+        conn.commit()
+
+    except Exception:
+        conn.rollback()
+        raise
+
+    finally:
+        cursor.close()
+        conn.close()
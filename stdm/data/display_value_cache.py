@@ -0,0 +1,210 @@
+"""
+/***************************************************************************
+Name                 : DisplayValueCache
+Description          : Process-wide cache of the display columns of parent
+                       and lookup records used by the column formatters.
+Date                 : 18/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import sys
+from collections import OrderedDict
+
+from sqlalchemy.sql import (
+    column,
+    select,
+    table
+)
+
+from stdm.data.database import (
+    register_write_listener,
+    Singleton,
+    STDMDb
+)
+
+# Approximate memory, in bytes, that the cached values may occupy
+DISPLAY_CACHE_MEMORY_BUDGET = 32 * 1024 * 1024
+
+# Maximum number of ids in a single IN (...) clause
+DISPLAY_CACHE_BATCH_SIZE = 1000
+
+
+@Singleton
+class DisplayValueCache:
+    """
+    Caches the values of the display columns of records, indexed by table
+    name, display columns and record id. Only the display columns are
+    fetched, and missing ids are fetched in batches. The least recently
+    used records are evicted once the memory budget is exceeded. Records
+    written through the Model class are removed from the cache.
+    """
+
+    def __init__(self):
+        self.memory_budget = DISPLAY_CACHE_MEMORY_BUDGET
+        self._entries = OrderedDict()
+        self._costs = {}
+        self._cost = 0
+
+        # (table, columns) whose records have all been loaded
+        self._complete = set()
+
+        register_write_listener(self.invalidate)
+
+    @staticmethod
+    def _entry_cost(key, values):
+        # Rough estimate of the memory held by a cache entry
+        return sys.getsizeof(key) + sys.getsizeof(values) + sum(
+            sys.getsizeof(v) for v in values
+        )
+
+    def _set(self, key, values):
+        self._remove(key)
+        cost = self._entry_cost(key, values)
+        self._entries[key] = values
+        self._costs[key] = cost
+        self._cost += cost
+
+    def _remove(self, key):
+        if key in self._entries:
+            del self._entries[key]
+            self._cost -= self._costs.pop(key)
+
+    def _evict(self):
+        # Remove least recently used entries until within the budget
+        while self._cost > self.memory_budget and self._entries:
+            key, _ = self._entries.popitem(last=False)
+            self._cost -= self._costs.pop(key)
+            self._complete.discard(key[:2])
+
+    def _fetch(self, table_name, columns, ids=None):
+        """
+        Queries the id and display columns of the given records, all
+        records if ids is None.
+        """
+        tbl = table(table_name, column('id'), *[column(c) for c in columns])
+        query = select([tbl.c.id] + [tbl.c[c] for c in columns])
+        if ids is not None:
+            query = query.where(tbl.c.id.in_(ids))
+
+        conn = STDMDb.instance().engine.connect()
+        try:
+            rows = conn.execute(query).fetchall()
+        finally:
+            conn.close()
+
+        for row in rows:
+            self._set((table_name, columns, row[0]), tuple(row[1:]))
+
+        return rows
+
+    def prefetch(self, table_name, columns, ids):
+        """
+        Loads the display values of the given records that are not in the
+        cache, using one query per batch of ids.
+        :param table_name: Name of the table.
+        :type table_name: str
+        :param columns: Names of the display columns.
+        :type columns: tuple
+        :param ids: Record ids.
+        :type ids: list
+        """
+        columns = tuple(columns)
+        missing_ids = []
+        for record_id in set(ids):
+            if record_id is None:
+                continue
+            if (table_name, columns, record_id) not in self._entries:
+                missing_ids.append(record_id)
+
+        for i in range(0, len(missing_ids), DISPLAY_CACHE_BATCH_SIZE):
+            self._fetch(
+                table_name,
+                columns,
+                missing_ids[i:i + DISPLAY_CACHE_BATCH_SIZE]
+            )
+
+        self._evict()
+
+    def display_values(self, table_name, columns, record_id):
+        """
+        :param table_name: Name of the table.
+        :type table_name: str
+        :param columns: Names of the display columns.
+        :type columns: tuple
+        :param record_id: Record id.
+        :type record_id: int
+        :return: Values of the display columns for the record, None if the
+        record does not exist.
+        :rtype: tuple
+        """
+        columns = tuple(columns)
+        key = (table_name, columns, record_id)
+        if key not in self._entries:
+            if (table_name, columns) in self._complete or record_id is None:
+                return None
+
+            self.prefetch(table_name, columns, [record_id])
+
+        values = self._entries.get(key, None)
+        if values is not None:
+            self._entries.move_to_end(key)
+
+        return values
+
+    def table_values(self, table_name, columns):
+        """
+        Loads, once, the display values of all the records in a table. To be
+        used for small tables such as value lists.
+        :param table_name: Name of the table.
+        :type table_name: str
+        :param columns: Names of the display columns.
+        :type columns: tuple
+        :return: Values of the display columns indexed by record id, ordered
+        by id.
+        :rtype: OrderedDict
+        """
+        columns = tuple(columns)
+        if (table_name, columns) not in self._complete:
+            self._fetch(table_name, columns)
+            self._complete.add((table_name, columns))
+            self._evict()
+
+        values = OrderedDict()
+        for key, key_values in self._entries.items():
+            if key[:2] == (table_name, columns):
+                values[key[2]] = key_values
+
+        return OrderedDict(sorted(values.items(), key=lambda v: v[0]))
+
+    def invalidate(self, table_name, record_id=None):
+        """
+        Removes the cached values of a record, or all records if record_id
+        is None, in the given table.
+        """
+        for key in [k for k in self._entries if k[0] == table_name]:
+            if record_id is None or key[2] == record_id:
+                self._remove(key)
+
+        self._complete = set(
+            c for c in self._complete if c[0] != table_name
+        )
+
+    def clear(self):
+        """
+        Removes all cached values.
+        """
+        self._entries.clear()
+        self._costs.clear()
+        self._cost = 0
+        self._complete.clear()
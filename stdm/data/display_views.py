@@ -0,0 +1,268 @@
+"""
+/***************************************************************************
+Name                 : display_views
+Description          : Database views of spatial entities with the display
+                       values of their lookup, administrative unit and
+                       foreign key columns already joined.
+Date                 : 18/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import logging
+from collections import OrderedDict
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql.expression import text
+
+from stdm.data.database import register_write_listener
+from stdm.data.pg_utils import (
+    _execute,
+    pg_table_exists
+)
+
+LOGGER = logging.getLogger('stdm')
+
+# Suffix of the display view names
+DISPLAY_VIEW_SUFFIX = '_display'
+
+# Suffix of the columns containing the joined display values
+DISPLAY_COLUMN_SUFFIX = '_display'
+
+# PostgreSQL truncates identifiers longer than this
+MAX_IDENTIFIER_LENGTH = 63
+
+# Number of writes to each table, through the Model class, in this session
+_table_versions = {}
+
+# Table versions when each materialized view was last refreshed
+_view_versions = {}
+
+
+def _quote(name):
+    return '"{0}"'.format(name.replace('"', '""'))
+
+
+def display_view_name(entity):
+    """
+    :param entity: Spatial entity.
+    :type entity: Entity
+    :return: Name of the display view of the entity.
+    :rtype: str
+    """
+    max_len = MAX_IDENTIFIER_LENGTH - len(DISPLAY_VIEW_SUFFIX)
+
+    return '{0}{1}'.format(entity.name[:max_len], DISPLAY_VIEW_SUFFIX)
+
+
+def display_columns(entity):
+    """
+    :param entity: Entity whose related columns are to be joined.
+    :type entity: Entity
+    :return: Name of the parent table and of the parent display column,
+    indexed by the name of each lookup, administrative unit and foreign
+    key column.
+    :rtype: OrderedDict
+    """
+    columns = OrderedDict()
+    for column in entity.columns.values():
+        if column.TYPE_INFO == 'LOOKUP':
+            fk_column = 'value'
+
+        elif column.TYPE_INFO == 'ADMIN_SPATIAL_UNIT':
+            fk_column = 'name'
+
+        elif column.TYPE_INFO == 'FOREIGN_KEY':
+            display_cols = column.entity_relation.display_cols
+
+            if len(display_cols) > 0:
+                fk_column = display_cols[0]
+            else:
+                fk_column = 'id'
+        else:
+            continue
+
+        columns[column.name] = (column.entity_relation.parent.name, fk_column)
+
+    return columns
+
+
+def display_column_name(column_name):
+    """
+    :param column_name: Name of a lookup, administrative unit or foreign
+    key column.
+    :type column_name: str
+    :return: Name of the view column containing the display value.
+    :rtype: str
+    """
+    return '{0}{1}'.format(column_name, DISPLAY_COLUMN_SUFFIX)
+
+
+def _view_sql(entity, materialized):
+    select_cols = ['t.*']
+    joins = []
+    for i, (col, (parent_table, fk_column)) in enumerate(
+            display_columns(entity).items()
+    ):
+        alias = 'j{0}'.format(i)
+        select_cols.append('{0}.{1} AS {2}'.format(
+            alias, _quote(fk_column), _quote(display_column_name(col))
+        ))
+        joins.append('LEFT JOIN {0} {1} ON {1}.id = t.{2}'.format(
+            _quote(parent_table), alias, _quote(col)
+        ))
+
+    return 'CREATE {0}VIEW {1} AS SELECT {2} FROM {3} t {4}'.format(
+        'MATERIALIZED ' if materialized else '',
+        _quote(display_view_name(entity)),
+        ', '.join(select_cols),
+        _quote(entity.name),
+        ' '.join(joins)
+    )
+
+
+def _is_materialized(view_name):
+    result = _execute(
+        text('SELECT 1 FROM pg_matviews WHERE matviewname = :name'),
+        name=view_name
+    )
+
+    return len(result.fetchall()) > 0
+
+
+def drop_display_view(entity):
+    """
+    Drops the display view of the entity, if it exists.
+    :param entity: Spatial entity.
+    :type entity: Entity
+    """
+    view_name = display_view_name(entity)
+    if not pg_table_exists(view_name):
+        return
+
+    view_type = 'MATERIALIZED VIEW' if _is_materialized(view_name) else 'VIEW'
+    _execute(text('DROP {0} IF EXISTS {1}'.format(
+        view_type, _quote(view_name)
+    )))
+
+
+def drop_display_views(profile):
+    """
+    Drops the display views of the entities in the profile. To be called
+    before the entity tables are altered as the views depend on them.
+    :param profile: Profile whose display views are to be dropped.
+    :type profile: Profile
+    """
+    entities = list(profile.entities.values()) + profile.removed_entities
+    for entity in entities:
+        if entity.TYPE_INFO == 'ENTITY' and entity.has_geometry_column():
+            drop_display_view(entity)
+
+
+def ensure_display_view(entity, materialized=False):
+    """
+    Creates the display view of the entity if it does not exist, or
+    recreates it if its type has changed. A materialized view whose data
+    is stale is refreshed.
+    :param entity: Spatial entity.
+    :type entity: Entity
+    :param materialized: True to create a materialized view, indexed on
+    the id and geometry columns.
+    :type materialized: bool
+    :return: Name of the display view, None if it could not be created.
+    :rtype: str
+    """
+    view_name = display_view_name(entity)
+
+    try:
+        if pg_table_exists(view_name):
+            if _is_materialized(view_name) == materialized:
+                if materialized and is_display_view_stale(entity):
+                    refresh_display_view(entity)
+
+                return view_name
+
+            drop_display_view(entity)
+
+        _execute(text(_view_sql(entity, materialized)))
+
+        if materialized:
+            _execute(text('CREATE UNIQUE INDEX ON {0} (id)'.format(
+                _quote(view_name)
+            )))
+            for column in entity.columns.values():
+                if column.TYPE_INFO == 'GEOMETRY':
+                    _execute(text('CREATE INDEX ON {0} USING gist ({1})'.format(
+                        _quote(view_name), _quote(column.name)
+                    )))
+            _view_versions[view_name] = _source_versions(entity)
+
+    except SQLAlchemyError as err:
+        LOGGER.debug('Display view for %s not created: %s', entity.name, err)
+
+        return None
+
+    return view_name
+
+
+def refresh_display_view(entity):
+    """
+    Refreshes the materialized display view of the entity without locking
+    out readers.
+    :param entity: Spatial entity.
+    :type entity: Entity
+    """
+    _execute(text('REFRESH MATERIALIZED VIEW CONCURRENTLY {0}'.format(
+        _quote(display_view_name(entity))
+    )))
+    _view_versions[display_view_name(entity)] = _source_versions(entity)
+
+
+def mark_display_view_stale(table_name):
+    """
+    Flags the materialized display views depending on the table for
+    refreshing the next time they are loaded.
+    :param table_name: Name of the entity or parent table that changed.
+    :type table_name: str
+    """
+    _table_versions[table_name] = _table_versions.get(table_name, 0) + 1
+
+
+def _source_versions(entity):
+    # Versions of the entity table and the tables joined in its view
+    tables = [entity.name] + [p[0] for p in display_columns(entity).values()]
+
+    return dict((t, _table_versions.get(t, 0)) for t in tables)
+
+
+def is_display_view_stale(entity):
+    """
+    :param entity: Spatial entity.
+    :type entity: Entity
+    :return: True if the entity table or any of the tables joined in its
+    display view has changed since the view was last refreshed in this
+    session.
+    :rtype: bool
+    """
+    view_versions = _view_versions.get(display_view_name(entity), None)
+    if view_versions is None:
+        return True
+
+    return view_versions != _source_versions(entity)
+
+
+def _on_record_written(table_name, record_id):
+    mark_display_view_stale(table_name)
+
+
+register_write_listener(_on_record_written)
@@ -0,0 +1,243 @@
+"""
+/***************************************************************************
+Name                 : Import Coercion Plan
+Description          : Compiles, once per import, the value converters that
+                       are applied to each destination column so that the
+                       per-row work is a plain loop over callables.
+Date                 : 18/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+from collections import OrderedDict
+
+__all__ = ['ColumnCoercionPlan', 'column_converter']
+
+# Column types whose zero value denotes a missing reference
+_REFERENCE_TYPES = ('LOOKUP', 'ADMIN_SPATIAL_UNIT', 'FOREIGN_KEY')
+
+_TRUE_VALUES = ('yes', 'true')
+_FALSE_VALUES = ('no', 'false')
+
+
+def _is_null_text(value):
+    # Empty strings and the literal 'null' are treated as missing values
+    if not isinstance(value, str):
+        return False
+
+    value = value.strip()
+
+    return not value or value.lower() == 'null'
+
+
+def to_float(value):
+    """
+    :return: Float value or None if the value is empty or cannot be
+    converted.
+    """
+    if value is None or _is_null_text(value):
+        return None
+
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def to_integer(value):
+    """
+    :return: Integer value or None if the value is empty or cannot be
+    converted.
+    """
+    if value is None or _is_null_text(value):
+        return None
+
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        # TODO show warning to the user that
+        #  some values cannot be converted to integer.
+        return None
+
+
+def to_reference(value):
+    """
+    :return: Integer value of a foreign key, None if the value is empty,
+    zero or cannot be converted.
+    """
+    value = to_integer(value)
+
+    return None if value == 0 else value
+
+
+def to_percent(value):
+    """
+    :return: Float value of a percentage with the '%' symbol removed or None
+    if the value is empty or cannot be converted.
+    """
+    if isinstance(value, str):
+        value = value.replace('%', '')
+
+    return to_float(value)
+
+
+def to_date(value):
+    """
+    :return: None if the date value is empty, otherwise the value as is.
+    """
+    if not value or _is_null_text(value):
+        return None
+
+    return value
+
+
+def to_boolean(value):
+    """
+    :return: True or False for yes/no and true/false strings, None if the
+    value is empty, otherwise the value as is.
+    """
+    if not isinstance(value, str):
+        return value
+
+    norm_value = value.strip().lower()
+    if not norm_value or norm_value == 'null':
+        return None
+    if norm_value in _TRUE_VALUES:
+        return True
+    if norm_value in _FALSE_VALUES:
+        return False
+
+    return value
+
+
+_TYPE_CONVERTERS = {
+    'INT': to_integer,
+    'DOUBLE': to_float,
+    'LOOKUP': to_reference,
+    'ADMIN_SPATIAL_UNIT': to_reference,
+    'FOREIGN_KEY': to_reference,
+    'PERCENT': to_percent,
+    'DATE': to_date,
+    'DATETIME': to_date,
+    'BOOL': to_boolean
+}
+
+
+def column_converter(column):
+    """
+    :param column: Entity column.
+    :type column: BaseColumn
+    :return: Function that converts an imported value to the format expected
+    by the column, None if values for the column are imported as is.
+    :rtype: callable
+    """
+    return _TYPE_CONVERTERS.get(column.TYPE_INFO, None)
+
+
+class ColumnCoercionPlan:
+    """
+    Maps destination columns to the converter that normalises imported values
+    for the column's data type. The plan is compiled once from the entity and
+    the source-destination column mapping so that the column type checks are
+    not repeated for each row.
+    """
+
+    def __init__(self, entity, columns):
+        """
+        :param entity: Destination entity.
+        :type entity: Entity
+        :param columns: Names of the destination columns that will be
+        populated by the import.
+        :type columns: list
+        """
+        self.entity = entity
+        self._converters = OrderedDict()
+
+        for col_name in columns:
+            col_obj = entity.columns.get(col_name, None)
+            if col_obj is None:
+                continue
+
+            converter = column_converter(col_obj)
+            if converter is not None:
+                self._converters[col_name] = converter
+
+    @classmethod
+    def from_column_match(cls, entity, columnmatch):
+        """
+        Creates a plan for the destination columns in a source-destination
+        column mapping.
+        :param entity: Destination entity.
+        :type entity: Entity
+        :param columnmatch: Source columns as keys and destination columns as
+        values.
+        :type columnmatch: dict
+        :rtype: ColumnCoercionPlan
+        """
+        return cls(entity, list(columnmatch.values()))
+
+    def converter(self, column):
+        """
+        :param column: Destination column name.
+        :type column: str
+        :return: Converter for the column or None if values are imported
+        as is.
+        :rtype: callable
+        """
+        return self._converters.get(column, None)
+
+    def coerce(self, column, value):
+        """
+        Converts a single value for the given destination column.
+        """
+        converter = self._converters.get(column, None)
+        if converter is None:
+            return value
+
+        return converter(value)
+
+    def apply(self, column_values):
+        """
+        Converts the values of a row, in place.
+        :param column_values: Destination column names and corresponding
+        values.
+        :type column_values: dict
+        :return: The converted row.
+        :rtype: dict
+        """
+        for col_name, converter in self._converters.items():
+            if col_name in column_values:
+                column_values[col_name] = converter(column_values[col_name])
+
+        return column_values
+
+    def apply_batch(self, columns, rows):
+        """
+        Converts a batch of rows column by column, in place.
+        :param columns: Destination column names in the order of the values
+        in each row.
+        :type columns: list
+        :param rows: List of rows where each row is a list of values.
+        :type rows: list
+        :return: The converted rows.
+        :rtype: list
+        """
+        for idx, col_name in enumerate(columns):
+            converter = self._converters.get(col_name, None)
+            if converter is None:
+                continue
+
+            for row in rows:
+                row[idx] = converter(row[idx])
+
+        return rows
@@ -19,9 +19,18 @@ email                : stdm@unhabitat.org
  ***************************************************************************/
 """
 from winreg import *
+import hashlib
+import io
+import json
+import logging
+import os
+import struct
 from datetime import datetime
 
-from qgis.PyQt.QtCore import Qt
+from qgis.PyQt.QtCore import (
+    QDir,
+    Qt
+)
 
 from qgis.PyQt.QtWidgets import (
     QApplication,
@@ -45,8 +54,20 @@ from stdm.settings import (
 )
 
 from sqlalchemy.exc import DataError, IntegrityError
-from stdm.data.database import STDMDb
+from stdm.data.database import (
+    notify_table_write,
+    STDMDb
+)
 
+from stdm.data.importexport.coercion import (
+    ColumnCoercionPlan,
+    to_boolean,
+    to_date,
+    to_float,
+    to_percent,
+    to_reference,
+    to_integer
+)
 from stdm.data.importexport.value_translators import (
     IgnoreType,
     ValueTranslatorManager
@@ -57,12 +78,161 @@ from stdm.data.configuration.entity import Entity
 from stdm.data.configuration.exception import ConfigurationException
 from stdm.ui.sourcedocument import SourceDocumentManager
 
+LOGGER = logging.getLogger('stdm')
+
+# Number of features sent to the database in one COPY statement
+BULK_IMPORT_BATCH_SIZE = 5000
+
+IMPORT_CHECKPOINT_DIR = QDir.home().path() + '/.stdm/import_checkpoints'
+
+# EWKB flag indicating that an SRID follows the geometry type
+_EWKB_SRID_FLAG = 0x20000000
+
 
 class ImportFeatureException(Exception):
     """
     Raised when an error occurs during feature import
     """
 
+
+class ImportCheckpoint:
+    """
+    Records the number of features from a source file that have been
+    committed to a destination table by a bulk import so that a failed
+    import can be resumed instead of restarted.
+    """
+
+    def __init__(self, source_file, table_name):
+        self.source_file = source_file
+        self.table_name = table_name
+        key = '{0}|{1}'.format(
+            os.path.abspath(source_file), table_name
+        ).encode('utf-8')
+        self.path = '{0}/{1}.json'.format(
+            IMPORT_CHECKPOINT_DIR,
+            hashlib.md5(key).hexdigest()
+        )
+
+    def _source_signature(self):
+        # Size and modification time identify the version of the source file
+        try:
+            stat = os.stat(self.source_file)
+        except OSError:
+            return None
+
+        return [stat.st_size, int(stat.st_mtime)]
+
+    def committed_rows(self):
+        """
+        :return: Number of features already committed for the source file and
+        destination table. Zero if there is no checkpoint or if the source
+        file has changed since the checkpoint was written.
+        :rtype: int
+        """
+        if not os.path.exists(self.path):
+            return 0
+
+        try:
+            with open(self.path, 'r') as cp_file:
+                cp_info = json.load(cp_file)
+        except (IOError, ValueError):
+            return 0
+
+        if cp_info.get('signature') != self._source_signature():
+            return 0
+
+        return int(cp_info.get('rows', 0))
+
+    def save(self, rows):
+        """
+        Persist the number of committed features.
+        :param rows: Number of features committed so far.
+        :type rows: int
+        """
+        if not os.path.exists(IMPORT_CHECKPOINT_DIR):
+            os.makedirs(IMPORT_CHECKPOINT_DIR)
+
+        cp_info = {
+            'source': self.source_file,
+            'table': self.table_name,
+            'signature': self._source_signature(),
+            'rows': rows,
+            'updated': datetime.now().isoformat()
+        }
+        with open(self.path, 'w') as cp_file:
+            json.dump(cp_info, cp_file)
+
+    def clear(self):
+        """
+        Removes the checkpoint file, if it exists.
+        """
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def copy_text_value(value):
+    """
+    Formats a Python value for the text format used by PostgreSQL's
+    COPY FROM STDIN.
+    :param value: Value to be formatted.
+    :type value: object
+    :return: Escaped value, '\\N' for None.
+    :rtype: str
+    """
+    if value is None or isinstance(value, IgnoreType) or value is IgnoreType:
+        return '\\N'
+
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+
+    value = str(value)
+
+    return value.replace('\\', '\\\\').replace('\t', '\\t').replace(
+        '\n', '\\n'
+    ).replace('\r', '\\r')
+
+
+def ogr_geometry_to_ewkb(geom, srid):
+    """
+    Converts an OGR geometry to hex-encoded EWKB which is accepted as-is by
+    the PostGIS geometry input function.
+    :param geom: OGR geometry.
+    :type geom: ogr.Geometry
+    :param srid: Spatial reference identifier of the destination column.
+    :type srid: int
+    :return: Hex-encoded EWKB.
+    :rtype: str
+    """
+    wkb = bytes(geom.ExportToWkb(ogr.wkbNDR))
+    geom_type = struct.unpack('<I', wkb[1:5])[0]
+    ewkb = wkb[:1] + struct.pack(
+        '<II',
+        geom_type | _EWKB_SRID_FLAG,
+        int(srid)
+    ) + wkb[5:]
+
+    return ewkb.hex()
+
+def layer_features(lyr, start=0):
+    """
+    Yields the features of the layer, starting from the feature at the given
+    index. The features are read using GetNextFeature since iterating over
+    the layer resets the reading and would discard the seek.
+    :param lyr: OGR layer.
+    :type lyr: ogr.Layer
+    :param start: Index of the first feature.
+    :type start: int
+    """
+    lyr.ResetReading()
+    if start > 0:
+        lyr.SetNextByIndex(start)
+
+    feat = lyr.GetNextFeature()
+    while feat is not None:
+        yield feat
+        feat = lyr.GetNextFeature()
+
+
 class OGRReader:
     def __init__(self, source_file: str):
         self._ds = ogr.Open(source_file)
@@ -150,6 +320,13 @@ class OGRReader:
 
         return ent_model, doc_model
 
+    def _column_type(self, target_table, col_name):
+        # TYPE_INFO of the destination column, None if it does not exist
+        entity = self._data_source_entity(target_table)
+        col_obj = entity.columns.get(col_name, None)
+
+        return None if col_obj is None else col_obj.TYPE_INFO
+
     def auto_fix_percent(self, target_table, col_name, value):
         """
         Fixes percent columns if empty and with a wrong format.
@@ -162,20 +339,8 @@ class OGRReader:
         :return: Converted value
         :rtype: Any
         """
-        entity = self._data_source_entity(target_table)
-
-        if entity.columns[col_name].TYPE_INFO == 'PERCENT':
-            if isinstance(value, str):
-                if not bool(value.strip()) or value.strip().lower() == 'null':
-                    value = None
-            if '%' in value:
-                value = value.replace('%', '')
-            try:
-                if value is not None:
-                    value = float(value)
-
-            except ValueError:
-                value = None
+        if self._column_type(target_table, col_name) == 'PERCENT':
+            value = to_percent(value)
 
         return value
 
@@ -191,41 +356,14 @@ class OGRReader:
         :return: Converted value
         :rtype: Any
         """
-        entity = self._data_source_entity(target_table)
-        integer_types = ['INT', 'LOOKUP', 'ADMIN_SPATIAL_UNIT',
-                         'FOREIGN_KEY', 'DOUBLE']
-        float_type = ['DOUBLE']
-        int_type = ['INT', 'LOOKUP', 'ADMIN_SPATIAL_UNIT',
-                    'FOREIGN_KEY']
-
-        if col_name in entity.columns.keys():
-            if entity.columns[col_name].TYPE_INFO in integer_types:
-                if isinstance(value, str):
-                    if not bool(value.strip()) or value.strip().lower() == 'null':
-                        value = None
-                if entity.columns[col_name].TYPE_INFO in float_type:
-                    try:
-                        if value is not None:
-                            value = float(value)
-
-                    except ValueError:
-                        value = None
-
-                elif entity.columns[col_name].TYPE_INFO in int_type:
-
-                    try:
-                        if value is not None:
-                            value = int(value)
-                            if isinstance(value, int):
-                                if value == 0:
-                                    if entity.columns[col_name].TYPE_INFO in \
-                                            ['LOOKUP', 'ADMIN_SPATIAL_UNIT',
-                                             'FOREIGN_KEY']:
-                                        value = None
-                    except ValueError:
-                        # TODO show warning to the user that
-                        #  some values cannot be converted to integer.
-                        value = None
+        type_info = self._column_type(target_table, col_name)
+
+        if type_info == 'DOUBLE':
+            value = to_float(value)
+        elif type_info == 'INT':
+            value = to_integer(value)
+        elif type_info in ['LOOKUP', 'ADMIN_SPATIAL_UNIT', 'FOREIGN_KEY']:
+            value = to_reference(value)
 
         return value
 
@@ -241,13 +379,8 @@ class OGRReader:
         :return: Converted value
         :rtype: Any
         """
-        entity = self._data_source_entity(target_table)
-
-        date_types = ['DATE', 'DATETIME']
-
-        if entity.columns[col_name].TYPE_INFO in date_types:
-            if not bool(value) or value.lower() == 'null':
-                value = None
+        if self._column_type(target_table, col_name) in ['DATE', 'DATETIME']:
+            value = to_date(value)
 
         return value
 
@@ -263,37 +396,31 @@ class OGRReader:
         :return: Converted value
         :rtype: Any
         """
-        entity = self._data_source_entity(target_table)
-        yes_no_types = ['BOOL']
-
-        if entity.columns[col_name].TYPE_INFO in yes_no_types:
-            if not bool(value.strip()) or value.strip().lower() == 'null':
-                value = None
-            elif value.strip().lower() == 'yes':
-                value = True
-            elif value.strip().lower() == 'no':
-                value = False
-            elif value.strip().lower() == 'true':
-                value = True
-            elif value.strip().lower() == 'false':
-                value = False
+        if self._column_type(target_table, col_name) == 'BOOL':
+            value = to_boolean(value)
+
         return value
 
-    def _insertRow(self, target_table, columnValueMapping):
+    def _insertRow(self, target_table, columnValueMapping, coercion_plan=None):
         """
         Insert a new row using the mapped class instance then mapping column
         names to the corresponding column values.
+        :param coercion_plan: Converters for the destination columns. If None,
+        a plan is compiled for the columns in the mapping.
+        :type coercion_plan: ColumnCoercionPlan
         """
+        if coercion_plan is None:
+            coercion_plan = ColumnCoercionPlan(
+                self._data_source_entity(target_table),
+                list(columnValueMapping.keys())
+            )
+
         model_instance = self._mapped_cls()
         for col, value in columnValueMapping.items():
             if hasattr(model_instance, col):
                 # 'documents' is not a column so exclude it.
                 if col != 'documents' and 'collection' not in col:
-                    value = self.auto_fix_float_integer(target_table, col,
-                                                        value)
-                    value = self.auto_fix_percent(target_table, col, value)
-                    value = self.auto_fix_date(target_table, col, value)
-                    value = self.auto_fix_yes_no(target_table, col, value)
+                    value = coercion_plan.coerce(col, value)
 
                 if not isinstance(value, IgnoreType):
                     setattr(model_instance, col, value)
@@ -359,6 +486,9 @@ class OGRReader:
         :param translator_manager: Instance of 'stdm.data.importexport.ValueTranslatorManager'
         containing value translators defined for the destination table columns.
         :type translator_manager: ValueTranslatorManager
+        :return: True if all the features were imported, False if the import
+        was canceled.
+        :rtype: bool
         """
         # Check current profile
         if self._current_profile is None:
@@ -393,6 +523,14 @@ class OGRReader:
         # Set entity for use in translators
         destination_entity = self._data_source_entity(targettable)
 
+        translator_manager.prefetch()
+
+        # Column converters are resolved once for the whole import
+        coercion_plan = ColumnCoercionPlan.from_column_match(
+            destination_entity,
+            columnmatch
+        )
+
         for feat in lyr:
             column_value_mapping = {}
             column_count = 0
@@ -520,7 +658,7 @@ class OGRReader:
                                 self._geomType))
 
             # Insert the record
-            self._insertRow(targettable, column_value_mapping)
+            self._insertRow(targettable, column_value_mapping, coercion_plan)
 
             init_val += 1
 
@@ -533,11 +671,338 @@ class OGRReader:
             del progress
             raise ImportFeatureException(str(e))
 
+        canceled = progress.wasCanceled()
         progress.setValue(numFeat)
 
         progress.deleteLater()
         del progress
 
+        self._log_translator_stats(translator_manager)
+
+        return not canceled
+
+    def supports_bulk_import(self, targettable, columnmatch,
+                             translator_manager=None):
+        """
+        Checks whether the destination table can be populated using the bulk
+        import engine. Entities with supporting documents, multiple select
+        columns or translators that upload documents require the ORM and
+        hence are imported using featToDb.
+        :param targettable: Destination table name.
+        :type targettable: str
+        :param columnmatch: Source columns as keys and target columns as
+        values.
+        :type columnmatch: dict
+        :param translator_manager: Value translators defined for the
+        destination table columns.
+        :type translator_manager: ValueTranslatorManager
+        :return: True if the bulk import engine can be used, else False.
+        :rtype: bool
+        """
+        entity = self._data_source_entity(targettable)
+        if entity is None or entity.supports_documents:
+            return False
+
+        for dest_column in columnmatch.values():
+            col_obj = entity.column(dest_column)
+            if col_obj is None or col_obj.TYPE_INFO == 'MULTIPLE_SELECT':
+                return False
+
+            if translator_manager is None:
+                continue
+
+            value_translator = translator_manager.translator(dest_column)
+            if value_translator is not None and \
+                    value_translator.requires_source_document_manager():
+                return False
+
+        return True
+
+    def _batch_column_values(self, batch, columns, columnmatch,
+                             translator_manager, destination_entity):
+        """
+        Derives the destination column values for a batch of features.
+        Each value translator resolves the whole batch at once. Values are
+        coerced to the column types separately, using a ColumnCoercionPlan.
+        :param batch: Source field values and geometry EWKB for each feature.
+        :type batch: list
+        :param columns: Destination column names, the geometry column being
+        the last one if the geometry is imported.
+        :type columns: list
+        :return: Rows of values in the order of the destination columns.
+        :rtype: list
+        """
+        dest_source_columns = {}
+        for source_col, dest_col in columnmatch.items():
+            dest_source_columns.setdefault(dest_col, source_col)
+
+        rows = [[None] * len(columns) for _ in batch]
+
+        for idx, dest_column in enumerate(columns):
+            source_column = dest_source_columns.get(dest_column, None)
+            if source_column is None:
+                # Geometry column
+                for row, (_, ewkb) in zip(rows, batch):
+                    row[idx] = ewkb
+
+                continue
+
+            value_translator = translator_manager.translator(dest_column)
+            if value_translator is not None:
+                value_translator.entity = destination_entity
+                source_col_names = value_translator.source_column_names()
+                values = value_translator.referencing_column_values([
+                    {c: source_values[c] for c in source_col_names
+                     if c in source_values}
+                    for source_values, _ in batch
+                ])
+            else:
+                values = [source_values[source_column]
+                          for source_values, _ in batch]
+
+            is_date = destination_entity.column(
+                dest_column
+            ).TYPE_INFO == 'DATE'
+
+            for row, field_value in zip(rows, values):
+                if isinstance(field_value, IgnoreType) or \
+                        field_value is IgnoreType:
+                    continue
+
+                if is_date and field_value:
+                    if not self.date_formatter.compare_date_format(field_value):
+                        raise ImportFeatureException(
+                            (f"Date format on your CSV should match system date format."
+                             f"`{self.date_formatter.system_date_format}`")
+                        )
+                    field_value = self.date_formatter.to_postgres_format(
+                        field_value
+                    )
+
+                row[idx] = field_value
+
+        return rows
+
+    def _feature_ewkb(self, feat):
+        """
+        :return: Hex EWKB of the feature's geometry converted to the
+        destination geometry type, or None if the feature has no geometry.
+        :rtype: str
+        """
+        geom = feat.GetGeometryRef()
+        if geom is None:
+            return None
+
+        dest_type = self._geomType.lower()
+        multi_types = {
+            ('polygon', 'multipolygon'): ogr.wkbMultiPolygon,
+            ('linestring', 'multilinestring'): ogr.wkbMultiLineString,
+            ('point', 'multipoint'): ogr.wkbMultiPoint
+        }
+        multi_type = multi_types.get(
+            (geom.GetGeometryName().lower(), dest_type), None
+        )
+        if multi_type is not None:
+            multi_geom = ogr.Geometry(multi_type)
+            multi_geom.AddGeometry(geom)
+            geom = multi_geom
+
+        if geom.GetGeometryName().lower() != dest_type:
+            raise TypeError(
+                "The geometries of the source and destination columns do not match.\n"
+                "Source Geometry Type: {0}, Destination Geometry Type: {1}".format(
+                    geom.GetGeometryName(),
+                    self._geomType))
+
+        return ogr_geometry_to_ewkb(geom, self._targetGeomColSRID)
+
+    def _copy_batch(self, cursor, targettable, columns, rows):
+        """
+        Streams a batch of rows to the destination table using
+        COPY ... FROM STDIN.
+        """
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write('\t'.join(copy_text_value(v) for v in row))
+            buffer.write('\n')
+        buffer.seek(0)
+
+        copy_sql = 'COPY {0} ({1}) FROM STDIN'.format(
+            targettable,
+            ', '.join('"{0}"'.format(c) for c in columns)
+        )
+        cursor.copy_expert(copy_sql, buffer)
+
+    def bulkFeatToDb(self, targettable, columnmatch, append, parentdialog,
+                     geomColumn=None, translator_manager=None,
+                     batch_size=BULK_IMPORT_BATCH_SIZE, resume=True):
+        """
+        Imports features in batches using PostgreSQL's COPY FROM STDIN, with
+        geometries sent as EWKB. Each batch is committed separately and a
+        checkpoint is written after each commit so that a failed import can
+        be resumed from the last committed batch.
+        Use supports_bulk_import to check whether the destination table can
+        be populated using this method, otherwise use featToDb.
+        :param targettable: Destination table name
+        :param columnmatch: Dictionary containing source columns as keys and
+        target columns as the values.
+        :param append: True to append, false to overwrite by deleting
+        previous records.
+        :param parentdialog: A reference to the calling dialog.
+        :param translator_manager: Instance of
+        'stdm.data.importexport.ValueTranslatorManager'.
+        :param batch_size: Number of features per COPY statement and commit.
+        :type batch_size: int
+        :param resume: True to continue from the last checkpoint for the
+        source file and destination table, if one exists. An import can only
+        be resumed when appending, as overwriting deletes the records
+        committed by the previous run.
+        :type resume: bool
+        :return: True if all the features were imported, False if the import
+        was canceled. The checkpoint of a canceled import is kept so that it
+        can be resumed.
+        :rtype: bool
+        """
+        if resume and not append:
+            msg = QApplication.translate(
+                'OGRReader',
+                'An import that overwrites the existing records cannot be '
+                'resumed.'
+            )
+            raise ImportFeatureException(msg)
+
+        if self._current_profile is None:
+            msg = QApplication.translate(
+                'OGRReader',
+                'The current profile could not be determined.\nPlease set it '
+                'in the Options dialog or Configuration Wizard.'
+            )
+            raise ConfigurationException(msg)
+
+        if translator_manager is None:
+            translator_manager = ValueTranslatorManager()
+
+        destination_entity = self._data_source_entity(targettable)
+
+        checkpoint = ImportCheckpoint(self._ds.GetDescription(), targettable)
+        skip_rows = checkpoint.committed_rows() if resume else 0
+
+        if skip_rows == 0:
+            checkpoint.clear()
+            if not append:
+                delete_table_data(targettable)
+
+        if geomColumn is not None:
+            self._geomType, self._targetGeomColSRID = geometryType(
+                targettable, geomColumn
+            )
+
+        lyr = self.getLayer()
+        feat_defn = lyr.GetLayerDefn()
+        numFeat = lyr.GetFeatureCount()
+
+        progress = QProgressDialog("", "&Cancel", 0, numFeat, parentdialog)
+        progress.setWindowModality(Qt.WindowModal)
+        lblMsgTemp = QApplication.translate(
+            'OGRReader',
+            'Importing {0} of {1} to STDM...'
+        )
+
+        # Destination columns in the order of the source columns
+        columns = []
+        for f in range(feat_defn.GetFieldCount()):
+            field_name = feat_defn.GetFieldDefn(f).GetNameRef()
+            if field_name in columnmatch and \
+                    columnmatch[field_name] not in columns:
+                columns.append(columnmatch[field_name])
+        if geomColumn is not None:
+            columns.append(geomColumn)
+
+        coercion_plan = ColumnCoercionPlan(destination_entity, columns)
+        field_count = feat_defn.GetFieldCount()
+
+        translator_manager.prefetch()
+
+        conn = STDMDb.instance().engine.raw_connection()
+        cursor = conn.cursor()
+        committed = skip_rows
+        batch = []
+
+        def flush():
+            nonlocal committed, batch
+
+            rows = self._batch_column_values(
+                batch, columns, columnmatch, translator_manager,
+                destination_entity
+            )
+            coercion_plan.apply_batch(columns, rows)
+            self._copy_batch(cursor, targettable, columns, rows)
+            conn.commit()
+            committed += len(rows)
+            checkpoint.save(committed)
+            batch = []
+
+            progress.setValue(committed)
+            progress.setLabelText(lblMsgTemp.format(committed, numFeat))
+            QApplication.processEvents()
+
+        try:
+            for feat in layer_features(lyr, skip_rows):
+                if progress.wasCanceled():
+                    break
+
+                source_values = {
+                    feat_defn.GetFieldDefn(f).GetNameRef(): feat.GetField(f)
+                    for f in range(field_count)
+                }
+                ewkb = None
+                if geomColumn is not None:
+                    ewkb = self._feature_ewkb(feat)
+
+                batch.append((source_values, ewkb))
+
+                if len(batch) >= batch_size:
+                    flush()
+
+            if batch and not progress.wasCanceled():
+                flush()
+
+        except Exception as e:
+            conn.rollback()
+            msg = QApplication.translate(
+                'OGRReader',
+                '{0}\n{1} of {2} features were committed before the error. '
+                'Run the import again to resume from this point.'
+            ).format(str(e), committed, numFeat)
+            raise ImportFeatureException(msg)
+
+        finally:
+            canceled = progress.wasCanceled()
+            cursor.close()
+            conn.close()
+            progress.close()
+            progress.deleteLater()
+
+            # The batches are copied on a raw connection, so the caches of
+            # the target table are not notified through the Model class.
+            if committed > skip_rows:
+                notify_table_write(targettable)
+
+        if not canceled:
+            checkpoint.clear()
+
+        self._log_translator_stats(translator_manager)
+
+        return not canceled
+
+    def _log_translator_stats(self, translator_manager):
+        # Reports the cache hits and misses of the value translators
+        for name, stats in translator_manager.cache_stats().items():
+            LOGGER.info(
+                'Import translator %s: %s cached values, %s hits, %s misses',
+                name, stats['size'], stats['hits'], stats['misses']
+            )
+
     def _enumeration_column_type(self, column_name, value):
         """
         Checks if the given column is of DeclEnumType.
@@ -30,7 +30,7 @@ from qgis.PyQt.QtWidgets import (
     QApplication,
     QVBoxLayout
 )
-from sqlalchemy import func, cast, String
+from sqlalchemy import func, cast, String, tuple_
 from sqlalchemy.schema import (
     Table,
     MetaData
@@ -41,6 +41,10 @@ from stdm.data.database import (
     STDMDb
 )
 from stdm.data.pg_utils import table_column_names
+from stdm.utils.bounded_cache import (
+    BoundedCache,
+    MISSING
+)
 from stdm.utils.util import (
     getIndex
 )
@@ -49,6 +53,15 @@ from .exceptions import TranslatorException
 __all__ = ["SourceValueTranslator", "ValueTranslatorManager",
            "RelatedTableTranslator", "IgnoreType"]
 
+# Maximum number of resolved values held by each translator
+TRANSLATOR_CACHE_SIZE = 10000
+
+# Lookup tables with up to this number of rows are loaded in full
+LOOKUP_PREFETCH_LIMIT = 5000
+
+# Maximum number of keys in a single IN (...) clause
+BATCH_QUERY_SIZE = 1000
+
 
 class IgnoreType:
     """
@@ -230,6 +243,34 @@ class SourceValueTranslator:
         """
         raise NotImplementedError
 
+    def referencing_column_values(self, field_values_list):
+        """
+        Derives the values of the referencing column for a batch of rows.
+        Subclasses that query the database should override this to resolve
+        the batch in as few queries as possible.
+        :param field_values_list: Column name-value pairings for each row.
+        :type field_values_list: list
+        :return: Values for the referencing column in the same order as the
+        rows.
+        :rtype: list
+        """
+        return [self.referencing_column_value(fv) for fv in field_values_list]
+
+    def prefetch(self):
+        """
+        Called once before the import starts so that subclasses can preload
+        the values they translate. Default implementation does nothing.
+        """
+        pass
+
+    def cache_stats(self):
+        """
+        :return: Cache size, hits and misses of the values resolved by the
+        translator, None if the translator does not cache values.
+        :rtype: dict
+        """
+        return None
+
     def run_checks(self):
         """
         Assert translator configuration prior to commencing the translation
@@ -365,15 +406,85 @@ class ValueTranslatorManager:
         if isinstance(translator, SourceValueTranslator):
             self.remove_translator_by_name(translator.name())
 
+    def prefetch(self):
+        """
+        Preloads the values of all translators prior to an import.
+        """
+        for translator in self._translators.values():
+            translator.prefetch()
+
+    def cache_stats(self):
+        """
+        :return: Cache statistics of the translators that cache values,
+        indexed by translator name.
+        :rtype: dict
+        """
+        stats = {}
+        for name, translator in self._translators.items():
+            tr_stats = translator.cache_stats()
+            if tr_stats is not None:
+                stats[name] = tr_stats
+
+        return stats
+
 
 class RelatedTableTranslator(SourceValueTranslator):
     """
     This class translates values from one or more columns in the referenced
     table to the specified column in the referencing table.
+    Resolved values are memoised in a bounded cache and a batch of rows can
+    be resolved with a single query.
     """
 
     def __init__(self):
         SourceValueTranslator.__init__(self)
+        self._link_table = None
+        self._cache = BoundedCache(TRANSLATOR_CACHE_SIZE)
+
+    def clear(self):
+        SourceValueTranslator.clear(self)
+        self._link_table = None
+        if hasattr(self, '_cache'):
+            self._cache.clear()
+
+    def set_referenced_table(self, table_name):
+        SourceValueTranslator.set_referenced_table(self, table_name)
+        self._link_table = None
+        self._cache.clear()
+
+    def _linked_table(self):
+        # Reflect the referenced table only once
+        if self._link_table is None:
+            self._link_table = self._table(self._referenced_table)
+
+        return self._link_table
+
+    def cache_stats(self):
+        return self._cache.stats()
+
+    def _query_column_pairs(self):
+        """
+        :return: Pairs of source column and referenced table column whose
+        referenced column exists in the referenced table.
+        :rtype: list
+        """
+        link_table = self._linked_table()
+
+        return [
+            (source_col, ref_col)
+            for source_col, ref_col in self._input_referenced_columns.items()
+            if ref_col in link_table.c
+        ]
+
+    @staticmethod
+    def _key(field_values, column_pairs):
+        # Values are compared as text, same as the database query
+        key = []
+        for source_col, _ in column_pairs:
+            val = field_values.get(source_col, None)
+            key.append(None if val is None else str(val))
+
+        return tuple(key)
 
     def referencing_column_value(self, field_values):
         """
@@ -385,37 +496,103 @@ class RelatedTableTranslator(SourceValueTranslator):
         :return: Value of the referenced column in the linked table.
         :rtype: object
         """
-        link_table_columns = self._table_columns(self._referenced_table)
+        return self.referencing_column_values([field_values])[0]
 
-        query_attrs = {}
+    def referencing_column_values(self, field_values_list):
+        """
+        Resolves the referenced column values for a batch of rows using one
+        IN (...) query for the keys that are not in the cache.
+        :param field_values_list: Pairs of field names and corresponding
+        values for each row.
+        :type field_values_list: list
+        :return: Values of the referenced column in the linked table.
+        :rtype: list
+        """
+        column_pairs = self._query_column_pairs()
+        keys = [self._key(fv, column_pairs) for fv in field_values_list]
+
+        # Values of the distinct keys in the batch, each looked up once.
+        # None in the key can never match in the database.
+        resolved = {}
+        missing_keys = []
+        for key in dict.fromkeys(keys):
+            if None in key:
+                resolved[key] = None
+                continue
 
-        for source_col, val in field_values.items():
-            ref_table_col = self._input_referenced_columns.get(source_col, None)
+            value = self._cache.get(key)
+            if value is MISSING:
+                missing_keys.append(key)
+            else:
+                resolved[key] = value
+
+        if column_pairs:
+            for i in range(0, len(missing_keys), BATCH_QUERY_SIZE):
+                resolved.update(self._load_keys(
+                    column_pairs,
+                    missing_keys[i:i + BATCH_QUERY_SIZE]
+                ))
+
+        values = []
+        for key in keys:
+            value = resolved.get(key, None)
+            values.append(IgnoreType() if value is None else value)
+
+        return values
+
+    def _load_keys(self, column_pairs, keys):
+        """
+        Queries the linked table for the given keys and caches the value of
+        the output column for each key. Keys without a matching record are
+        cached as not found.
+        :return: Value of the output column for each key, None for the keys
+        without a matching record.
+        :rtype: dict
+        """
+        link_table = self._linked_table()
+        ref_cols = [link_table.c[ref_col] for _, ref_col in column_pairs]
+        output_col = link_table.c.get(self._output_referenced_column, None)
+        if output_col is None:
+            for key in keys:
+                self._cache.set(key, None)
 
-            if ref_table_col is not None:
-                col_idx = getIndex(link_table_columns, ref_table_col)
+            return dict.fromkeys(keys)
 
-                # If column is found, add it to the query fields collection
-                if col_idx != -1:
-                    # TODO use the column object to cast based on column data type
-                    query_attrs[ref_table_col] = cast(val, String)
+        if len(ref_cols) == 1:
+            key_filter = ref_cols[0].in_(
+                [cast(key[0], String) for key in keys]
+            )
+        else:
+            key_filter = tuple_(*ref_cols).in_(
+                [tuple_(*[cast(v, String) for v in key]) for key in keys]
+            )
 
-        # Create link table object
-        link_table = self._table(self._referenced_table)
+        results = self._db_session.query(
+            output_col, *ref_cols
+        ).filter(key_filter).all()
 
-        # Use AND operator
-        link_table_rec = self._db_session.query(link_table).filter_by(**query_attrs).first()
+        found = {}
+        for row in results:
+            row_key = tuple(
+                None if v is None else str(v) for v in row[1:]
+            )
+            # Use the first matching record, same as a single row query
+            if row_key not in found:
+                found[row_key] = row[0]
 
-        if link_table_rec is None:
-            return IgnoreType()
+        values = {}
+        for key in keys:
+            values[key] = found.get(key, None)
+            self._cache.set(key, values[key])
 
-        else:
-            return getattr(link_table_rec, self._output_referenced_column, IgnoreType())
+        return values
 
 
 class LookupValueTranslator(RelatedTableTranslator):
     """
     Translator for lookup values.
+    Small lookup tables are loaded in full, case-folded, prior to the
+    import.
     """
     def __init__(self, **kwargs):
         super(LookupValueTranslator, self).__init__()
@@ -423,12 +600,71 @@ class LookupValueTranslator(RelatedTableTranslator):
         self._default_value = kwargs.get('default', '')
         self._lk_value_column = 'value'
 
+        # Ids of all the lookup values, indexed by case-folded value, if the
+        # lookup table has been prefetched
+        self._prefetched_ids = None
+        self._prefetch_hits = 0
+        self._prefetch_misses = 0
+
+    def clear(self):
+        RelatedTableTranslator.clear(self)
+        self._prefetched_ids = None
+
+    def set_referenced_table(self, table_name):
+        RelatedTableTranslator.set_referenced_table(self, table_name)
+        self._prefetched_ids = None
+
     def set_default_value(self, deflt_value):
         self._default_value = deflt_value
 
     def default_value(self):
         return self._default_value
 
+    def _lookup_value_column(self):
+        return getattr(self._linked_table().c, self._lk_value_column)
+
+    def prefetch(self):
+        """
+        Loads all the values of the lookup table if the table has no more
+        than LOOKUP_PREFETCH_LIMIT rows. The values are kept apart from the
+        bounded cache so that none of them can be evicted.
+        """
+        if not self._referenced_table:
+            return
+
+        lookup_table = self._linked_table()
+        num_rows = self._db_session.query(
+            func.count(lookup_table.c.id)
+        ).scalar()
+        if num_rows > LOOKUP_PREFETCH_LIMIT:
+            return
+
+        lk_value_column_obj = self._lookup_value_column()
+        results = self._db_session.query(
+            lookup_table.c.id, lk_value_column_obj
+        ).order_by(lookup_table.c.id).all()
+
+        prefetched_ids = {}
+        for lk_id, lk_value in results:
+            if lk_value is None:
+                continue
+
+            # Keep the first record, same as a single row query
+            prefetched_ids.setdefault(str(lk_value).lower(), lk_id)
+
+        self._prefetched_ids = prefetched_ids
+        self._prefetch_hits = self._prefetch_misses = 0
+
+    def cache_stats(self):
+        if self._prefetched_ids is None:
+            return RelatedTableTranslator.cache_stats(self)
+
+        return {
+            'size': len(self._prefetched_ids),
+            'hits': self._prefetch_hits,
+            'misses': self._prefetch_misses
+        }
+
     def referencing_column_value(self, field_values):
         """
         Searches a corresponding record from the linked table using one or more
@@ -439,6 +675,22 @@ class LookupValueTranslator(RelatedTableTranslator):
         :return: Value of the referenced column in the linked table.
         :rtype: object
         """
+        if len(field_values) == 0:
+            return IgnoreType
+
+        return self.referencing_column_values([field_values])[0]
+
+    def referencing_column_values(self, field_values_list):
+        """
+        Resolves the lookup ids for a batch of rows using a case-insensitive
+        match on the lookup value. Values that are not in the cache are
+        queried with a single IN (...) query.
+        :param field_values_list: Pairs of field names and corresponding
+        values for each row.
+        :type field_values_list: list
+        :return: Ids of the lookup records.
+        :rtype: list
+        """
         if not self._referenced_table:
             msg = QApplication.translate(
                 'LookupValueTranslator',
@@ -446,39 +698,81 @@ class LookupValueTranslator(RelatedTableTranslator):
             )
             raise ValueError(msg)
 
-        if len(field_values) == 0:
-            return IgnoreType
+        # Assume the source column is the first (and only) one in field_values
+        keys = []
+        for field_values in field_values_list:
+            if len(field_values) == 0:
+                keys.append(None)
+                continue
 
-        source_column = list(field_values.keys())[0]
+            lookup_value = list(field_values.values())[0]
+            keys.append(
+                None if lookup_value is None else str(lookup_value).lower()
+            )
 
-        # Check if the source column is in the field_values
-        if source_column not in field_values:
-            return IgnoreType
+        default_key = str(self._default_value).lower() \
+            if self._default_value else None
 
-        # Assume the source column is the first (and only) one in field_values
-        source_column = list(field_values.keys())[0]
-        lookup_value = field_values.get(source_column)
+        # Ids of the distinct values in the batch, each looked up once
+        resolved = {}
+        missing_keys = []
+        for key in dict.fromkeys(keys + [default_key]):
+            if key is None:
+                continue
+
+            if self._prefetched_ids is not None:
+                # The whole table has been loaded so other values do not exist
+                lk_id = self._prefetched_ids.get(key, None)
+                if lk_id is None:
+                    self._prefetch_misses += 1
+                else:
+                    self._prefetch_hits += 1
+                resolved[key] = lk_id
+                continue
 
-        # Create lookup table object
-        lookup_table = self._table(self._referenced_table)
+            lk_id = self._cache.get(key)
+            if lk_id is MISSING:
+                missing_keys.append(key)
+            else:
+                resolved[key] = lk_id
 
-        lk_value_column_obj = getattr(lookup_table.c, self._lk_value_column)
+        for i in range(0, len(missing_keys), BATCH_QUERY_SIZE):
+            resolved.update(
+                self._load_lookup_keys(missing_keys[i:i + BATCH_QUERY_SIZE])
+            )
 
-        # Get corresponding lookup value record
-        lookup_rec = self._db_session.query(lookup_table).filter(
-            func.lower(lk_value_column_obj) == func.lower(cast(lookup_value, String))
-        ).first()
+        default_id = resolved.get(default_key, None)
 
-        # Use default value if record is empty
-        if lookup_rec is None and self._default_value:
-            lookup_rec = self._db_session.query(lookup_table).filter(
-                lk_value_column_obj == self._default_value
-            ).first()
+        values = []
+        for key in keys:
+            lk_id = resolved.get(key, None)
+            if lk_id is None:
+                lk_id = default_id
 
-        if lookup_rec is None:
-            return IgnoreType()
+            values.append(IgnoreType() if lk_id is None else lk_id)
+
+        return values
 
-        return getattr(lookup_rec, 'id', IgnoreType())
+    def _load_lookup_keys(self, keys):
+        # Query and cache the lookup ids for the given case-folded values
+        lookup_table = self._linked_table()
+        lk_value_column_obj = self._lookup_value_column()
+        results = self._db_session.query(
+            lookup_table.c.id, lk_value_column_obj
+        ).filter(
+            func.lower(lk_value_column_obj).in_(keys)
+        ).order_by(lookup_table.c.id).all()
+
+        found = {}
+        for lk_id, lk_value in results:
+            found.setdefault(str(lk_value).lower(), lk_id)
+
+        values = {}
+        for key in keys:
+            values[key] = found.get(key, None)
+            self._cache.set(key, values[key])
+
+        return values
 
 
 class MultipleEnumerationTranslator(SourceValueTranslator):
@@ -494,6 +788,9 @@ class MultipleEnumerationTranslator(SourceValueTranslator):
         # Container for lookup id and corresponding values
         self._lk_up_id_vals = {}
 
+        # Lookup objects indexed by case-folded value
+        self._cache = BoundedCache(TRANSLATOR_CACHE_SIZE)
+
     def separator(self):
         """
         :return: The enum separator in the source table's column.
@@ -561,16 +858,25 @@ class MultipleEnumerationTranslator(SourceValueTranslator):
         for kv in lk_vals:
             kv = kv.strip()
             if kv:
-                # Get corresponding lookup value object based on a
-                # case-insensitive search
-                lookup_obj = self._db_session.query(lookup_mapped_cls).filter(
-                    func.lower(lookup_mapped_cls.value) == func.lower(kv)
-                ).first()
+                lookup_obj = self._cache.get(kv.lower())
+                if lookup_obj is MISSING:
+                    # Get corresponding lookup value object based on a
+                    # case-insensitive search
+                    lookup_obj = self._db_session.query(
+                        lookup_mapped_cls
+                    ).filter(
+                        func.lower(lookup_mapped_cls.value) == func.lower(kv)
+                    ).first()
+                    self._cache.set(kv.lower(), lookup_obj)
+
                 if lookup_obj:
                     lk_objs.append(lookup_obj)
 
         return lk_objs
 
+    def cache_stats(self):
+        return self._cache.stats()
+
 
 class SourceDocumentTranslator(SourceValueTranslator):
     """
@@ -6,6 +6,8 @@ about:            Wrapper class for writing PostgreSQL/PostGIS tables to user-de
 """
 
 import datetime
+import logging
+import time
 
 from qgis.PyQt.QtCore import (
     QFileInfo,
@@ -23,10 +25,11 @@ from osgeo import osr
 from stdm.exceptions import DummyException
 from stdm.data.pg_utils import (
     columnType,
-    geometryType
-)
-from stdm.settings import (
-    current_profile
+    column_types,
+    geometryType,
+    query_row_count,
+    report_filter_sql,
+    stream_query
 )
 from stdm.data.importexport.enums import (
     ogrTypes,
@@ -34,6 +37,17 @@ from stdm.data.importexport.enums import (
     drivers
 )
 
+LOGGER = logging.getLogger('stdm')
+
+# Number of rows fetched from the server-side cursor at a time
+EXPORT_CHUNK_SIZE = 5000
+
+# Number of features written in a single OGR layer transaction
+EXPORT_TRANSACTION_SIZE = 20000
+
+# Minimum interval, in seconds, between progress dialog updates
+PROGRESS_UPDATE_INTERVAL = 0.25
+
 
 class OGRWriter():
     OGR_STRING_TYPE = 4
@@ -60,10 +74,11 @@ class OGRWriter():
 
         return str(fi.baseName())
 
-    def createField(self, table, field):
+    def createField(self, table, field, colType=None):
         # Creates an OGR field
+        if colType is None:
+            colType = columnType(table, field)
 
-        colType = columnType(table, field)
         # Get OGR type
         ogrType = ogrTypes[colType]
 
@@ -75,7 +90,30 @@ class OGRWriter():
 
         return field_defn
 
-    def db2Feat(self, parent, table, results, columns, geom=""):
+    def db2Feat(self, parent, table, columns, geom="", where="",
+                chunk_size=EXPORT_CHUNK_SIZE,
+                transaction_size=EXPORT_TRANSACTION_SIZE):
+        """
+        Exports the records of a table or view to the target file. Rows are
+        streamed from a server-side cursor in chunks, geometries are
+        transferred as WKB and features are written in layer transactions.
+        :param parent: Parent widget of the progress dialog.
+        :param table: Name of the source table or view.
+        :type table: str
+        :param columns: Names of the non-spatial columns to export.
+        :type columns: list
+        :param geom: Name of the geometry column, empty if the geometry
+        should not be exported.
+        :type geom: str
+        :param where: Optional filter expression.
+        :type where: str
+        :param chunk_size: Number of rows fetched from the server at a time.
+        :type chunk_size: int
+        :param transaction_size: Number of features written per transaction.
+        :type transaction_size: int
+        :return: Number of exported features.
+        :rtype: int
+        """
         # Execute the export process
         # Create driver
         drv = ogr.GetDriverByName(self.getDriverName())
@@ -106,75 +144,93 @@ class OGRWriter():
         if lyr is None:
             raise Exception("Layer creation failed")
 
-        # Create fields
+        # Create fields, the column types are resolved once
+        col_types = column_types(table, columns)
         for c in columns:
 
-            field_defn = self.createField(table, c)
+            field_defn = self.createField(table, c, col_types[c])
 
             if lyr.CreateField(field_defn) != 0:
                 raise Exception("Creating %s field failed" % (c))
 
-        # Add Geometry column to list for referencing in the result set
+        query_cols = list(columns)
         if geom != "":
-            columns.append(geom)
+            query_cols.append('ST_AsBinary({0})'.format(geom))
 
-        featGeom = None
+        sql = report_filter_sql(table, ','.join(query_cols), where)
 
         # Configure progress dialog
-        initVal = 0
-        numFeat = results.rowcount
-        progress = QProgressDialog("", "&Cancel", initVal, numFeat, parent)
+        numFeat = query_row_count(sql)
+        progress = QProgressDialog("", "&Cancel", 0, numFeat, parent)
         progress.setWindowModality(Qt.WindowModal)
         lblMsgTemp = QApplication.translate(
             'OGRWriter', 'Writing {0} of {1} to file...')
 
-        entity = current_profile().entity_by_name(table)
-        # Iterate the result set
-        for r in results:
-            # Progress dialog
-            progress.setValue(initVal)
-            progressMsg = lblMsgTemp.format(str(initVal + 1), str(numFeat))
-            progress.setLabelText(progressMsg)
-
-            if progress.wasCanceled():
-                break
-
-            # Create OGR Feature
-            feat = ogr.Feature(lyr.GetLayerDefn())
-
-            for i in range(len(columns)):
-                colName = columns[i]
-
-                # Check if its the geometry column in the iteration
-                if colName == geom:
-                    if r[i] is not None:
-                        featGeom = ogr.CreateGeometryFromWkt(r[i])
-                    else:
-                        featGeom = ogr.CreateGeometryFromWkt("")
-
-                    feat.SetGeometry(featGeom)
-
-                else:
-                    field_value = r[i]
-                    feat.SetField(i, str(field_value))
-
-            if lyr.CreateFeature(feat) != 0:
-                progress.close()
-                progress.deleteLater()
-                del progress
-                raise Exception(
-                    "Failed to create feature in %s" % (self._targetFile)
-                )
-
-            if featGeom is not None:
-                featGeom.Destroy()
-
-            feat.Destroy()
-            initVal += 1
-
-        progress.setValue(numFeat)
-        progress.deleteLater()
-        del progress
+        use_transactions = lyr.TestCapability(ogr.OLCTransactions)
+        num_fields = len(columns)
+        layer_defn = lyr.GetLayerDefn()
+        written = 0
+        last_update = 0
+
+        try:
+            if use_transactions:
+                lyr.StartTransaction()
+
+            for rows in stream_query(sql, chunk_size):
+                if progress.wasCanceled():
+                    break
+
+                for r in rows:
+                    # Create OGR Feature
+                    feat = ogr.Feature(layer_defn)
+
+                    for i in range(num_fields):
+                        field_value = r[i]
+                        if field_value is not None:
+                            feat.SetField(i, str(field_value))
+
+                    if geom != "" and r[num_fields] is not None:
+                        feat.SetGeometry(
+                            ogr.CreateGeometryFromWkb(bytes(r[num_fields]))
+                        )
+
+                    if lyr.CreateFeature(feat) != 0:
+                        raise Exception(
+                            "Failed to create feature in %s" % (self._targetFile)
+                        )
+
+                    written += 1
+
+                    if use_transactions and written % transaction_size == 0:
+                        lyr.CommitTransaction()
+                        lyr.StartTransaction()
+
+                # Throttle progress updates
+                now = time.monotonic()
+                if now - last_update >= PROGRESS_UPDATE_INTERVAL:
+                    last_update = now
+                    progress.setValue(written)
+                    progress.setLabelText(
+                        lblMsgTemp.format(str(written), str(numFeat))
+                    )
+
+            if use_transactions:
+                lyr.CommitTransaction()
+
+        except Exception:
+            if use_transactions:
+                lyr.RollbackTransaction()
+            raise
+
+        finally:
+            progress.setValue(numFeat)
+            progress.deleteLater()
+            del progress
+
+        LOGGER.debug('%s features exported from %s to %s', written, table,
+                     self._targetFile)
+
+        return written
 
     @staticmethod
     def is_date(string):
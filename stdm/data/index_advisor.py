@@ -0,0 +1,448 @@
+"""
+/***************************************************************************
+Name                 : index_advisor
+Description          : Proposes and builds the indexes that the relations,
+                       search columns and geometry columns of a profile need
+                       but that do not exist in the database.
+Date                 : 18/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+
+Indexes are built with CREATE INDEX CONCURRENTLY so that the tables can
+still be edited while they are being built, which requires the statements
+to be run outside a transaction.
+"""
+import logging
+from collections import OrderedDict
+
+from qgis.PyQt.QtWidgets import QApplication
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql.expression import text
+
+from stdm.data.database import STDMDb
+from stdm.data.search import (
+    TEXT_COLUMN_TYPES,
+    full_text_columns,
+    full_text_document_sql
+)
+
+LOGGER = logging.getLogger('stdm')
+
+# Index access methods
+BTREE = 'btree'
+GIST = 'gist'
+GIN = 'gin'
+
+# Operator class of the trigram indexes used by ILIKE searches
+TRIGRAM_OPCLASS = 'gin_trgm_ops'
+TRIGRAM_EXTENSION = 'pg_trgm'
+
+# Search columns are only indexed on tables with at least this number of
+# rows and that are mostly read using sequential scans, as each index slows
+# down the writes to the table
+SEARCH_INDEX_MIN_ROWS = 10000
+
+# Name suffix of the full text indexes
+FULL_TEXT_INDEX_SUFFIX = 'fts'
+
+# PostgreSQL truncates identifiers longer than this
+MAX_IDENTIFIER_LENGTH = 63
+
+# Leading column, access method and operator class of the existing indexes.
+# The column is null for expression indexes.
+_INDEXES_SQL = """
+SELECT t.relname AS table_name, ic.relname AS index_name,
+a.attname AS column_name, am.amname AS method, opc.opcname AS opclass,
+ix.indisvalid AS valid
+FROM pg_index ix
+JOIN pg_class t ON t.oid = ix.indrelid
+JOIN pg_class ic ON ic.oid = ix.indexrelid
+JOIN pg_namespace n ON n.oid = t.relnamespace
+JOIN pg_am am ON am.oid = ic.relam
+LEFT JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = ix.indkey[0]
+LEFT JOIN pg_opclass opc ON opc.oid = ix.indclass[0]
+WHERE n.nspname = 'public'
+"""
+
+_TABLE_STATS_SQL = """
+SELECT relname AS table_name, n_live_tup, seq_scan, seq_tup_read,
+COALESCE(idx_scan, 0) AS idx_scan
+FROM pg_stat_user_tables WHERE schemaname = 'public'
+"""
+
+_TRIGRAM_SQL = """
+SELECT installed_version IS NOT NULL AS installed
+FROM pg_available_extensions WHERE name = :name
+"""
+
+
+def tr(text):
+    return QApplication.translate('IndexAdvisor', text)
+
+
+def _quote(name):
+    return '"{0}"'.format(name.replace('"', '""'))
+
+
+class TableStatistics(object):
+    """
+    Number of rows and scans of a table read from pg_stat_user_tables.
+    """
+
+    def __init__(self, rows=0, seq_scans=0, seq_rows_read=0, index_scans=0):
+        self.rows = rows
+        self.seq_scans = seq_scans
+        self.seq_rows_read = seq_rows_read
+        self.index_scans = index_scans
+
+
+class IndexProposal(object):
+    """
+    Index missing on a profile table.
+    """
+
+    def __init__(self, table, column, method=BTREE, opclass=None, reason='',
+                 statistics=None, expression=None):
+        """
+        :param table: Name of the table.
+        :type table: str
+        :param column: Name of the indexed column, or of the index suffix
+        for expression indexes.
+        :type column: str
+        :param method: Access method, one of BTREE, GIST or GIN.
+        :type method: str
+        :param opclass: Operator class of the indexed column, None to use
+        the default of the column type.
+        :type opclass: str
+        :param reason: Why the index is needed.
+        :type reason: str
+        :param statistics: Row and scan counts of the table.
+        :type statistics: TableStatistics
+        :param expression: Indexed expression, None to index the column.
+        :type expression: str
+        """
+        self.table = table
+        self.column = column
+        self.method = method
+        self.opclass = opclass
+        self.reason = reason
+        self.statistics = statistics or TableStatistics()
+        self.expression = expression
+        self.error = None
+
+    @property
+    def name(self):
+        """
+        :return: Name of the index, following the naming of the indexes
+        created for the columns flagged for indexing in the configuration.
+        :rtype: str
+        """
+        suffix = '_trgm' if self.opclass == TRIGRAM_OPCLASS else ''
+
+        return 'idx_{0}_{1}{2}'.format(
+            self.table, self.column, suffix
+        )[:MAX_IDENTIFIER_LENGTH]
+
+    @property
+    def is_trigram(self):
+        """
+        :return: True if the index requires the pg_trgm extension.
+        :rtype: bool
+        """
+        return self.opclass == TRIGRAM_OPCLASS
+
+    def sql(self):
+        """
+        :return: Statement creating the index without blocking writes to
+        the table.
+        :rtype: str
+        """
+        if self.expression is not None:
+            column = '({0})'.format(self.expression)
+        else:
+            column = _quote(self.column)
+        if self.opclass:
+            column = '{0} {1}'.format(column, self.opclass)
+
+        return 'CREATE INDEX CONCURRENTLY IF NOT EXISTS {0} ON {1} ' \
+               'USING {2} ({3})'.format(
+                   _quote(self.name), _quote(self.table), self.method, column
+               )
+
+    def __str__(self):
+        return tr('{0} index on {1}.{2} ({3}, {4} rows)').format(
+            self.method if not self.is_trigram else 'trigram',
+            self.table,
+            self.column,
+            self.reason,
+            self.statistics.rows
+        )
+
+
+class IndexAdvisor(object):
+    """
+    Compares the columns of the profile tables that are used for joins,
+    cascading deletes, searches and spatial queries with the indexes in the
+    database.
+    """
+
+    def __init__(self, profile, engine=None):
+        """
+        :param profile: Profile whose tables are to be inspected.
+        :type profile: Profile
+        :param engine: Engine connected to the database, the STDM engine if
+        None.
+        :type engine: Engine
+        """
+        self.profile = profile
+        self.engine = engine
+        if self.engine is None:
+            self.engine = STDMDb.instance().engine
+
+        self.indexes = {}
+        self.index_names = set()
+        self.invalid_indexes = set()
+        self.statistics = {}
+        self.trigram_installed = False
+        self.trigram_available = False
+
+    def read_catalog(self):
+        """
+        Reads the existing indexes, the table statistics and whether the
+        trigram extension is available.
+        """
+        self.indexes = {}
+        self.index_names = set()
+        self.invalid_indexes = set()
+        self.statistics = {}
+
+        with self.engine.connect() as conn:
+            for row in conn.execute(text(_INDEXES_SQL)):
+                # Left behind by a failed concurrent build
+                if not row.valid:
+                    self.invalid_indexes.add(row.index_name)
+                    continue
+
+                self.index_names.add(row.index_name)
+                self.indexes.setdefault(row.table_name, []).append(
+                    (row.column_name, row.method, row.opclass)
+                )
+
+            for row in conn.execute(text(_TABLE_STATS_SQL)):
+                self.statistics[row.table_name] = TableStatistics(
+                    row.n_live_tup, row.seq_scan, row.seq_tup_read,
+                    row.idx_scan
+                )
+
+            trgm = conn.execute(
+                text(_TRIGRAM_SQL), name=TRIGRAM_EXTENSION
+            ).fetchone()
+            self.trigram_available = trgm is not None
+            self.trigram_installed = bool(trgm and trgm.installed)
+
+    def is_indexed(self, table, column, method=BTREE, opclass=None):
+        """
+        :return: True if an index of the given type exists with the column
+        as its leading column.
+        :rtype: bool
+        """
+        for idx_column, idx_method, idx_opclass in self.indexes.get(table, []):
+            if idx_column != column or idx_method != method:
+                continue
+            if opclass is None or idx_opclass == opclass:
+                return True
+
+        return False
+
+    def _candidates(self):
+        # Columns that should be indexed, keyed by table and column name
+        candidates = OrderedDict()
+
+        def add(table, column, method, opclass, reason, search=False,
+                expression=None):
+            key = (table, column, method, opclass)
+            if key not in candidates:
+                candidates[key] = (reason, search, expression)
+
+        str_entity = self.profile.social_tenure
+        str_columns = {}
+        if str_entity is not None:
+            for col in str_entity.party_columns:
+                str_columns[col] = tr('STR party')
+            for col in str_entity.spatial_unit_columns:
+                str_columns[col] = tr('STR spatial unit')
+
+        # Child columns are joined to their parents and are scanned when
+        # parent records are deleted
+        for rel in self.profile.relations.values():
+            if not rel.valid()[0]:
+                continue
+
+            child_column = rel.child.columns.get(rel.child_column, None)
+            if rel.child.TYPE_INFO == 'SOCIAL_TENURE' and \
+                    rel.child_column in str_columns:
+                reason = str_columns[rel.child_column]
+            elif child_column is not None and \
+                    child_column.TYPE_INFO == 'LOOKUP':
+                reason = tr('lookup')
+            else:
+                reason = tr('foreign key')
+
+            add(rel.child.name, rel.child_column, BTREE, None, reason)
+
+        for entity in self.profile.entities.values():
+            if entity.TYPE_INFO == 'VALUE_LIST':
+                continue
+
+            # Full text document searched by the advanced search
+            text_columns = full_text_columns(entity)
+            if len(text_columns) > 0:
+                add(
+                    entity.name,
+                    FULL_TEXT_INDEX_SUFFIX,
+                    GIN,
+                    None,
+                    tr('full text search'),
+                    True,
+                    full_text_document_sql(text_columns)
+                )
+
+            for column in entity.columns.values():
+                if column.TYPE_INFO == 'GEOMETRY':
+                    add(entity.name, column.name, GIST, None, tr('geometry'))
+
+                elif column.searchable and column.TYPE_INFO != 'SERIAL':
+                    if column.TYPE_INFO in TEXT_COLUMN_TYPES and \
+                            self.trigram_available:
+                        add(
+                            entity.name,
+                            column.name,
+                            GIN,
+                            TRIGRAM_OPCLASS,
+                            tr('text search'),
+                            True
+                        )
+                    else:
+                        add(entity.name, column.name, BTREE, None,
+                            tr('search'), True)
+
+        return candidates
+
+    def propose(self, min_rows=0):
+        """
+        Reads the database catalogue and lists the missing indexes. Indexes
+        on the relation and geometry columns are always proposed while
+        those on the search columns are only proposed for large tables that
+        are mostly read using sequential scans.
+        :param min_rows: Tables with fewer rows are not considered.
+        :type min_rows: int
+        :return: Missing indexes, those on the tables with the most rows
+        read by sequential scans first.
+        :rtype: list
+        """
+        self.read_catalog()
+
+        proposals = []
+        for (table, column, method, opclass), (reason, search, expression) \
+                in self._candidates().items():
+            # Table not created yet
+            if table not in self.statistics:
+                continue
+
+            stats = self.statistics[table]
+            if stats.rows < min_rows:
+                continue
+
+            if search and (stats.rows < SEARCH_INDEX_MIN_ROWS or
+                           stats.seq_scans <= stats.index_scans):
+                continue
+
+            proposal = IndexProposal(
+                table, column, method, opclass, reason, stats, expression
+            )
+
+            if expression is not None:
+                if proposal.name in self.index_names:
+                    continue
+            elif self.is_indexed(table, column, method, opclass):
+                continue
+
+            proposals.append(proposal)
+
+        proposals.sort(
+            key=lambda p: (p.statistics.seq_rows_read, p.statistics.rows),
+            reverse=True
+        )
+
+        return proposals
+
+    def build(self, proposals, index_built=None):
+        """
+        Creates the proposed indexes one at a time. An index that fails is
+        dropped, as a failed concurrent build leaves an invalid index
+        behind, and the remaining indexes are still built.
+        :param proposals: Indexes to create.
+        :type proposals: list
+        :param index_built: Called with each proposal after its index has
+        been built or has failed, in which case its error is set.
+        :type index_built: callable
+        :return: Number of indexes created.
+        :rtype: int
+        """
+        created = 0
+
+        conn = self.engine.connect().execution_options(
+            isolation_level='AUTOCOMMIT'
+        )
+        try:
+            trigram_ready = self.trigram_installed
+            for proposal in proposals:
+                proposal.error = None
+                try:
+                    # Otherwise skipped by IF NOT EXISTS
+                    if proposal.name in self.invalid_indexes:
+                        self._drop_invalid(conn, proposal)
+                        self.invalid_indexes.discard(proposal.name)
+
+                    if proposal.is_trigram and not trigram_ready:
+                        conn.execute(text(
+                            'CREATE EXTENSION IF NOT EXISTS {0}'.format(
+                                TRIGRAM_EXTENSION
+                            )
+                        ))
+                        trigram_ready = True
+                        self.trigram_installed = True
+
+                    conn.execute(text(proposal.sql()))
+                    created += 1
+
+                except SQLAlchemyError as err:
+                    proposal.error = str(err)
+                    LOGGER.debug('Index %s not created: %s', proposal.name, err)
+                    self._drop_invalid(conn, proposal)
+
+                if index_built is not None:
+                    index_built(proposal)
+        finally:
+            conn.close()
+
+        return created
+
+    def _drop_invalid(self, conn, proposal):
+        try:
+            conn.execute(text('DROP INDEX CONCURRENTLY IF EXISTS {0}'.format(
+                _quote(proposal.name)
+            )))
+        except SQLAlchemyError as err:
+            LOGGER.debug('Index %s not dropped: %s', proposal.name, err)
@@ -17,6 +17,9 @@ email                : gkahiu@gmail.com
  *                                                                         *
  ***************************************************************************/
 """
+import threading
+import uuid
+from contextlib import contextmanager
 from typing import List
 
 from geoalchemy2 import WKBElement
@@ -57,6 +60,9 @@ _text_col_types = ["character varying", "text"]
 
 # Flags for specifying data source type
 VIEWS = 2500
+
+# Connection, per thread, to which the statements run by _execute are routed
+_shared_transaction = threading.local()
 TABLES = 2501
 
 
@@ -235,8 +241,12 @@ def pg_table_record_count(table_name):
     return cnt
 
 
-def process_report_filter(tableName, columns, whereStr="", sortStmnt=""):
-    # Process the report builder filter
+def report_filter_sql(tableName, columns, whereStr="", sortStmnt=""):
+    """
+    Builds the SELECT statement used by the report builder and data export
+    filters.
+    :rtype: str
+    """
     if "'" in columns and '"' not in columns:
         cols = []
         spited_cols = columns.split(',')
@@ -253,11 +263,66 @@ def process_report_filter(tableName, columns, whereStr="", sortStmnt=""):
     if sortStmnt != "":
         sql += sortStmnt
 
+    return sql
+
+
+def process_report_filter(tableName, columns, whereStr="", sortStmnt=""):
+    # Process the report builder filter
+    sql = report_filter_sql(tableName, columns, whereStr, sortStmnt)
+
     t = text(sql)
 
     return _execute(t)
 
 
+def query_row_count(sql):
+    """
+    :param sql: SELECT statement.
+    :type sql: str
+    :return: Number of rows returned by the statement, computed on the
+    server without fetching the rows.
+    :rtype: int
+    """
+    t = text('SELECT count(*) FROM ({0}) AS q'.format(sql))
+    result = _execute(t)
+
+    for r in result:
+        return r[0]
+
+    return 0
+
+
+def stream_query(sql, chunk_size=5000):
+    """
+    Executes the statement using a named server-side cursor and yields the
+    rows in chunks so that the full result set is never held in memory.
+    :param sql: SELECT statement.
+    :type sql: str
+    :param chunk_size: Number of rows fetched from the server at a time.
+    :type chunk_size: int
+    :return: Generator of lists of rows.
+    """
+    conn = STDMDb.instance().engine.raw_connection()
+    cursor_name = 'stdm_stream_{0}'.format(uuid.uuid4().hex)
+    cursor = conn.cursor(name=cursor_name)
+    cursor.itersize = chunk_size
+
+    try:
+        cursor.execute(sql)
+
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+
+            yield rows
+
+    finally:
+        cursor.close()
+        conn.rollback()
+        conn.close()
+
+
 def export_data(table_name):
     sql = "SELECT * FROM {0} ".format(str(table_name))
 
@@ -498,6 +563,37 @@ def columnType(tableName, columnName):
     return dataType
 
 
+def column_types(table_name, columns):
+    """
+    Returns the PostgreSQL data types of the specified columns using a
+    single query. Columns that are not found in the information schema,
+    such as view expressions, are resolved individually.
+    :param table_name: Name of the table or view.
+    :type table_name: str
+    :param columns: Column names, quoted names are supported.
+    :type columns: list
+    :return: Data types indexed by column name as specified in 'columns'.
+    :rtype: dict
+    """
+    sql = "SELECT column_name, data_type FROM information_schema.columns " \
+          "WHERE table_name = :tname"
+    result = _execute(text(sql), tname=table_name)
+
+    schema_types = {}
+    for r in result:
+        schema_types[r['column_name']] = r['data_type']
+
+    types = {}
+    for c in columns:
+        data_type = schema_types.get(c.strip('"'), None)
+        if data_type is None:
+            data_type = columnType(table_name, c)
+
+        types[c] = data_type
+
+    return types
+
+
 def columns_by_type(table, data_types):
     """
     :param table: Name of the database table.
@@ -575,10 +671,39 @@ def qgsgeometry_from_wkbelement(wkb_element):
     return QgsGeometry.fromWkt(geom_wkt)
 
 
+@contextmanager
+def shared_transaction(connection):
+    """
+    Routes the statements run by _execute, in the current thread, to the
+    given connection so that they are part of the transaction in progress
+    on it instead of being committed one at a time.
+    :param connection: Connection with a transaction in progress.
+    :type connection: Connection
+    """
+    _shared_transaction.connection = connection
+    try:
+        yield connection
+    finally:
+        _shared_transaction.connection = None
+
+
 def _execute(sql, **kwargs):
     """
     Execute the passed in sql statement
     """
+    shared_conn = getattr(_shared_transaction, 'connection', None)
+    if shared_conn is not None:
+        # Run each statement in a savepoint so that the errors handled by
+        # the callers do not abort the shared transaction
+        savepoint = shared_conn.begin_nested()
+        try:
+            result = shared_conn.execute(sql, **kwargs)
+            savepoint.commit()
+            return result
+        except SQLAlchemyError as db_error:
+            savepoint.rollback()
+            raise db_error
+
     try:
         conn = STDMDb.instance().engine.connect()
         trans = conn.begin()
@@ -19,6 +19,8 @@ email                : gkahiu@gmail.com
  ***************************************************************************/
 """
 
+import bisect
+from collections import OrderedDict
 from decimal import Decimal
 
 from qgis.PyQt.QtCore import (
@@ -35,11 +37,16 @@ from qgis.PyQt.QtGui import (
     QColor,
     QFont
 )
+from sqlalchemy import (
+    and_,
+    or_
+)
 
 from stdm.data.modelformatters import (
     LookupFormatter,
     DoBFormatter,
 )
+from stdm.data.search import EntitySearch
 
 # Standard colors for widgets supporting alternating rows
 ALT_COLOR_EVEN = QColor(255, 165, 79)
@@ -605,6 +612,7 @@ class VerticalHeaderSortFilterProxyModel(QSortFilterProxyModel):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.filter_params = {}
+        self.filter_ids = None
 
     def headerData(self, section, orientation, role):
         if orientation == Qt.Vertical and role == Qt.DisplayRole:
@@ -612,17 +620,32 @@ class VerticalHeaderSortFilterProxyModel(QSortFilterProxyModel):
 
         return super(VerticalHeaderSortFilterProxyModel, self).headerData(section, orientation, role)
 
-    def set_filter_params(self, parameters: dict):
+    def set_filter_params(self, parameters: dict, ids=None):
         """
         Sets a dictionary of filtering parameters to use to filter the model
+        :param parameters: Search values indexed by attribute name.
+        :type parameters: dict
+        :param ids: Ids of the records matching the parameters, searched
+        in the database. If None, the parameters are compared with the
+        values of each row.
+        :type ids: set
         """
         self.filter_params = parameters
+        self.filter_ids = ids if parameters else None
         self.invalidateFilter()
 
     def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:
         if not super().filterAcceptsRow(source_row, source_parent):
             return False
 
+        if self.filter_ids is not None:
+            row_id = self.sourceModel().data(
+                self.sourceModel().index(source_row, 0, QModelIndex()),
+                BaseSTDMTableModel.ROLE_ROW_ID
+            )
+
+            return row_id in self.filter_ids
+
         for col in range(self.sourceModel().columnCount()):
             attribute_name = self.sourceModel().data(self.sourceModel().index(source_row, col, QModelIndex()),
                                                      BaseSTDMTableModel.ROLE_ATTRIBUTE_NAME)
@@ -642,6 +665,458 @@ class VerticalHeaderSortFilterProxyModel(QSortFilterProxyModel):
         return True
 
 
+class _ModelPage:
+    """
+    Rows of a page in EntityPagedTableModel. 'rows' is None if the page has
+    been evicted from memory, in which case it is fetched again using
+    'start_key'.
+    """
+
+    def __init__(self, start_key, rows):
+        self.start_key = start_key
+        self.rows = rows
+        self.count = len(rows)
+        # Pages with rows changed in the view are not evicted
+        self.pinned = False
+
+
+class EntityPagedTableModel(BaseSTDMTableModel):
+    """
+    Table model that fetches entity records from the database on demand,
+    one page at a time, using keyset pagination i.e.
+    WHERE (sort column, id) > (last value, last id) ORDER BY sort column, id
+    LIMIT page size.
+    Sorting and filtering are done in the database. At most 'max_pages'
+    pages are held in memory, the rest are fetched again when required.
+    """
+
+    def __init__(self, db_model, headerdata, attribute_names,
+                 formatters=None, page_size=500, max_pages=20,
+                 parent=None, entity=None):
+        """
+        :param db_model: Mapped class of the entity.
+        :param headerdata: Column headers.
+        :type headerdata: list
+        :param attribute_names: Model attribute names corresponding to the
+        headers.
+        :type attribute_names: list
+        :param formatters: Display formatters indexed by attribute name.
+        :type formatters: dict
+        :param page_size: Number of records fetched in one query.
+        :type page_size: int
+        :param max_pages: Maximum number of pages held in memory.
+        :type max_pages: int
+        :param entity: Entity of the records, whose column types are used to
+        compile the search parameters.
+        :type entity: Entity
+        """
+        BaseSTDMTableModel.__init__(
+            self, [], headerdata, parent,
+            attribute_names=attribute_names
+        )
+        self._db_model = db_model
+        self._search = EntitySearch(entity, db_model)
+        self._formatters = formatters or {}
+        self.page_size = max(1, page_size)
+        self.max_pages = max(2, max_pages)
+
+        self._sort_column = None
+        self._sort_order = Qt.AscendingOrder
+        self._filter_criteria = OrderedDict()
+
+        self._pages = []
+        self._offsets = []
+        self._loaded_pages = OrderedDict()
+        self._at_end = False
+
+    def _table_column(self, attribute_name):
+        # Table column object or None for relationship attributes
+        return self._db_model.__table__.c.get(attribute_name, None)
+
+    def _query(self):
+        query = self._db_model().queryObject()
+        for criterion in self._filter_criteria.values():
+            query = query.filter(criterion)
+
+        return query
+
+    def _ordered_query(self, start_key=None):
+        # Query sorted by the sort column and id, starting after start_key
+        query = self._query()
+        id_col = self._db_model.id
+        descending = self._sort_order == Qt.DescendingOrder
+        sort_col = None
+        if self._sort_column is not None:
+            sort_col = self._table_column(self._sort_column)
+
+        if start_key is not None:
+            last_val, last_id = start_key
+            after_id = id_col < last_id if descending else id_col > last_id
+
+            if sort_col is None:
+                query = query.filter(after_id)
+            elif last_val is None:
+                # Nulls are sorted last
+                query = query.filter(and_(sort_col.is_(None), after_id))
+            else:
+                after_val = sort_col < last_val if descending \
+                    else sort_col > last_val
+                query = query.filter(or_(
+                    after_val,
+                    and_(sort_col == last_val, after_id),
+                    sort_col.is_(None)
+                ))
+
+        if sort_col is None:
+            order_by = [id_col.desc() if descending else id_col.asc()]
+        elif descending:
+            order_by = [sort_col.desc().nullslast(), id_col.desc()]
+        else:
+            order_by = [sort_col.asc().nullslast(), id_col.asc()]
+
+        return query.order_by(*order_by)
+
+    def _row_from_record(self, record):
+        # Row id, display values, raw values and keyset key of the record
+        display_values = []
+        raw_values = []
+        for attr in self._attribute_names:
+            raw_val = getattr(record, attr)
+            attr_val = raw_val
+            if raw_val is not None and attr in self._formatters:
+                attr_val = self._formatters[attr].format_column_value(
+                    raw_val
+                )
+
+            raw_values.append(raw_val)
+            display_values.append(attr_val)
+
+        sort_val = None
+        if self._sort_column is not None:
+            sort_val = getattr(record, self._sort_column, None)
+
+        return [record.id, display_values, raw_values, (sort_val, record.id)]
+
+    def _fetch_rows(self, start_key, limit):
+        records = self._ordered_query(start_key).limit(limit).all()
+
+        # Load the display values referenced by the page in bulk
+        for attr, formatter in self._formatters.items():
+            prefetch = getattr(formatter, 'prefetch_values', None)
+            if prefetch is not None:
+                prefetch([getattr(r, attr, None) for r in records])
+
+        return [self._row_from_record(r) for r in records]
+
+    def _update_offsets(self):
+        offset = 0
+        self._offsets = []
+        for page in self._pages:
+            self._offsets.append(offset)
+            offset += page.count
+
+    def _touch_page(self, page_idx):
+        # Mark page as recently used and evict the least recently used pages
+        self._loaded_pages[page_idx] = True
+        self._loaded_pages.move_to_end(page_idx)
+
+        for idx in list(self._loaded_pages.keys()):
+            if len(self._loaded_pages) <= self.max_pages:
+                break
+
+            page = self._pages[idx]
+            if idx == page_idx or page.pinned:
+                continue
+
+            page.rows = None
+            del self._loaded_pages[idx]
+
+    def _locate(self, row):
+        """
+        :return: Page and the row position within the page, fetching the
+        page again if it had been evicted.
+        :rtype: tuple
+        """
+        page_idx = bisect.bisect_right(self._offsets, row) - 1
+        page = self._pages[page_idx]
+
+        if page.rows is None:
+            rows = self._fetch_rows(page.start_key, page.count)
+            # Pad in case records were deleted by another session
+            while len(rows) < page.count:
+                rows.append([None, [None] * self.columnCount(),
+                             [None] * self.columnCount(), page.start_key])
+            page.rows = rows
+
+        self._touch_page(page_idx)
+
+        return page, row - self._offsets[page_idx]
+
+    def _row(self, row):
+        page, page_row = self._locate(row)
+
+        return page, page.rows[page_row]
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or not self._pages:
+            return 0
+
+        return self._offsets[-1] + self._pages[-1].count
+
+    def total_count(self):
+        """
+        :return: Number of records in the database matching the current
+        filter.
+        :rtype: int
+        """
+        return self._query().count()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+
+        return not self._at_end
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._at_end:
+            return
+
+        start_key = None
+        if self._pages:
+            _, last_row = self._row(self.rowCount() - 1)
+            start_key = last_row[3]
+
+        rows = self._fetch_rows(start_key, self.page_size)
+        if len(rows) < self.page_size:
+            self._at_end = True
+
+        if not rows:
+            return
+
+        position = self.rowCount()
+        self.beginInsertRows(QModelIndex(), position, position + len(rows) - 1)
+        self._pages.append(_ModelPage(start_key, rows))
+        self._update_offsets()
+        self._touch_page(len(self._pages) - 1)
+        self.endInsertRows()
+
+    def refresh(self):
+        """
+        Discards the fetched records and fetches the first page again.
+        """
+        self.beginResetModel()
+        self._pages = []
+        self._offsets = []
+        self._loaded_pages.clear()
+        self._at_end = False
+        self.endResetModel()
+
+        self.fetchMore()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """
+        Sorts the records in the database. Columns that are not table
+        columns, such as multiple select columns, are sorted by id.
+        """
+        attr = None
+        if 0 < column < len(self._attribute_names):
+            attr = self._attribute_names[column]
+            if self._table_column(attr) is None:
+                attr = None
+
+        self._sort_column = attr
+        self._sort_order = order
+        self.refresh()
+
+    def set_sort(self, attribute_name, order=Qt.AscendingOrder):
+        """
+        Sets the sort column and order without fetching records.
+        """
+        if self._table_column(attribute_name) is not None:
+            self._sort_column = attribute_name
+        self._sort_order = order
+
+    def set_filter_text(self, column, text):
+        """
+        Filters records whose displayed value in the given column contains
+        the text, case insensitive. Wildcards in the text are matched
+        literally.
+        :param column: Column index.
+        :type column: int
+        :param text: Filter text, an empty string removes the filter.
+        :type text: str
+        """
+        self._filter_criteria.pop('text', None)
+        if text and 0 <= column < len(self._attribute_names):
+            criterion = self._search.display_text_criterion(
+                self._attribute_names[column], text
+            )
+            if criterion is not None:
+                self._filter_criteria['text'] = criterion
+
+        self.refresh()
+
+    def set_filter_params(self, parameters):
+        """
+        Filters records using attribute name-value pairs, compiled into SQL
+        using the column types by EntitySearch.
+        :param parameters: Attribute names and values.
+        :type parameters: dict
+        """
+        for key in [k for k in self._filter_criteria if k != 'text']:
+            del self._filter_criteria[key]
+
+        for attr, criterion in self._search.criteria(parameters).items():
+            self._filter_criteria['param_{0}'.format(attr)] = criterion
+
+        self.refresh()
+
+    def all_rows(self):
+        """
+        :return: Display values of all the records matching the current
+        filter, fetched in pages.
+        :rtype: list
+        """
+        rows = []
+        start_key = None
+        while True:
+            page_rows = self._fetch_rows(start_key, self.page_size)
+            rows.extend([r[1] for r in page_rows])
+            if len(page_rows) < self.page_size:
+                break
+            start_key = page_rows[-1][3]
+
+        return rows
+
+    def data(self, index, role):
+        if not index.isValid() or index.row() >= self.rowCount():
+            return None
+
+        if index.column() < 0 or index.column() >= self.columnCount():
+            return None
+
+        if role == BaseSTDMTableModel.ROLE_ATTRIBUTE_NAME:
+            return self._attribute_names[index.column()]
+
+        if role not in (Qt.DisplayRole, BaseSTDMTableModel.ROLE_ROW_ID,
+                        BaseSTDMTableModel.ROLE_RAW_VALUE):
+            return None
+
+        _, row = self._row(index.row())
+        if role == BaseSTDMTableModel.ROLE_ROW_ID:
+            return row[0]
+        elif role == BaseSTDMTableModel.ROLE_RAW_VALUE:
+            return row[2][index.column()]
+
+        val = row[1][index.column()]
+        # Decimal not supported by QVariant so we adapt it to a supported type
+        if isinstance(val, Decimal):
+            return str(val)
+
+        return val
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid():
+            return False
+
+        page, row = self._row(index.row())
+        if role == Qt.EditRole:
+            row[1][index.column()] = value
+        elif role == BaseSTDMTableModel.ROLE_RAW_VALUE:
+            row[2][index.column()] = value
+        elif role == BaseSTDMTableModel.ROLE_ROW_ID:
+            row[0] = value
+        else:
+            return False
+
+        page.pinned = True
+        self.dataChanged.emit(index, index)
+
+        return True
+
+    def insertRows(self, position, rows, parent=QModelIndex()):
+        if position < 0 or position > self.rowCount():
+            return False
+
+        if not self._pages:
+            self._pages.append(_ModelPage(None, []))
+            self._update_offsets()
+            self._touch_page(0)
+
+        if position == self.rowCount():
+            # Append to the last page, fetching it first if it was evicted
+            page = self._pages[-1]
+            if page.count > 0:
+                self._locate(self._offsets[-1])
+            page_row = page.count
+        else:
+            page, page_row = self._locate(position)
+
+        self.beginInsertRows(parent, position, position + rows - 1)
+        for i in range(rows):
+            page.rows.insert(page_row, [
+                None,
+                [""] * self.columnCount(),
+                [None] * self.columnCount(),
+                page.start_key
+            ])
+        page.count = len(page.rows)
+        page.pinned = True
+        self._update_offsets()
+        self.endInsertRows()
+
+        return True
+
+    def removeRows(self, position, count, parent=QModelIndex()):
+        if position < 0 or position + count > self.rowCount():
+            return False
+
+        self.beginRemoveRows(parent, position, position + count - 1)
+        for i in range(count):
+            page, page_row = self._locate(position)
+            del page.rows[page_row]
+            page.count = len(page.rows)
+            page.pinned = True
+            self._update_offsets()
+        self.endRemoveRows()
+
+        return True
+
+
+class PagedSortFilterProxyModel(VerticalHeaderSortFilterProxyModel):
+    """
+    Proxy model that passes sorting and filtering on to an
+    EntityPagedTableModel so that they are done in the database instead of
+    on the fetched rows only.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._filter_text = ''
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sourceModel().sort(column, order)
+
+    def setFilterKeyColumn(self, column):
+        super().setFilterKeyColumn(column)
+        if self._filter_text:
+            self.sourceModel().set_filter_text(column, self._filter_text)
+
+    def setFilterRegExp(self, reg_exp):
+        self._filter_text = reg_exp.pattern()
+        self.sourceModel().set_filter_text(
+            self.filterKeyColumn(),
+            self._filter_text
+        )
+
+    def set_filter_params(self, parameters: dict):
+        self.filter_params = parameters
+        self.sourceModel().set_filter_params(parameters)
+
+    def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:
+        return True
+
+
 class STRTreeViewModel(QAbstractItemModel):
     """
     Model for rendering social tenure relationship nodes in a tree view.
@@ -0,0 +1,354 @@
+"""
+/***************************************************************************
+Name                 : search
+Description          : Compiles the advanced search criteria of an entity
+                       into SQL so that searches are run in the database on
+                       the whole table.
+Date                 : 18/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+
+Text values are matched using ILIKE, which the trigram indexes proposed by
+the index advisor support, and the full text search value is matched
+against a tsvector of the searchable text columns of the entity, built
+with the same expression as its full text index.
+"""
+from datetime import (
+    date,
+    datetime,
+    time,
+    timedelta
+)
+
+from qgis.PyQt.QtCore import (
+    QDate,
+    QDateTime
+)
+from sqlalchemy import (
+    String,
+    and_,
+    cast,
+    or_
+)
+from sqlalchemy.sql import (
+    column,
+    select,
+    table
+)
+from sqlalchemy.sql.expression import text
+
+# Search parameter key of the value matched against all the searchable
+# text columns
+FULL_TEXT_SEARCH = '_full_text'
+
+# Column types whose values are matched using ILIKE
+TEXT_COLUMN_TYPES = ('VARCHAR', 'TEXT', 'AUTO_GENERATED')
+
+# Column types whose values are the ids of the related records
+RELATED_COLUMN_TYPES = ('LOOKUP', 'ADMIN_SPATIAL_UNIT', 'FOREIGN_KEY')
+
+# Text search configuration of the full text documents. 'simple' does not
+# stem words as the searched values are mostly names.
+FULL_TEXT_CONFIG = 'simple'
+
+# Number of ids returned in each page of search results
+SEARCH_PAGE_SIZE = 5000
+
+
+def _quote(name):
+    return '"{0}"'.format(name.replace('"', '""'))
+
+
+def _like_pattern(value):
+    # Wildcards in the value are matched literally
+    escaped = str(value).replace('\\', '\\\\').replace(
+        '%', '\\%'
+    ).replace('_', '\\_')
+
+    return '%{0}%'.format(escaped)
+
+
+def display_value_columns(config_column):
+    """
+    :param config_column: Lookup, administrative unit or foreign key column.
+    :type config_column: BaseColumn
+    :return: Name of the parent table and names of its columns whose values
+    are displayed in place of the ids in the column.
+    :rtype: tuple
+    """
+    type_info = config_column.TYPE_INFO
+    if type_info == 'LOOKUP':
+        display_cols = ['value', 'code']
+    elif type_info == 'ADMIN_SPATIAL_UNIT':
+        display_cols = ['name', 'code']
+    else:
+        display_cols = list(config_column.entity_relation.display_cols) or \
+                       ['id']
+
+    return config_column.entity_relation.parent.name, display_cols
+
+
+def full_text_columns(entity):
+    """
+    :param entity: Entity whose columns are to be searched.
+    :type entity: Entity
+    :return: Names of the searchable text columns of the entity, in the
+    order in which they are concatenated in the full text document.
+    :rtype: list
+    """
+    return [
+        c.name for c in entity.columns.values()
+        if c.searchable and c.TYPE_INFO in TEXT_COLUMN_TYPES
+    ]
+
+
+def full_text_document_sql(columns, table_name=None):
+    """
+    :param columns: Names of the text columns.
+    :type columns: list
+    :param table_name: Name of the table used to qualify the columns in
+    queries, None for index definitions.
+    :type table_name: str
+    :return: Expression of the tsvector of the columns. The same expression
+    is used in the full text index and in the search queries so that the
+    index is used.
+    :rtype: str
+    """
+    col_refs = []
+    for col in columns:
+        col_ref = _quote(col)
+        if table_name:
+            col_ref = '{0}.{1}'.format(_quote(table_name), col_ref)
+        col_refs.append("coalesce({0}::text, '')".format(col_ref))
+
+    return "to_tsvector('{0}'::regconfig, {1})".format(
+        FULL_TEXT_CONFIG, " || ' ' || ".join(col_refs)
+    )
+
+
+def _python_value(value):
+    # Widget values converted to the types bound by SQLAlchemy
+    if isinstance(value, QDateTime):
+        return value.toPyDateTime()
+    if isinstance(value, QDate):
+        return value.toPyDate()
+
+    return value
+
+
+class EntitySearch(object):
+    """
+    Search criteria of an entity compiled into SQLAlchemy expressions using
+    the type of each column in the configuration.
+    """
+
+    def __init__(self, entity, db_model):
+        """
+        :param entity: Entity whose records are searched, None to compile
+        the criteria using the type of the values only.
+        :type entity: Entity
+        :param db_model: Mapped class of the entity.
+        """
+        self.entity = entity
+        self.db_model = db_model
+
+    def _config_column(self, name):
+        if self.entity is None:
+            return None
+
+        return self.entity.columns.get(name, None)
+
+    def _table_column(self, name):
+        return self.db_model.__table__.c.get(name, None)
+
+    def full_text_criterion(self, value):
+        """
+        :param value: Words to be found in the searchable text columns.
+        :type value: str
+        :return: Criterion matching the records containing all the words,
+        None if the entity has no searchable text columns.
+        """
+        if self.entity is None:
+            return None
+
+        columns = full_text_columns(self.entity)
+        if len(columns) == 0:
+            return None
+
+        return text(
+            "{0} @@ plainto_tsquery('{1}'::regconfig, :full_text)".format(
+                full_text_document_sql(columns, self.db_model.__table__.name),
+                FULL_TEXT_CONFIG
+            )
+        ).bindparams(full_text=str(value))
+
+    def column_criterion(self, name, value):
+        """
+        :param name: Name of the column.
+        :type name: str
+        :param value: Value entered in the search form.
+        :type value: object
+        :return: Criterion matching the value in the column, None if the
+        column is not a table column e.g. a multiple select column.
+        """
+        value = _python_value(value)
+        config_col = self._config_column(name)
+        type_info = config_col.TYPE_INFO if config_col is not None else None
+
+        col = self._table_column(name)
+        if col is None:
+            return None
+
+        if type_info in TEXT_COLUMN_TYPES:
+            return col.ilike(_like_pattern(value))
+
+        if type_info in RELATED_COLUMN_TYPES:
+            return col == int(value)
+
+        if type_info == 'DATETIME' and isinstance(value, (date, datetime)):
+            # Records on the same day, as a range so that an index on the
+            # column can be used
+            day = value.date() if isinstance(value, datetime) else value
+            start = datetime.combine(day, time.min)
+
+            return and_(col >= start, col < start + timedelta(days=1))
+
+        if type_info is None and isinstance(value, str):
+            return cast(col, String).ilike(_like_pattern(value))
+
+        return col == value
+
+    def display_text_criterion(self, name, value):
+        """
+        :param name: Name of the column.
+        :type name: str
+        :param value: Text entered in the filter box.
+        :type value: str
+        :return: Criterion matching the records whose displayed value in
+        the column contains the text, case insensitive. Ids in lookup,
+        administrative unit and foreign key columns are matched by the
+        display columns of the parent records. None if the column is not a
+        table column.
+        """
+        col = self._table_column(name)
+        if col is None:
+            return None
+
+        pattern = _like_pattern(value)
+        config_col = self._config_column(name)
+        type_info = config_col.TYPE_INFO if config_col is not None else None
+
+        if type_info in TEXT_COLUMN_TYPES:
+            return col.ilike(pattern)
+
+        if type_info not in RELATED_COLUMN_TYPES:
+            return cast(col, String).ilike(pattern)
+
+        parent_name, display_cols = display_value_columns(config_col)
+        parent = table(
+            parent_name,
+            column('id'),
+            *[column(c) for c in display_cols if c != 'id']
+        )
+        parent_ids = select([parent.c.id]).where(or_(
+            *[cast(parent.c[c], String).ilike(pattern) for c in display_cols]
+        ))
+
+        return col.in_(parent_ids)
+
+    def criteria(self, parameters):
+        """
+        :param parameters: Search values indexed by column name, and the
+        full text search value indexed by FULL_TEXT_SEARCH.
+        :type parameters: dict
+        :return: Criteria that the records have to match, indexed by the
+        name of the parameter.
+        :rtype: dict
+        """
+        criteria = {}
+        for name, value in parameters.items():
+            if name == FULL_TEXT_SEARCH:
+                criterion = self.full_text_criterion(value)
+            else:
+                criterion = self.column_criterion(name, value)
+
+            if criterion is not None:
+                criteria[name] = criterion
+
+        return criteria
+
+    def query(self, parameters, record_ids=None):
+        """
+        :param parameters: Search values.
+        :type parameters: dict
+        :param record_ids: Ids of the records to be searched, None to search
+        the whole table.
+        :type record_ids: list
+        :return: Query of the records matching the search values.
+        :rtype: Query
+        """
+        query = self.db_model().queryObject()
+        if record_ids is not None:
+            query = query.filter(self.db_model.id.in_(list(record_ids)))
+        for criterion in self.criteria(parameters).values():
+            query = query.filter(criterion)
+
+        return query
+
+    def ids(self, parameters, after_id=None, page_size=SEARCH_PAGE_SIZE,
+            record_ids=None):
+        """
+        :param parameters: Search values.
+        :type parameters: dict
+        :param after_id: Id of the last record of the previous page, None
+        for the first page.
+        :type after_id: int
+        :param page_size: Maximum number of ids returned.
+        :type page_size: int
+        :param record_ids: Ids of the records to be searched, None to search
+        the whole table.
+        :type record_ids: list
+        :return: Ids of the matching records, in ascending order.
+        :rtype: list
+        """
+        id_col = self.db_model.id
+        query = self.query(parameters, record_ids).with_entities(id_col)
+        if after_id is not None:
+            query = query.filter(id_col > after_id)
+
+        return [r[0] for r in query.order_by(id_col).limit(page_size)]
+
+    def all_ids(self, parameters, page_size=SEARCH_PAGE_SIZE,
+                record_ids=None):
+        """
+        :param parameters: Search values.
+        :type parameters: dict
+        :param page_size: Number of ids fetched in one query.
+        :type page_size: int
+        :param record_ids: Ids of the records to be searched, None to search
+        the whole table.
+        :type record_ids: list
+        :return: Ids of all the matching records, fetched in pages.
+        :rtype: set
+        """
+        ids = set()
+        after_id = None
+        while True:
+            page = self.ids(parameters, after_id, page_size, record_ids)
+            ids.update(page)
+            if len(page) < page_size:
+                break
+            after_id = page[-1]
+
+        return ids
@@ -17,19 +17,118 @@ email                : gkahiu@gmail.com
  ***************************************************************************/
 """
 import hashlib
+import logging
 
 from qgis.PyQt.QtCore import (
     pyqtSignal,
     QObject
 )
 from qgis.PyQt.QtWidgets import QApplication
+from sqlalchemy.sql.expression import select
 
 from stdm.data.database import (
     Content,
-    Role
+    content_roles_table,
+    Role,
+    STDMDb
 )
 from stdm.utils.hashable_mixin import HashableMixin
 
+LOGGER = logging.getLogger('stdm')
+
+PG_ACCOUNT = 'postgres'
+
+
+def _content_hash_code(name):
+    ht = hashlib.sha1(name.encode('utf-8'))
+    return ht.hexdigest()
+
+
+def register_content_groups(username, groups):
+    """
+    Registers the content items of the given groups in a single pass. The
+    items are compared against the registered items using one query and
+    the missing items, for a postgres user account, are inserted and
+    assigned to the 'postgres' role using one statement each. For other
+    accounts, the codes of the items are read from the registered items.
+    :param username: Name of the logged in user.
+    :type username: str
+    :param groups: Content groups whose items are to be registered.
+    :type groups: list
+    """
+    items = []
+    for group in groups:
+        items.extend(
+            [c for c in group.contentItems() if isinstance(c, Content)]
+        )
+
+    if len(items) == 0:
+        return
+
+    content_table = Content.__table__
+    role_table = Role.__table__
+
+    with STDMDb.instance().engine.begin() as conn:
+        registered = conn.execute(
+            select([content_table.c.name, content_table.c.code])
+        ).fetchall()
+
+        if username != PG_ACCOUNT:
+            codes = dict((r[0], r[1]) for r in registered)
+            for c in items:
+                if c.name in codes:
+                    c.code = codes[c.name]
+
+            return
+
+        codes = set(r[1] for r in registered)
+        names = set(r[0] for r in registered)
+
+        new_items = []
+        for c in items:
+            if c.code is None:
+                c.code = _content_hash_code(str(c.name))
+
+            if c.code in codes or c.name in names:
+                continue
+
+            new_items.append({'name': c.name, 'code': c.code})
+            codes.add(c.code)
+            names.add(c.name)
+
+        if len(new_items) == 0:
+            return
+
+        # Check if the 'postgres' role is defined, if not then create one
+        role_id = conn.execute(
+            select([role_table.c.id]).where(role_table.c.name == PG_ACCOUNT)
+        ).scalar()
+        if role_id is None:
+            role_id = conn.execute(
+                role_table.insert().values(name=PG_ACCOUNT).returning(
+                    role_table.c.id
+                )
+            ).scalar()
+
+        content_ids = conn.execute(
+            content_table.insert().values(new_items).returning(
+                content_table.c.id
+            )
+        ).fetchall()
+
+        conn.execute(
+            content_roles_table.insert().values(
+                [{'content_base_id': r[0], 'role_id': role_id}
+                 for r in content_ids]
+            )
+        )
+
+    LOGGER.debug('%s content items registered', len(new_items))
+
+    from stdm.security.authorization import refresh_permissions
+
+    refresh_permissions()
+
 
 class ContentGroup(QObject, HashableMixin):
     """
@@ -128,58 +227,15 @@ class ContentGroup(QObject, HashableMixin):
         return allowedContent
 
     def hash_code(self, name):
-        ht = hashlib.sha1(name.encode('utf-8'))
-        return ht.hexdigest()
+        return _content_hash_code(name)
 
     def register(self):
         """
         Registers the content items into the database. Registration only works for a
-        postgres user account.
-        """
-        PG_ACCOUNT = "postgres"
-
-        if self._username == PG_ACCOUNT:
-            for c in self.contentItems():
-                if isinstance(c, Content):
-                    cnt = Content()
-                    qo = cnt.queryObject()
-
-                    if c.code is None:
-                        code = self.hash_code(str(c.name))
-                        cn = c
-                    else:
-                        code = c.code
-
-                    cn = qo.filter(Content.code == code).first()
-
-                    # If content not found then add
-                    if cn is None:
-                        # Check if the 'postgres' role is defined, if not then create one
-                        rl = Role()
-                        rolequery = rl.queryObject()
-                        role = rolequery.filter(Role.name == PG_ACCOUNT).first()
-
-                        if role is None:
-                            rl.name = PG_ACCOUNT
-                            rl.contents = [c]
-                            rl.save()
-                        else:
-                            existingContents = role.contents
-                            # Append new content to existing
-                            if c.code is None:
-                                c.code = code
-
-                            if len([e_cont for e_cont in existingContents if e_cont.name == c.name]) == 0:
-                                existingContents.append(c)
-                                role.contents = existingContents
-                                role.update()
-        else:
-            for c in self.contentItems():
-                if isinstance(c, Content):
-                    cnt = Content()
-                    qo = cnt.queryObject()
-                    cn = qo.filter(Content.name == c.name).first()
-                    c.code = cn.code
+        postgres user account. Use register_content_groups to register the
+        items of several groups in one pass.
+        """
+        register_content_groups(self._username, [self])
 
 
 class TableContentGroup(ContentGroup):
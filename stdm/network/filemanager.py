@@ -18,6 +18,7 @@ email                : gkahiu@gmail.com
  *                                                                         *
  ***************************************************************************/
 """
+import hashlib
 from uuid import uuid4
 
 from qgis.PyQt.QtCore import (
@@ -28,6 +29,7 @@ from qgis.PyQt.QtCore import (
     QDir
 )
 
+from stdm.network.preview_cache import preview_cache
 from stdm.settings import current_profile
 from stdm.utils.util import (
     guess_extension
@@ -101,11 +103,13 @@ class NetworkFileManager(QObject):
 
         # srcLen = self.sourceFile.bytesAvailable()
         totalRead = 0
+        sha = hashlib.sha256()
         while True:
             inbytes = srcFile.read(4096)
             if not inbytes:
                 break
             destinationFile.write(inbytes)
+            sha.update(inbytes)
             totalRead += len(inbytes)
             # Raise signal on each block written
             self.blockWritten.emit(totalRead)
@@ -115,6 +119,11 @@ class NetworkFileManager(QObject):
         srcFile.close()
         destinationFile.close()
 
+        # Generate the document previews in the background
+        preview_cache(self.networkPath).request(
+            self.destinationPath, sha.hexdigest()
+        )
+
         return self.fileID
 
 
@@ -0,0 +1,405 @@
+"""
+/***************************************************************************
+Name                 : preview_cache
+Description          : Content-addressed cache of thumbnails and reduced
+                       resolution previews of the supporting documents,
+                       generated by a pool of background workers.
+Date                 : 18/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+
+Previews are stored in a hidden folder in the root of the document
+repository and named using the SHA-256 digest of the document contents so
+that copies of the same document share their previews. Digests are
+remembered, for the session, against the size and modification time of
+each document.
+"""
+import hashlib
+import logging
+import os
+import threading
+
+from qgis.PyQt.QtCore import (
+    QObject,
+    QRect,
+    QRunnable,
+    QSize,
+    QThreadPool,
+    Qt,
+    pyqtSignal
+)
+from qgis.PyQt.QtGui import (
+    QImage,
+    QImageReader,
+    QPainter
+)
+
+LOGGER = logging.getLogger('stdm')
+
+# Name of the preview folder in the root of the document repository
+PREVIEW_FOLDER = '.previews'
+
+# Width and height, in pixels, of the square document thumbnails
+THUMBNAIL_SIZE = 128
+
+# Maximum width or height, in pixels, of each preview level
+PREVIEW_SIZES = (THUMBNAIL_SIZE, 512, 2048)
+
+# Preview level shown in the document viewer before zooming in
+VIEWER_PREVIEW_SIZE = 2048
+
+# Number of background workers generating previews
+PREVIEW_WORKERS = 2
+
+PREVIEW_QUALITY = 90
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def preview_cache(repository):
+    """
+    :param repository: Root folder of the document repository.
+    :type repository: str
+    :return: Preview cache of the document repository.
+    :rtype: PreviewCache
+    """
+    repository = os.path.normpath(repository)
+    with _caches_lock:
+        if repository not in _caches:
+            _caches[repository] = PreviewCache(repository)
+
+        return _caches[repository]
+
+
+def is_image_document(doc_path):
+    """
+    :param doc_path: Path of the document.
+    :type doc_path: str
+    :return: True if the document is in an image format that can be read.
+    :rtype: bool
+    """
+    ext = os.path.splitext(doc_path)[1][1:].lower().encode()
+    supported = [bytes(f).lower() for f in QImageReader.supportedImageFormats()]
+
+    return ext in supported
+
+
+def image_size(doc_path):
+    """
+    :param doc_path: Path of the image document.
+    :type doc_path: str
+    :return: Width and height of the image read from its header, without
+    decoding it. An invalid size if the image cannot be read.
+    :rtype: QSize
+    """
+    return QImageReader(doc_path).size()
+
+
+def file_digest(file_path):
+    """
+    :param file_path: Path of the file.
+    :type file_path: str
+    :return: SHA-256 digest of the file contents.
+    :rtype: str
+    """
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(block)
+
+    return sha.hexdigest()
+
+
+def _scaled_size(size, max_size, fill=False):
+    # Fits the size in a max_size square, or covers it if fill, and never
+    # enlarges the image
+    bounds = QSize(max_size, max_size)
+    if not fill and size.width() <= max_size and size.height() <= max_size:
+        return QSize(size)
+
+    mode = Qt.KeepAspectRatioByExpanding if fill else Qt.KeepAspectRatio
+    scaled = size.scaled(bounds, mode)
+    if fill and scaled.width() > size.width():
+        return QSize(size)
+
+    return scaled
+
+
+def _thumbnail(image):
+    # Square crop of the top left of the image, as previously shown in the
+    # document widgets
+    scaled = image.scaled(
+        _scaled_size(image.size(), THUMBNAIL_SIZE, fill=True),
+        Qt.IgnoreAspectRatio,
+        Qt.SmoothTransformation
+    )
+    side = min(scaled.width(), scaled.height())
+
+    return scaled.copy(QRect(0, 0, side, side))
+
+
+def _opaque(image):
+    # JPEG has no alpha channel, transparent areas are drawn on white
+    if not image.hasAlphaChannel():
+        return image
+
+    opaque = QImage(image.size(), QImage.Format_RGB32)
+    opaque.fill(Qt.white)
+    painter = QPainter(opaque)
+    painter.drawImage(0, 0, image)
+    painter.end()
+
+    return opaque
+
+
+class _PreviewJob(QRunnable):
+    """
+    Generates the missing previews of a document.
+    """
+
+    def __init__(self, cache, doc_path, digest=None):
+        QRunnable.__init__(self)
+        self._cache = cache
+        self._doc_path = doc_path
+        self._digest = digest
+
+    def run(self):
+        try:
+            self._cache.generate_previews(self._doc_path, self._digest)
+        except Exception as ex:
+            LOGGER.debug(
+                'Previews of %s not generated: %s', self._doc_path, ex
+            )
+        finally:
+            self._cache.job_finished(self._doc_path)
+
+
+class PreviewCache(QObject):
+    """
+    Thumbnails and reduced resolution previews of the image documents in
+    a document repository. Missing previews are generated in the
+    background and the previewReady signal is emitted with the document
+    path, the preview level and the path of each preview when it is
+    available. The signal is emitted from the worker threads and delivered
+    to the receivers in their own threads.
+    """
+    previewReady = pyqtSignal(str, int, str)
+
+    def __init__(self, repository, parent=None):
+        QObject.__init__(self, parent)
+        self._repository = repository
+        self._folder = os.path.join(repository, PREVIEW_FOLDER)
+        self._digests = {}
+        self._pending = set()
+        self._lock = threading.Lock()
+
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(PREVIEW_WORKERS)
+
+    @property
+    def repository(self):
+        """
+        :return: Root folder of the document repository.
+        :rtype: str
+        """
+        return self._repository
+
+    def preview_path(self, digest, size):
+        """
+        :param digest: SHA-256 digest of the document contents.
+        :type digest: str
+        :param size: Preview level.
+        :type size: int
+        :return: Path of the preview file.
+        :rtype: str
+        """
+        return os.path.join(
+            self._folder, digest[:2], '{0}_{1}.jpg'.format(digest, size)
+        )
+
+    def _stat_key(self, doc_path):
+        st = os.stat(doc_path)
+
+        return st.st_size, st.st_mtime_ns
+
+    def remember_digest(self, doc_path, digest):
+        """
+        Records the digest of the document contents, e.g. computed while
+        the document was being copied to the repository.
+        :param doc_path: Path of the document.
+        :type doc_path: str
+        :param digest: SHA-256 digest of the document contents.
+        :type digest: str
+        """
+        with self._lock:
+            self._digests[os.path.normpath(doc_path)] = (
+                self._stat_key(doc_path), digest
+            )
+
+    def known_digest(self, doc_path):
+        """
+        :param doc_path: Path of the document.
+        :type doc_path: str
+        :return: Digest of the document contents if it has been computed
+        and the document has not changed since, else None.
+        :rtype: str
+        """
+        doc_path = os.path.normpath(doc_path)
+        with self._lock:
+            stat_key, digest = self._digests.get(doc_path, (None, None))
+
+        try:
+            if digest is not None and stat_key == self._stat_key(doc_path):
+                return digest
+        except OSError:
+            pass
+
+        return None
+
+    def document_digest(self, doc_path):
+        """
+        :param doc_path: Path of the document.
+        :type doc_path: str
+        :return: Digest of the document contents, computed if not known.
+        :rtype: str
+        """
+        digest = self.known_digest(doc_path)
+        if digest is None:
+            digest = file_digest(doc_path)
+            self.remember_digest(doc_path, digest)
+
+        return digest
+
+    def cached_preview(self, doc_path, size):
+        """
+        Looks up a preview without reading the document.
+        :param doc_path: Path of the document.
+        :type doc_path: str
+        :param size: Preview level, one of PREVIEW_SIZES.
+        :type size: int
+        :return: Path of the preview if it exists, else None.
+        :rtype: str
+        """
+        digest = self.known_digest(doc_path)
+        if digest is None:
+            return None
+
+        path = self.preview_path(digest, size)
+        if os.path.exists(path):
+            return path
+
+        return None
+
+    def request(self, doc_path, digest=None):
+        """
+        Queues the generation of the missing previews of an image document.
+        previewReady is emitted for each level, including the levels that
+        were already in the cache.
+        :param doc_path: Path of the document.
+        :type doc_path: str
+        :param digest: Digest of the document contents, if known.
+        :type digest: str
+        :return: True if the previews have been queued, False if the
+        document is not an image or is already queued.
+        :rtype: bool
+        """
+        if not is_image_document(doc_path):
+            return False
+
+        doc_path = os.path.normpath(doc_path)
+        with self._lock:
+            if doc_path in self._pending:
+                return False
+            self._pending.add(doc_path)
+
+        self._pool.start(_PreviewJob(self, doc_path, digest))
+
+        return True
+
+    def job_finished(self, doc_path):
+        """
+        Called by the workers once the previews of a document have been
+        processed.
+        """
+        with self._lock:
+            self._pending.discard(doc_path)
+
+    def generate_previews(self, doc_path, digest=None):
+        """
+        Generates the missing previews of an image document. The document
+        is decoded once, at the resolution of the largest missing level,
+        from which the smaller levels are scaled. Runs in the worker
+        threads.
+        :param doc_path: Path of the document.
+        :type doc_path: str
+        :param digest: Digest of the document contents, if known.
+        :type digest: str
+        """
+        if digest is None:
+            digest = self.document_digest(doc_path)
+        else:
+            self.remember_digest(doc_path, digest)
+
+        missing = [
+            s for s in PREVIEW_SIZES
+            if not os.path.exists(self.preview_path(digest, s))
+        ]
+
+        if len(missing) > 0:
+            reader = QImageReader(doc_path)
+            full_size = reader.size()
+            if full_size.isValid():
+                # Decoders such as JPEG can decode directly at a lower
+                # resolution
+                reader.setScaledSize(_scaled_size(
+                    full_size,
+                    max(missing),
+                    fill=max(missing) == THUMBNAIL_SIZE
+                ))
+            image = reader.read()
+            if image.isNull():
+                LOGGER.debug(
+                    'Previews of %s not generated: %s',
+                    doc_path, reader.errorString()
+                )
+                return
+
+            image = _opaque(image)
+            os.makedirs(
+                os.path.dirname(self.preview_path(digest, missing[0])),
+                exist_ok=True
+            )
+
+            for size in sorted(missing, reverse=True):
+                if size == THUMBNAIL_SIZE:
+                    preview = _thumbnail(image)
+                else:
+                    preview = image.scaled(
+                        _scaled_size(image.size(), size),
+                        Qt.IgnoreAspectRatio,
+                        Qt.SmoothTransformation
+                    )
+
+                # Write to a temporary file so that a partial preview is
+                # never read by other workers or sessions
+                path = self.preview_path(digest, size)
+                tmp_path = '{0}.{1}.tmp'.format(path, threading.get_ident())
+                if preview.save(tmp_path, 'JPG', PREVIEW_QUALITY):
+                    os.replace(tmp_path, path)
+
+        for size in PREVIEW_SIZES:
+            path = self.preview_path(digest, size)
+            if os.path.exists(path):
+                self.previewReady.emit(doc_path, size, path)
@@ -21,6 +21,7 @@ import glob
 import logging
 import os.path
 import shutil
+import time
 from collections import OrderedDict
 
 from qgis.PyQt.QtCore import (
@@ -62,6 +63,7 @@ from stdm.composer.custom_layout_items import StdmCustomLayoutItems
 from stdm.composer.document_template import DocumentTemplate
 from stdm.data import globals
 from stdm.data.configfile_paths import FilePaths
+from stdm.data.configuration import clear_entity_model_cache
 from stdm.data.configuration.column_updaters import varchar_updater
 from stdm.data.configuration.config_updater import ConfigurationSchemaUpdater
 from stdm.data.configuration.exception import ConfigurationException
@@ -83,7 +85,11 @@ from stdm.navigation.components import STDMAction
 from stdm.navigation.container_loader import (
     QtContainerLoader,
     ContentGroup)
-from stdm.navigation.content_group import TableContentGroup
+from stdm.navigation.content_group import (
+    register_content_groups,
+    TableContentGroup
+)
+from stdm.security.authorization import refresh_permissions
 from stdm.security.privilege_provider import SinglePrivilegeProvider
 from stdm.security.roleprovider import RoleProvider
 from stdm.security.user import User
@@ -1001,6 +1007,7 @@ class STDMQGISLoader:
         """
         Define and add modules to the menu and/or toolbar using the module loader
         """
+        start_time = time.perf_counter()
 
         self.toolbarLoader = QtContainerLoader(self.iface.mainWindow(),
                                                self.stdmInitToolbar, self.logoutAct)
@@ -1248,6 +1255,9 @@ class STDMQGISLoader:
 
         self.moduleCntGroup = None
         self.moduleContentGroups = []
+
+        # Content groups whose items are registered in one pass
+        register_groups = []
         self._moduleItems = OrderedDict()
         self._reportModules = OrderedDict()
 
@@ -1260,6 +1270,7 @@ class STDMQGISLoader:
             )
             self._reportModules[k] = v
             self.moduleContentGroups.append(moduleCntGroup)
+            register_groups.append(moduleCntGroup)
 
         # create a separator
         tbSeparator = QAction(self.iface.mainWindow())
@@ -1280,32 +1291,33 @@ class STDMQGISLoader:
                     'new_str.png'
                 )
                 self.moduleContentGroups.append(moduleCntGroup)
+                register_groups.append(moduleCntGroup)
 
         # Create content groups and add items
         self.contentAuthCntGroup = ContentGroup(username)
         self.contentAuthCntGroup.addContentItem(contentAuthCnt)
         self.contentAuthCntGroup.setContainerItem(self.contentAuthAct)
-        self.contentAuthCntGroup.register()
+        register_groups.append(self.contentAuthCntGroup)
 
         self.userRoleCntGroup = ContentGroup(username)
         self.userRoleCntGroup.addContentItem(userRoleMngtCnt)
         self.userRoleCntGroup.setContainerItem(self.usersAct)
-        self.userRoleCntGroup.register()
+        register_groups.append(self.userRoleCntGroup)
 
         self.options_content_group = ContentGroup(username)
         self.options_content_group.addContentItem(options_cnt)
         self.options_content_group.setContainerItem(self.options_act)
-        self.options_content_group.register()
+        register_groups.append(self.options_content_group)
 
         self.profile_db_backup_group = ContentGroup(username)
         self.profile_db_backup_group.addContentItem(profile_db_backup_cnt)
         self.profile_db_backup_group.setContainerItem(self.profile_db_backup_act)
-        self.profile_db_backup_group.register()
+        register_groups.append(self.profile_db_backup_group)
 
         self.profile_backup_restore_group = ContentGroup(username)
         self.profile_backup_restore_group.addContentItem(profile_backup_restore_cnt)
         self.profile_backup_restore_group.setContainerItem(self.profile_backup_restore_act)
-        self.profile_backup_restore_group.register()
+        register_groups.append(self.profile_backup_restore_group)
 
         self.config_separator = ContentGroup(username)
         self.config_separator.addContentItem(self._action_separator())
@@ -1313,7 +1325,7 @@ class STDMQGISLoader:
         self.switch_config_group = ContentGroup(username)
         self.switch_config_group.addContentItem(switch_config_cnt)
         self.switch_config_group.setContainerItem(self.switch_config_act)
-        self.switch_config_group.register()
+        register_groups.append(self.switch_config_group)
 
         config_managmt_group = []
         config_managmt_group.append(self.profile_db_backup_group)
@@ -1330,19 +1342,19 @@ class STDMQGISLoader:
         self.adminUnitsCntGroup = ContentGroup(username)
         self.adminUnitsCntGroup.addContentItem(adminUnitsCnt)
         self.adminUnitsCntGroup.setContainerItem(self.manageAdminUnitsAct)
-        self.adminUnitsCntGroup.register()
+        register_groups.append(self.adminUnitsCntGroup)
 
         self.spatialUnitManagerCntGroup = ContentGroup(username, self.spatialLayerManager)
         self.spatialUnitManagerCntGroup.addContentItem(spatialLayerManagerCnt)
-        self.spatialUnitManagerCntGroup.register()
+        register_groups.append(self.spatialUnitManagerCntGroup)
 
         self.feature_details_cnt_group = ContentGroup(username, self.feature_details_act)
         self.feature_details_cnt_group.addContentItem(feature_details_cnt)
-        self.feature_details_cnt_group.register()
+        register_groups.append(self.feature_details_cnt_group)
 
         self.wzdConfigCntGroup = ContentGroup(username, self.wzdAct)
         self.wzdConfigCntGroup.addContentItem(wzdConfigCnt)
-        self.wzdConfigCntGroup.register()
+        register_groups.append(self.wzdConfigCntGroup)
 
         self.STRCntGroup = TableContentGroup(username,
                                              self.viewSTRAct.text(),
@@ -1351,32 +1363,32 @@ class STDMQGISLoader:
         self.STRCntGroup.readContentItem().code = "ED607F24-11A2-427C-B395-2E2A3EBA4EBD"
         self.STRCntGroup.updateContentItem().code = "5D45A49D-F640-4A48-94D9-A10F502655F5"
         self.STRCntGroup.deleteContentItem().code = "15E27A59-28F7-42B4-858F-C070E2C3AE10"
-        self.STRCntGroup.register()
+        register_groups.append(self.STRCntGroup)
 
         self.docDesignerCntGroup = ContentGroup(username, self.docDesignerAct)
         self.docDesignerCntGroup.addContentItem(documentDesignerCnt)
-        self.docDesignerCntGroup.register()
+        register_groups.append(self.docDesignerCntGroup)
 
         self.docGeneratorCntGroup = ContentGroup(username, self.docGeneratorAct)
         self.docGeneratorCntGroup.addContentItem(documentGeneratorCnt)
-        self.docGeneratorCntGroup.register()
+        register_groups.append(self.docGeneratorCntGroup)
 
         self.importCntGroup = ContentGroup(username, self.importAct)
         self.importCntGroup.addContentItem(importCnt)
-        self.importCntGroup.register()
+        register_groups.append(self.importCntGroup)
 
         self.exportCntGroup = ContentGroup(username, self.exportAct)
         self.exportCntGroup.addContentItem(exportCnt)
-        self.exportCntGroup.register()
+        register_groups.append(self.exportCntGroup)
 
         # Create mobile content group
         self.mobileXformgenCntGroup = ContentGroup(username, self.mobile_form_act)
         self.mobileXformgenCntGroup.addContentItem(mobileFormgeneratorCnt)
-        self.mobileXformgenCntGroup.register()
+        register_groups.append(self.mobileXformgenCntGroup)
 
         self.mobileXFormImportCntGroup = ContentGroup(username, self.mobile_form_import)
         self.mobileXFormImportCntGroup.addContentItem(mobileFormImportCnt)
-        self.mobileXFormImportCntGroup.register()
+        register_groups.append(self.mobileXFormImportCntGroup)
 
         # Group geoodk actions to one menu
         geoodkSettingsCntGroup = []
@@ -1407,11 +1419,16 @@ class STDMQGISLoader:
                 User.CURRENT_USER.UserName,
                 'templates'
             )
+            register_groups.append(template_content)
             # template_content.code = template_content_group.hash_code(unicode(template.name))
             # template_content_group.addContentItem(template_content)
             # template_content.name = template.name
         # template_content_group.register()
 
+        register_start = time.perf_counter()
+        register_content_groups(username, register_groups)
+        register_time = time.perf_counter() - register_start
+
         # Add Design Forms menu and tool bar actions
         self.toolbarLoader.addContent(self.wzdConfigCntGroup)
         self.menubarLoader.addContent(self.wzdConfigCntGroup)
@@ -1484,6 +1501,12 @@ class STDMQGISLoader:
 
         self.profile_status_message()
 
+        LOGGER.debug(
+            'Modules loaded in %.3f seconds, %s content groups registered '
+            'in %.3f seconds', time.perf_counter() - start_time,
+            len(register_groups), register_time
+        )
+
     def _doc_temp_exist(self, doc_temp, profile_templates):
         doc_exist = False
         for template in profile_templates:
@@ -1529,7 +1552,6 @@ class STDMQGISLoader:
             self.iface.mainWindow()
         )
         moduleCntGroup = TableContentGroup(username, k, content_action)
-        moduleCntGroup.register()
         return moduleCntGroup
 
     def check_spatial_tables(self, show_message=False):
@@ -2175,6 +2197,8 @@ class STDMQGISLoader:
                 if globals.APP_DBCONN is not None:
                     STDMDb.cleanUp()
                     DeclareMapping.cleanUp()
+                    clear_entity_model_cache()
+                    refresh_permissions()
                 # Remove database reference
                 globals.APP_DBCONN = None
             else:
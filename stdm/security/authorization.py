@@ -17,16 +17,104 @@ email                : gkahiu@gmail.com
  *                                                                         *
  ***************************************************************************/
 """
-from stdm.data.database import Content
+from sqlalchemy.sql.expression import text
+
+from stdm.data.database import (
+    register_write_listener,
+    Singleton,
+    STDMDb
+)
 from stdm.exceptions import DummyException
 from stdm.security.roleprovider import RoleProvider
-from stdm.utils.util import getIndex
+
+# Tables whose changes invalidate the content permissions
+PERMISSION_TABLES = ('content_base', 'content_roles', 'role')
 
 
 class RoleMapper:
     pass
 
 
+@Singleton
+class PermissionCache:
+    """
+    Holds the roles permitted to access each content item and the roles of
+    each user. The content permissions are loaded using a single query and
+    are reloaded when content items or roles are written through the Model
+    class or when refresh is called.
+    """
+
+    def __init__(self):
+        self._content_roles = None
+        self._user_roles = {}
+
+        register_write_listener(self._on_record_written)
+
+    def _on_record_written(self, table_name, record_id):
+        if table_name in PERMISSION_TABLES:
+            self._content_roles = None
+
+    def _load_content_roles(self):
+        sql = 'SELECT cb.code, rl.name FROM content_base cb ' \
+              'JOIN content_roles cr ON cr.content_base_id = cb.id ' \
+              'JOIN role rl ON rl.id = cr.role_id'
+
+        conn = STDMDb.instance().engine.connect()
+        try:
+            result = conn.execute(text(sql)).fetchall()
+        finally:
+            conn.close()
+
+        content_roles = {}
+        for code, role_name in result:
+            content_roles.setdefault(code, set()).add(role_name)
+
+        return content_roles
+
+    def content_roles(self, code):
+        """
+        :param code: Code of the content item.
+        :type code: str
+        :return: Names of the roles that have been granted access to the
+        content item.
+        :rtype: set
+        """
+        if self._content_roles is None:
+            self._content_roles = self._load_content_roles()
+
+        return self._content_roles.get(code, set())
+
+    def user_roles(self, username):
+        """
+        :param username: User name.
+        :type username: str
+        :return: Names of the roles that the user belongs to.
+        :rtype: list
+        """
+        if username not in self._user_roles:
+            self._user_roles[username] = RoleProvider().GetRolesForUser(
+                username
+            )
+
+        return list(self._user_roles[username])
+
+    def refresh(self):
+        """
+        Clears the cached permissions so that they are reloaded on the next
+        access check.
+        """
+        self._content_roles = None
+        self._user_roles = {}
+
+
+def refresh_permissions():
+    """
+    Clears the cached content permissions and user roles. To be called when
+    role memberships or content assignments change.
+    """
+    PermissionCache.instance().refresh()
+
+
 class Authorizer:
     """
     This class has the responsibility of asserting whether an account with
@@ -42,8 +130,7 @@ class Authorizer:
         """
         Get roles that the user belongs to
         """
-        roleProvider = RoleProvider()
-        self.userRoles = roleProvider.GetRolesForUser(self.username)
+        self.userRoles = PermissionCache.instance().user_roles(self.username)
         """
         If user name is postgres then add it to the list of user roles since
         it is not a group role in PostgreSQL but content is initialized by
@@ -61,18 +148,8 @@ class Authorizer:
         hasPermission = False
         # Get roles with permission
         try:
-            cnt = Content()
-            qo = cnt.queryObject()
-            """
-            cntRef = qo.filter(Content.code == contentCode).first()
-            """
-            cntRef = qo.filter(Content.code == contentCode).first()
-            if cntRef is not None:
-                cntRoles = cntRef.roles
-                for rl in cntRoles:
-                    if getIndex(self.userRoles, rl.name) != -1:
-                        hasPermission = True
-                        break
+            cntRoles = PermissionCache.instance().content_roles(contentCode)
+            hasPermission = not cntRoles.isdisjoint(self.userRoles)
         except DummyException:
             """
             Current user does not have permission to access the content tables.
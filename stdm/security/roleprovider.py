@@ -185,6 +185,8 @@ class RoleProvider:
         t = text("DROP OWNED BY %s CASCADE;DROP ROLE %s;" % (roleName, roleName))
         self._execute(t)
 
+        self._refresh_permissions()
+
     def RoleExists(self, roleName):
         '''
         Assert whether the given role exists
@@ -233,6 +235,8 @@ class RoleProvider:
             t = text("BEGIN;%s %s %s %s;COMMIT;" % (action, role, refkeyword, usersConcat))
             result = self._execute(t)
 
+        self._refresh_permissions()
+
     def GetUsersInRole(self, roleName):
         '''
         Get all users in the given role
@@ -261,6 +265,15 @@ class RoleProvider:
         qo = rl.queryObject()
         return qo.all()
 
+    def _refresh_permissions(self):
+        '''
+        Clear the cached content permissions following changes in role
+        memberships.
+        '''
+        from stdm.security.authorization import refresh_permissions
+
+        refresh_permissions()
+
     def _execute(self, sql, **kwargs):
         '''
         Execute the passed in sql statement
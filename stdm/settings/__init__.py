@@ -1,16 +1,95 @@
-from qgis.PyQt.QtCore import QStandardPaths
+from qgis.PyQt.QtCore import (
+    pyqtSignal,
+    QObject,
+    QStandardPaths
+)
 
 from stdm.data.configuration.profile import Profile
+from stdm.data.database import Singleton
 from stdm.settings.config_serializer import ConfigurationFileSerializer
 from stdm.settings.registryconfig import (
     CURRENT_PROFILE,
     RegistryConfig,
     ENTITY_BROWSER_RECORD_LIMIT,
+    ENTITY_BROWSER_PAGE_SIZE,
+    ENTITY_BROWSER_PAGE_WINDOW,
     ENTITY_SORT_ORDER,
+    FEATURE_DETAILS_MAX_FEATURES,
     LOG_MODE
 
 )
 
+@Singleton
+class CurrentProfileCache(QObject):
+    """
+    Holds the name of the current profile so that the settings are only read
+    once, and emits profile_changed when the current profile is changed or
+    the configuration containing it is reloaded.
+    """
+    profile_changed = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        from stdm.data.configuration.stdm_configuration import StdmConfiguration
+
+        QObject.__init__(self, parent)
+        self._name = None
+        self._profile = None
+
+        config = StdmConfiguration.instance()
+        config.profile_added.connect(self._on_profile_changed)
+        config.profile_removed.connect(self._on_profile_changed)
+
+    def _on_profile_changed(self, profile):
+        # Slot raised when a profile is added to or removed from the
+        # configuration, including when the configuration is reloaded.
+        name = profile if isinstance(profile, str) else profile.name
+        if name == self._name:
+            self.profile()
+
+    def profile(self) -> Profile:
+        """
+        :returns current Profile object in the configuration currently
+        being used.
+        :rtype: Profile
+        """
+        from stdm.data.configuration.stdm_configuration import StdmConfiguration
+
+        if self._name is None:
+            reg_config = RegistryConfig()
+            profile_info = reg_config.read([CURRENT_PROFILE])
+            self._name = str(profile_info.get(CURRENT_PROFILE, ''))
+
+        # Return None if there is no current profile
+        if not self._name:
+            profile = None
+        else:
+            profile = StdmConfiguration.instance().profiles.get(
+                self._name, None
+            )
+
+        # A different object is returned if the configuration was reloaded
+        if profile is not self._profile:
+            self._profile = profile
+            self.profile_changed.emit(profile)
+
+        return profile
+
+    def set_profile_name(self, name: str):
+        """
+        Sets the name of the current profile and notifies dependants if the
+        profile has changed.
+        :param name: Name of the current profile.
+        :type name: str
+        """
+        self._name = name
+        self.profile()
+
+    def reset(self):
+        """
+        Clears the cached profile name so that it is read from the settings
+        on the next call to :func:`profile`.
+        """
+        self._name = None
 
 
 def current_profile() -> Profile:
@@ -18,19 +97,7 @@ def current_profile() -> Profile:
     :returns current Profile object in the configuration currently being used.
     :rtype: Profile
     """
-    from stdm.data.configuration.stdm_configuration import StdmConfiguration
-
-    reg_config = RegistryConfig()
-    profile_info = reg_config.read([CURRENT_PROFILE])
-    profile_name = profile_info.get(CURRENT_PROFILE, '')
-
-    # Return None if there is no current profile
-    if not profile_name:
-        return None
-
-    profiles = StdmConfiguration.instance().profiles
-
-    return profiles.get(str(profile_name), None)
+    return CurrentProfileCache.instance().profile()
 
 
 def save_current_profile(name: str):
@@ -46,6 +113,8 @@ def save_current_profile(name: str):
     reg_config = RegistryConfig()
     reg_config.write({CURRENT_PROFILE: name})
 
+    CurrentProfileCache.instance().set_profile_name(name)
+
 
 def save_configuration():
     """
@@ -72,6 +141,46 @@ def save_entity_browser_record_limit(limit: int):
     reg_config = RegistryConfig()
     reg_config.write({ENTITY_BROWSER_RECORD_LIMIT: limit})
 
+
+def get_entity_browser_page_size() -> int:
+    """
+    :return: Number of records fetched at a time by the entity browser.
+    :rtype: int
+    """
+    reg_config = RegistryConfig()
+    page_info = reg_config.read([ENTITY_BROWSER_PAGE_SIZE])
+    return int(page_info.get(ENTITY_BROWSER_PAGE_SIZE, 500))
+
+
+def get_entity_browser_page_window() -> int:
+    """
+    :return: Maximum number of pages of records held in memory by the
+    entity browser.
+    :rtype: int
+    """
+    reg_config = RegistryConfig()
+    window_info = reg_config.read([ENTITY_BROWSER_PAGE_WINDOW])
+    return int(window_info.get(ENTITY_BROWSER_PAGE_WINDOW, 20))
+
+
+def get_feature_details_max_features() -> int:
+    """
+    :return: Maximum number of selected features whose details are shown
+    by Spatial Entity Details.
+    :rtype: int
+    """
+    reg_config = RegistryConfig()
+    max_info = reg_config.read([FEATURE_DETAILS_MAX_FEATURES])
+    return int(max_info.get(FEATURE_DETAILS_MAX_FEATURES, 5000))
+
+
+def save_feature_details_max_features(limit: int):
+    """
+    :type limit: int
+    """
+    reg_config = RegistryConfig()
+    reg_config.write({FEATURE_DETAILS_MAX_FEATURES: limit})
+
 def save_log_mode(log_mode: str):
     reg_config = RegistryConfig()
     reg_config.write({LOG_MODE: log_mode})
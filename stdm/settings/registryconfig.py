@@ -43,9 +43,19 @@ FIRST_LOGIN = 'FirstLogin'
 STDM_PLUGIN = 'stdm'
 STDM_VERSION = 'STDMVersion'
 ENTITY_BROWSER_RECORD_LIMIT = 'EntityBrowserRecordLimit'
+ENTITY_BROWSER_PAGE_SIZE = 'EntityBrowserPageSize'
+ENTITY_BROWSER_PAGE_WINDOW = 'EntityBrowserPageWindow'
 ENTITY_SORT_ORDER = 'EntitySortOrder'
 RUN_TEMPLATE_CONVERTER = 'RunTemplateConverter'
 LOG_MODE = 'LogMode'
+SPATIAL_LAYER_DISPLAY_MODE = 'SpatialLayerDisplayMode'
+FEATURE_DETAILS_MAX_FEATURES = 'FeatureDetailsMaxFeatures'
+BUILD_ADVISED_INDEXES = 'BuildAdvisedIndexes'
+
+# Ways of showing the display values of related columns in spatial layers
+LAYER_JOIN_DISPLAY = 'JOIN'
+VIEW_DISPLAY = 'VIEW'
+MATERIALIZED_VIEW_DISPLAY = 'MATERIALIZED_VIEW'
 
 def registry_value(key_name: str):
     """
@@ -129,6 +139,32 @@ def logging_mode():
     return log_mode
 
 
+def spatial_layer_display_mode() -> str:
+    """
+    :return: Returns whether the display values of the lookup, administrative
+    unit and foreign key columns of spatial layers are joined in QGIS
+    (LAYER_JOIN_DISPLAY) or in a database view (VIEW_DISPLAY or
+    MATERIALIZED_VIEW_DISPLAY).
+    :rtype: str
+    """
+    mode = registry_value(SPATIAL_LAYER_DISPLAY_MODE)
+    if mode not in (VIEW_DISPLAY, MATERIALIZED_VIEW_DISPLAY):
+        return LAYER_JOIN_DISPLAY
+
+    return mode
+
+
+def set_spatial_layer_display_mode(mode: str):
+    """
+    Sets how the display values of related columns of spatial layers are
+    joined.
+    :param mode: LAYER_JOIN_DISPLAY, VIEW_DISPLAY or
+    MATERIALIZED_VIEW_DISPLAY.
+    :type mode: str
+    """
+    set_registry_value(SPATIAL_LAYER_DISPLAY_MODE, mode)
+
+
 def set_debug_logging(state: bool):
     """
     Enable or disable debug logging.
@@ -141,6 +177,26 @@ def set_debug_logging(state: bool):
 
     set_registry_value(DEBUG_LOG, lvl)
 
+def build_advised_indexes() -> bool:
+    """
+    :return: Returns whether the indexes proposed by the index advisor are
+    created after the schema has been updated. True by default.
+    :rtype: bool
+    """
+    value = registry_value(BUILD_ADVISED_INDEXES)
+    return False if value == 'False' else True
+
+
+def set_build_advised_indexes(state: bool):
+    """
+    Enable or disable building the advised indexes after schema updates.
+    :param state: True to enable, False to disable.
+    :type state: bool
+    """
+    value = 'True' if state else 'False'
+    set_registry_value(BUILD_ADVISED_INDEXES, value)
+
+
 def set_run_template_converter_on_startup(state: bool):
     value = 'True' if state else 'False'
     set_registry_value(RUN_TEMPLATE_CONVERTER, value) 
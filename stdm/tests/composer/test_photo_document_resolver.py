@@ -0,0 +1,110 @@
+from collections import namedtuple
+from unittest import (
+    makeSuite,
+    TestCase
+)
+
+from sqlalchemy import (
+    Column,
+    create_engine,
+    event,
+    Integer,
+    MetaData,
+    String,
+    Table
+)
+from sqlalchemy.orm import sessionmaker
+
+from stdm.composer.document_generator import PhotoDocumentResolver
+from stdm.tests.utilities import get_qgis_app
+
+QGIS_APP = get_qgis_app()
+
+PHOTO_TYPE_ID = 1
+
+Record = namedtuple('Record', ['id'])
+
+
+class TestPhotoDocumentResolver(TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite://')
+        self.metadata = MetaData()
+        base = Table(
+            'supporting_document', self.metadata,
+            Column('id', Integer, primary_key=True),
+            Column('document_identifier', String(50)),
+            Column('filename', String(100))
+        )
+        photos = Table(
+            'person_supporting_document', self.metadata,
+            Column('id', Integer, primary_key=True),
+            Column('person_id', Integer),
+            Column('supporting_doc_id', Integer),
+            Column('document_type', Integer)
+        )
+        self.metadata.create_all(self.engine)
+
+        with self.engine.begin() as conn:
+            conn.execute(base.insert(), [
+                {'id': 1, 'document_identifier': 'a1', 'filename': 'a.jpg'},
+                {'id': 2, 'document_identifier': 'b1', 'filename': 'b.png'},
+                {'id': 3, 'document_identifier': 'a2', 'filename': 'c.jpg'}
+            ])
+            conn.execute(photos.insert(), [
+                {'id': 1, 'person_id': 10, 'supporting_doc_id': 1,
+                 'document_type': PHOTO_TYPE_ID},
+                {'id': 2, 'person_id': 20, 'supporting_doc_id': 2,
+                 'document_type': PHOTO_TYPE_ID},
+                {'id': 3, 'person_id': 10, 'supporting_doc_id': 3,
+                 'document_type': PHOTO_TYPE_ID}
+            ])
+
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._count)
+
+        self.session = sessionmaker(bind=self.engine)()
+        self.resolver = PhotoDocumentResolver(
+            lambda name: self.metadata.tables[name], self.session
+        )
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+
+    def _count(self, conn, cursor, statement, *args):
+        self.statements.append(statement)
+
+    def _document(self, record):
+        return self.resolver.document(
+            'person_supporting_document',
+            'supporting_document',
+            'person_id',
+            'id',
+            PHOTO_TYPE_ID,
+            record
+        )
+
+    def test_batch_resolved_in_one_query(self):
+        records = [Record(10), Record(20), Record(30)]
+        self.resolver.set_batch(records)
+
+        documents = [self._document(r) for r in records]
+
+        self.assertEqual(len(self.statements), 1)
+        self.assertEqual(documents[0], ('a1', 'a.jpg'))
+        self.assertEqual(documents[1], ('b1', 'b.png'))
+        self.assertIsNone(documents[2])
+
+    def test_clear(self):
+        self.resolver.set_batch([Record(10)])
+        self._document(Record(10))
+        self.resolver.clear()
+        self._document(Record(10))
+
+        self.assertEqual(len(self.statements), 2)
+
+
+def suite():
+    suite = makeSuite(TestPhotoDocumentResolver, 'test')
+
+    return suite
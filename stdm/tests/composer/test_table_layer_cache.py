@@ -0,0 +1,87 @@
+from unittest import (
+    makeSuite,
+    TestCase
+)
+from unittest.mock import MagicMock
+
+from qgis.core import (
+    QgsProject,
+    QgsVectorLayer
+)
+
+from stdm.composer.composer_wrapper import TableLayerCache
+from stdm.tests.utilities import get_qgis_app
+
+QGIS_APP = get_qgis_app()
+
+LINKED_TABLES = ['household', 'person', 'supporting_document']
+
+# Number of documents in the long run test
+RUN_DOCUMENTS = 100
+
+
+def _table_layer(table_name):
+    # Stands in for the PostGIS layer of the linked table
+    return QgsVectorLayer(
+        'None?field=id:integer&field=name:string(20)',
+        table_name,
+        'memory'
+    )
+
+
+class TestTableLayerCache(TestCase):
+    def setUp(self):
+        self.project = QgsProject()
+        self.cache = TableLayerCache(_table_layer, self.project)
+
+    def tearDown(self):
+        self.cache.clear()
+        self.project = None
+
+    def test_layers_shared(self):
+        first = self.cache.layers(LINKED_TABLES)
+        second = self.cache.layers(LINKED_TABLES)
+
+        self.assertEqual(len(first), len(LINKED_TABLES))
+        self.assertEqual(
+            [l.id() for l in first], [l.id() for l in second]
+        )
+        self.assertEqual(len(self.project.mapLayers()), len(LINKED_TABLES))
+
+    def test_clear_removes_layers(self):
+        self.cache.layers(LINKED_TABLES)
+        self.cache.clear()
+
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(len(self.project.mapLayers()), 0)
+
+    def test_layer_recreated_if_removed(self):
+        layer = self.cache.layer('person')
+        layer_id = layer.id()
+        self.project.removeMapLayer(layer_id)
+
+        layer = self.cache.layer('person')
+        self.assertNotEqual(layer.id(), layer_id)
+        self.assertEqual(len(self.project.mapLayers()), 1)
+
+        # Removed layers are ignored on clearing
+        self.cache.clear()
+        self.assertEqual(len(self.project.mapLayers()), 0)
+
+    def test_layers_created_once_per_run(self):
+        factory = MagicMock(side_effect=_table_layer)
+        cache = TableLayerCache(factory, self.project)
+
+        for _ in range(RUN_DOCUMENTS):
+            cache.layers(LINKED_TABLES)
+
+        self.assertEqual(factory.call_count, len(LINKED_TABLES))
+        self.assertEqual(len(self.project.mapLayers()), len(LINKED_TABLES))
+
+        cache.clear()
+
+
+def suite():
+    suite = makeSuite(TestTableLayerCache, 'test')
+
+    return suite
@@ -0,0 +1,134 @@
+import os
+import shutil
+import tempfile
+from unittest import (
+    makeSuite,
+    TestCase
+)
+from unittest.mock import (
+    MagicMock,
+    patch
+)
+
+from stdm.data.configuration.stdm_configuration import StdmConfiguration
+from stdm.data.database import (
+    register_write_listener,
+    unregister_write_listener
+)
+from stdm.data.importexport import reader
+from stdm.data.importexport.reader import (
+    ImportCheckpoint,
+    ImportFeatureException,
+    layer_features,
+    OGRReader
+)
+from stdm.tests.data.utils import (
+    add_basic_profile,
+    add_person_entity,
+    append_person_columns,
+    BASIC_PROFILE
+)
+from stdm.tests.utilities import get_qgis_app
+
+QGIS_APP = get_qgis_app()
+
+SOURCE_ROWS = 10
+
+
+class TestBulkImport(TestCase):
+    def setUp(self):
+        self.config = StdmConfiguration.instance()
+        self.profile = add_basic_profile(self.config)
+        self.entity = add_person_entity(self.profile)
+        append_person_columns(self.entity)
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.source_file = os.path.join(self.temp_dir, 'person.csv')
+        with open(self.source_file, 'w') as source:
+            source.write('FNAME\n')
+            for i in range(SOURCE_ROWS):
+                source.write('person{0}\n'.format(i))
+
+        self.copied_rows = []
+        self.writes = []
+        register_write_listener(self._on_write)
+        self.addCleanup(unregister_write_listener, self._on_write)
+
+        patchers = [
+            patch.object(reader, 'STDMDb', MagicMock()),
+            patch.object(reader, 'current_profile', lambda: self.profile),
+            patch.object(
+                reader,
+                'IMPORT_CHECKPOINT_DIR',
+                os.path.join(self.temp_dir, 'checkpoints')
+            ),
+            patch.object(OGRReader, '_copy_batch', self._copy_batch)
+        ]
+        for p in patchers:
+            p.start()
+            self.addCleanup(p.stop)
+
+        self.reader = OGRReader(self.source_file)
+
+    def tearDown(self):
+        self.reader.reset()
+        self.config.remove_profile(BASIC_PROFILE)
+        self.profile = None
+        self.config = None
+        shutil.rmtree(self.temp_dir)
+
+    def _copy_batch(self, cursor, targettable, columns, rows):
+        self.copied_rows.extend(rows)
+
+    def _on_write(self, table_name, record_id):
+        self.writes.append((table_name, record_id))
+
+    def _import(self, append=True, resume=True):
+        return self.reader.bulkFeatToDb(
+            self.entity.name,
+            {'FNAME': 'first_name'},
+            append,
+            None,
+            batch_size=3,
+            resume=resume
+        )
+
+    def test_layer_features_from_index(self):
+        names = [
+            f.GetField('FNAME')
+            for f in layer_features(self.reader.getLayer(), 4)
+        ]
+
+        self.assertEqual(
+            names, ['person{0}'.format(i) for i in range(4, SOURCE_ROWS)]
+        )
+
+    def test_resume_from_checkpoint(self):
+        checkpoint = ImportCheckpoint(
+            self.reader._ds.GetDescription(),
+            self.entity.name
+        )
+        checkpoint.save(4)
+
+        self.assertTrue(self._import())
+
+        self.assertEqual(
+            [r[0] for r in self.copied_rows],
+            ['person{0}'.format(i) for i in range(4, SOURCE_ROWS)]
+        )
+        self.assertEqual(4 + len(self.copied_rows), SOURCE_ROWS)
+        self.assertEqual(checkpoint.committed_rows(), 0)
+        self.assertEqual(self.writes, [(self.entity.name, None)])
+
+    def test_resume_overwrite_rejected(self):
+        with self.assertRaises(ImportFeatureException):
+            self._import(append=False, resume=True)
+
+        self.assertEqual(len(self.copied_rows), 0)
+        self.assertEqual(self.writes, [])
+
+
+def suite():
+    suite = makeSuite(TestBulkImport, 'test')
+
+    return suite
@@ -0,0 +1,135 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import (
+    makeSuite,
+    TestCase
+)
+from unittest.mock import (
+    MagicMock,
+    patch
+)
+
+from stdm.data import delta_backup
+from stdm.data.delta_backup import (
+    delta_chain,
+    DeltaBackupException,
+    read_manifest,
+    verify_delta,
+    write_delta,
+    XID_WRAPAROUND
+)
+
+TABLES = ['hh_household', 'hh_person']
+
+
+class FakeCursor:
+    # Stands in for the psycopg2 cursor of the backup connection
+    def __init__(self, txid):
+        self.txid = txid
+        self.statements = []
+        self.rowcount = 0
+
+    def execute(self, sql):
+        self.statements.append(sql)
+
+    def fetchone(self):
+        return (self.txid,)
+
+    def copy_expert(self, sql, f):
+        self.statements.append(sql)
+        f.write(b'1\tvalue\n')
+        self.rowcount = 1
+
+    def close(self):
+        pass
+
+
+class TestDeltaBackup(TestCase):
+    def setUp(self):
+        self.backup_folder = tempfile.mkdtemp()
+        self.db_con = MagicMock()
+        self.db_con.Database = 'stdm'
+
+    def tearDown(self):
+        shutil.rmtree(self.backup_folder)
+
+    def _write_delta(self, txid, base_snapshot, parent=None):
+        cursor = FakeCursor(txid)
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+
+        with patch.object(delta_backup, '_raw_connection', return_value=conn):
+            manifest_path = write_delta(
+                self.db_con, TABLES, self.backup_folder, base_snapshot, parent
+            )
+
+        copies = [s for s in cursor.statements if s.startswith('COPY (SELECT *')]
+
+        return manifest_path, copies
+
+    def _write_manifest(self, name, parent):
+        with open(os.path.join(self.backup_folder, name), 'w') as mf:
+            json.dump({'parent': parent, 'tables': {}}, mf)
+
+    def test_write_delta_same_epoch(self):
+        manifest_path, copies = self._write_delta(150, (100, 0))
+
+        self.assertEqual(len(copies), len(TABLES))
+        for sql in copies:
+            self.assertIn('WHERE xmin::text::bigint >= 100', sql)
+
+        manifest = read_manifest(manifest_path)
+        self.assertIsNone(manifest['parent'])
+        self.assertEqual(manifest['snapshot_xid'], 150)
+        self.assertEqual(manifest['snapshot_epoch'], 0)
+        self.assertEqual(sorted(manifest['tables']), TABLES)
+        self.assertEqual(verify_delta(manifest_path), [])
+
+    def test_write_delta_after_wraparound(self):
+        manifest_path, copies = self._write_delta(XID_WRAPAROUND + 5, (100, 0))
+
+        for sql in copies:
+            self.assertNotIn('WHERE', sql)
+
+        manifest = read_manifest(manifest_path)
+        self.assertEqual(manifest['snapshot_xid'], 5)
+        self.assertEqual(manifest['snapshot_epoch'], 1)
+
+    def test_verify_delta_detects_changed_files(self):
+        manifest_path, _ = self._write_delta(150, (100, 0))
+        table_info = read_manifest(manifest_path)['tables'][TABLES[0]]
+
+        rows_file = os.path.join(self.backup_folder, table_info['rows_file'])
+        with open(rows_file, 'ab') as f:
+            f.write(b'tampered')
+        os.remove(os.path.join(self.backup_folder, table_info['ids_file']))
+
+        self.assertEqual(
+            sorted(verify_delta(manifest_path)),
+            sorted([table_info['rows_file'], table_info['ids_file']])
+        )
+
+    def test_delta_chain_order(self):
+        self._write_manifest('delta_3.json', 'delta_1.json')
+        self._write_manifest('delta_1.json', None)
+        self._write_manifest('delta_2.json', 'delta_3.json')
+
+        chain = [os.path.basename(p) for p in delta_chain(self.backup_folder)]
+
+        self.assertEqual(chain, ['delta_1.json', 'delta_3.json', 'delta_2.json'])
+
+    def test_delta_chain_branch_rejected(self):
+        self._write_manifest('delta_1.json', None)
+        self._write_manifest('delta_2.json', 'delta_1.json')
+        self._write_manifest('delta_3.json', 'delta_1.json')
+
+        with self.assertRaises(DeltaBackupException):
+            delta_chain(self.backup_folder)
+
+
+def suite():
+    suite = makeSuite(TestDeltaBackup, 'test')
+
+    return suite
@@ -0,0 +1,114 @@
+from unittest import (
+    makeSuite,
+    TestCase
+)
+from unittest.mock import patch
+
+from stdm.data.configuration.columns import (
+    BooleanColumn,
+    DateColumn,
+    DoubleColumn,
+    PercentColumn
+)
+from stdm.data.configuration.stdm_configuration import StdmConfiguration
+from stdm.data.importexport import coercion
+from stdm.data.importexport.coercion import ColumnCoercionPlan
+from stdm.tests.data.utils import (
+    add_basic_profile,
+    add_person_entity,
+    append_person_columns,
+    BASIC_PROFILE
+)
+
+PLAN_ROWS = 100
+
+
+class TestColumnCoercionPlan(TestCase):
+    def setUp(self):
+        self.config = StdmConfiguration.instance()
+        self.profile = add_basic_profile(self.config)
+        self.entity = add_person_entity(self.profile)
+        append_person_columns(self.entity)
+        self.entity.add_column(DoubleColumn('income', self.entity))
+        self.entity.add_column(PercentColumn('share', self.entity))
+        self.entity.add_column(BooleanColumn('is_head', self.entity))
+        self.entity.add_column(DateColumn('dob', self.entity))
+
+        self.columnmatch = {
+            'HH_ID': 'household_id',
+            'FNAME': 'first_name',
+            'SEX': 'gender',
+            'INCOME': 'income',
+            'SHARE': 'share',
+            'HEAD': 'is_head',
+            'DOB': 'dob'
+        }
+        self.plan = ColumnCoercionPlan.from_column_match(
+            self.entity,
+            self.columnmatch
+        )
+
+    def tearDown(self):
+        self.config.remove_profile(BASIC_PROFILE)
+        self.profile = None
+        self.config = None
+
+    def _row(self):
+        return {
+            'household_id': '12',
+            'first_name': 'Jane',
+            'gender': '0',
+            'income': ' ',
+            'share': '25%',
+            'is_head': 'Yes',
+            'dob': 'NULL'
+        }
+
+    def test_text_columns_have_no_converter(self):
+        self.assertIsNone(self.plan.converter('first_name'))
+
+    def test_apply(self):
+        row = self.plan.apply(self._row())
+
+        self.assertEqual(row['household_id'], 12)
+        self.assertEqual(row['first_name'], 'Jane')
+        self.assertIsNone(row['gender'])
+        self.assertIsNone(row['income'])
+        self.assertEqual(row['share'], 25.0)
+        self.assertTrue(row['is_head'])
+        self.assertIsNone(row['dob'])
+
+    def test_apply_batch(self):
+        columns = list(self._row().keys())
+        rows = [list(self._row().values()) for _ in range(3)]
+        self.plan.apply_batch(columns, rows)
+
+        for row in rows:
+            self.assertEqual(row, list(self.plan.apply(self._row()).values()))
+
+    def test_converters_resolved_once(self):
+        with patch.object(
+                coercion,
+                'column_converter',
+                wraps=coercion.column_converter
+        ) as converter:
+            plan = ColumnCoercionPlan.from_column_match(
+                self.entity,
+                self.columnmatch
+            )
+            self.assertEqual(converter.call_count, len(self.columnmatch))
+
+            for _ in range(PLAN_ROWS):
+                plan.apply(self._row())
+            plan.apply_batch(
+                list(self._row().keys()),
+                [list(self._row().values()) for _ in range(PLAN_ROWS)]
+            )
+
+            self.assertEqual(converter.call_count, len(self.columnmatch))
+
+
+def suite():
+    suite = makeSuite(TestColumnCoercionPlan, 'test')
+
+    return suite
@@ -0,0 +1,111 @@
+from unittest import (
+    makeSuite,
+    TestCase
+)
+
+from stdm.data.index_advisor import (
+    BTREE,
+    GIN,
+    GIST,
+    IndexAdvisor,
+    IndexProposal,
+    SEARCH_INDEX_MIN_ROWS,
+    TableStatistics,
+    TRIGRAM_OPCLASS
+)
+from stdm.data.configuration.stdm_configuration import StdmConfiguration
+from stdm.tests.data.utils import (
+    add_spatial_unit_entity,
+    BASIC_PROFILE,
+    PERSON_ENTITY,
+    populate_basic_profile
+)
+
+
+class TestIndexAdvisor(TestCase):
+    def setUp(self):
+        self.config = StdmConfiguration.instance()
+        populate_basic_profile(self.config)
+        self.profile = self.config.profile(BASIC_PROFILE)
+        self.person = self.profile.entity(PERSON_ENTITY)
+        self.spatial_unit = add_spatial_unit_entity(self.profile)
+
+        # Catalogue of a database with empty profile tables
+        self.advisor = IndexAdvisor(self.profile, engine=object())
+        self.advisor.read_catalog = lambda: None
+        self.advisor.statistics = dict(
+            (e.name, TableStatistics())
+            for e in self.profile.entities.values()
+        )
+
+    def tearDown(self):
+        self.config.remove_profile(BASIC_PROFILE)
+        self.config = None
+
+    def _proposal(self, proposals, table, column):
+        for p in proposals:
+            if p.table == table and p.column == column:
+                return p
+
+        return None
+
+    def test_propose_foreign_key_and_geometry(self):
+        proposals = self.advisor.propose()
+
+        fk = self._proposal(proposals, self.person.name, 'household_id')
+        self.assertIsNotNone(fk)
+        self.assertEqual(fk.method, BTREE)
+
+        geom = self._proposal(proposals, self.spatial_unit.name, 'geom_poly')
+        self.assertIsNotNone(geom)
+        self.assertEqual(geom.method, GIST)
+
+    def test_propose_search_for_scanned_tables(self):
+        proposal = self._proposal(
+            self.advisor.propose(), self.person.name, 'first_name'
+        )
+        self.assertIsNone(proposal)
+
+        self.advisor.statistics[self.person.name] = TableStatistics(
+            rows=SEARCH_INDEX_MIN_ROWS, seq_scans=10
+        )
+        proposal = self._proposal(
+            self.advisor.propose(), self.person.name, 'first_name'
+        )
+        self.assertEqual(proposal.method, BTREE)
+
+        self.advisor.trigram_available = True
+        proposal = self._proposal(
+            self.advisor.propose(), self.person.name, 'first_name'
+        )
+        self.assertEqual(proposal.method, GIN)
+        self.assertEqual(proposal.opclass, TRIGRAM_OPCLASS)
+
+    def test_skip_existing_indexes(self):
+        self.advisor.indexes = {
+            self.person.name: [('household_id', BTREE, 'int4_ops')]
+        }
+        proposals = self.advisor.propose()
+
+        self.assertIsNone(
+            self._proposal(proposals, self.person.name, 'household_id')
+        )
+
+    def test_proposal_sql(self):
+        proposal = IndexProposal(
+            'person', 'first_name', GIN, TRIGRAM_OPCLASS
+        )
+
+        self.assertEqual(proposal.name, 'idx_person_first_name_trgm')
+        self.assertEqual(
+            proposal.sql(),
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS '
+            '"idx_person_first_name_trgm" ON "person" '
+            'USING gin ("first_name" gin_trgm_ops)'
+        )
+
+
+def suite():
+    suite = makeSuite(TestIndexAdvisor, 'test')
+
+    return suite
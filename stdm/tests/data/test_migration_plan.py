@@ -0,0 +1,83 @@
+from unittest import (
+    makeSuite,
+    TestCase
+)
+
+from stdm.data.code_generator import CODE_COUNTER_TABLE
+from stdm.data.configuration.migration_plan import (
+    CatalogSnapshot,
+    MigrationPlan,
+    MigrationStep
+)
+from stdm.data.configuration.stdm_configuration import StdmConfiguration
+from stdm.data.database import metadata
+from stdm.tests.data.utils import (
+    BASIC_PROFILE,
+    PERSON_ENTITY,
+    populate_basic_profile
+)
+
+
+class TestMigrationPlan(TestCase):
+    def setUp(self):
+        self.config = StdmConfiguration.instance()
+        populate_basic_profile(self.config)
+        self.profile = self.config.profile(BASIC_PROFILE)
+        self.person = self.profile.entity(PERSON_ENTITY)
+
+    def tearDown(self):
+        self.config.remove_profile(BASIC_PROFILE)
+        self.config = None
+
+    def _steps(self, plan, kind):
+        return [s for s in plan.steps if s.kind == kind]
+
+    def test_build_empty_database(self):
+        plan = MigrationPlan.build(self.config, CatalogSnapshot(), metadata)
+
+        created = [s.target for s in self._steps(plan, MigrationStep.CREATE)]
+        self.assertIn(self.person.name, created)
+        self.assertEqual(len(self._steps(plan, MigrationStep.DROP)), 0)
+        self.assertEqual(len(plan.preview()), len(plan))
+
+    def test_build_skips_existing_foreign_keys(self):
+        plan = MigrationPlan.build(self.config, CatalogSnapshot(), metadata)
+        fk_names = [
+            s.target for s in self._steps(plan, MigrationStep.CREATE_FOREIGN_KEY)
+        ]
+        self.assertTrue(len(fk_names) > 0)
+
+        snapshot = CatalogSnapshot(
+            foreign_keys=dict((name, self.person.name) for name in fk_names)
+        )
+        plan = MigrationPlan.build(self.config, snapshot, metadata)
+
+        self.assertEqual(
+            len(self._steps(plan, MigrationStep.CREATE_FOREIGN_KEY)), 0
+        )
+
+    def test_build_alters_existing_table(self):
+        snapshot = CatalogSnapshot(
+            tables=[self.person.name],
+            columns={self.person.name: {'id'}}
+        )
+        plan = MigrationPlan.build(self.config, snapshot, metadata)
+
+        altered = [s.target for s in self._steps(plan, MigrationStep.ALTER)]
+        self.assertIn(self.person.name, altered)
+
+    def test_build_creates_code_counter_once(self):
+        plan = MigrationPlan.build(self.config, CatalogSnapshot(), metadata)
+        created = [s.target for s in self._steps(plan, MigrationStep.CREATE)]
+        self.assertEqual(created[-1], CODE_COUNTER_TABLE)
+
+        snapshot = CatalogSnapshot(tables=[CODE_COUNTER_TABLE])
+        plan = MigrationPlan.build(self.config, snapshot, metadata)
+        created = [s.target for s in self._steps(plan, MigrationStep.CREATE)]
+        self.assertNotIn(CODE_COUNTER_TABLE, created)
+
+
+def suite():
+    suite = makeSuite(TestMigrationPlan, 'test')
+
+    return suite
@@ -10,10 +10,12 @@ from stdm.tests.data.utils import (
     add_basic_profile,
     add_household_entity,
     add_person_entity,
+    add_secondary_tenure_value_list,
     append_person_columns,
     BASIC_PROFILE,
     create_person_entity,
     create_relation,
+    HOUSEHOLD_ENTITY,
     PERSON_ENTITY,
     set_profile_social_tenure
 )
@@ -108,7 +110,103 @@ class TestProfile(TestCase):
         self.config = None
 
 
+class TestProfileIndexes(TestCase):
+    """
+    Checks that the entity and relation indexes of the profile return the
+    same items as scanning the collections, through the edits carried out
+    by the configuration wizard.
+    """
+
+    def setUp(self):
+        self.config = StdmConfiguration.instance()
+        self.profile = add_basic_profile(self.config)
+        self.person = add_person_entity(self.profile)
+        append_person_columns(self.person)
+        self.household = add_household_entity(self.profile)
+
+        self.rel = create_relation(self.profile)
+        self.rel.parent = self.household
+        self.rel.child = self.person
+        self.rel.child_column = 'household_id'
+        self.rel.parent_column = 'id'
+        self.profile.add_entity_relation(self.rel)
+
+    def tearDown(self):
+        self.config.remove_profile(BASIC_PROFILE)
+        self.profile = None
+        self.config = None
+
+    def assertIndexesConsistent(self):
+        entities = list(self.profile.entities.values())
+        for e in entities:
+            self.assertIs(self.profile.entity_by_name(e.name), e)
+
+            parents = [er for er in self.profile.relations.values()
+                       if er.parent.name == e.name]
+            children = [er for er in self.profile.relations.values()
+                        if er.child.name == e.name]
+            self.assertEqual(self.profile.parent_relations(e), parents)
+            self.assertEqual(self.profile.child_relations(e), children)
+
+    def test_entity_by_name(self):
+        self.assertIs(self.profile.entity_by_name(self.person.name),
+                      self.person)
+        self.assertIsNone(self.profile.entity_by_name('not_an_entity'))
+        self.assertIndexesConsistent()
+
+    def test_relations(self):
+        self.assertIn(self.rel, self.profile.parent_relations(self.household))
+        self.assertIn(self.rel, self.profile.child_relations(self.person))
+        self.assertIndexesConsistent()
+
+    def test_add_entity(self):
+        tenure_vl = add_secondary_tenure_value_list(self.profile)
+
+        self.assertIs(self.profile.entity_by_name(tenure_vl.name), tenure_vl)
+        self.assertIndexesConsistent()
+
+    def test_remove_entity(self):
+        person_name = self.person.name
+        self.profile.remove_entity(PERSON_ENTITY)
+
+        self.assertIsNone(self.profile.entity_by_name(person_name))
+        self.assertIndexesConsistent()
+
+    def test_rename(self):
+        old_name = self.household.name
+        self.profile.rename(HOUSEHOLD_ENTITY, 'family')
+
+        self.assertIsNone(self.profile.entity_by_name(old_name))
+        self.assertIs(self.profile.entity_by_name(self.household.name),
+                      self.household)
+        self.assertIs(
+            self.profile.entity_by_name(self.household.supporting_doc.name),
+            self.household.supporting_doc
+        )
+        self.assertIn(self.rel, self.profile.parent_relations(self.household))
+        self.assertIndexesConsistent()
+
+    def test_direct_collection_edits(self):
+        # Edits made by the wizard when a lookup is renamed
+        tenure_vl = add_secondary_tenure_value_list(self.profile)
+        tmp_short_name = tenure_vl.short_name
+        tenure_vl.rename_entity('tenure_type')
+        self.profile.entities[tmp_short_name] = tenure_vl
+        self.profile.entities[tenure_vl.short_name] = \
+            self.profile.entities.pop(tmp_short_name)
+
+        self.assertIs(self.profile.entity_by_name(tenure_vl.name), tenure_vl)
+
+        # Relation removed by the schema updater
+        del self.profile.relations[self.rel.name]
+
+        self.assertNotIn(self.rel,
+                         self.profile.parent_relations(self.household))
+        self.assertIndexesConsistent()
+
+
 def suite():
     suite = makeSuite(TestProfile, 'test')
+    suite.addTests(makeSuite(TestProfileIndexes, 'test'))
 
     return suite
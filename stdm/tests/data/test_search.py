@@ -0,0 +1,106 @@
+from types import SimpleNamespace
+from unittest import (
+    makeSuite,
+    TestCase
+)
+
+from sqlalchemy import (
+    Column,
+    Integer,
+    MetaData,
+    String,
+    Table
+)
+from sqlalchemy.dialects import postgresql
+
+from stdm.data.configuration.stdm_configuration import StdmConfiguration
+from stdm.data.search import (
+    _like_pattern,
+    EntitySearch,
+    full_text_columns,
+    full_text_document_sql
+)
+from stdm.tests.data.utils import (
+    BASIC_PROFILE,
+    PERSON_ENTITY,
+    populate_basic_profile
+)
+
+
+class TestSearch(TestCase):
+    def setUp(self):
+        self.config = StdmConfiguration.instance()
+        populate_basic_profile(self.config)
+        self.profile = self.config.profile(BASIC_PROFILE)
+        self.person = self.profile.entity(PERSON_ENTITY)
+
+    def tearDown(self):
+        self.config.remove_profile(BASIC_PROFILE)
+        self.config = None
+
+    def test_full_text_columns(self):
+        columns = full_text_columns(self.person)
+
+        self.assertIn('first_name', columns)
+        self.assertIn('last_name', columns)
+        self.assertNotIn('household_id', columns)
+
+        self.person.columns['last_name'].searchable = False
+        self.assertNotIn('last_name', full_text_columns(self.person))
+
+    def test_full_text_document_sql(self):
+        self.assertEqual(
+            full_text_document_sql(['first_name', 'last_name']),
+            "to_tsvector('simple'::regconfig, "
+            "coalesce(\"first_name\"::text, '') || ' ' || "
+            "coalesce(\"last_name\"::text, ''))"
+        )
+        self.assertEqual(
+            full_text_document_sql(['first_name'], 'person'),
+            "to_tsvector('simple'::regconfig, "
+            "coalesce(\"person\".\"first_name\"::text, ''))"
+        )
+
+    def test_like_pattern_escapes_wildcards(self):
+        self.assertEqual(_like_pattern('50%_off'), '%50\\%\\_off%')
+
+    def _display_text_criterion(self, name, value):
+        person_table = Table(
+            self.person.name, MetaData(),
+            Column('id', Integer, primary_key=True),
+            Column('first_name', String(30)),
+            Column('gender', Integer)
+        )
+        search = EntitySearch(
+            self.person, SimpleNamespace(__table__=person_table)
+        )
+
+        return search.display_text_criterion(name, value)
+
+    def test_display_text_criterion_matches_lookup_values(self):
+        lookup = self.person.columns['gender'].value_list.name
+        criterion = self._display_text_criterion('gender', 'Male')
+        sql = str(criterion.compile(
+            dialect=postgresql.dialect(),
+            compile_kwargs={'literal_binds': True}
+        ))
+
+        self.assertIn('gender IN (SELECT {0}.id'.format(lookup), sql)
+        self.assertIn(
+            'CAST({0}.value AS VARCHAR) ILIKE \'%%Male%%\''.format(lookup),
+            sql
+        )
+        self.assertIn('CAST({0}.code AS VARCHAR) ILIKE'.format(lookup), sql)
+
+    def test_display_text_criterion_text_column(self):
+        criterion = self._display_text_criterion('first_name', '5%')
+        compiled = criterion.compile(dialect=postgresql.dialect())
+
+        self.assertIn('first_name ILIKE', str(compiled))
+        self.assertEqual(list(compiled.params.values()), [_like_pattern('5%')])
+
+
+def suite():
+    suite = makeSuite(TestSearch, 'test')
+
+    return suite
@@ -209,6 +209,29 @@ def append_community_columns(community):
     community.add_column(name)
 
 
+def add_household_person_relation(profile, household, person):
+    rel = create_relation(profile)
+    rel.parent = household
+    rel.child = person
+    rel.child_column = 'household_id'
+    rel.parent_column = 'id'
+    profile.add_entity_relation(rel)
+
+    return rel
+
+
+def populate_basic_profile(config):
+    # Basic profile with persons linked to households. Unlike
+    # populate_configuration, no social tenure custom attributes are added.
+    profile = add_basic_profile(config)
+    household_entity = add_household_entity(profile)
+    person_entity = add_person_entity(profile)
+    append_person_columns(person_entity)
+    add_household_person_relation(profile, household_entity, person_entity)
+
+    return profile
+
+
 def populate_configuration(config):
     profile = add_basic_profile(config)
 
@@ -0,0 +1,76 @@
+from unittest import (
+    makeSuite,
+    TestCase
+)
+from unittest.mock import patch
+
+from stdm.data.configuration.stdm_configuration import StdmConfiguration
+from stdm import settings
+from stdm.settings import (
+    CurrentProfileCache,
+    current_profile,
+    save_current_profile
+)
+from stdm.settings.registryconfig import (
+    CURRENT_PROFILE,
+    RegistryConfig
+)
+from stdm.tests.data.utils import (
+    add_basic_profile,
+    BASIC_PROFILE
+)
+
+PROFILE_CALLS = 100
+
+
+class TestCurrentProfile(TestCase):
+    def setUp(self):
+        self.config = StdmConfiguration.instance()
+        self.profile = add_basic_profile(self.config)
+        self._prev_name = RegistryConfig().read(
+            [CURRENT_PROFILE]
+        ).get(CURRENT_PROFILE, '')
+        save_current_profile(BASIC_PROFILE)
+
+    def tearDown(self):
+        if self._prev_name:
+            save_current_profile(self._prev_name)
+        self.config.remove_profile(BASIC_PROFILE)
+        self.profile = None
+        self.config = None
+
+    def test_current_profile(self):
+        self.assertIs(current_profile(), self.profile)
+
+    def test_profile_changed_signal(self):
+        profiles = []
+        cache = CurrentProfileCache.instance()
+        cache.profile_changed.connect(profiles.append)
+
+        self.config.remove_profile(BASIC_PROFILE)
+        self.assertIsNone(current_profile())
+
+        self.profile = add_basic_profile(self.config)
+        cache.profile_changed.disconnect(profiles.append)
+
+        self.assertEqual(profiles, [None, self.profile])
+
+    def test_settings_read_once(self):
+        cache = CurrentProfileCache.instance()
+        cache.reset()
+
+        with patch.object(
+                settings,
+                'RegistryConfig',
+                wraps=RegistryConfig
+        ) as reg_config:
+            for _ in range(PROFILE_CALLS):
+                self.assertIs(current_profile(), self.profile)
+
+        self.assertEqual(reg_config.call_count, 1)
+
+
+def suite():
+    suite = makeSuite(TestCurrentProfile, 'test')
+
+    return suite
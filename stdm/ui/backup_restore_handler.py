@@ -1,8 +1,5 @@
 import os
-import winreg
 import json
-import subprocess
-from subprocess import Popen
 from time import sleep
 
 from qgis.PyQt.QtWidgets import (
@@ -31,7 +28,16 @@ from stdm.data.configuration.stdm_configuration import (
     StdmConfiguration
 )
 from stdm.data.config import DatabaseConfig
+from stdm.data.db_backup import (
+    create_database,
+    restore_database
+)
 from stdm.data.connection import DatabaseConnection
+from stdm.data.delta_backup import (
+    apply_delta,
+    delta_chain,
+    DeltaBackupException
+)
 from stdm.security.user import User
 from stdm.data.pg_utils import _execute
 
@@ -40,10 +46,6 @@ from stdm.settings.registryconfig import (
     COMPOSER_TEMPLATE
 )
 
-from stdm.utils.util import (
-    PLUGIN_DIR
-)
-
 
 backup_type = {True: 'COMPRESSED', False: 'FLAT_FILE'}
 
@@ -165,7 +167,7 @@ class BackupRestoreHandler(QObject):
 
     def _valid_backup_info(self, backup_info: dict) ->bool:
         if len(backup_info) == 0:
-            msg = f"Invalid backup info file"
+            msg = "Invalid backup info file"
             self._log_error(msg)
             return False
 
@@ -221,7 +223,7 @@ class BackupRestoreHandler(QObject):
             self._log_error(error)
             return msg, False
         else:
-            msg = f'Authentication... Successful.'
+            msg = 'Authentication... Successful.'
             self._log_info(msg)
 
         self.db_name = db_name
@@ -243,7 +245,7 @@ class BackupRestoreHandler(QObject):
         self._log_info('Creating database...')
         if not self._create_database(conn_params, username, password,
                                      db_name):
-            error = f'Failed to create database! Restore aborted.'
+            error = 'Failed to create database! Restore aborted.'
             msg = QApplication.translate(msg_title, error)
             self._log_error(error)
             return msg, False
@@ -257,14 +259,21 @@ class BackupRestoreHandler(QObject):
         self._log_info('Restoring database...')
         if not self._restore_database(conn_params, username, password,
                                      db_name, db_backup_filepath):
-            error = f"Failed to restore database!"
+            error = "Failed to restore database!"
             msg =QApplication.translate(msg_title, error)
             self._log_error(error)
             return msg, False
         else:
-            msg = f'Database restored successfully.'
+            msg = 'Database restored successfully.'
             self._log_info(msg)
 
+        # STEP 1b: Apply incremental backups
+        if not self._apply_deltas(conn_params, username, password, db_name):
+            error = "Failed to apply incremental backups! Restore aborted."
+            msg = QApplication.translate(msg_title, error)
+            self._log_error(error)
+            return msg, False
+
         # STEP 2a: Copy configuration.stc to the 'configurations' folder
         self._log_info('Copying configruation file...')
         restore_location = f'{QDir.homePath()}/.stdm/configurations/{self.db_name}'
@@ -281,15 +290,15 @@ class BackupRestoreHandler(QObject):
 
         if not QFile.exists(dest_config_filepath):
             if not QFile.copy(src_config_filepath, dest_config_filepath):
-                error = f'Failed to copy configuration file. Restore aborted.'
+                error = 'Failed to copy configuration file. Restore aborted.'
                 msg = QApplication.translate(msg_title, error) 
                 self._log_error(error)
                 return msg, False
             else:
-                msg = f'Configuration file copied successfully.'
+                msg = 'Configuration file copied successfully.'
                 self._log_info(msg)
         else:
-            msg = f'Configuration file already exists. Copy skipped.'
+            msg = 'Configuration file already exists. Copy skipped.'
             self._log_info(msg)
 
         # STEP 2b: Copy log file to configurations folder
@@ -305,7 +314,7 @@ class BackupRestoreHandler(QObject):
             msg = f'Log file: `{[dest_logfile_filepath]}`... Created successfully.'
             self._log_info(msg)
         else:
-            msg = f'Log file already exists. Copy skipped.'
+            msg = 'Log file already exists. Copy skipped.'
             self._log_info(msg)
 
         # STEP 3: Copy templates
@@ -321,15 +330,15 @@ class BackupRestoreHandler(QObject):
             QFile.copy(src_temp_filepath, dest_temp_filepath)
 
         if len(self.templates) > 0:
-            msg = f'Templates copied successfully.'
+            msg = 'Templates copied successfully.'
             self._log_info(msg)
         else:
-            msg = f'No templates found.'
+            msg = 'No templates found.'
             self._log_info(msg)
 
         self._log_info('Restore process... Done.')
 
-        msg = f'Restore process completed. Backup restored successfully.'
+        msg = 'Restore process completed. Backup restored successfully.'
         self._log_info(msg)
 
         return msg, True
@@ -369,107 +378,57 @@ class BackupRestoreHandler(QObject):
     def _restore_database(self, db_conn_params: DatabaseConnection, user: str,
                          password: str, db_name: str, backup_filepath: str) -> bool:
 
-        base_folder = self._get_pg_base_folder()
-        if base_folder == "":
-            return False
+        status, output = restore_database(db_conn_params, user, password,
+                                          db_name, backup_filepath)
+        if not status:
+            self._logger.log_error(output)
 
-        restore_util =f'{base_folder}\\bin\\pg_restore.exe'
-
-        script_filepath = f"{PLUGIN_DIR}/scripts/restoredb.bat"
-
-        script_path = f'{PLUGIN_DIR}/scripts/'
-
-        db_name = f"{db_name}"
-        host=f"{db_conn_params.Host}"
-        port = f"{db_conn_params.Port}"
-        user = f"{user}"
-        password = f"{password}"
-
-        startup_info = subprocess.STARTUPINFO()
-        startup_info.dwFlags |=subprocess.STARTF_USESHOWWINDOW
-        process = subprocess.Popen([script_filepath,
-                                    db_name,
-                                    host,
-                                    port,
-                                    user,
-                                    password,
-                                    restore_util,
-                                    backup_filepath,
-                                    script_path
-                                    ],
-                                    startupinfo=startup_info)
-
-        stdout, stderr = process.communicate()
-        process.wait()
-        result_code = process.returncode
+        return status
         
+    def _apply_deltas(self, db_conn_params: DatabaseConnection, user: str,
+                      password: str, db_name: str) -> bool:
+        """
+        Applies, in order, the incremental backups in the backup folder to
+        the restored database. Each delta is verified against its checksums
+        before it is applied.
+        """
+        try:
+            chain = delta_chain(self.backup_folder)
+        except DeltaBackupException as e:
+            self._log_error(str(e))
+            return False
+
+        if len(chain) == 0:
+            return True
+
+        db_con = DatabaseConnection(db_conn_params.Host, db_conn_params.Port, db_name)
+        db_con.User = User(user, password)
+
+        for manifest_path in chain:
+            self._log_info(f'Applying incremental backup: `{os.path.basename(manifest_path)}`...')
+            try:
+                apply_delta(db_con, manifest_path)
+            except Exception as e:
+                self._log_error(str(e))
+                return False
+
+        self._log_info(f'{len(chain)} incremental backup(s) applied.')
+
         return True
-        
+
     def _create_database(self, db_conn_params: DatabaseConnection, user: str,
                          password: str, db_name: str) ->bool:
 
         msg = f'Creating database: `{db_name}`...'
         self._log_info(msg)
 
-        base_pg_folder =  self._get_pg_base_folder()
-        if base_pg_folder == "":
-            return False
-        
-        createdb_util = f'{base_pg_folder}\\bin\createdb.exe'
-        createdb_script_filepath = f'{PLUGIN_DIR}/scripts/createdb.bat'
-
-        script_path = f'{PLUGIN_DIR}/scripts/'
-        db_name = f"{db_name}"
-        host = f"{db_conn_params.Host}"
-        port =  f"{db_conn_params.Port}"
-        user = f"{user}"
-        password = f"{password}"
-
-        startup_info = subprocess.STARTUPINFO()
-        startup_info.dwFlags |=subprocess.STARTF_USESHOWWINDOW
-        process = subprocess.Popen([createdb_script_filepath,
-                                    db_name,
-                                    host,
-                                    port,
-                                    user,
-                                    password,
-                                    createdb_util,
-                                    script_path
-                                    ],
-                                    startupinfo=startup_info)
-
-        stdout, stderr = process.communicate()
-        process.wait()
-        result_code = process.returncode
+        status, output = create_database(db_conn_params, user, password, db_name)
+        if not status:
+            self._logger.log_error(output)
 
-        return True
+        return status
 
     def _show_progress(self, msg: str):
         self.update_status.emit(msg, self._restore_steps)
         self._restore_steps = self._restore_steps + 1
         QApplication.processEvents()
-
-    def _get_pg_base_folder(self) ->str:
-            """
-            PostgrSQL base folder
-            """
-            reg_key = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, "SOFTWARE\\PostgreSQL\\Installations\\")
-            pg_base_value = ""
-            for i in range(winreg.QueryInfoKey(reg_key)[0]):
-                try:
-                    subkey_name = winreg.EnumKey(reg_key, i)
-                    subkey = winreg.OpenKey(reg_key, subkey_name)
-
-                    for j in range(winreg.QueryInfoKey(subkey)[1]):
-                        name, value,_ = winreg.EnumValue(subkey, j)
-                        if name == "Base Directory":
-                            pg_base_value = value
-                            break
-                    if not pg_base_value == "":
-                        break
-                    winreg.CloseKey(subkey)
-                except OSError:
-                    pass
-            winreg.CloseKey(reg_key)
-
-            return pg_base_value
\ No newline at end of file
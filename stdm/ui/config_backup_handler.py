@@ -20,12 +20,10 @@ email                : stdm@unhabitat.org
 """
 import os
 import errno
+import glob
 import shutil
-import winreg
 import json
-import subprocess
-from subprocess import Popen
-from zipfile import ZipFile
+import time
 
 from qgis.PyQt.QtCore import (
     QObject,
@@ -36,13 +34,23 @@ from qgis.PyQt.QtCore import (
     QFile
 )
 
-from stdm.utils.logging_handlers import (
-    EventLogger
-)
-
 from stdm.data.config import DatabaseConfig
+from stdm.data.db_backup import (
+    BACKUP_JOBS,
+    dump_database,
+    table_sizes,
+    write_archive
+)
 from stdm.data.configuration.stdm_configuration import StdmConfiguration
 from stdm.data.connection import DatabaseConnection
+from stdm.data.delta_backup import (
+    database_snapshot,
+    delta_chain,
+    DeltaBackupException,
+    profile_backup_tables,
+    read_manifest,
+    write_delta
+)
 from stdm.security.user import User
 from stdm.data.configuration.entity import Entity
 from stdm.data.configuration.profile import Profile
@@ -55,7 +63,6 @@ from stdm.utils.logging_handlers import (
 )
 
 from stdm.utils.util import (
-    PLUGIN_DIR,
     documentTemplates,
     user_non_profile_views
 )
@@ -72,6 +79,7 @@ class ConfigBackupHandler(QObject):
         self._log_mode = log_mode
         self._backup_step = 1
         self._stdm_config = StdmConfiguration.instance()
+        self._snapshot = None
 
         self._logger = self._make_logger()
 
@@ -134,8 +142,14 @@ class ConfigBackupHandler(QObject):
 
 
     def do_configuration_backup(self, user: str, password: str, 
-                             backup_folder: str, backup_mode:str) -> tuple[bool, str]:
-        
+                             backup_folder: str, backup_mode:str,
+                             profile_name: str=None) -> tuple[bool, str]:
+        """
+        Backs up the database, configuration file and templates. If
+        profile_name is specified, only the tables of the profile are
+        included in the database backup.
+        """
+
         # Validate user authentication
         reg_config = RegistryConfig()
         settings = reg_config.read(['Host', 'Database', 'Port'])
@@ -150,7 +164,7 @@ class ConfigBackupHandler(QObject):
         valid, msg = db_con.validateConnection()
 
         if not valid:
-            error = f'DB authenticaion Failed!'
+            error = 'DB authenticaion Failed!'
             self._log_error(error)
             return False, error
 
@@ -176,8 +190,14 @@ class ConfigBackupHandler(QObject):
         self._log_info(backup_name)
         self._log_info(backup_path)
 
-        status, msg = self._backup_database(db_con, PG_ADMIN, password, db_backup_filepath,
-                                            backup_folder)
+        tables = None
+        if profile_name is not None:
+            profile = self._stdm_config.profile(profile_name)
+            tables = [f'public.{profile.prefix}_*']
+            self._log_info(f'Backup scoped to `{profile_name}` profile tables.')
+
+        status, msg, table_stats = self._backup_database(db_con, PG_ADMIN, password,
+                                                         db_backup_filepath, tables)
         if not status:
             backup_msg = f'Failed to to backup database: {msg}'
             self._log_error(backup_msg)
@@ -242,7 +262,8 @@ class ConfigBackupHandler(QObject):
             backup_is_compressed = True
 
         backup_log = self._make_log(profiles, db_con.Database,
-                                     db_backup_filename, log_dtime, backup_is_compressed)
+                                     db_backup_filename, log_dtime, backup_is_compressed,
+                                     table_stats)
 
         log_file_msg = f'Creating backup log file: `{log_filepath}'
         self._log_info(log_file_msg)
@@ -267,6 +288,76 @@ class ConfigBackupHandler(QObject):
         self._log_info('Backup process completed successfully.')
         return True, ''
 
+    def do_incremental_backup(self, user: str, password: str,
+                              backup_folder: str, profile_name: str) -> tuple[bool, str]:
+        """
+        Exports the rows of the profile tables that have changed since the
+        full backup, or the latest delta, in the backup folder. The delta
+        is written alongside the full backup, which must not be compressed.
+        """
+        reg_config = RegistryConfig()
+        settings = reg_config.read(['Host', 'Database', 'Port'])
+        db_config =  DatabaseConfig(settings)
+        db_params = db_config.read()
+
+        db_con = DatabaseConnection(db_params.Host, db_params.Port, db_params.Database)
+        db_con.User = User(user, password)
+
+        self._log_info("Verifying DB connection...")
+
+        valid, msg = db_con.validateConnection()
+        if not valid:
+            error = 'DB authenticaion Failed!'
+            self._log_error(error)
+            return False, error
+
+        base_logs = sorted(glob.glob(f'{backup_folder}/backuplog_*.json'),
+                           key=os.path.getmtime)
+        if len(base_logs) == 0:
+            error = 'No full backup found in the backup folder.'
+            self._log_error(error)
+            return False, error
+
+        with open(base_logs[-1], 'r') as lf:
+            base_log = json.load(lf)
+
+        snapshot = base_log['configuration']['database'].get('snapshot', None)
+        if snapshot is None:
+            error = 'The full backup does not support incremental backups.'
+            self._log_error(error)
+            return False, error
+
+        try:
+            chain = delta_chain(backup_folder)
+        except DeltaBackupException as e:
+            self._log_error(str(e))
+            return False, str(e)
+
+        parent = None
+        if len(chain) > 0:
+            parent = os.path.basename(chain[-1])
+            manifest = read_manifest(chain[-1])
+            snapshot = (manifest['snapshot_xid'], manifest['snapshot_epoch'])
+
+        profile = self._stdm_config.profile(profile_name)
+        tables = profile_backup_tables(profile)
+
+        self._log_info(f'Exporting changes in {len(tables)} `{profile_name}` tables...')
+
+        try:
+            manifest_path = write_delta(db_con, tables, backup_folder, snapshot, parent)
+        except (OSError, DeltaBackupException) as e:
+            error = f'Failed to create incremental backup: {e}'
+            self._log_error(error)
+            return False, error
+
+        for table, info in read_manifest(manifest_path)['tables'].items():
+            self._log_info(f'Table `{table}`: {info["changed_rows"]} changed rows.')
+
+        self._log_info(f'Incremental backup: `{manifest_path}`... Done.')
+
+        return True, ''
+
     def _profile_entities(self, profile: Profile) ->list[Entity]:
         entities = []
         for entity in profile.entities.values():
@@ -303,54 +394,45 @@ class ConfigBackupHandler(QObject):
     
 
     def _backup_database(self, db_con: DatabaseConnection, user: str, password: str,
-                         backup_filepath: str, backup_folder:str) ->tuple[bool, str]:
-
-        base_folder = self._get_pg_base_folder()
-        if base_folder == "":
-            pg_folder = f'PostgreSQL folder: {base_folder} ... NOT found.'
-            self._log_error(pg_folder)
-            return False, pg_folder
-
-        pg_folder = f'PostgreSQL folder: {base_folder} ... Found.'
-        self._log_info(pg_folder)
-
-        dump_tool = "\\bin\\pg_dump.exe"
-        backup_util = f"{base_folder}{dump_tool}"
-
-        if not os.path.exists(backup_util):
-            util_msg = f'Backup utility: `{backup_util}` ... NOT found.'
-            self._log_error(util_msg)
-            return False, util_msg
-
-        util_msg = f'Backup utility: `{backup_util}` ... Found.'
-        self._log_info(util_msg)
-
-        script_file = "/scripts/dbbackup.bat"
-        script_filepath = f"{PLUGIN_DIR}{script_file}"
-
-        if not os.path.exists(script_filepath):
-            script_msg = f'Backup script: `{script_filepath}` ... NOT found. '
-            self._log_error(script_msg)
-            return False, script_msg
+                         backup_filepath: str, tables: list=None) ->tuple[bool, str, list]:
+        """
+        Dumps the database into a directory using parallel pg_dump jobs and
+        returns the size and dump duration of each table.
+        """
+        self._log_info(f'Dumping database using {BACKUP_JOBS} parallel jobs...')
 
-        script_msg = f'Backup script: `{script_filepath}` ... Found.'
-        self._log_info(script_msg)
+        try:
+            sizes = table_sizes()
+        except Exception as e:
+            self._logger.log_error(f'Failed to read table sizes: {e}')
+            sizes = {}
 
-        self._log_info('Launching backup script in a subprocess.')
+        # Changes made after this snapshot are included in the next delta
+        try:
+            self._snapshot = database_snapshot(db_con)
+        except Exception as e:
+            self._logger.log_error(f'Failed to read transaction snapshot: {e}')
+            self._snapshot = None
+
+        start = time.monotonic()
+        status, msg, durations = dump_database(
+            db_con, user, password, backup_filepath, tables=tables,
+            progress_callback=lambda table: self._log_info(f'Table `{table}`... Done.')
+        )
+        if not status:
+            return False, msg, []
 
-        startup_info = subprocess.STARTUPINFO()
-        startup_info.dwFlags |=subprocess.STARTF_USESHOWWINDOW
-        process = subprocess.Popen([script_filepath, db_con.Database, 
-            db_con.Host, str(db_con.Port), user, password, backup_folder, backup_util,
-            backup_filepath], startupinfo=startup_info)
+        self._log_info(f'Database dumped in {time.monotonic() - start:.1f} seconds.')
 
-        stdout, stderr = process.communicate()
-        process.wait()
+        table_stats = []
+        for table in sorted(set(sizes) | set(durations)):
+            table_stats.append({
+                'name': table,
+                'size': sizes.get(table, None),
+                'seconds': round(durations[table], 2) if table in durations else None
+            })
 
-        if process.returncode == 0:
-            return True, ''
-        else:
-            return False, stderr
+        return True, '', table_stats
 
     def _backed_template_files(self, template_file_names: list, backup_folder: str) -> list[str]:
         temp_files = []
@@ -372,30 +454,31 @@ class ConfigBackupHandler(QObject):
         self._log_info(zip_msg)
         
         try:
-            self._write_zip_file(files, zip_filepath)
-        except BadZipfile:
+            write_archive(files, zip_filepath, backup_folder)
+        except OSError as e:
+            self._logger.log_error(str(e))
             return False
 
         return True
 
-    def _write_zip_file(self, file_list: list, zip_file: str):
-        with ZipFile(zip_file, 'w') as zf:
-            for file in file_list:
-                basename = os.path.basename(file)
-                zf.write(file, arcname=basename)
-
     def _remove_compressed_files(self, files: list[str]):
         for file in files:
-            if os.path.isfile(file):
+            if os.path.isdir(file):
+                shutil.rmtree(file)
+            elif os.path.isfile(file):
                 os.remove(file)
 
     def _make_log(self, profiles: list, db_name: str, db_backup_filename: str,
-            log_dtime: str, is_compressed: bool) -> dict:
+            log_dtime: str, is_compressed: bool, table_stats: list=None) -> dict:
 
         backup_log = {'configuration':{'filename':'configuration.stc',
                                        'profiles':profiles,
                'database':{'name':db_name,
-                           'backup_file':db_backup_filename},
+                           'backup_file':db_backup_filename,
+                           'format':'directory',
+                           'jobs':BACKUP_JOBS,
+                           'tables':table_stats or [],
+                           'snapshot':self._snapshot},
                'created_on':log_dtime,
                'compressed':is_compressed
               }}
@@ -417,29 +500,3 @@ class ConfigBackupHandler(QObject):
         self.update_status.emit(msg, self._backup_step)
         QCoreApplication.processEvents()
         self._backup_step = self._backup_step + 1
-
-    def _get_pg_base_folder(self) ->str:
-            """
-            PostgrSQL base folder
-            """
-            reg_key = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, "SOFTWARE\\PostgreSQL\\Installations\\")
-            pg_base_value = ""
-            for i in range(winreg.QueryInfoKey(reg_key)[0]):
-                try:
-                    subkey_name = winreg.EnumKey(reg_key, i)
-                    subkey = winreg.OpenKey(reg_key, subkey_name)
-
-                    for j in range(winreg.QueryInfoKey(subkey)[1]):
-                        name, value,_ = winreg.EnumValue(subkey, j)
-                        if name == "Base Directory":
-                            pg_base_value = value
-                            break
-                    if not pg_base_value == "":
-                        break
-                    winreg.CloseKey(subkey)
-                except OSError:
-                    pass
-            winreg.CloseKey(reg_key)
-
-            return pg_base_value
-
@@ -63,6 +63,9 @@ WIDGET, BASE = uic.loadUiType(
 
 PG_ADMIN = 'postgres'
 
+# Backup types
+FULL_BACKUP, INCREMENTAL_BACKUP = 'FULL', 'INCREMENTAL'
+
 class DBProfileBackupDialog(WIDGET, BASE):
     total_backup_steps = 6
     def __init__(self, iface):
@@ -98,6 +101,13 @@ class DBProfileBackupDialog(WIDGET, BASE):
 
         self.twProfiles.setColumnCount(1)
         self.build_profiles_tree()
+        self.load_profiles()
+
+        self.cboBackupType.addItem(self.tr('Full'), FULL_BACKUP)
+        self.cboBackupType.addItem(self.tr('Incremental'), INCREMENTAL_BACKUP)
+        self.cboBackupType.currentIndexChanged.connect(
+            self.backup_type_changed
+        )
 
     def build_profiles_tree(self):
         for profile in self.backup_handler.profiles():
@@ -126,6 +136,24 @@ class DBProfileBackupDialog(WIDGET, BASE):
 
             self.twProfiles.insertTopLevelItem(0, profile_item)
 
+    def load_profiles(self):
+        # The database backup can be limited to the tables of one profile
+        self.cboProfile.addItem(self.tr('All profiles'), None)
+        for profile in self.backup_handler.profiles():
+            self.cboProfile.addItem(profile.name, profile.name)
+
+    def _is_incremental(self) ->bool:
+        return self.cboBackupType.currentData() == INCREMENTAL_BACKUP
+
+    def backup_type_changed(self, index: int):
+        # Incremental backups are written to the folder of an uncompressed
+        # full backup of the selected profile.
+        incremental = self._is_incremental()
+        if incremental:
+            self.cbCompress.setChecked(False)
+        self.cbCompress.setEnabled(not incremental)
+        self.edtBackupFolder.clear()
+
     def _profile_entities(self, profile: Profile) ->list[Entity]:
         entities = []
         for entity in profile.entities.values():
@@ -155,15 +183,20 @@ class DBProfileBackupDialog(WIDGET, BASE):
         return template_items
 
     def backup_folder_clicked(self):
-        self._set_selected_directory(self.edtBackupFolder, 
-                self.tr('Configuration file and DB backup folder')
-            )
+        if self._is_incremental():
+            title = self.tr('Full backup folder')
+        else:
+            title = self.tr('Configuration file and DB backup folder')
+        self._set_selected_directory(self.edtBackupFolder, title)
 
     def _set_selected_directory(self, txt_box: QLineEdit, title: str):
         def_path = txt_box.text()
         sel_doc_path = QFileDialog.getExistingDirectory(self, title, def_path)
         if sel_doc_path:
-            normalized_path = f"{QDir.fromNativeSeparators(sel_doc_path)}/{self.db_conn.Database}_{self._dtime_str()}"
+            if self._is_incremental():
+                normalized_path = QDir.fromNativeSeparators(sel_doc_path)
+            else:
+                normalized_path = f"{QDir.fromNativeSeparators(sel_doc_path)}/{self.db_conn.Database}_{self._dtime_str()}"
             txt_box.clear()
             txt_box.setText(normalized_path)
 
@@ -178,17 +211,32 @@ class DBProfileBackupDialog(WIDGET, BASE):
             self.show_message(msg, QMessageBox.Critical)
             return False
 
+        profile_name = self.cboProfile.currentData()
+        if self._is_incremental() and profile_name is None:
+            msg = self.tr('Please select the profile whose tables are to be '
+                          'included in the incremental backup')
+            self.show_message(msg, QMessageBox.Critical)
+            return False
+
         backup_mode = 'FLAT-FILE'
         if self.cbCompress.isChecked():
             backup_mode = 'ZIP-FILE'
 
         self.btnBackup.setEnabled(False)
 
-        backup_result, msg = self.backup_handler.do_configuration_backup(
-            PG_ADMIN,
-            self.edtAdminPassword.text(),
-            self.edtBackupFolder.text(),
-            backup_mode)
+        if self._is_incremental():
+            backup_result, msg = self.backup_handler.do_incremental_backup(
+                PG_ADMIN,
+                self.edtAdminPassword.text(),
+                self.edtBackupFolder.text(),
+                profile_name)
+        else:
+            backup_result, msg = self.backup_handler.do_configuration_backup(
+                PG_ADMIN,
+                self.edtAdminPassword.text(),
+                self.edtBackupFolder.text(),
+                backup_mode,
+                profile_name)
 
         self.btnBackup.setEnabled(True)
 
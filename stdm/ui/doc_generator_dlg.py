@@ -663,80 +663,94 @@ class DocumentGeneratorDialog(WIDGET, BASE):
             # Apply cell formatters for naming output files
             self._doc_generator.set_attr_value_formatters(config.formatters())
 
-        entity_field_name = "id"
-
-        # Iterate through the selected records
-        progressDlg = QProgressDialog(self)
-        progressDlg.setMaximum(len(records))
-
-
-        try:
-            QApplication.setOverrideCursor(QCursor(Qt.WaitCursor))
-
-            for i, record in enumerate(records):
-                progressDlg.setValue(i)
-
-                if progressDlg.wasCanceled():
-                    success_status = False
-                    break
-                # User-defined location
-                if self.chkUseOutputFolder.checkState() == Qt.Unchecked:
-
-                    status, msg = self._doc_generator.run(self._docTemplatePath, entity_field_name,
-                                                        record.id, outputMode,
-                                                        data_source=self.ds_entity.name,
-                                                        filePath=self._outputFilePath)
-                    self._doc_generator.clear_temporary_layers()
+        # Records of the template data source are iterated by the generator
+        if self.chk_template_datasource.isChecked():
+            record_ids = None
+        else:
+            record_ids = [record.id for record in records]
 
+        # Offer to skip the records processed by a run that did not complete
+        if self.chkUseOutputFolder.checkState() == Qt.Unchecked:
+            completed = self._doc_generator.completed_batch_documents(self._docTemplatePath, outputMode,
+                                                                      filePath=self._outputFilePath)
+        else:
+            completed = self._doc_generator.completed_batch_documents(self._docTemplatePath, outputMode,
+                                                                      dataFields=documentNamingAttrs)
+
+        resume = False
+        if completed > 0:
+            result = QMessageBox.question(self,
+                                          QApplication.translate("DocumentGeneratorDialog",
+                                                                 "Resume Document Generation"),
+                                          QApplication.translate("DocumentGeneratorDialog",
+                                                                 "A previous run with the same template and output "
+                                                                 "options did not complete after generating the "
+                                                                 "documents of {0} records.\nDo you want to skip "
+                                                                 "these records?").format(completed),
+                                          QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel)
+            if result == QMessageBox.Cancel:
+                return
 
-                # Output folder location using custom naming
-                else:
+            resume = result == QMessageBox.Yes
 
-                    status, msg = self._doc_generator.run(self._docTemplatePath, entity_field_name,
-                                                          record.id, outputMode,
-                                                          dataFields=documentNamingAttrs,
-                                                          fileExtension=fileExtension,
-                                                          data_source=self.ds_entity.name)
-                    self._doc_generator.clear_temporary_layers()
+        progressDlg = QProgressDialog(self)
+        progressDlg.setMaximum(len(records))
 
-                if not status:
-                    result = QMessageBox.warning(self,
-                                                 QApplication.translate("DocumentGeneratorDialog",
-                                                                        "Document Generate Error"),
-                                                 msg, QMessageBox.Ignore | QMessageBox.Abort)
+        def on_progress(processed, total, status, msg):
+            # Returns False to stop document generation
+            progressDlg.setMaximum(total)
+            progressDlg.setValue(processed)
+            QApplication.processEvents()
 
-                    if result == QMessageBox.Abort:
-                        progressDlg.close()
-                        progressDlg.deleteLater()
-                        del progressDlg
-                        success_status = False
+            if not status:
+                QApplication.restoreOverrideCursor()
+                result = QMessageBox.warning(self,
+                                             QApplication.translate("DocumentGeneratorDialog",
+                                                                    "Document Generate Error"),
+                                             msg, QMessageBox.Ignore | QMessageBox.Abort)
+                QApplication.setOverrideCursor(QCursor(Qt.WaitCursor))
 
-                        # Restore cursor
-                        QApplication.restoreOverrideCursor()
+                if result == QMessageBox.Abort:
+                    return False
 
-                    # If its the last record and user has selected to ignore
-                    if i + 1 == len(records):
-                        progressDlg.close()
-                        progressDlg.deleteLater()
-                        del progressDlg
-                        success_status = False
+            return not progressDlg.wasCanceled()
 
-                        # Restore cursor
-                        QApplication.restoreOverrideCursor()
+        try:
+            QApplication.setOverrideCursor(QCursor(Qt.WaitCursor))
 
-                        return
+            # User-defined location
+            if self.chkUseOutputFolder.checkState() == Qt.Unchecked:
+                success_status, msg = self._doc_generator.run_batch(self._docTemplatePath, record_ids,
+                                                                    outputMode,
+                                                                    data_source=self.ds_entity.name,
+                                                                    filePath=self._outputFilePath,
+                                                                    progress_callback=on_progress,
+                                                                    resume=resume)
 
-                else:
-                    progressDlg.setValue(len(records))
+            # Output folder location using custom naming
+            else:
+                success_status, msg = self._doc_generator.run_batch(self._docTemplatePath, record_ids,
+                                                                    outputMode,
+                                                                    dataFields=documentNamingAttrs,
+                                                                    fileExtension=fileExtension,
+                                                                    data_source=self.ds_entity.name,
+                                                                    progress_callback=on_progress,
+                                                                    resume=resume)
 
             QApplication.restoreOverrideCursor()
 
-            QMessageBox.information(self,
-                                    QApplication.translate("DocumentGeneratorDialog",
-                                                           "Document Generation Complete"),
+            if success_status:
+                QMessageBox.information(self,
+                                        QApplication.translate("DocumentGeneratorDialog",
+                                                               "Document Generation Complete"),
+                                        QApplication.translate("DocumentGeneratorDialog",
+                                                               "Document generation has successfully completed.")
+                                        )
+            else:
+                QMessageBox.warning(self,
                                     QApplication.translate("DocumentGeneratorDialog",
-                                                           "Document generation has successfully completed.")
-                                    )
+                                                           "Document Generate Error"),
+                                    msg)
 
         except SQLAlchemyError as sqlerr:
             LOGGER.debug(str(sqlerr))
@@ -770,7 +784,6 @@ class DocumentGeneratorDialog(WIDGET, BASE):
             success_status = False
 
         progressDlg.deleteLater()
-        del progressDlg
 
         # Reset UI
         QApplication.restoreOverrideCursor()
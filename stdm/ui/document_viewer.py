@@ -31,7 +31,6 @@ from qgis.PyQt.QtCore import (
     QSize
 )
 from qgis.PyQt.QtGui import (
-    QImage,
     QPixmap,
     QPalette,
     QPainter,
@@ -58,6 +57,13 @@ from qgis.PyQt.QtWidgets import (
 )
 
 from stdm.exceptions import DummyException
+from stdm.network.preview_cache import (
+    THUMBNAIL_SIZE,
+    VIEWER_PREVIEW_SIZE,
+    image_size,
+    is_image_document,
+    preview_cache
+)
 from stdm.settings import current_profile
 from stdm.ui.gui_utils import GuiUtils
 from stdm.utils.util import (
@@ -72,7 +78,7 @@ class PhotoViewer(QScrollArea):
     Widget for viewing images by incorporating basic navigation options.
     """
 
-    def __init__(self, parent=None, photo_path=""):
+    def __init__(self, parent=None, photo_path="", cache=None):
         QScrollArea.__init__(self, parent)
         self.setBackgroundRole(QPalette.Dark)
 
@@ -86,7 +92,10 @@ class PhotoViewer(QScrollArea):
         self.setWidget(self._lbl_photo)
 
         self._photo_path = photo_path
-        self._ph_image = None
+        self._image_size = QSize()
+        self._full_image_loaded = False
+        self._preview_cache = cache
+        self._awaiting_preview = False
         self._scale_factor = 1.0
         self._aspect_ratio = -1
 
@@ -142,7 +151,8 @@ class PhotoViewer(QScrollArea):
         self.scale_photo(0.8)
 
     def normal_size(self):
-        self._lbl_photo.adjustSize()
+        self._load_full_image()
+        self._lbl_photo.resize(self._image_size)
         self._scale_factor = 1.0
 
     def fit_to_window(self):
@@ -158,6 +168,7 @@ class PhotoViewer(QScrollArea):
         print_dialog = QPrintDialog(self._printer, self)
 
         if print_dialog.exec_() == QDialog.Accepted:
+            self._load_full_image()
             painter = QPainter(self._printer)
             rect = painter.viewport()
             size = self._lbl_photo.pixmap().size()
@@ -211,7 +222,12 @@ class PhotoViewer(QScrollArea):
         """
         if not self._lbl_photo.pixmap().isNull():
             self._scale_factor *= factor
-            self._lbl_photo.resize(self._scale_factor * self._lbl_photo.pixmap().size())
+            # Previews are replaced by the full image once zoomed beyond
+            # their resolution
+            if self._scale_factor * self._image_size.width() > \
+                    self._lbl_photo.pixmap().width():
+                self._load_full_image()
+            self._lbl_photo.resize(self._scale_factor * self._image_size)
 
             self._adjust_scroll_bar(self.horizontalScrollBar(), factor)
             self._adjust_scroll_bar(self.verticalScrollBar(), factor)
@@ -224,30 +240,101 @@ class PhotoViewer(QScrollArea):
                                 + ((factor - 1) * scroll_bar.pageStep() / 2)))
 
     def load_document(self, photo_path):
+        """
+        Shows the cached preview of the photo, or its thumbnail until the
+        preview has been generated. The full image is only decoded when
+        zooming in beyond the preview resolution, or when printing.
+        :param photo_path: Path of the photo.
+        :type photo_path: str
+        :return: Size of the full image, False if it cannot be read.
+        :rtype: QSize
+        """
         if photo_path:
-            self._ph_image = QImage(photo_path)
+            full_size = image_size(photo_path)
 
-            if self._ph_image.isNull():
+            if full_size.isEmpty():
                 return False
 
             self._photo_path = photo_path
-
-            ph_pixmap = QPixmap.fromImage(self._ph_image)
-
-            self._lbl_photo.setPixmap(ph_pixmap)
+            self._image_size = full_size
+            self._full_image_loaded = False
+
+            ph_pixmap = self._cached_pixmap(photo_path)
+            if ph_pixmap is None:
+                self._load_full_image()
+            else:
+                self._lbl_photo.setPixmap(ph_pixmap)
             self._scale_factor = 1.0
 
-            self._aspect_ratio = ph_pixmap.width() / ph_pixmap.height()
+            self._aspect_ratio = full_size.width() / full_size.height()
 
             self._fit_to_window_act.setEnabled(True)
             self._print_act.setEnabled(True)
             self._fit_to_window_act.trigger()
 
             self.update_actions()
-            return ph_pixmap
+            return QSize(full_size)
 
         return True
 
+    def _cached_pixmap(self, photo_path):
+        """
+        :return: The viewer preview of the photo or, while the preview is
+        being generated, its thumbnail. None if neither is available.
+        :rtype: QPixmap
+        """
+        if self._preview_cache is None or not is_image_document(photo_path):
+            return None
+
+        preview = self._preview_cache.cached_preview(
+            photo_path, VIEWER_PREVIEW_SIZE
+        )
+        if preview is not None:
+            return QPixmap(preview)
+
+        if not self._awaiting_preview:
+            self._preview_cache.previewReady.connect(self._on_preview_ready)
+            self._awaiting_preview = True
+        self._preview_cache.request(photo_path)
+
+        thumbnail = self._preview_cache.cached_preview(
+            photo_path, THUMBNAIL_SIZE
+        )
+        if thumbnail is not None:
+            return QPixmap(thumbnail)
+
+        # Placeholder, stretched to the image size, until the preview is
+        # ready
+        placeholder = QPixmap(1, 1)
+        placeholder.fill(self.palette().color(QPalette.Dark))
+
+        return placeholder
+
+    def _on_preview_ready(self, photo_path, preview_size, preview_path):
+        """
+        Slot raised when a preview has been generated, replaces the
+        thumbnail or placeholder unless the full image has been loaded.
+        """
+        if preview_size != VIEWER_PREVIEW_SIZE or self._full_image_loaded:
+            return
+
+        if photo_path == os.path.normpath(self._photo_path):
+            self._lbl_photo.setPixmap(QPixmap(preview_path))
+
+    def _load_full_image(self):
+        """
+        Decodes the photo at its full resolution, if not already loaded.
+        """
+        if self._full_image_loaded or not self._photo_path:
+            return
+
+        ph_pixmap = QPixmap(self._photo_path)
+        if ph_pixmap.isNull():
+            return
+
+        self._lbl_photo.setPixmap(ph_pixmap)
+        self._full_image_loaded = True
+
     def photo_location(self):
         """
         :returns: Absolute path of the photo in the central document repository.
@@ -664,7 +751,10 @@ class DocumentViewManager(QMainWindow):
 
         # TODO: Incorporate logic for determining
         # TODO: viewer based on document type
-        ph_viewer = PhotoViewer()
+        cache = None
+        if document_widget.fileManager is not None:
+            cache = preview_cache(document_widget.fileManager.networkPath)
+        ph_viewer = PhotoViewer(cache=cache)
 
         # v_layout = QVBoxLayout()
         # v_layout.addWidget(ph_viewer)
@@ -19,6 +19,7 @@ email                : stdm@unhabitat.org
  ***************************************************************************/
 """
 import cProfile
+import logging
 from collections import OrderedDict
 
 from qgis.PyQt import uic
@@ -29,7 +30,8 @@ from qgis.PyQt.QtCore import (
     QSize,
     QModelIndex,
     QItemSelectionModel,
-    QRegExp
+    QRegExp,
+    QTimer
 )
 from qgis.PyQt.QtWidgets import (
     QApplication,
@@ -52,6 +54,7 @@ from qgis.gui import QgsGui
 from qgis.utils import (
     iface
 )
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.sql.expression import text
 
 from stdm.data.configuration import entity_model
@@ -68,12 +71,17 @@ from stdm.data.pg_utils import (
 )
 from stdm.data.qtmodels import (
     BaseSTDMTableModel,
+    EntityPagedTableModel,
+    PagedSortFilterProxyModel,
     VerticalHeaderSortFilterProxyModel
 )
+from stdm.data.search import EntitySearch
 from stdm.exceptions import DummyException
 from stdm.navigation.content_group import TableContentGroup
 from stdm.network.filemanager import NetworkFileManager
 from stdm.settings import (
+    get_entity_browser_page_size,
+    get_entity_browser_page_window,
     get_entity_browser_record_limit,
     get_entity_sort_details,
     current_profile
@@ -107,6 +115,12 @@ from stdm.utils.util import (
 
 __all__ = ["EntityBrowser", "EntityBrowserWithEditor", "ContentGroupEntityBrowser"]
 
+LOGGER = logging.getLogger('stdm')
+
+# Delay, in milliseconds, after the last key stroke before the filter text
+# is applied to records fetched from the database
+FILTER_DELAY = 400
+
 
 class _EntityDocumentViewerHandler(object):
     """
@@ -278,6 +292,11 @@ class EntityBrowser(SupportsManageMixin, WIDGET, BASE):
         self._select_item = None
         self.current_records = 0
 
+        self._filter_timer = QTimer(self)
+        self._filter_timer.setInterval(FILTER_DELAY)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.timeout.connect(self.apply_filter_text)
+
         self.parent_record_id = ent_rec_id
         self.record_limit = self.get_records_limit()  # get_entity_browser_record_limit()
         self.sort_order = self.get_sorting_value()
@@ -545,8 +564,14 @@ class EntityBrowser(SupportsManageMixin, WIDGET, BASE):
         if not self._proxyModel:
             return
 
-        total_records = self._proxyModel.sourceModel().rowCount()
-        visible_records = self._proxyModel.rowCount()
+        source_model = self._proxyModel.sourceModel()
+        if isinstance(source_model, EntityPagedTableModel):
+            # Records are fetched on demand so use the count in the database
+            total_records = source_model.total_count()
+            visible_records = total_records
+        else:
+            total_records = source_model.rowCount()
+            visible_records = self._proxyModel.rowCount()
 
         rowStr = QApplication.translate('EntityBrowser', 'row') \
             if total_records == 1 \
@@ -669,7 +694,27 @@ class EntityBrowser(SupportsManageMixin, WIDGET, BASE):
         """
         Filters the view using the specified search parameters
         """
-        self._proxyModel.set_filter_params(search_parameters)
+        if isinstance(self._tableModel, EntityPagedTableModel) or \
+                not search_parameters:
+            self._proxyModel.set_filter_params(search_parameters)
+        else:
+            # Search the loaded records in the database instead of
+            # comparing the values of each row
+            record_ids = [
+                self._tableModel.data(
+                    self._tableModel.index(row, 0),
+                    BaseSTDMTableModel.ROLE_ROW_ID
+                )
+                for row in range(self._tableModel.rowCount())
+            ]
+            search = EntitySearch(self._entity, self._dbmodel)
+            try:
+                ids = search.all_ids(search_parameters, record_ids=record_ids)
+            except SQLAlchemyError as err:
+                LOGGER.debug('Advanced search failed: %s', err)
+                ids = None
+            self._proxyModel.set_filter_params(search_parameters, ids)
+
         self._search_act.setChecked(bool(search_parameters))
         self.update_visible_row_count()
         self._clear_search_action.setEnabled(bool(search_parameters))
@@ -713,7 +758,10 @@ class EntityBrowser(SupportsManageMixin, WIDGET, BASE):
                 self._doc_viewer.load(docs)
     
     def on_csv_export(self):
-        data = self._tableModel._initData
+        if isinstance(self._tableModel, EntityPagedTableModel):
+            data = self._tableModel.all_rows()
+        else:
+            data = self._tableModel._initData
         headers = self._tableModel._headerdata if len(data) > 0 else []
 
         export_entity = {
@@ -746,6 +794,10 @@ class EntityBrowser(SupportsManageMixin, WIDGET, BASE):
 
         self._init_entity_columns()
 
+        if self._use_paged_model(filtered_records):
+            self._initialize_paged_data()
+            return
+
         # Load entity data. There might be a better way in future in order
         # to ensure that there is a balance between user data discovery
         # experience and performance.
@@ -809,6 +861,12 @@ class EntityBrowser(SupportsManageMixin, WIDGET, BASE):
 
                 numRecords = len(entity_records)
 
+            # Load the display values referenced by the records in bulk
+            for attr, formatter in self._cell_formatters.items():
+                prefetch = getattr(formatter, 'prefetch_values', None)
+                if prefetch is not None:
+                    prefetch([getattr(er, attr, None) for er in entity_records])
+
             # if self._tableModel is None:
             entity_records_collection = []
             entity_raw_records = []
@@ -858,6 +916,85 @@ class EntityBrowser(SupportsManageMixin, WIDGET, BASE):
 
             ENTITY_TABLE_MODEL[self._entity.name] = self._tableModel
 
+        self._setup_table_view(VerticalHeaderSortFilterProxyModel())
+
+        if numRecords > 0:
+            # Set maximum value of the progress dialog
+            progressDialog.setValue(numRecords)
+        else:
+            progressDialog.close()
+
+        # because progressDialog has been parented to a widget, it won't ever get deleted until that parent
+        # widget is. But we're done with it now and don't want it hanging around and showing on top of things,
+        # so we FORCE it's immediate deletion with a call to deleteLater(). Despite what the name says, this
+        # will cause the underlying c++ dialog instance to be closed and deleted as soon as Qt returns to the
+        # event loop
+        progressDialog.deleteLater()
+        del progressDialog
+
+    def _use_paged_model(self, filtered_records=None):
+        """
+        :return: True if the records should be fetched on demand using
+        EntityPagedTableModel. Records filtered by a parent record or
+        loaded in an entity editor are loaded in full.
+        :rtype: bool
+        """
+        if filtered_records is not None or len(self.filtered_records) > 0:
+            return False
+
+        if isinstance(self._parent, EntityEditorDialog):
+            return False
+
+        if type(self.parent_record_id) == int and self.parent_record_id > 0:
+            return False
+
+        return True
+
+    def _initialize_paged_data(self):
+        """
+        Sets a table model that fetches the entity records from the database
+        a page at a time. Sorting and filtering are done in the database.
+        """
+        self._tableModel = EntityPagedTableModel(
+            self._dbmodel,
+            self._headers,
+            self._entity_attrs,
+            formatters=self._cell_formatters,
+            page_size=get_entity_browser_page_size(),
+            max_pages=get_entity_browser_page_window(),
+            parent=self,
+            entity=self._entity
+        )
+
+        self._setup_table_view(PagedSortFilterProxyModel())
+
+        # Enabling sorting fetches the first page using the saved sort order
+        sort_col_idx, sort_order = 0, Qt.AscendingOrder
+        sort_details = self._sort_details()
+        if sort_details is not None:
+            sort_column, order = sort_details
+            if sort_column in self._entity_attrs:
+                sort_col_idx = self._entity_attrs.index(sort_column)
+            if order == 'desc':
+                sort_order = Qt.DescendingOrder
+
+        self.tbEntity.horizontalHeader().setSortIndicator(
+            sort_col_idx, sort_order
+        )
+        self.tbEntity.setSortingEnabled(True)
+
+        if self._select_item is not None:
+            self._select_record(self._select_item)
+
+        self.update_visible_row_count()
+
+    def _setup_table_view(self, proxy_model):
+        """
+        Sets the proxy model for the table model in the view and connects
+        the filter widgets.
+        :param proxy_model: Proxy model for sorting and filtering records.
+        :type proxy_model: VerticalHeaderSortFilterProxyModel
+        """
         # Add filter columns
         for header, info in self._searchable_columns.items():
             column_name, index = info['name'], info['header_index']
@@ -865,7 +1002,7 @@ class EntityBrowser(SupportsManageMixin, WIDGET, BASE):
                 self.cboFilterColumn.addItem(header, info)
 
         # Use sortfilter proxy model for the view
-        self._proxyModel = VerticalHeaderSortFilterProxyModel()
+        self._proxyModel = proxy_model
         self._proxyModel.setDynamicSortFilter(True)
         self._proxyModel.setSourceModel(self._tableModel)
         self._proxyModel.setSortCaseSensitivity(Qt.CaseInsensitive)
@@ -904,20 +1041,6 @@ class EntityBrowser(SupportsManageMixin, WIDGET, BASE):
         if self._select_item is not None:
             self._select_record(self._select_item)
 
-        if numRecords > 0:
-            # Set maximum value of the progress dialog
-            progressDialog.setValue(numRecords)
-        else:
-            progressDialog.close()
-
-        # because progressDialog has been parented to a widget, it won't ever get deleted until that parent
-        # widget is. But we're done with it now and don't want it hanging around and showing on top of things,
-        # so we FORCE it's immediate deletion with a call to deleteLater(). Despite what the name says, this
-        # will cause the underlying c++ dialog instance to be closed and deleted as soon as Qt returns to the
-        # event loop
-        progressDialog.deleteLater()
-        del progressDialog
-
     def filter_col(self, child_entity):
         for col in child_entity.columns.values():
             if col.TYPE_INFO == 'FOREIGN_KEY':
@@ -931,9 +1054,23 @@ class EntityBrowser(SupportsManageMixin, WIDGET, BASE):
         Returns a quoted string of sort column and sort order for a given entity.
         :rtype: str
         """
-        sort_details = get_entity_sort_details('Sorting/'+current_profile().name, self._entity.short_name)
+        sort_details = self._sort_details()
         if sort_details is None:
             return text('')
+
+        sort_column, sort_order = sort_details
+
+        return text(sort_column+' '+sort_order)
+
+    def _sort_details(self):
+        """
+        :return: Sort column and order ('asc' or 'desc') saved for the
+        entity, None if not set or if the column no longer exists.
+        :rtype: tuple
+        """
+        sort_details = get_entity_sort_details('Sorting/'+current_profile().name, self._entity.short_name)
+        if sort_details is None:
+            return None
         order = {'Ascending':'asc', 'Descending':'desc'}
         column_and_order = sort_details.split()
         sort_column = column_and_order[0]
@@ -941,9 +1078,9 @@ class EntityBrowser(SupportsManageMixin, WIDGET, BASE):
 
         # confirm if the column still exists in the entity
         if sort_column not in list(self._entity.columns.keys()):
-            return text('')
+            return None
 
-        return text(sort_column+' '+sort_order)
+        return sort_column, sort_order
 
     def _header_index_from_filter_combo_index(self, idx):
         col_info = self.cboFilterColumn.itemData(idx)
@@ -966,9 +1103,23 @@ class EntityBrowser(SupportsManageMixin, WIDGET, BASE):
 
     def onFilterRegExpChanged(self, text):
         """
-        Slot raised whenever the filter text changes.
+        Slot raised whenever the filter text changes. Records fetched from
+        the database are only filtered once the user stops typing.
         """
-        regExp = QRegExp(text, Qt.CaseInsensitive, QRegExp.FixedString)
+        if isinstance(self._proxyModel, PagedSortFilterProxyModel):
+            self._filter_timer.start()
+        else:
+            self.apply_filter_text()
+
+    def apply_filter_text(self):
+        """
+        Filters the records using the text in the filter box.
+        """
+        regExp = QRegExp(
+            self.txtFilterPattern.text(),
+            Qt.CaseInsensitive,
+            QRegExp.FixedString
+        )
         self._proxyModel.setFilterRegExp(regExp)
         self.update_visible_row_count()
 
@@ -49,7 +49,8 @@ from stdm.data.importexport import (
 )
 from stdm.data.importexport.writer import OGRWriter
 from stdm.data.pg_utils import (
-    process_report_filter,
+    query_row_count,
+    report_filter_sql,
     table_column_names,
     unique_column_values
 )
@@ -281,12 +282,12 @@ class ExportData(WIDGET, BASE):
 
         targetFile = str(self.field("destFile"))
         writer = OGRWriter(targetFile)
-        resultSet = self.filter_buildQuery()
+        record_count = self.filter_countRecords()
 
-        if resultSet is None:
+        if record_count is None:
             return succeed
 
-        if resultSet.rowcount == 0:
+        if record_count == 0:
             msg = QApplication.translate(
                 'ExportData', "There are no records to export.")
 
@@ -296,8 +297,8 @@ class ExportData(WIDGET, BASE):
         try:
 
             writer.db2Feat(
-                self, self.srcTab, resultSet, self.selectedColumns(),
-                self.geomColumn
+                self, self.srcTab, self.selectedColumns(), self.geomColumn,
+                self.txtWhereQuery.toPlainText()
             )
 
             ft = QApplication.translate('ExportData', 'Features in ')
@@ -360,10 +361,9 @@ class ExportData(WIDGET, BASE):
             self.ErrorInfoMessage(msg)
 
         else:
-            results = self.filter_buildQuery()
+            rLen = self.filter_countRecords()
 
-            if results != None:
-                rLen = results.rowcount
+            if rLen is not None:
                 msg1 = QApplication.translate(
                     'ExportData', "The SQL statement was successfully verified.\n")
                 msg2 = QApplication.translate('ExportData', "record(s) returned.")
@@ -393,23 +393,20 @@ class ExportData(WIDGET, BASE):
                         where_stmnt += "'{}'".format(i.strip('"').strip("'"))
             self.txtWhereQuery.setPlainText(where_stmnt)
 
-    def filter_buildQuery(self):
-        # Build query set and return results
+    def filter_countRecords(self):
+        # Count, on the server, the records matching the filter
         queryCols = self.selectedColumns()
 
-        if self.geomColumn != "":
-            queryCols.append("ST_AsText(%s)" % (self.geomColumn))
-        # remove quote from each column
-
-        columnList = ",".join(queryCols)
+        # Only the geometry column may have been selected
+        columnList = ",".join(queryCols) or "1"
 
         whereStmnt = self.txtWhereQuery.toPlainText()
 
-        sortStmnt = ''
         results = None
 
         try:
-            results = process_report_filter(self.srcTab, columnList, whereStmnt, sortStmnt)
+            sql = report_filter_sql(self.srcTab, columnList, whereStmnt)
+            results = query_row_count(sql)
 
         except sqlalchemy.exc.DataError:
             msg = QApplication.translate(
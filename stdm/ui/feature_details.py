@@ -22,11 +22,13 @@ email                : stdm@unhabitat.org
 import logging
 import re
 from collections import OrderedDict
+from functools import partial
 from typing import Optional
 
 from qgis.PyQt import sip
 from qgis.PyQt import uic
 from qgis.PyQt.QtCore import (
+    Qt,
     QDateTime,
     QDate
 )
@@ -75,7 +77,10 @@ from stdm.data.supporting_documents import (
     document_models
 )
 from stdm.exceptions import DummyException
-from stdm.settings import current_profile
+from stdm.settings import (
+    current_profile,
+    get_feature_details_max_features
+)
 from stdm.settings.registryconfig import (
     selection_color
 )
@@ -95,6 +100,12 @@ from stdm.utils.util import (
 LOGGER = logging.getLogger("stdm")
 LOGGER.setLevel(logging.DEBUG)
 
+# Maximum number of ids in each keyed query
+FEATURE_DETAILS_BATCH_SIZE = 1000
+
+# Item data role holding the key of the children loader of a tree node
+LAZY_CHILDREN_ROLE = Qt.UserRole + 100
+
 class LayerSelectionHandler(QWidget):
     """
      Handles all tasks related to the layer.
@@ -144,13 +155,14 @@ class LayerSelectionHandler(QWidget):
             for feature in selected_features:
                 if 'id' in field_names:
                     features.append(feature)
-            if len(features) > 40:
+            max_features = get_feature_details_max_features()
+            if len(features) > max_features:
                 max_error = QApplication.translate(
                     'LayerSelectionHandler',
                     'You have exceeded the maximum number of features that \n'
                     'can be selected and queried by Spatial Entity Details. \n'
-                    'Please select a maximum of 40 features.'
-                )
+                    'Please select a maximum of {} features.'
+                ).format(max_features)
 
                 QMessageBox.warning(
                     iface.mainWindow(),
@@ -437,20 +449,82 @@ class DetailsDBHandler(LayerSelectionHandler):
         if isinstance(id, QgsFeature):
             id = id.id()
 
-        # result = model_obj.queryObject().filter(model.id == id).all()
-        result = model_obj.queryObject().all()
-        if len(result) == 0:
+        try:
+            id = int(id)
+        except (TypeError, ValueError):
             return None
 
-        try:
-            for r in result:
-                if int(r.id) == int(id):
-                    return r
+        return model_obj.queryObject().filter(model.id == id).first()
 
-            return result[0]
-        except:
-            return None
+    def feature_models_by_id(self, entity: Entity, ids: list) -> dict:
+        """
+        Gets the models of the entity records with the given ids using one
+        keyed query per batch of ids.
+        :param entity: Entity
+        :type entity: Object
+        :param ids: Ids of the records
+        :type ids: List
+        :return: The models of the records found, indexed by id
+        :rtype: Dictionary
+        """
+        model = entity_model(entity)
+        model_obj = model()
+
+        ids = list(OrderedDict.fromkeys(int(i) for i in ids))
+        models = {}
+        for i in range(0, len(ids), FEATURE_DETAILS_BATCH_SIZE):
+            batch_ids = ids[i:i + FEATURE_DETAILS_BATCH_SIZE]
+            for r in model_obj.queryObject().filter(
+                    model.id.in_(batch_ids)
+            ).all():
+                models[r.id] = r
+
+        return models
+
+    def _str_links(self, link_column: str, ids: list) -> OrderedDict:
+        """
+        Gets the STR records linked to each of the given ids using one
+        query per batch of ids.
+        :param link_column: Name of the STR column referencing the
+        party or spatial unit.
+        :type link_column: String
+        :param ids: Ids of the parties or spatial units
+        :type ids: List
+        :return: The lists of social tenure records, indexed by id
+        :rtype: OrderedDict
+        """
+        str_model = entity_model(
+            self.current_profile.social_tenure
+        )
+        link_col_obj = getattr(str_model, link_column)
+        model_obj = str_model()
+
+        links = OrderedDict((i, []) for i in ids)
+        link_ids = list(links.keys())
+        for i in range(0, len(link_ids), FEATURE_DETAILS_BATCH_SIZE):
+            batch_ids = link_ids[i:i + FEATURE_DETAILS_BATCH_SIZE]
+            for r in model_obj.queryObject().filter(
+                    link_col_obj.in_(batch_ids)
+            ).order_by(str_model.id).all():
+                links[getattr(r, link_column)].append(r)
+
+        return links
+
+    def features_str_links(self, feature_ids: list, entity=None) -> OrderedDict:
+        """
+        Gets the STR records linked to each of the features, if the layer
+        is a spatial unit layer.
+        :param feature_ids: The feature ids/ids of the spatial units
+        :type feature_ids: List
+        :return: The lists of social tenure records, indexed by feature id
+        :rtype: OrderedDict
+        """
+        if entity is None:
+            entity = self._entity
+        spatial_unit_entity_id = '{}_id'.format(
+            entity.short_name.replace(' ', '_').lower())
 
+        return self._str_links(spatial_unit_entity_id, feature_ids)
 
     def feature_str_link(self, feature_id: int, entity=None) -> list:
         """
@@ -461,24 +535,19 @@ class DetailsDBHandler(LayerSelectionHandler):
         :return: The list of social tenure records
         :rtype: List
         """
-        str_model = entity_model(
-            self.current_profile.social_tenure
-        )
-        if entity is None:
-            spatial_unit_entity_id = '{}_id'.format(
-                self._entity.short_name.replace(' ', '_').lower())
-        else:
-            spatial_unit_entity_id = '{}_id'.format(
-                entity.short_name.replace(' ', '_').lower())
+        return self.features_str_links([feature_id], entity)[feature_id]
 
-        spatial_unit_col_obj = getattr(str_model, spatial_unit_entity_id)
-        model_obj = str_model()
-        # TODO Check if str_model.spatial_unit_id is correct
-        result = model_obj.queryObject().filter(
-            spatial_unit_col_obj == feature_id
-        ).all()
+    def parties_str_links(self, party_entity: Entity, party_ids: list) -> OrderedDict:
+        """
+        Gets the STR records linked to each of the parties.
+        :param party_ids: The ids of the party records
+        :type party_ids: List
+        :return: The lists of social tenure records, indexed by party id
+        :rtype: OrderedDict
+        """
+        party_entity_id = f"{(party_entity.short_name.lower().replace(' ','_'))}_id"
 
-        return result
+        return self._str_links(party_entity_id, party_ids)
 
     def party_str_link(self, party_entity: Entity, party_id: int):
         """
@@ -488,21 +557,7 @@ class DetailsDBHandler(LayerSelectionHandler):
         :return: The list of social tenure records
         :rtype: List
         """
-        str_model = entity_model(
-            self.current_profile.social_tenure
-        )
-        model_obj = str_model()
-        party_name = party_entity.name
-
-        party_entity_id = f"{(party_entity.short_name.lower().replace(' ','_'))}_id"
-
-        party_col_obj = getattr(str_model, party_entity_id)
-
-        result = model_obj.queryObject().filter(
-            party_col_obj == party_id
-        ).all()
-
-        return result
+        return self.parties_str_links(party_entity, [party_id])[party_id]
 
     def column_widget_registry(self, model, entity):
         """
@@ -695,8 +750,11 @@ class DetailsTreeView(DetailsDBHandler):
         self.party_items = {}
         self._selected_features = []
         self.spatial_unit_items = {}
+        self._children_loaders = {}
+        self._next_loader_key = 0
         self.model = QStandardItemModel()
         self.view.setModel(self.model)
+        self.view.expanded.connect(self._on_node_expanded)
         self.view.setUniformRowHeights(True)
         self.view.setRootIsDecorated(True)
         self.view.setAlternatingRowColors(True)
@@ -916,6 +974,7 @@ class DetailsTreeView(DetailsDBHandler):
         """
         # clear feature_ids list, model and highlight
         self.model.clear()
+        self._children_loaders.clear()
 
         self.clear_sel_highlight()  # remove sel_highlight
         if self.removed_feature is None:
@@ -965,29 +1024,33 @@ class DetailsTreeView(DetailsDBHandler):
             if roots is None:
                 return
 
+            # Resolve the records and STR links of all the selected
+            # features at once
+            feature_ids = [
+                f.id() for f in roots.keys() if isinstance(f, QgsFeature)
+            ]
+            db_models = self.feature_models_by_id(self.entity, feature_ids)
+            str_links = {}
+            if self.entity in self.social_tenure.spatial_units:
+                str_links = self.features_str_links(feature_ids)
+
+            field_names = [field.name() for field in self.layer.fields()]
+
             for feature, root in roots.items():
 
                 self.spatial_unit_items[root.data()] = self.entity
 
-                if isinstance(feature, QgsFeature):
-                    id = feature.id()
-
-                if not isinstance(id, int):
+                if not isinstance(feature, QgsFeature):
                     continue
 
-                if self.entity in self.social_tenure.spatial_units:
-                    str_records = self.feature_str_link(id)
- 
-                if len(str_records) > 0:
-                    db_model = getattr(str_records[0], self.entity.name) # SQLAlchemy Object
-                else:
-                    data = self.features_data(id)
+                id = feature.id()
+                str_records = str_links.get(id, [])
 
-                    # if len(self.features_data(id)) > 0:
-                    if len(data[0]) > 0:
-                        db_model = data[0]  # OrderedDict
-                    else:
-                        db_model = self.feature_model(self.entity, id) # SQLAlchemy Object
+                db_model = db_models.get(id, None)  # SQLAlchemy Object
+                if db_model is None:
+                    db_model = OrderedDict(
+                        list(zip(field_names, feature.attributes()))
+                    )
 
                 self.add_root_children(db_model, root, str_records)
 
@@ -1006,6 +1069,8 @@ class DetailsTreeView(DetailsDBHandler):
         # add non entity layer for views.
 
         # self.reset_tree_view(selected_features)
+        db_models = self.feature_models_by_id(entity, spatial_unit_ids)
+        str_links = self.features_str_links(spatial_unit_ids, entity)
         for spu_id in spatial_unit_ids:
 
             root = QStandardItem(layer_icon, str(entity.short_name))
@@ -1014,14 +1079,8 @@ class DetailsTreeView(DetailsDBHandler):
             self.set_bold(root)
             self.model.appendRow(root)
 
-            str_records = self.feature_str_link(spu_id, entity)
-
-
-            if len(str_records) > 0:
-                #db_model = getattr(str_records[list(str_records.keys())[0]], entity.name)
-                db_model = getattr(str_records[0], entity.name)
-            else:
-                db_model = self.feature_model(entity, spu_id)
+            str_records = str_links[spu_id]
+            db_model = db_models.get(spu_id, None)
 
             self.add_root_children(db_model, root, str_records)
 
@@ -1043,8 +1102,10 @@ class DetailsTreeView(DetailsDBHandler):
         # add non entity layer for views.
 
         str_records = []
+        db_models = self.feature_models_by_id(entity, party_ids)
+        str_links = self.parties_str_links(entity, party_ids)
         for spu_id in party_ids:
-            str_records = self.party_str_link(entity, spu_id)
+            str_records = str_links[spu_id]
 
             root = QStandardItem(table_icon, str(entity.short_name))
             self.party_items[spu_id] = entity
@@ -1052,10 +1113,7 @@ class DetailsTreeView(DetailsDBHandler):
             self.set_bold(root)
             self.model.appendRow(root)
 
-            if len(str_records) > 0:
-                db_model = getattr(str_records[0], entity.name)
-            else:
-                db_model = self.feature_model(entity, spu_id)
+            db_model = db_models.get(spu_id, None)
 
             self.add_root_children(db_model, root, str_records, True)
 
@@ -1335,7 +1393,7 @@ class DetailsTreeView(DetailsDBHandler):
             # add STR children
             self.column_widget_registry(record, self.social_tenure)
 
-            for i, (col, row) in enumerate(self._formatted_record.items()):
+            for col, row in self._formatted_record.items():
                 str_child = QStandardItem(
                     '{}: {}'.format(col, row)
                 )
@@ -1344,57 +1402,116 @@ class DetailsTreeView(DetailsDBHandler):
                     str_root.appendRow([str_child])
                 except RuntimeError:
                     pass
-                record_dict = record.__dict__
-                #party, party_id = self.current_party(record_dict)
-                results = self.current_party(record_dict)
-                if results is None:
-                    return
-                party, party_id = results
-                party_model = None
-
-                if party is not None:
-                    party_model = getattr(record, party.name)
-
-                if i == len(self._formatted_record) - 1:
-                    custom_attr_entity = self.social_tenure.spu_custom_attribute_entity(
-                        spatial_unit
-                    )
 
-                    if custom_attr_entity is not None and len(custom_attr_entity.columns) > 2:
-                        try:
-                            custom_attr_model = entity_attr_to_model(
-                                custom_attr_entity,
-                                'social_tenure_relationship_id', record_dict['id']
-                            )
-                        except DummyException:
-                            custom_attr_model = None
-
-                        if custom_attr_model is not None:
-                            custom_attr_root = self.add_custom_attr_child(
-                                str_root, custom_attr_entity, custom_attr_model
-                            )
-
-                    if not party_query:
-                        if party_model is not None:
-                            party_root = self.add_party_child(
-                                str_root, party, party_model
-                            )
-
-                            self.party_items[party_model.id] = party
-                    else:
-
-                        record_dict = record.__dict__
-                        spatial_unit, spatial_unit_id = self.current_spatial_unit(
-                            record_dict
-                        )
-                        spatial_unit_model = getattr(record, spatial_unit.name)
-                        spu_root = self.add_spatial_unit_child(
-                            str_root, spatial_unit, spatial_unit_model
-                        )
-                        self.spatial_unit_items[spu_root.data()] = spatial_unit
+            # The party or spatial unit and the custom tenure information
+            # are loaded when the STR node is expanded.
+            if len(self._formatted_record) > 0:
+                self.add_lazy_children(
+                    str_root,
+                    partial(
+                        self.add_str_related_children,
+                        str_root, record, spatial_unit, party_query
+                    )
+                )
 
         self.feature_str_model[feature_id] = list(self.str_models.keys())
 
+    def add_str_related_children(self, str_root, record, spatial_unit, party_query=False):
+        """
+        Adds the custom tenure information and the party, or the spatial
+        unit if the tree shows parties, of an STR record.
+        :param str_root: The STR node.
+        :type str_root: QStandardItem
+        :param record: The STR record.
+        :type record: SQLAlchemy Model
+        :param spatial_unit: The spatial unit entity of the STR record.
+        :type spatial_unit: Object
+        :param party_query: True if the tree shows parties.
+        :type party_query: Boolean
+        """
+        record_dict = record.__dict__
+        results = self.current_party(record_dict)
+        if results is None:
+            return
+        party, party_id = results
+        party_model = None
+
+        if party is not None:
+            party_model = getattr(record, party.name)
+
+        custom_attr_entity = self.social_tenure.spu_custom_attribute_entity(
+            spatial_unit
+        )
+
+        if custom_attr_entity is not None and len(custom_attr_entity.columns) > 2:
+            try:
+                custom_attr_model = entity_attr_to_model(
+                    custom_attr_entity,
+                    'social_tenure_relationship_id', record_dict['id']
+                )
+            except DummyException:
+                custom_attr_model = None
+
+            if custom_attr_model is not None:
+                self.add_custom_attr_child(
+                    str_root, custom_attr_entity, custom_attr_model
+                )
+
+        if not party_query:
+            if party_model is not None:
+                self.add_party_child(
+                    str_root, party, party_model
+                )
+
+                self.party_items[party_model.id] = party
+        else:
+            spatial_unit, spatial_unit_id = self.current_spatial_unit(
+                record_dict
+            )
+            spatial_unit_model = getattr(record, spatial_unit.name)
+            spu_root = self.add_spatial_unit_child(
+                str_root, spatial_unit, spatial_unit_model
+            )
+            self.spatial_unit_items[spu_root.data()] = spatial_unit
+
+    def add_lazy_children(self, parent, loader):
+        """
+        Adds a placeholder child to a node whose children are to be added
+        by the loader when the node is first expanded.
+        :param parent: The node whose children are loaded on demand.
+        :type parent: QStandardItem
+        :param loader: Callable adding the children of the node.
+        :type loader: Callable
+        """
+        placeholder = QStandardItem(
+            QApplication.translate('DetailsTreeView', 'Loading...')
+        )
+        placeholder.setSelectable(False)
+        parent.appendRow([placeholder])
+
+        key = self._next_loader_key
+        self._next_loader_key += 1
+        parent.setData(key, LAZY_CHILDREN_ROLE)
+        self._children_loaders[key] = loader
+
+    def _on_node_expanded(self, index):
+        """
+        Triggered when a tree node is expanded. Replaces the placeholder
+        child of the node with the children added by its loader.
+        :param index: The index of the expanded node.
+        :type index: QModelIndex
+        """
+        item = self.model.itemFromIndex(index)
+        if item is None:
+            return
+
+        loader = self._children_loaders.pop(item.data(LAZY_CHILDREN_ROLE), None)
+        if loader is None:
+            return
+
+        item.removeRow(item.rowCount() - 1)
+        loader()
+
     def add_party_node(self, parent, party_entity, party_id):
         """
         Add party steam with table icon and entity short name.
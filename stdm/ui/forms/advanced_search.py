@@ -26,6 +26,7 @@ from qgis.PyQt.QtWidgets import (
     QFrame,
     QGridLayout,
     QLabel,
+    QLineEdit,
     QScrollArea,
     QTabWidget,
     QApplication,
@@ -36,6 +37,10 @@ from stdm.data.configuration.columns import (
     VirtualColumn
 )
 from stdm.data.pg_utils import table_column_names
+from stdm.data.search import (
+    FULL_TEXT_SEARCH,
+    full_text_columns
+)
 from stdm.ui.forms.editor_dialog import EntityEditorDialog
 from stdm.utils.util import entity_display_columns, format_name
 
@@ -49,6 +54,11 @@ class AdvancedSearch(EntityEditorDialog):
 
         self.initial_values = initial_values or {}
 
+        if self.full_text_edit is not None:
+            self.full_text_edit.setText(
+                self.initial_values.get(FULL_TEXT_SEARCH, '')
+            )
+
         for k, v in self.initial_values.items():
             for mapper in self._attrMappers:
                 if mapper.attributeName() == k:
@@ -110,6 +120,9 @@ class AdvancedSearch(EntityEditorDialog):
         """
         Resets the dialog back to an empty/no filter status
         """
+        if self.full_text_edit is not None:
+            self.full_text_edit.clear()
+
         for column in self._entity.columns.values():
             if column.name in entity_display_columns(self._entity):
 
@@ -135,6 +148,11 @@ class AdvancedSearch(EntityEditorDialog):
         Returns a dictionary representing the current search data
         """
         search_data = {}
+        if self.full_text_edit is not None:
+            full_text = self.full_text_edit.text().strip()
+            if full_text:
+                search_data[FULL_TEXT_SEARCH] = full_text
+
         for column in self._entity.columns.values():
             if column.name in entity_display_columns(self._entity):
 
@@ -172,8 +190,25 @@ class AdvancedSearch(EntityEditorDialog):
         table_name = self._entity.name
         columns = table_column_names(table_name)
 
-        # Iterate entity column and assert if they exist
+        # Words searched in all the searchable text columns
         row_id = 0
+        self.full_text_edit = None
+        if len(full_text_columns(self._entity)) > 0:
+            full_text_label = QLabel(self.scroll_widget_contents)
+            full_text_label.setText(self.tr('Any text'))
+            self.gl.addWidget(full_text_label, row_id, 0, 1, 1)
+
+            self.full_text_edit = QLineEdit(self.scroll_widget_contents)
+            self.full_text_edit.setObjectName('full_text_edit')
+            self.full_text_edit.setToolTip(
+                self.tr('Finds the records containing all the words in '
+                        'their searchable text columns')
+            )
+            self.gl.addWidget(self.full_text_edit, row_id, 1, 1, 1)
+
+            row_id += 1
+
+        # Iterate entity column and assert if they exist
         for column_name, column_widget in self.column_widgets.items():
             c = self.columns[column_name]
 
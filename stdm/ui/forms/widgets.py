@@ -22,6 +22,7 @@ from datetime import (
     date,
     datetime
 )
+from types import SimpleNamespace
 
 from qgis.PyQt.QtCore import QCoreApplication, QDate, QDateTime
 from qgis.PyQt.QtGui import (
@@ -45,7 +46,6 @@ from qgis.gui import (
     QgsDateTimeEdit
 )
 
-from stdm.data.configuration import entity_model
 from stdm.data.configuration.columns import (
     AdministrativeSpatialUnitColumn,
     BaseColumn,
@@ -63,9 +63,7 @@ from stdm.data.configuration.columns import (
     AutoGeneratedColumn,
     ExpressionColumn
 )
-from stdm.data.pg_utils import (
-    export_data
-)
+from stdm.data.display_value_cache import DisplayValueCache
 from stdm.settings import current_profile
 from stdm.ui.customcontrols.multi_select_view import MultipleSelectTreeView
 from stdm.ui.customcontrols.relation_line_edit import (
@@ -348,6 +346,16 @@ class ColumnWidgetRegistry(object):
         """
         pass
 
+    def prefetch_values(self, values):
+        """
+        Loads, in bulk, any data required to format the given column values
+        so that subsequent calls to :func:`format_column_value` do not query
+        the database for each value. Default implementation does nothing.
+        :param values: Column values that will be formatted.
+        :type values: list
+        """
+        pass
+
     def format_column_value(self, value):
         """
         Formats the column value to a more friendly display value. Should be
@@ -614,9 +622,6 @@ class RelatedEntityWidgetFactory(ColumnWidgetRegistry):
     def __init__(self, column):
         ColumnWidgetRegistry.__init__(self, column)
 
-        self._parent_entity_cache = {}
-
-        # Query all parent entities. Need for optimization
         p_entity = self._column.entity_relation.parent
 
         if p_entity is None:
@@ -627,13 +632,13 @@ class RelatedEntityWidgetFactory(ColumnWidgetRegistry):
             )
             raise WidgetException(msg)
 
-        self._p_entity_cls = entity_model(p_entity, entity_only=True)
-        self._p_entity_obj = self._p_entity_cls()
-
-        # res = self._p_entity_obj.queryObject().filter().all()
-        res = export_data(p_entity.name)
-        for r in res:
-            self._parent_entity_cache[r.id] = r
+        # Only the display columns of the parent records are cached
+        self._p_table = p_entity.name
+        self._display_cols = tuple(
+            c for c in self._column.entity_relation.display_cols
+            if c in p_entity.columns
+        )
+        self._cache = DisplayValueCache.instance()
 
     @classmethod
     def _create_widget(cls, c, parent, host=None):
@@ -642,6 +647,15 @@ class RelatedEntityWidgetFactory(ColumnWidgetRegistry):
 
         return re_le
 
+    def prefetch_values(self, values):
+        """
+        Loads the display values of the parent records referenced by the
+        given primary keys using a single query.
+        :param values: Primary key values of the parent entity.
+        :type values: list
+        """
+        self._cache.prefetch(self._p_table, self._display_cols, values)
+
     def format_column_value(self, value):
         """
         Sets the display based on the values of the display columns separated
@@ -651,21 +665,15 @@ class RelatedEntityWidgetFactory(ColumnWidgetRegistry):
         :return: Display extracted from the selected parent record.
         :rtype: str
         """
-        if value in self._parent_entity_cache:
-            rec = self._parent_entity_cache[value]
-
-        else:
-            # Query value
-            rec = self._p_entity_obj.queryObject().filter(
-                self._p_entity_cls.id == value
-            ).first()
-
-            if rec is None:
-                return ''
+        display_vals = self._cache.display_values(
+            self._p_table,
+            self._display_cols,
+            value
+        )
+        if display_vals is None:
+            return ''
 
-            else:
-                # Add to cache
-                self._parent_entity_cache[rec.id] = rec
+        rec = SimpleNamespace(**dict(zip(self._display_cols, display_vals)))
 
         return RelatedEntityLineEdit.process_display(self._column, rec)
 
@@ -684,17 +692,9 @@ class AdministrativeUnitWidgetFactory(ColumnWidgetRegistry):
 
         ColumnWidgetRegistry.__init__(self, column)
 
-        self._aus_cache = {}
-
-        # Query all admin units on initializing
         aus = self._column.entity.profile.administrative_spatial_unit
-        self._aus_cls = entity_model(aus, entity_only=True)
-        self._aus_obj = self._aus_cls()
-
-        # res = self._aus_obj.queryObject().filter().all()
-        res = export_data(aus.name)
-        for r in res:
-            self._aus_cache[r.id] = [r.name, r.code]
+        self._aus_table = aus.name
+        self._cache = DisplayValueCache.instance()
 
     @classmethod
     def _create_widget(cls, c, parent, host=None):
@@ -703,6 +703,15 @@ class AdministrativeUnitWidgetFactory(ColumnWidgetRegistry):
 
         return aule
 
+    def prefetch_values(self, values):
+        """
+        Loads the names and codes of the given administrative units using a
+        single query.
+        :param values: Primary key values of the administrative units.
+        :type values: list
+        """
+        self._cache.prefetch(self._aus_table, ('name', 'code'), values)
+
     def format_column_value(self, value):
         """
         Extracts the admin unit name and code from the primary key.
@@ -711,23 +720,15 @@ class AdministrativeUnitWidgetFactory(ColumnWidgetRegistry):
         :return: Name and code corresponding to the given id.
         :rtype: str
         """
-        if value in self._aus_cache:
-            nc = self._aus_cache[value]
-            name, code = nc[0], nc[1]
-
-        else:
-            # Query value
-            res = self._aus_obj.queryObject().filter(
-                self._aus_cls.id == value
-            ).first()
+        nc = self._cache.display_values(
+            self._aus_table,
+            ('name', 'code'),
+            value
+        )
+        if nc is None:
+            return ''
 
-            if res is None:
-                return ''
-
-            else:
-                # Add result to the cache
-                self._aus_cache[res.id] = res
-                name, code = res.name, res.code
+        name, code = nc[0], nc[1]
 
         if code:
             if 'code' not in self._column.entity_relation.display_cols:
@@ -772,16 +773,16 @@ class LookupWidgetFactory(ColumnWidgetRegistry):
     def __init__(self, column):
         ColumnWidgetRegistry.__init__(self, column)
 
-        self._lookups = {}
-
-        # Query all lookups on initializing so as to reduce db roundtrips
+        # Lookup tables are small hence all values are loaded, once per
+        # session, so as to reduce db roundtrips
         lookup = self._column.value_list
-        # lk_cls = entity_model(lookup, entity_only=True)
-        # lk_obj = lk_cls()
-        # res = lk_obj.queryObject().filter().all()
-        res = export_data(lookup.name)
-        for r in res:
-            self._lookups[r.id] = [r.value, r.code]
+        self._lookups = OrderedDict(
+            (lk_id, list(cd_val)) for lk_id, cd_val in
+            DisplayValueCache.instance().table_values(
+                lookup.name,
+                ('value', 'code')
+            ).items()
+        )
 
     def lookups(self):
         """
@@ -670,36 +670,69 @@ class ImportData(WIDGET, BASE):
                     )
 
                     if del_result == QMessageBox.Yes:
-                        self.dataReader.featToDb(
-                            self.targetTab, matchCols, False, self, geom_column,
-                            translator_manager=value_translator_manager
+                        success = self._import_features(
+                            matchCols, False, geom_column,
+                            value_translator_manager
                         )
                         # Update directory info in the registry
                         setVectorFileDir(self.field("srcFile"))
 
-                        self.show_info_message(
-                            "All features have been imported successfully!"
-                        )
-                        success = True
-
                     else:
                         success = False
             else:
-                self.dataReader.featToDb(
-                    self.targetTab, matchCols, True, self, geom_column,
-                    translator_manager=value_translator_manager
-                )
-                self.show_info_message(
-                    "All features have been imported successfully!"
+                success = self._import_features(
+                    matchCols, True, geom_column, value_translator_manager
                 )
                 # Update directory info in the registry
                 setVectorFileDir(self.field("srcFile"))
-                success = True
         except ImportFeatureException as e:
             self.show_error_message(str(e))
 
         return success
 
+    def _import_features(self, match_cols, append, geom_column,
+                         translator_manager):
+        """
+        Imports the source features using the bulk COPY engine if the
+        destination table supports it, else falls back to the ORM-based
+        import. Only imports that append to the destination table are
+        resumed.
+        :return: True if all the features were imported, False if the
+        import was canceled.
+        :rtype: bool
+        """
+        if self.dataReader.supports_bulk_import(
+                self.targetTab, match_cols, translator_manager
+        ):
+            completed = self.dataReader.bulkFeatToDb(
+                self.targetTab, match_cols, append, self, geom_column,
+                translator_manager=translator_manager, resume=append
+            )
+            canceled_msg = QApplication.translate(
+                'ImportData',
+                'The import was canceled. The features committed so far have '
+                'been kept, run the import again to resume it.'
+            )
+        else:
+            completed = self.dataReader.featToDb(
+                self.targetTab, match_cols, append, self, geom_column,
+                translator_manager=translator_manager
+            )
+            canceled_msg = QApplication.translate(
+                'ImportData',
+                'The import was canceled before all the features were '
+                'imported.'
+            )
+
+        if completed:
+            self.show_info_message(
+                "All features have been imported successfully!"
+            )
+        else:
+            self.show_info_message(canceled_msg)
+
+        return completed
+
     def _clear_dest_table_selections(self, exclude=None):
         # Clears checked items in destination table list view
         if exclude is None:
@@ -36,6 +36,7 @@ from qgis.PyQt.QtWidgets import (
     QDialogButtonBox,
     QFileDialog,
     QMessageBox,
+    QProgressDialog,
     QHeaderView,
     QTableWidgetItem,
     QComboBox,
@@ -46,10 +47,12 @@ from qgis.PyQt.QtWidgets import (
     )
 
 from qgis.gui import QgsGui
+from sqlalchemy.exc import SQLAlchemyError
 
 from stdm.data.config import DatabaseConfig
 from stdm.data.configuration.stdm_configuration import StdmConfiguration
 from stdm.data.connection import DatabaseConnection
+from stdm.data.index_advisor import IndexAdvisor
 from stdm.settings import (
     current_profile,
     save_current_profile,
@@ -73,7 +76,9 @@ from stdm.settings.registryconfig import (
     CONFIG_UPDATED,
     LOG_MODE,
     set_run_template_converter_on_startup,
-    run_template_converter_on_startup
+    run_template_converter_on_startup,
+    build_advised_indexes,
+    set_build_advised_indexes
 )
 from stdm.ui.customcontrols.validating_line_edit import INVALIDATESTYLESHEET
 from stdm.ui.gui_utils import GuiUtils
@@ -139,6 +144,7 @@ class OptionsDialog(WIDGET, BASE):
             self._on_pg_profile_changed)
         self.btn_db_conn_clear.clicked.connect(self.clear_properties)
         self.btn_test_db_connection.clicked.connect(self._on_test_connection)
+        self.btn_build_indexes.clicked.connect(self._on_build_indexes)
         self.btn_supporting_docs.clicked.connect(
             self._on_choose_supporting_docs_path
         )
@@ -208,6 +214,12 @@ class OptionsDialog(WIDGET, BASE):
         else:
             self.cbTempConv.setCheckState(Qt.Unchecked)
 
+        # Indexes
+        if build_advised_indexes():
+            self.chk_build_indexes.setCheckState(Qt.Checked)
+        else:
+            self.chk_build_indexes.setCheckState(Qt.Unchecked)
+
         # Logging Mode
         log_mode =  logging_mode()
         index = self.cbLogMode.findText(log_mode)
@@ -395,6 +407,72 @@ class OptionsDialog(WIDGET, BASE):
                           "successful.".format(db_conn.Database))
             QMessageBox.information(self, self.tr('Database Connection'), msg)
 
+    def _on_build_indexes(self):
+        """
+        Slot raised to list the indexes missing on the tables of the
+        selected profile and create them.
+        """
+        profile = self._config.profile(self.cbo_profiles.currentText())
+        if profile is None:
+            return
+
+        advisor = IndexAdvisor(profile)
+        try:
+            proposals = advisor.propose()
+        except SQLAlchemyError as err:
+            self.notif_bar.insertErrorNotification(str(err))
+            return
+
+        if len(proposals) == 0:
+            msg = self.tr('All the recommended indexes for {0} already '
+                          'exist.').format(profile.name)
+            self.notif_bar.insertInformationNotification(msg)
+            return
+
+        msg = self.tr('{0} indexes are missing on the tables of {1}. They '
+                      'will be created without locking the tables, which '
+                      'may take a while on large tables.\n\nDo you want to '
+                      'create them?').format(len(proposals), profile.name)
+        msg_box = QMessageBox(
+            QMessageBox.Question,
+            self.tr('Recommended Indexes'),
+            msg,
+            QMessageBox.Yes | QMessageBox.No,
+            self
+        )
+        msg_box.setDetailedText('\n'.join(str(p) for p in proposals))
+        if msg_box.exec_() != QMessageBox.Yes:
+            return
+
+        progress = QProgressDialog(
+            self.tr('Creating indexes...'), None, 0, len(proposals), self
+        )
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
+
+        failed = []
+
+        def index_built(proposal):
+            if proposal.error is not None:
+                failed.append(proposal)
+            progress.setValue(progress.value() + 1)
+            progress.setLabelText(str(proposal))
+
+        progress.setValue(0)
+        created = advisor.build(proposals, index_built)
+        progress.close()
+
+        if len(failed) > 0:
+            msg = self.tr('{0} of {1} indexes could not be created: {2}').format(
+                len(failed),
+                len(proposals),
+                '; '.join(p.name for p in failed)
+            )
+            self.notif_bar.insertWarningNotification(msg)
+        else:
+            msg = self.tr('{0} indexes successfully created.').format(created)
+            self.notif_bar.insertSuccessNotification(msg)
+
     def set_current_profile(self):
         """
         Saves the given profile name as the current profile.
@@ -595,6 +673,10 @@ class OptionsDialog(WIDGET, BASE):
 
         save_log_mode(self.cbLogMode.currentText())
 
+        set_build_advised_indexes(
+            self.chk_build_indexes.checkState() == Qt.Checked
+        )
+
         self.cache.save()
 
         msg = self.tr('Settings successfully saved.')
@@ -17,6 +17,7 @@ email                : gkahiu@gmail.com
  ***************************************************************************/
 """
 import logging
+import os
 from collections import OrderedDict
 from datetime import datetime
 
@@ -29,12 +30,10 @@ from qgis.PyQt.QtCore import (
     QObject,
     pyqtSignal,
     QEvent,
-    QThread,
-    QRect
+    QThread
 )
 from qgis.PyQt.QtGui import (
-    QPixmap,
-    QImage
+    QPixmap
 )
 from qgis.PyQt.QtWidgets import (
     QApplication,
@@ -48,6 +47,10 @@ from stdm.network.filemanager import (
     NetworkFileManager,
     DocumentTransferWorker
 )
+from stdm.network.preview_cache import (
+    THUMBNAIL_SIZE,
+    preview_cache
+)
 from stdm.settings import (
     current_profile
 )
@@ -573,6 +576,7 @@ class DocumentWidget(WIDGET, BASE):
 
         self.workerThread = QThread(self) 
         self.docWorker = None
+        self._thumbnail_doc_path = None
 
     def eventFilter(self, watched, e):
         """
@@ -810,16 +814,18 @@ class DocumentWidget(WIDGET, BASE):
 
     def set_thumbnail(self):
         """
-        Sets thumbnail to the document widget by
-        cropping if necessary.
+        Sets thumbnail to the document widget from the preview cache. If
+        the thumbnail is not in the cache, it is generated in the background
+        and set once ready.
         :return: None
         :rtype: NoneType
         """
         extension = self._displayName[self._displayName.rfind('.'):]
 
         QApplication.processEvents()
+        repository = source_document_location()
         doc_path = '{}{}/{}/{}/{}{}'.format(
-            source_document_location(),
+            repository,
             str(self.curr_profile.name),
             str(self._source_entity),
             str(self.doc_type_value()).replace(' ', '_'),
@@ -827,18 +833,28 @@ class DocumentWidget(WIDGET, BASE):
             str(extension)
         ).lower()
 
-        ph_image = QImage(doc_path)
-        ph_pixmap = QPixmap.fromImage(ph_image)
-        # If width is larger than height, use height as width and height
-        if ph_pixmap.width() > ph_pixmap.height():
-            rectangle = QRect(0, 0, ph_pixmap.height(), ph_pixmap.height())
-            ph_pixmap = ph_pixmap.copy(rectangle)
-        # If height is larger than width, use width as width and height
-        elif ph_pixmap.height() > ph_pixmap.width():
-            rectangle = QRect(0, 0, ph_pixmap.width(), ph_pixmap.width())
-            ph_pixmap = ph_pixmap.copy(rectangle)
-
-        self.lblThumbnail.setPixmap(ph_pixmap)
+        cache = preview_cache(repository)
+        thumbnail = cache.cached_preview(doc_path, THUMBNAIL_SIZE)
+        if thumbnail is not None:
+            self._show_thumbnail(thumbnail)
+            return
+
+        if self._thumbnail_doc_path is None:
+            cache.previewReady.connect(self._on_preview_ready)
+        self._thumbnail_doc_path = os.path.normpath(doc_path)
+        cache.request(doc_path)
+
+    def _on_preview_ready(self, doc_path, preview_size, preview_path):
+        """
+        Slot raised when a preview has been generated, sets the thumbnail
+        if it is for the document in this widget.
+        """
+        if preview_size == THUMBNAIL_SIZE and \
+                doc_path == self._thumbnail_doc_path:
+            self._show_thumbnail(preview_path)
+
+    def _show_thumbnail(self, thumbnail_path):
+        self.lblThumbnail.setPixmap(QPixmap(thumbnail_path))
         self.lblThumbnail.setScaledContents(True)
 
     def buildDisplay(self):
@@ -48,6 +48,11 @@ from qgis.core import (
 )
 
 from stdm.data.configuration.social_tenure import SocialTenure
+from stdm.data.display_views import (
+    display_column_name,
+    display_columns,
+    ensure_display_view
+)
 from stdm.data.pg_utils import (
     geometryType,
     spatial_tables,
@@ -60,6 +65,11 @@ from stdm.settings import (
     current_profile,
     save_configuration
 )
+from stdm.settings.registryconfig import (
+    MATERIALIZED_VIEW_DISPLAY,
+    VIEW_DISPLAY,
+    spatial_layer_display_mode
+)
 from stdm.ui.forms.spatial_unit_form import (
     STDMFieldWidget
 )
@@ -592,6 +602,7 @@ class SpatialUnitManagerDockWidget(WIDGET, BASE):
 
         self.curr_lyr_table = table_name
         self.curr_lyr_sp_col = spatial_column
+        display_view = None
 
         if layer_item is not None:
             if isinstance(layer_item, str):
@@ -607,8 +618,10 @@ class SpatialUnitManagerDockWidget(WIDGET, BASE):
                 if int(geom_col_obj.srid) >= 100000:
                     srid = geom_col_obj.srid
 
+                display_view = self.display_view(entity)
+
                 curr_layer = vector_layer(
-                    table_name,
+                    display_view or table_name,
                     geom_column=spatial_column,
                     layer_name=layer_name,
                     proj_wkt=srid
@@ -653,10 +666,13 @@ class SpatialUnitManagerDockWidget(WIDGET, BASE):
                 )
 
             entity = self._curr_profile.entity_by_name(self.curr_lyr_table)
-            fk_fields = self.join_fk_layer(curr_layer, entity)
-            if entity is not None:
-                self.sort_joined_columns(curr_layer, fk_fields)
-                self.set_field_alias(curr_layer, entity, fk_fields)
+            if display_view is not None:
+                self.set_display_view_alias(curr_layer, entity)
+            else:
+                fk_fields = self.join_fk_layer(curr_layer, entity)
+                if entity is not None:
+                    self.sort_joined_columns(curr_layer, fk_fields)
+                    self.set_field_alias(curr_layer, entity, fk_fields)
 
         elif curr_layer is not None:
             msg = QApplication.translate(
@@ -672,6 +688,59 @@ class SpatialUnitManagerDockWidget(WIDGET, BASE):
                 msg
             )
 
+    def display_view(self, entity):
+        """
+        Gets the database view of the entity with the display values of
+        the related columns joined, creating it if required, when layers
+        are to be loaded from display views.
+        :param entity: The layer entity object
+        :type entity: Object
+        :return: The name of the display view or None if the display values
+        are to be joined in QGIS.
+        :rtype: str
+        """
+        mode = spatial_layer_display_mode()
+        if mode not in (VIEW_DISPLAY, MATERIALIZED_VIEW_DISPLAY):
+            return None
+
+        if len(display_columns(entity)) == 0:
+            return None
+
+        return ensure_display_view(
+            entity, materialized=mode == MATERIALIZED_VIEW_DISPLAY
+        )
+
+    def set_display_view_alias(self, layer, entity):
+        """
+        Sets the alias of the fields of a layer loaded from a display view
+        to the column headers, and hides the id columns of related records.
+        :param layer: The layer loaded from the display view
+        :type layer: QgsVectorLayer
+        :param entity: The entity of the layer
+        :type entity: Object
+        """
+        fields = layer.fields()
+        config = layer.attributeTableConfig()
+        columns = config.columns()
+
+        hidden_columns = []
+        for column_name in display_columns(entity):
+            header = entity.columns[column_name].header()
+
+            f_index = fields.indexFromName(display_column_name(column_name))
+            layer.setFieldAlias(f_index, header)
+            hidden_columns.append(column_name)
+
+        for column in columns:
+            if column.name in hidden_columns:
+                column.hidden = True
+            elif column.name in entity.columns:
+                f_index = fields.indexFromName(column.name)
+                layer.setFieldAlias(f_index, entity.columns[column.name].header())
+
+        config.setColumns(columns)
+        layer.setAttributeTableConfig(config)
+
     def set_field_alias(self, layer, entity, fk_fields):
         """
         Set the field alia for fk joined fields so that they are
@@ -60,10 +60,14 @@ from sqlalchemy import (
     func,
     String
 )
+from sqlalchemy.orm import Session
 
 from stdm.data import globals
 from stdm.data.configuration import entity_model
-from stdm.data.database import Content
+from stdm.data.database import (
+    Content,
+    STDMDb
+)
 from stdm.data.pg_utils import pg_table_record_count
 from stdm.data.qtmodels import (
     BaseSTDMTableModel
@@ -424,6 +428,7 @@ class ViewSTRWidget(WIDGET, BASE):
         entityWidg = STRViewEntityWidget(config)
         entityWidg.asyncStarted.connect(self._progressStart)
         entityWidg.asyncFinished.connect(self._progressFinish)
+        entityWidg.searchFinished.connect(self._on_search_finished)
 
         tabIndex = self.tbSTREntity.addTab(entityWidg, config.Title)
 
@@ -447,8 +452,6 @@ class ViewSTRWidget(WIDGET, BASE):
 
         entityWidget = self.tbSTREntity.currentWidget()
 
-        entity_name = entityWidget.config.data_source_name
-
         self._reset_controls()
 
         if isinstance(entityWidget, EntitySearchItem):
@@ -460,39 +463,49 @@ class ViewSTRWidget(WIDGET, BASE):
 
                 return
 
-            results, searchWord = entityWidget.executeSearch()
-
-            # Show error message
-            if len(results) == 0:
-                noResultsMsg = QApplication.translate(
-                    'ViewSTR',
-                    'No results found for "{}"'.format(searchWord)
-                )
-                self._notif_search_config.clear()
-                self._notif_search_config.insertErrorNotification(
-                    noResultsMsg
-                )
-
-                return
+            # Results are returned through the searchFinished signal
+            entityWidget.executeSearch()
+
+    def _on_search_finished(self, entity_name, result_ids, searchWord):
+        """
+        Slot raised when the search for the matching items of an entity
+        has finished.
+        :param entity_name: Name of the searched entity.
+        :type entity_name: str
+        :param result_ids: Ids of the matching entity records.
+        :type result_ids: list
+        :param searchWord: Search term specified by the user.
+        :type searchWord: str
+        """
+        # Show error message
+        if len(result_ids) == 0:
+            noResultsMsg = QApplication.translate(
+                'ViewSTR',
+                'No results found for "{}"'.format(searchWord)
+            )
+            self._notif_search_config.clear()
+            self._notif_search_config.insertErrorNotification(
+                noResultsMsg
+            )
 
-            party_names = [e.name for e in self.curr_profile.social_tenure.parties]
-            entity = self.curr_profile.entity_by_name(entity_name)
+            return
 
-            result_ids = [r.id for r in results]
+        party_names = [e.name for e in self.curr_profile.social_tenure.parties]
+        entity = self.curr_profile.entity_by_name(entity_name)
 
-            if entity_name in party_names:
+        if entity_name in party_names:
 
-                self.active_spu_id = self.details_tree_view.search_party(
-                    entity, result_ids
-                )
-            else:
-                self.details_tree_view.search_spatial_unit(
-                    entity, result_ids
-                )
+            self.active_spu_id = self.details_tree_view.search_party(
+                entity, result_ids
+            )
+        else:
+            self.details_tree_view.search_spatial_unit(
+                entity, result_ids
+            )
 
-            # self.tbPropertyPreview._iface.activeLayer().selectByExpression("id={}".format(self.active_spu_id))
-            # self.details_tree_view._selected_features = self.tbPropertyPreview._iface.activeLayer().selectedFeatures()
-            # self._load_root_node(entity_name, formattedNode)
+        # self.tbPropertyPreview._iface.activeLayer().selectByExpression("id={}".format(self.active_spu_id))
+        # self.details_tree_view._selected_features = self.tbPropertyPreview._iface.activeLayer().selectedFeatures()
+        # self._load_root_node(entity_name, formattedNode)
 
     def clearSearch(self):
         """
@@ -862,9 +875,9 @@ class EntitySearchItem(QObject):
     def executeSearch(self):
         """
         Implemented when the a search operation
-        is executed. Should return tuple of formatted
-        results for render in the tree view,raw
-        object results and search word.
+        is executed. Should emit the ids of the
+        matching records and the search word once
+        the search has finished.
         """
         raise NotImplementedError(
             str(
@@ -907,6 +920,8 @@ class STRViewEntityWidget(WIDGET2, BASE2, EntitySearchItem):
     """
     asyncStarted = pyqtSignal()
     asyncFinished = pyqtSignal()
+    # Entity name, ids of matching records and search term
+    searchFinished = pyqtSignal(str, list, str)
 
     def __init__(self, config, formatter=None, parent=None):
         QWidget.__init__(self, parent)
@@ -924,6 +939,8 @@ class STRViewEntityWidget(WIDGET2, BASE2, EntitySearchItem):
         # Model for storing display and actual mapping values
         self._completer_model = None
         self._proxy_completer_model = None
+        self._search_worker = None
+        self._search_progress = None
 
         # Hook up signals
         self.cboFilterCol.currentIndexChanged.connect(
@@ -1032,25 +1049,14 @@ class STRViewEntityWidget(WIDGET2, BASE2, EntitySearchItem):
     def executeSearch(self):
         """
         Base class override.
-        Search for matching items for the specified entity and column.
+        Search, in a background thread, for matching items for the specified
+        entity and column. The ids of the matching records are emitted
+        through the searchFinished signal.
         """
-        model_root_node = None
+        self.cancel_search()
 
-        prog_dialog = QProgressDialog(self)
-        prog_dialog.setFixedWidth(380)
-        prog_dialog.setWindowTitle(
-            QApplication.translate(
-                "STRViewEntityWidget",
-                "Searching for STR..."
-            )
-        )
-        prog_dialog.show()
-        prog_dialog.setRange(
-            0, 10
-        )
         search_term = self._searchTerm()
 
-        prog_dialog.setValue(2)
         # Try to get the corresponding search term value from the completer model
         if self._completer_model is not None:
             reg_exp = QRegExp("^%s$" % search_term, Qt.CaseInsensitive,
@@ -1063,111 +1069,101 @@ class STRViewEntityWidget(WIDGET2, BASE2, EntitySearchItem):
                 source_model_idx = self._proxy_completer_model.mapToSource(
                     value_model_idx
                 )
-                prog_dialog.setValue(4)
                 search_term = self._completer_model.data(
                     source_model_idx, Qt.DisplayRole
                 )
 
-        modelInstance = self.config.STRModel()
+        col_name = self.currentFieldName()
+        entity = self.curr_profile.entity_by_name(
+            self.config.data_source_name
+        )
+
+        lookup_model = None
+        col = entity.columns.get(col_name, None)
+        if col is not None and col.TYPE_INFO == 'LOOKUP':
+            lookup_entity = lookup_parent_entity(
+                self.curr_profile, col_name
+            )
+            lookup_model = entity_model(lookup_entity)
 
-        modelQueryObj = modelInstance.queryObject()
+        validity_period = None
+        if self.validity.isEnabled():
+            validity_period = (
+                self.validity_from_date.date().toPyDate(),
+                self.validity_to_date.date().toPyDate()
+            )
 
-        queryObjProperty = getattr(
-            self.config.STRModel, self.currentFieldName()
+        self._search_progress = QProgressDialog(self)
+        self._search_progress.setFixedWidth(380)
+        self._search_progress.setWindowTitle(
+            QApplication.translate(
+                "STRViewEntityWidget",
+                "Searching for STR..."
+            )
         )
+        # Busy indicator since the duration of the search is not known
+        self._search_progress.setRange(0, 0)
+        self._search_progress.canceled.connect(self.cancel_search)
+        self._search_progress.show()
+
+        search_thread = QThread(self)
+        search_worker = STRSearchWorker(
+            self.config.STRModel,
+            col_name,
+            search_term,
+            lookup_model,
+            self.str_model,
+            validity_period
+        )
+        search_worker.moveToThread(search_thread)
 
-        entity_name = modelQueryObj._primary_entity._label_name
+        # Connect signals
+        search_worker.error.connect(self.errorHandler)
+        search_worker.retrieved.connect(self._on_search_retrieved)
+        search_thread.started.connect(search_worker.search)
+        search_worker.finished.connect(search_thread.quit)
+        search_thread.finished.connect(search_worker.deleteLater)
+        search_thread.finished.connect(search_thread.deleteLater)
 
-        entity = self.curr_profile.entity_by_name(entity_name)
+        self._search_worker = search_worker
 
-        prog_dialog.setValue(6)
-        # Get property type so that the filter can
-        # be applied according to the appropriate type
-        propType = queryObjProperty.property.columns[0].type
-        results = []
-        try:
-            if not isinstance(propType, String):
+        search_thread.start()
 
-                col_name = self.currentFieldName()
-                col = entity.columns[self.currentFieldName()]
+    def cancel_search(self):
+        """
+        Cancels the search that is currently running, if any. The results of
+        a cancelled search are discarded.
+        """
+        if self._search_worker is not None:
+            self._search_worker.cancel()
+            self._search_worker = None
 
-                if col.TYPE_INFO == 'LOOKUP':
-                    lookup_entity = lookup_parent_entity(
-                        self.curr_profile, col_name
-                    )
-                    lkp_model = entity_model(lookup_entity)
-                    lkp_obj = lkp_model()
-                    value_obj = getattr(
-                        lkp_model, 'value'
-                    )
+        self._close_search_progress()
 
-                    result = lkp_obj.queryObject().filter(
-                        func.lower(value_obj) == func.lower(search_term)
-                    ).first()
-                    if result is None:
-                        result = lkp_obj.queryObject().filter(
-                            func.lower(value_obj).like(search_term + '%')
-                        ).first()
+    def _close_search_progress(self):
+        if self._search_progress is not None:
+            self._search_progress.canceled.disconnect(self.cancel_search)
+            self._search_progress.hide()
+            self._search_progress.deleteLater()
+            self._search_progress = None
 
-                    if result is not None:
-                        results = modelQueryObj.filter(
-                            queryObjProperty == result.id
-                        ).all()
+    def _on_search_retrieved(self, result_ids, search_term):
+        """
+        Slot raised when the search worker has retrieved the ids of the
+        matching records.
+        """
+        if self.sender() is not self._search_worker:
+            # Results of a cancelled search
+            return
 
-                    else:
-                        results = []
-
-            else:
-                results = modelQueryObj.filter(
-                    func.lower(queryObjProperty) == func.lower(search_term)
-                ).all()
-
-            if self.validity.isEnabled():
-                valid_str_ids = self.str_validity_period_filter(results)
-            else:
-                valid_str_ids = None
-
-            prog_dialog.setValue(7)
-        except exc.StatementError:
-            prog_dialog.deleteLater()
-            del prog_dialog
-            return model_root_node, [], search_term
-
-        # if self.formatter is not None:
-        # self.formatter.setData(results)
-        # model_root_node = self.formatter.root(valid_str_ids)
-        prog_dialog.setValue(10)
-        prog_dialog.hide()
-
-        prog_dialog.deleteLater()
-        del prog_dialog
-
-        return results, search_term
-
-    def str_validity_period_filter(self, results):
-        """
-        Filter the entity results using validity period in STR table.
-        :param results: Entity result
-        :type results: SQLAlchemy result proxy
-        :return: Valid list of STR ids
-        :rtype: List
-        """
-        self.str_model_obj = self.str_model()
-        valid_str_ids = []
-        for result in results:
-            from_date = self.validity_from_date.date().toPyDate()
-            to_date = self.validity_to_date.date().toPyDate()
-            entity_id = '{}_id'.format(result.__table__.name[3:])
-            str_column_obj = getattr(self.str_model, entity_id)
-            str_result = self.str_model_obj.queryObject().filter(
-                self.str_model.validity_start >= from_date).filter(
-                self.str_model.validity_end <= to_date
-            ).filter(str_column_obj == result.id).all()
-
-            for res in str_result:
-                valid_str_ids.append(res.id)
-
-        return valid_str_ids
+        self._search_worker = None
+        self._close_search_progress()
+
+        self.searchFinished.emit(
+            self.config.data_source_name,
+            result_ids,
+            search_term
+        )
 
     def reset(self):
         """
@@ -1285,6 +1281,166 @@ class EntityConfiguration(object):
         self.displayColumns = OrderedDict()
 
 
+def valid_str_records(session, str_model, entity_column, entity_ids,
+                      from_date, to_date):
+    """
+    Retrieves, in a single query, the STR records whose validity period is
+    within the given dates and that reference any of the given entity
+    records.
+    :param session: Session used to run the query.
+    :type session: Session
+    :param str_model: Social tenure relationship model.
+    :type str_model: object
+    :param entity_column: Name of the STR column referencing the entity.
+    :type entity_column: str
+    :param entity_ids: Ids of the entity records.
+    :type entity_ids: list
+    :param from_date: Start of the validity period.
+    :type from_date: date
+    :param to_date: End of the validity period.
+    :type to_date: date
+    :return: List of (STR id, entity id) tuples.
+    :rtype: list
+    """
+    if len(entity_ids) == 0:
+        return []
+
+    str_column_obj = getattr(str_model, entity_column)
+
+    return session.query(str_model.id, str_column_obj).filter(
+        str_model.validity_start >= from_date
+    ).filter(
+        str_model.validity_end <= to_date
+    ).filter(
+        str_column_obj.in_(entity_ids)
+    ).all()
+
+
+class STRSearchWorker(QObject):
+    """
+    Worker for searching the entity records that match a search term and,
+    optionally, have an STR within a validity period. The queries are run
+    in the worker thread using a session of its own, as the session of
+    STDMDb is used by the GUI thread.
+    """
+    # Ids of the matching records and search term
+    retrieved = pyqtSignal(list, str)
+    error = pyqtSignal(str)
+    finished = pyqtSignal()
+
+    def __init__(self, model, fieldname, search_term, lookup_model=None,
+                 str_model=None, validity_period=None):
+        """
+        :param model: Model of the entity being searched.
+        :type model: object
+        :param fieldname: Name of the column being searched.
+        :type fieldname: str
+        :param search_term: Value being searched.
+        :type search_term: str
+        :param lookup_model: Model of the lookup table if the column is a
+        lookup column.
+        :type lookup_model: object
+        :param str_model: Social tenure relationship model.
+        :type str_model: object
+        :param validity_period: Tuple of the start and end dates of the STR
+        validity period, None if the results are not filtered by validity.
+        :type validity_period: tuple
+        """
+        super().__init__()
+        self.model = model
+        self.fieldname = fieldname
+        self.search_term = search_term
+        self.lookup_model = lookup_model
+        self.str_model = str_model
+        self.validity_period = validity_period
+        self._cancelled = False
+
+    def cancel(self):
+        """
+        Flags the search as cancelled. Pending queries are not executed and
+        no results are emitted.
+        """
+        self._cancelled = True
+
+    def _lookup_id(self, session):
+        # Id of the lookup value matching the search term
+        value_obj = getattr(self.lookup_model, 'value')
+
+        result = session.query(self.lookup_model.id).filter(
+            func.lower(value_obj) == func.lower(self.search_term)
+        ).first()
+        if result is None:
+            result = session.query(self.lookup_model.id).filter(
+                func.lower(value_obj).like(self.search_term + '%')
+            ).first()
+
+        return None if result is None else result[0]
+
+    def _search(self, session):
+        query_obj_property = getattr(self.model, self.fieldname)
+
+        # Get property type so that the filter can
+        # be applied according to the appropriate type
+        prop_type = query_obj_property.property.columns[0].type
+
+        if isinstance(prop_type, String):
+            query = session.query(self.model.id).filter(
+                func.lower(query_obj_property) == func.lower(self.search_term)
+            )
+
+        elif self.lookup_model is not None:
+            lookup_id = self._lookup_id(session)
+            if lookup_id is None or self._cancelled:
+                return []
+
+            query = session.query(self.model.id).filter(
+                query_obj_property == lookup_id
+            )
+
+        else:
+            return []
+
+        result_ids = [r[0] for r in query.all()]
+
+        if self.validity_period is None or self._cancelled:
+            return result_ids
+
+        # Only retain the records that have a valid STR
+        entity_column = '{}_id'.format(self.model.__table__.name[3:])
+        from_date, to_date = self.validity_period
+        valid_ids = set(
+            entity_id for _, entity_id in valid_str_records(
+                session,
+                self.str_model,
+                entity_column,
+                result_ids,
+                from_date,
+                to_date
+            )
+        )
+
+        return [r_id for r_id in result_ids if r_id in valid_ids]
+
+    def search(self):
+        """
+        Executes the search and emits the ids of the matching records unless
+        the search has been cancelled.
+        """
+        session = Session(bind=STDMDb.instance().engine)
+        try:
+            result_ids = self._search(session)
+        except exc.SQLAlchemyError as ex:
+            self.error.emit(str(ex))
+            result_ids = []
+        finally:
+            session.close()
+
+        if not self._cancelled:
+            self.retrieved.emit(result_ids, self.search_term)
+
+        self.finished.emit()
+
+
 class ModelWorker(QObject):
     """
     Worker for retrieving model attribute
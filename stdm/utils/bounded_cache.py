@@ -0,0 +1,119 @@
+"""
+/***************************************************************************
+Name                 : BoundedCache
+Description          : Size-bounded, least-recently-used cache with optional
+                       time-to-live for entries and hit/miss counters.
+Date                 : 18/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import time
+from collections import OrderedDict
+
+# Returned by BoundedCache.get when a key is not in the cache
+MISSING = object()
+
+
+class BoundedCache:
+    """
+    Least-recently-used cache that holds at most 'max_size' entries. If
+    'ttl' (in seconds) is specified, entries older than the ttl are treated
+    as missing.
+    """
+
+    def __init__(self, max_size=1000, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return self._entry(key) is not None
+
+    def _entry(self, key):
+        # Returns the (timestamp, value) entry or None if missing or expired
+        entry = self._entries.get(key, None)
+        if entry is None:
+            return None
+
+        if self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+            del self._entries[key]
+            return None
+
+        return entry
+
+    def get(self, key, default=MISSING):
+        """
+        :param key: Cache key.
+        :param default: Value returned if the key is not in the cache.
+        :return: Cached value for the key or the default value.
+        """
+        entry = self._entry(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+
+        return entry[1]
+
+    def set(self, key, value):
+        """
+        Adds or replaces the value for the given key, evicting the least
+        recently used entries if the cache is full.
+        """
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def remove(self, key):
+        """
+        Removes the entry for the given key, if it exists.
+        """
+        self._entries.pop(key, None)
+
+    def remove_matching(self, predicate):
+        """
+        Removes the entries whose keys satisfy the predicate.
+        :param predicate: Callable accepting a key and returning True if the
+        entry is to be removed.
+        """
+        for key in [k for k in self._entries if predicate(k)]:
+            del self._entries[key]
+
+    def clear(self):
+        """
+        Removes all entries and resets the hit/miss counters.
+        """
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """
+        :return: Number of entries, hits and misses.
+        :rtype: dict
+        """
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses
+        }
@@ -51,17 +51,48 @@ from qgis.gui import QgsEncodingFileDialog
 from sqlalchemy import (
     func
 )
+from sqlalchemy.sql import (
+    column,
+    select,
+    table
+)
 
 from stdm.data.configuration import (
     entity_model
 )
+from stdm.data.database import (
+    register_write_listener,
+    STDMDb
+)
 from stdm.exceptions import DummyException
+from stdm.utils.bounded_cache import (
+    BoundedCache,
+    MISSING
+)
 
 PLUGIN_DIR = os.path.abspath(os.path.join(
     os.path.dirname(__file__), os.path.pardir)).replace("\\", "/")
 CURRENCY_CODE = ""  # TODO: Put in the registry
 DOUBLE_FILE_EXTENSIONS = ['tar.gz', 'tar.bz2']
 
+# Maximum number of entries, and their lifetime in seconds, of the cache
+# used by the id to value conversion functions.
+ID_VALUE_CACHE_SIZE = 20000
+ID_VALUE_CACHE_TTL = 300
+
+# Maximum number of values in a single IN (...) clause
+ID_VALUE_BATCH_SIZE = 1000
+
+_id_value_cache = BoundedCache(ID_VALUE_CACHE_SIZE, ID_VALUE_CACHE_TTL)
+
+
+def _invalidate_id_values(table_name, record_id):
+    # Entries are keyed by table name first
+    _id_value_cache.remove_matching(lambda key: key[0] == table_name)
+
+
+register_write_listener(_invalidate_id_values)
+
 
 def getIndex(listObj, item):
     """
@@ -546,9 +577,9 @@ def db_user_tables(profile):
             'VALUE_LIST'
         ]
     ]
-    for table in tables:
-        if table in pg_tables():
-            db_tables.append(table)
+    for table_name in tables:
+        if table_name in pg_tables():
+            db_tables.append(table_name)
 
     return db_tables
 
@@ -589,6 +620,212 @@ def lookup_parent_entity(profile, col):
         return None
 
 
+def column_values(table_name, key_column, value_columns, keys, lower=False):
+    """
+    Gets the values of the specified columns of the records whose key column
+    matches the given keys, using one query per batch of keys that are not
+    in the cache.
+    :param table_name: Name of the table.
+    :type table_name: str
+    :param key_column: Name of the column that the keys are matched against.
+    :type key_column: str
+    :param value_columns: Names of the columns whose values are returned.
+    :type value_columns: tuple
+    :param keys: Values of the key column.
+    :type keys: list
+    :param lower: True to match text keys regardless of the case.
+    :type lower: bool
+    :return: Values of the value columns, as a tuple, indexed by key. Keys
+    that do not match any record are omitted.
+    :rtype: dict
+    """
+    value_columns = tuple(value_columns)
+    prefix = (table_name, key_column, value_columns, lower)
+
+    def cache_key(key):
+        if lower and isinstance(key, str):
+            key = key.lower()
+
+        return prefix + (key,)
+
+    values = {}
+    missing = []
+    for key in set(keys):
+        if key is None:
+            continue
+        cached = _id_value_cache.get(cache_key(key))
+        if cached is MISSING:
+            missing.append(key)
+        elif cached is not None:
+            values[key] = cached
+
+    if len(missing) == 0:
+        return values
+
+    tbl = table(
+        table_name,
+        column(key_column),
+        *[column(c) for c in value_columns if c != key_column]
+    )
+    key_col = tbl.c[key_column]
+    if lower:
+        key_col = func.lower(key_col)
+
+    conn = STDMDb.instance().engine.connect()
+    try:
+        for i in range(0, len(missing), ID_VALUE_BATCH_SIZE):
+            batch = missing[i:i + ID_VALUE_BATCH_SIZE]
+            match_keys = dict((cache_key(k)[-1], k) for k in batch)
+
+            query = select(
+                [key_col] + [tbl.c[c] for c in value_columns]
+            ).where(key_col.in_(list(match_keys.keys())))
+
+            for row in conn.execute(query):
+                key = match_keys.get(row[0], row[0])
+                if key not in values:
+                    values[key] = tuple(row[1:])
+
+            # Cache misses too so that they are not queried again
+            for key in batch:
+                _id_value_cache.set(cache_key(key), values.get(key, None))
+    finally:
+        conn.close()
+
+    return values
+
+
+def lookup_ids_to_values(profile, col, ids):
+    """
+    Converts lookup ids into their values.
+    :param profile: Current profile
+    :type profile: Class
+    :param col: The lookup column name
+    :type col: String
+    :param ids: Ids in the lookup table
+    :type ids: list
+    :return: Lookup values indexed by id. Ids without a match are mapped
+    to themselves.
+    :rtype: dict
+    """
+    parent_entity = None
+    if col in profile_lookup_columns(profile):
+        parent_entity = lookup_parent_entity(profile, col)
+
+    if parent_entity is None:
+        return dict((i, i) for i in ids)
+
+    values = column_values(parent_entity.name, 'id', ('value',), ids)
+
+    return dict(
+        (i, values[i][0] if i in values else i) for i in ids
+    )
+
+
+def entity_ids_to_attr(entity, attr, ids):
+    """
+    Converts entity ids to the values of another column of the same
+    records.
+    :param entity: Entity
+    :type entity: Class
+    :param attr: Column name
+    :type attr: String
+    :param ids: Ids of the entity records
+    :type ids: list
+    :return: Column values indexed by id. Ids without a match are mapped
+    to themselves.
+    :rtype: dict
+    """
+    values = column_values(entity.name, 'id', (attr,), ids)
+
+    return dict(
+        (i, values[i][0] if i in values else i) for i in ids
+    )
+
+
+def entity_ids_to_display_col(entity, column_name, ids):
+    """
+    Converts ids of the parent records of a foreign key column into the
+    values of the display columns of the parent records.
+    :param entity: Entity
+    :type entity: Class
+    :param column_name: Name of the foreign key column
+    :type column_name: String
+    :param ids: Ids of the parent records
+    :type ids: list
+    :return: Comma-separated display values indexed by id. Ids without a
+    match are mapped to themselves.
+    :rtype: dict
+    """
+    entity_relation = entity.columns[column_name].entity_relation
+    display_cols = tuple(entity_relation.display_cols)
+    values = column_values(entity_relation.parent.name, 'id', display_cols, ids)
+
+    display_values = {}
+    for i in ids:
+        if i in values:
+            display_values[i] = ', '.join(
+                [str(v) for v in values[i] if v is not None]
+            )
+        else:
+            display_values[i] = str(i)
+
+    return display_values
+
+
+def entity_ids_to_models(entity, ids):
+    """
+    Gets the model objects of an entity for the given ids using one query
+    per batch of ids. Model objects are not cached as they are bound to the
+    session.
+    :param entity: Entity
+    :type entity: Object
+    :param ids: Ids of the records
+    :type ids: list
+    :return: Model objects indexed by id
+    :rtype: dict
+    """
+    model = entity_model(entity)
+    model_obj = model()
+    ids = [i for i in set(ids) if i is not None]
+
+    models = {}
+    for i in range(0, len(ids), ID_VALUE_BATCH_SIZE):
+        results = model_obj.queryObject().filter(
+            model.id.in_(ids[i:i + ID_VALUE_BATCH_SIZE])
+        ).all()
+        for result in results:
+            models[result.id] = result
+
+    return models
+
+
+def entity_attrs_to_ids(entity, col_name, attr_vals, lower=False):
+    """
+    Converts values of a column into the ids of the matching records of
+    the same table.
+    :param entity: Entity
+    :type entity: Class
+    :param col_name: The table column name
+    :type col_name: String
+    :param attr_vals: Values of the column
+    :type attr_vals: list
+    :param lower: True to match text values regardless of the case.
+    :type lower: bool
+    :return: Ids indexed by value. Values without a match are mapped to
+    themselves.
+    :rtype: dict
+    """
+    if col_name != 'id' and col_name not in entity.columns:
+        raise AttributeError('Specified column does not exist')
+
+    ids = column_values(entity.name, col_name, ('id',), attr_vals, lower)
+
+    return dict(
+        (v, ids[v][0] if v in ids else v) for v in attr_vals
+    )
+
+
 def lookup_id_to_value(profile, col, id):
     """
     Converts a lookup id into its value
@@ -603,31 +840,7 @@ def lookup_id_to_value(profile, col, id):
     value if no match is found.
     :rtype: Integer or String
     """
-    if col in profile_lookup_columns(profile):
-        parent_entity = lookup_parent_entity(profile, col)
-
-        if parent_entity is not None:
-            db_model = entity_model(parent_entity)
-            db_obj = db_model()
-            query = db_obj.queryObject().filter(
-                db_model.id == id
-            ).first()
-
-            if query is not None:
-                value = getattr(
-                    query,
-                    'value',
-                    None
-                )
-
-                return value
-            else:
-                return id
-        # if the column is a related entity column
-        else:
-            return id
-    else:
-        return id
+    return lookup_ids_to_values(profile, col, [id])[id]
 
 
 def get_db_attr(db_model, source_col, source_attr, destination_col):
@@ -671,21 +884,7 @@ def entity_id_to_attr(entity, attr, id):
     :return: a column value if a match found
     :rtype: Integer or String
     """
-    doc_type_model = entity_model(entity)
-    doc_type_obj = doc_type_model()
-    result = doc_type_obj.queryObject().filter(
-        doc_type_model.id == id
-    ).first()
-    if result is not None:
-        attr_val = getattr(
-            result,
-            attr,
-            None
-        )
-    else:
-        attr_val = id
-
-    return attr_val
+    return entity_ids_to_attr(entity, attr, [id])[id]
 
 
 def entity_id_to_display_col(entity, column, id):
@@ -701,31 +900,7 @@ def entity_id_to_display_col(entity, column, id):
     :return: a column value if a match found
     :rtype: Integer or String
     """
-
-    display_cols = entity.columns[column].entity_relation.display_cols
-    parent_entity = entity.columns[column].entity_relation.parent
-    model = entity_model(parent_entity)
-    model_obj = model()
-    result = model_obj.queryObject().filter(
-        model.id == id
-    ).first()
-    attr_vals = []
-
-    if result is not None:
-        for col in display_cols:
-
-            attr_val = getattr(
-                result,
-                col,
-                None
-            )
-            if attr_val is not None:
-                attr_vals.append(attr_val)
-
-    else:
-        attr_vals = [id]
-
-    return ', '.join(attr_vals)
+    return entity_ids_to_display_col(entity, column, [id])[id]
 
 
 def entity_id_to_model(entity, id):
@@ -738,10 +913,7 @@ def entity_id_to_model(entity, id):
     :return: SQLAlchemy result proxy
     :rtype: Object
     """
-    model = entity_model(entity)
-    model_obj = model()
-    result = model_obj.queryObject().filter(model.id == id).first()
-    return result
+    return entity_ids_to_models(entity, [id]).get(id, None)
 
 
 def entity_attr_to_model(entity, attr, value):
@@ -780,35 +952,7 @@ def entity_attr_to_id(entity, col_name, attr_val, lower=False):
     value if no id is found or the attribute is not valid.
     :rtype: Integer or NoneType
     """
-    doc_type_model = entity_model(entity)
-
-    doc_type_obj = doc_type_model()
-
-    model_col = getattr(doc_type_model, col_name)
-    if model_col is None:
-        raise AttributeError('Specified column does not exist')
-
-    if lower:
-
-        result = doc_type_obj.queryObject().filter(
-            func.lower(col_name) == func.lower(attr_val)
-        ).first()
-
-    else:
-        result = doc_type_obj.queryObject().filter(
-            model_col == attr_val
-        ).first()
-
-    if result is not None:
-        attr_id = getattr(
-            result,
-            'id',
-            None
-        )
-    else:
-        attr_id = attr_val
-
-    return attr_id
+    return entity_attrs_to_ids(entity, col_name, [attr_val], lower)[attr_val]
 
 
 def profile_entities(profile):